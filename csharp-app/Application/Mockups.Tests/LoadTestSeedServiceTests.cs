@@ -0,0 +1,155 @@
+using Microsoft.AspNetCore.Identity;
+using Microsoft.EntityFrameworkCore;
+using Mockups.Configs;
+using Mockups.Models.LoadTest;
+using Mockups.Repositories.Carts;
+using Mockups.Services.LoadTestSeed;
+using Mockups.Storage;
+using Mockups.Tests.TestSupport;
+
+namespace Mockups.Tests;
+
+public class LoadTestSeedServiceTests
+{
+    private static LoadTestSeedService CreateService(ApplicationDbContext db, CartsRepository? carts = null)
+    {
+        return new LoadTestSeedService(db, new PasswordHasher<User>(), carts ?? new CartsRepository(),
+            new LoadTestSeedConfig { Enabled = true, MaxUsers = 100 });
+    }
+
+    [Fact]
+    public async Task SeedPool_CreatesUsersWithMainAddressAndWorkingPassword()
+    {
+        var (conn, db) = SqliteTestDb.Create();
+        await using var _ = db;
+        await using var __ = conn;
+
+        var svc = CreateService(db);
+
+        var result = await svc.SeedPool(new SeedPoolViewModel
+        {
+            Prefix = "lt_test",
+            Count = 3,
+            Password = "P@ssw0rd!",
+            MenuItems = 2
+        });
+
+        Assert.Equal(3, result.CreatedUsers);
+        Assert.Equal(3, result.Users.Count);
+        Assert.Equal(2, result.MenuItems.Count);
+
+        var users = await db.Users.Include(x => x.Addresses).ToListAsync();
+        Assert.Equal(3, users.Count);
+        Assert.All(users, u => Assert.Single(u.Addresses, a => a.IsMainAddress));
+
+        var hasher = new PasswordHasher<User>();
+        Assert.All(users, u =>
+            Assert.NotEqual(PasswordVerificationResult.Failed, hasher.VerifyHashedPassword(u, u.PasswordHash, "P@ssw0rd!")));
+    }
+
+    [Fact]
+    public async Task SeedPool_IsIdempotentForSamePrefix()
+    {
+        var (conn, db) = SqliteTestDb.Create();
+        await using var _ = db;
+        await using var __ = conn;
+
+        var svc = CreateService(db);
+        var model = new SeedPoolViewModel { Prefix = "lt_test", Count = 2, Password = "P@ssw0rd!", MenuItems = 1 };
+
+        await svc.SeedPool(model);
+        model.Count = 4;
+        var second = await svc.SeedPool(model);
+
+        Assert.Equal(2, second.CreatedUsers);
+        Assert.Equal(0, second.CreatedMenuItems);
+        Assert.Equal(4, await db.Users.CountAsync());
+    }
+
+    [Fact]
+    public async Task SeedPool_PrefillsCarts()
+    {
+        var (conn, db) = SqliteTestDb.Create();
+        await using var _ = db;
+        await using var __ = conn;
+
+        var carts = new CartsRepository();
+        var svc = CreateService(db, carts);
+
+        await svc.SeedPool(new SeedPoolViewModel
+        {
+            Prefix = "lt_test",
+            Count = 2,
+            Password = "P@ssw0rd!",
+            MenuItems = 1,
+            CartItems = 3
+        });
+
+        foreach (var user in await db.Users.ToListAsync())
+        {
+            var cart = carts.GetUsersCart(user.Id);
+            Assert.Single(cart.Items);
+            Assert.Equal(3, cart.Items[0].Amount);
+        }
+    }
+
+    [Fact]
+    public async Task SeedPool_Throws_WhenCountExceedsLimit()
+    {
+        var (conn, db) = SqliteTestDb.Create();
+        await using var _ = db;
+        await using var __ = conn;
+
+        var svc = CreateService(db);
+
+        await Assert.ThrowsAsync<ArgumentOutOfRangeException>(() =>
+            svc.SeedPool(new SeedPoolViewModel { Prefix = "lt_test", Count = 101, Password = "P@ssw0rd!" }));
+    }
+
+    [Fact]
+    public async Task CleanupPool_RemovesOnlyPoolData()
+    {
+        var (conn, db) = SqliteTestDb.Create();
+        await using var _ = db;
+        await using var __ = conn;
+
+        var otherUserId = Guid.NewGuid();
+        await TestDataSeeder.AddUserAsync(db, otherUserId);
+
+        var svc = CreateService(db);
+        var seeded = await svc.SeedPool(new SeedPoolViewModel
+        {
+            Prefix = "lt_test",
+            Count = 2,
+            Password = "P@ssw0rd!",
+            MenuItems = 1
+        });
+        await svc.SeedPool(new SeedPoolViewModel { Prefix = "lt_other", Count = 1, Password = "P@ssw0rd!", MenuItems = 0 });
+
+        var poolUser = await db.Users.FirstAsync(x => x.UserName == seeded.Users[0]);
+        db.Orders.Add(new Order
+        {
+            UserId = poolUser.Id,
+            Address = "Street 1",
+            CreationTime = DateTime.Now,
+            DeliveryTime = DateTime.Now.AddHours(1),
+            Cost = 100,
+            OrderMenuItems = { new OrderMenuItem { ItemId = seeded.MenuItems[0], Amount = 1 } }
+        });
+        await db.SaveChangesAsync();
+
+        var result = await svc.CleanupPool("lt_test");
+
+        Assert.Equal(2, result.DeletedUsers);
+        Assert.Equal(1, result.DeletedOrders);
+        Assert.Equal(1, result.DeletedMenuItems);
+
+        db.ChangeTracker.Clear();
+        var remaining = await db.Users.Select(x => x.UserName).ToListAsync();
+        Assert.Equal(2, remaining.Count);
+        Assert.Contains(svc.GetEmail("lt_other", 0), remaining);
+        Assert.Empty(await db.Orders.ToListAsync());
+        Assert.Empty(await db.Addresses.Where(x => x.User.UserName.StartsWith("lt_test.")).ToListAsync());
+        Assert.Empty(await db.MenuItems.ToListAsync());
+    }
+}
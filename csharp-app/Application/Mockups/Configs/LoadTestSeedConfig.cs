@@ -0,0 +1,9 @@
+﻿namespace Mockups.Configs
+{
+    public class LoadTestSeedConfig
+    {
+        public bool Enabled { get; set; } = false; // эндпоинты /LoadTest/* отвечают 404, пока не включено явно
+        public string? Token { get; set; } // если задан — требуется заголовок X-Seed-Token
+        public int MaxUsers { get; set; } = 5000;
+    }
+}
@@ -0,0 +1,67 @@
+﻿using Microsoft.AspNetCore.Mvc;
+using Mockups.Configs;
+using Mockups.Models.LoadTest;
+using Mockups.Services.LoadTestSeed;
+
+namespace Mockups.Controllers
+{
+    // Сид пула аккаунтов для нагрузочных сценариев (loadtest/seed_pool.py).
+    // Выключен по умолчанию: LoadTestSeed__Enabled=true (и желательно LoadTestSeed__Token).
+    public class LoadTestController : Controller
+    {
+        private const string TokenHeader = "X-Seed-Token";
+
+        private readonly ILoadTestSeedService _loadTestSeedService;
+        private readonly LoadTestSeedConfig _config;
+
+        public LoadTestController(ILoadTestSeedService loadTestSeedService, LoadTestSeedConfig config)
+        {
+            _loadTestSeedService = loadTestSeedService;
+            _config = config;
+        }
+
+        [HttpPost]
+        public async Task<IActionResult> Seed([FromBody] SeedPoolViewModel model)
+        {
+            if (!IsAllowed())
+            {
+                return NotFound();
+            }
+            if (!ModelState.IsValid)
+            {
+                return BadRequest(ModelState);
+            }
+            try
+            {
+                return Json(await _loadTestSeedService.SeedPool(model));
+            }
+            catch (ArgumentOutOfRangeException ex)
+            {
+                return BadRequest(ex.Message);
+            }
+        }
+
+        [HttpPost]
+        public async Task<IActionResult> Cleanup([FromQuery] string prefix)
+        {
+            if (!IsAllowed())
+            {
+                return NotFound();
+            }
+            if (string.IsNullOrWhiteSpace(prefix))
+            {
+                return BadRequest("prefix is required");
+            }
+
+            return Json(await _loadTestSeedService.CleanupPool(prefix));
+        }
+
+        private bool IsAllowed()
+        {
+            if (!_config.Enabled)
+                return false;
+
+            return string.IsNullOrEmpty(_config.Token) || Request.Headers[TokenHeader] == _config.Token;
+        }
+    }
+}
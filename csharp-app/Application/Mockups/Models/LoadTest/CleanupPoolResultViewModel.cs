@@ -0,0 +1,10 @@
+﻿namespace Mockups.Models.LoadTest
+{
+    public class CleanupPoolResultViewModel
+    {
+        public string Prefix { get; set; }
+        public int DeletedUsers { get; set; }
+        public int DeletedOrders { get; set; }
+        public int DeletedMenuItems { get; set; }
+    }
+}
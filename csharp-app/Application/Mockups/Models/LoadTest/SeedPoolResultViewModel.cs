@@ -0,0 +1,12 @@
+﻿namespace Mockups.Models.LoadTest
+{
+    public class SeedPoolResultViewModel
+    {
+        public string Prefix { get; set; }
+        public List<string> Users { get; set; } = new List<string>();
+        public int CreatedUsers { get; set; }
+        public List<Guid> MenuItems { get; set; } = new List<Guid>();
+        public int CreatedMenuItems { get; set; }
+        public int PrefilledCarts { get; set; }
+    }
+}
@@ -0,0 +1,20 @@
+﻿using System.ComponentModel.DataAnnotations;
+
+namespace Mockups.Models.LoadTest
+{
+    public class SeedPoolViewModel
+    {
+        [Required]
+        [RegularExpression("^[a-z0-9_]{3,32}$", ErrorMessage = "Префикс: 3-32 символа a-z, 0-9, _")]
+        public string Prefix { get; set; }
+        [Range(1, Int32.MaxValue)]
+        public int Count { get; set; } = 50;
+        [Required]
+        [MinLength(6)]
+        public string Password { get; set; }
+        [Range(0, 100)]
+        public int MenuItems { get; set; } = 5;
+        [Range(0, 100)]
+        public int CartItems { get; set; } = 0;
+    }
+}
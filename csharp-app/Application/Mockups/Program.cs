@@ -14,6 +14,7 @@ using Mockups.Repositories.Orders;
 using Mockups.Services.Orders;
 using Mockups.Services.CartsCleanerService;
 using Mockups.Services.Time;
+using Mockups.Services.LoadTestSeed;
 
 var builder = WebApplication.CreateBuilder(args);
 
@@ -23,8 +24,10 @@ builder.Services.AddRazorPages().AddRazorRuntimeCompilation();
 #region Configs
 OrderConfig OrderConfig = new OrderConfig();
 CartsCleanerConfig CartsCleanerConfig = new CartsCleanerConfig();
+LoadTestSeedConfig LoadTestSeedConfig = new LoadTestSeedConfig();
 builder.Configuration.Bind("OrderTimeParams", OrderConfig);;
 builder.Configuration.Bind("CartsCleaner", CartsCleanerConfig);
+builder.Configuration.Bind("LoadTestSeed", LoadTestSeedConfig);
 #endregion
 
 #region Auth
@@ -46,6 +49,7 @@ builder.Services.AddScoped<IAddressesService, AddressesService>();
 builder.Services.AddScoped<IMenuItemsService, MenuItemsService>();
 builder.Services.AddScoped<ICartsService, CartsService>();
 builder.Services.AddScoped<IOrdersService, OrdersService>();
+builder.Services.AddScoped<ILoadTestSeedService, LoadTestSeedService>();
 builder.Services.AddSingleton<IDateTimeProvider, SystemDateTimeProvider>();
 
 builder.Services.AddScoped<AddressRepository>();
@@ -55,6 +59,7 @@ builder.Services.AddSingleton<CartsRepository>();
 
 builder.Services.AddSingleton(OrderConfig);
 builder.Services.AddSingleton(CartsCleanerConfig);
+builder.Services.AddSingleton(LoadTestSeedConfig);
 
 builder.Services.AddHostedService<CartsCleaner>();
 
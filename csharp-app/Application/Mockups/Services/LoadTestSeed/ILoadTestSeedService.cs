@@ -0,0 +1,11 @@
+﻿using Mockups.Models.LoadTest;
+
+namespace Mockups.Services.LoadTestSeed
+{
+    public interface ILoadTestSeedService
+    {
+        Task<SeedPoolResultViewModel> SeedPool(SeedPoolViewModel model);
+        Task<CleanupPoolResultViewModel> CleanupPool(string prefix);
+        string GetEmail(string prefix, int index);
+    }
+}
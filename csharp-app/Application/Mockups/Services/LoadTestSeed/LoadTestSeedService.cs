@@ -0,0 +1,211 @@
+﻿using Microsoft.AspNetCore.Identity;
+using Microsoft.EntityFrameworkCore;
+using Mockups.Configs;
+using Mockups.Models.LoadTest;
+using Mockups.Repositories.Carts;
+using Mockups.Storage;
+
+namespace Mockups.Services.LoadTestSeed
+{
+    public class LoadTestSeedService : ILoadTestSeedService
+    {
+        private const string EmailDomain = "loadtest.local";
+
+        private readonly ApplicationDbContext _context;
+        private readonly IPasswordHasher<User> _passwordHasher;
+        private readonly CartsRepository _cartsRepository;
+        private readonly LoadTestSeedConfig _config;
+
+        public LoadTestSeedService(ApplicationDbContext context,
+                IPasswordHasher<User> passwordHasher,
+                CartsRepository cartsRepository,
+                LoadTestSeedConfig config)
+        {
+            _context = context;
+            _passwordHasher = passwordHasher;
+            _cartsRepository = cartsRepository;
+            _config = config;
+        }
+
+        public string GetEmail(string prefix, int index)
+        {
+            return $"{prefix}.{index}@{EmailDomain}";
+        }
+
+        public async Task<SeedPoolResultViewModel> SeedPool(SeedPoolViewModel model)
+        {
+            if (model.Count > _config.MaxUsers)
+            {
+                throw new ArgumentOutOfRangeException(nameof(model.Count), $"Pool size is limited to {_config.MaxUsers} users.");
+            }
+
+            var result = new SeedPoolResultViewModel { Prefix = model.Prefix };
+            var emails = Enumerable.Range(0, model.Count).Select(i => GetEmail(model.Prefix, i)).ToList();
+            var normalizedEmails = emails.Select(x => x.ToUpperInvariant()).ToList();
+
+            // PBKDF2 — основная цена регистрации; один хеш подходит всем аккаунтам пула (соль внутри хеша)
+            var passwordHash = _passwordHasher.HashPassword(new User(), model.Password);
+
+            // повторный сид с тем же префиксом досоздаёт недостающих и обновляет пароль остальным
+            var existingUsers = await _context.Users
+                .Where(x => normalizedEmails.Contains(x.NormalizedUserName))
+                .ToListAsync();
+            foreach (var user in existingUsers)
+            {
+                user.PasswordHash = passwordHash;
+            }
+
+            var userRole = await _context.Roles.FirstOrDefaultAsync(x => x.Name == ApplicationRoleNames.User);
+            var users = new List<User>(existingUsers);
+            var existingNames = existingUsers.Select(x => x.NormalizedUserName).ToHashSet();
+
+            for (var i = 0; i < emails.Count; i++)
+            {
+                if (existingNames.Contains(normalizedEmails[i]))
+                    continue;
+
+                var user = new User
+                {
+                    Id = Guid.NewGuid(),
+                    UserName = emails[i],
+                    NormalizedUserName = normalizedEmails[i],
+                    Email = emails[i],
+                    NormalizedEmail = normalizedEmails[i],
+                    Name = "Load Test User",
+                    Phone = "79990000000",
+                    BirthDate = new DateTime(1995, 1, 1),
+                    PasswordHash = passwordHash,
+                    SecurityStamp = Guid.NewGuid().ToString("N"),
+                    ConcurrencyStamp = Guid.NewGuid().ToString("N")
+                };
+                // основной адрес сразу — сценарию оформления заказа не нужно добавлять его в каждой итерации
+                user.Addresses.Add(new Address
+                {
+                    Id = Guid.NewGuid(),
+                    Name = "Home",
+                    StreetName = "Loadtest",
+                    HouseNumber = "1",
+                    EntranceNumber = "1",
+                    FlatNumber = (i + 1).ToString(),
+                    Note = "loadtest",
+                    IsMainAddress = true
+                });
+
+                _context.Users.Add(user);
+                if (userRole != null)
+                {
+                    _context.UserRoles.Add(new UserRole { UserId = user.Id, RoleId = userRole.Id });
+                }
+                users.Add(user);
+                result.CreatedUsers++;
+            }
+
+            var menuItemIds = await _context.MenuItems
+                .Where(x => !x.IsDeleted)
+                .OrderBy(x => x.Name)
+                .Select(x => x.Id)
+                .Take(model.MenuItems)
+                .ToListAsync();
+            var categories = Enum.GetValues<MenuItemCategory>();
+            for (var i = menuItemIds.Count; i < model.MenuItems; i++)
+            {
+                var item = new MenuItem
+                {
+                    Id = Guid.NewGuid(),
+                    Name = GetMenuItemName(model.Prefix, i),
+                    Price = 100 + i * 10,
+                    Description = "loadtest",
+                    Category = categories[i % categories.Length],
+                    IsVegan = i % 2 == 0,
+                    PhotoPath = ""
+                };
+                _context.MenuItems.Add(item);
+                menuItemIds.Add(item.Id);
+                result.CreatedMenuItems++;
+            }
+
+            await _context.SaveChangesAsync();
+
+            // корзины живут в памяти: CartsCleaner удалит их через CartsCleaner:Time минут простоя
+            if (model.CartItems > 0 && menuItemIds.Any())
+            {
+                for (var i = 0; i < users.Count; i++)
+                {
+                    _cartsRepository.ClearUsersCart(users[i].Id);
+                    _cartsRepository.AddItemToCart(users[i].Id, new CartMenuItem
+                    {
+                        MenuItemId = menuItemIds[i % menuItemIds.Count],
+                        Amount = model.CartItems
+                    });
+                    result.PrefilledCarts++;
+                }
+            }
+
+            result.Users = users.Select(x => x.UserName).OrderBy(x => x).ToList();
+            result.MenuItems = menuItemIds;
+            return result;
+        }
+
+        public async Task<CleanupPoolResultViewModel> CleanupPool(string prefix)
+        {
+            var result = new CleanupPoolResultViewModel { Prefix = prefix };
+            var emailPrefix = $"{prefix}.".ToUpperInvariant();
+            var emailSuffix = $"@{EmailDomain}".ToUpperInvariant();
+
+            var users = await _context.Users
+                .Where(x => x.NormalizedUserName.StartsWith(emailPrefix) && x.NormalizedUserName.EndsWith(emailSuffix))
+                .ToListAsync();
+            var userIds = users.Select(x => x.Id).ToList();
+
+            var orders = await _context.Orders
+                .Include(x => x.OrderMenuItems)
+                .Where(x => userIds.Contains(x.UserId))
+                .ToListAsync();
+            foreach (var order in orders)
+            {
+                _context.OrderMenuItems.RemoveRange(order.OrderMenuItems);
+            }
+            _context.Orders.RemoveRange(orders);
+            _context.Addresses.RemoveRange(_context.Addresses.Where(x => userIds.Contains(x.UserId)));
+            _context.UserRoles.RemoveRange(_context.UserRoles.Where(x => userIds.Contains(x.UserId)));
+            _context.Users.RemoveRange(users);
+
+            var orderIds = orders.Select(x => x.Id).ToList();
+            var itemNamePrefix = GetMenuItemNamePrefix(prefix);
+            var menuItems = await _context.MenuItems.Where(x => x.Name.StartsWith(itemNamePrefix)).ToListAsync();
+            foreach (var item in menuItems)
+            {
+                // блюдо из заказов вне пула удалять нельзя — только скрываем его из меню
+                var usedElsewhere = await _context.OrderMenuItems
+                    .AnyAsync(x => x.ItemId == item.Id && !orderIds.Contains(x.OrderId));
+                if (usedElsewhere)
+                {
+                    item.IsDeleted = true;
+                }
+                else
+                {
+                    _context.MenuItems.Remove(item);
+                }
+            }
+
+            await _context.SaveChangesAsync();
+
+            _cartsRepository.ClearCarts(userIds.Select(x => _cartsRepository.GetUsersCart(x)).ToList());
+
+            result.DeletedUsers = users.Count;
+            result.DeletedOrders = orders.Count;
+            result.DeletedMenuItems = menuItems.Count;
+            return result;
+        }
+
+        private static string GetMenuItemNamePrefix(string prefix)
+        {
+            return $"{prefix}.item.";
+        }
+
+        private static string GetMenuItemName(string prefix, int index)
+        {
+            return $"{GetMenuItemNamePrefix(prefix)}{index}";
+        }
+    }
+}
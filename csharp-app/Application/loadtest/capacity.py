@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Поиск «колена» пропускной способности (capacity search).
+
+Для каждого сценария запускает run.sh с RATE (constant-arrival-rate, итераций/с),
+увеличивая нагрузку в --factor раз, пока p95 / error rate / доля dropped iterations
+не выйдут за SLO. Затем сужает интервал [последний ok; первый fail] бисекцией.
+Итог — максимальный устойчивый RPS по каждому сценарию и кривая latency до колена:
+
+  out/capacity/<ts>/capacity.json   (suite_report.py рисует по нему графики)
+
+  python3 capacity.py --scenarios 01_anonymous_menu,02_auth_flow --slo-p95 800 --slo-err 0.01
+"""
+import argparse
+import json
+import os
+import pathlib
+import subprocess
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import manifest
+from report import summarize
+
+HERE = pathlib.Path(__file__).resolve().parent
+DEFAULT_SCENARIOS = ",".join(manifest.suite_scenarios(manifest.load()))
+
+
+def run_step(scenario: str, rate: float, args, session_dir: pathlib.Path) -> Dict[str, Any]:
+    step_dir = session_dir / scenario / f"rate_{rate:g}"
+    env = dict(os.environ)
+    env.update({
+        "SCENARIO": scenario,
+        "MODE": "capacity",
+        "RATE": f"{rate:g}",
+        "DURATION": args.step_duration,
+        "OUT_DIR": str(step_dir),
+        "ENGINE": args.engine,
+        "BASE_URL": args.base_url,
+        "NDJSON": "false",
+    })
+    print(f"\n[capacity] {scenario}: rate={rate:g} it/s for {args.step_duration}", flush=True)
+    p = subprocess.run([str(HERE / "run.sh")], env=env, cwd=str(HERE))
+    summaries = sorted((step_dir / scenario).glob("summary_*.json"))
+    if p.returncode not in (0, 99) or not summaries:
+        # 99 = k6 thresholds breached — это нормальный исход шага, не ошибка
+        raise SystemExit(f"k6 step failed for {scenario} at rate {rate:g} (exit {p.returncode})")
+
+    summary = json.loads(summaries[-1].read_text(encoding="utf-8"))
+    s = summarize(summary)
+    metrics = summary.get("metrics", {})
+    dropped = (metrics.get("dropped_iterations") or {}).get("count") or 0
+    iters = s["iter_count"] or 0
+    return {
+        "rate": rate,
+        "rps": s["http_reqs_rate"],
+        "iter_rate": s["iter_rate"],
+        "p95": s["http_dur_p95"],
+        "p99": (metrics.get("http_req_duration") or {}).get("p(99)"),
+        "error_rate": s["http_failed_rate"],
+        "dropped": dropped,
+        "dropped_ratio": dropped / (iters + dropped) if (iters + dropped) else 0.0,
+        "summary_path": str(summaries[-1]),
+    }
+
+
+def within_slo(step: Dict[str, Any], args) -> bool:
+    reasons = []
+    if step["p95"] is not None and step["p95"] > args.slo_p95:
+        reasons.append(f"p95 {step['p95']:.0f}ms > {args.slo_p95:g}ms")
+    if step["error_rate"] is not None and step["error_rate"] > args.slo_err:
+        reasons.append(f"errors {step['error_rate'] * 100:.2f}% > {args.slo_err * 100:g}%")
+    if step["dropped_ratio"] > args.max_dropped:
+        # генератор не успевает стартовать итерации по расписанию => сервер уже не держит темп
+        reasons.append(f"dropped {step['dropped_ratio'] * 100:.1f}% iterations")
+    step["slo_violations"] = reasons
+    step["ok"] = not reasons
+    return step["ok"]
+
+
+def search(scenario: str, args, session_dir: pathlib.Path) -> Dict[str, Any]:
+    steps: List[Dict[str, Any]] = []
+    good: Optional[Dict[str, Any]] = None
+    bad: Optional[Dict[str, Any]] = None
+
+    rate = args.start_rate
+    while rate <= args.max_rate:
+        step = run_step(scenario, rate, args, session_dir)
+        steps.append(step)
+        if within_slo(step, args):
+            good = step
+            rate *= args.factor
+        else:
+            bad = step
+            break
+
+    if good and bad:
+        lo, hi = good["rate"], bad["rate"]
+        for _ in range(args.bisect_steps):
+            mid = round((lo + hi) / 2, 2)
+            if mid in (lo, hi):
+                break
+            step = run_step(scenario, mid, args, session_dir)
+            steps.append(step)
+            if within_slo(step, args):
+                lo, good = mid, step
+            else:
+                hi = mid
+
+    steps.sort(key=lambda x: x["rate"])
+    return {
+        "scenario": scenario,
+        "knee_found": bad is not None,
+        "max_sustainable_rate": good["rate"] if good else None,
+        "max_sustainable_rps": good["rps"] if good else None,
+        "p95_at_max": good["p95"] if good else None,
+        "steps": steps,
+    }
+
+
+def latest_capacity(out_dir: pathlib.Path) -> Optional[Dict[str, Any]]:
+    files = sorted((out_dir / "capacity").glob("*/capacity.json"))
+    if not files:
+        return None
+    return json.loads(files[-1].read_text(encoding="utf-8"))
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Step-load search for the max sustainable arrival rate.")
+    ap.add_argument("--scenarios", default=DEFAULT_SCENARIOS)
+    ap.add_argument("--out", default=str(HERE / "out"))
+    ap.add_argument("--engine", default=os.environ.get("ENGINE", "docker"))
+    ap.add_argument("--base-url", default=os.environ.get("BASE_URL", "http://host.docker.internal:5146"))
+    ap.add_argument("--start-rate", type=float, default=2.0, help="iterations/s of the first step")
+    ap.add_argument("--factor", type=float, default=2.0, help="rate multiplier between steps")
+    ap.add_argument("--max-rate", type=float, default=2000.0)
+    ap.add_argument("--bisect-steps", type=int, default=3)
+    ap.add_argument("--step-duration", default="30s")
+    ap.add_argument("--slo-p95", type=float, default=800.0, help="ms")
+    ap.add_argument("--slo-err", type=float, default=0.01, help="0..1")
+    ap.add_argument("--max-dropped", type=float, default=0.01, help="max share of dropped iterations")
+    args = ap.parse_args()
+
+    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    session_dir = pathlib.Path(args.out) / "capacity" / ts
+    session_dir.mkdir(parents=True, exist_ok=True)
+
+    results = []
+    for sc in [x.strip() for x in args.scenarios.split(",") if x.strip()]:
+        res = search(sc, args, session_dir)
+        results.append(res)
+        mx = res["max_sustainable_rps"]
+        print(f"[capacity] {sc}: max sustainable "
+              f"{'-' if mx is None else f'{mx:.2f} req/s'} "
+              f"(rate {res['max_sustainable_rate'] or '-'} it/s, knee {'found' if res['knee_found'] else 'not reached'})")
+
+    doc = {
+        "timestamp": ts,
+        "base_url": args.base_url,
+        "slo": {"p95_ms": args.slo_p95, "error_rate": args.slo_err, "max_dropped": args.max_dropped},
+        "step_duration": args.step_duration,
+        "results": results,
+    }
+    out_path = session_dir / "capacity.json"
+    out_path.write_text(json.dumps(doc, indent=2), encoding="utf-8")
+    print(f"[capacity] saved {out_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,547 @@
+#!/usr/bin/env python3
+"""
+Статистика хранилища до и после прогона k6 — чтобы по медленному прогону было видно, что делала БД.
+
+run.sh (DBSTATS=true, по умолчанию) снимает снимок перед k6 (`before`) и после него (`after`);
+в dbstats_<scenario>_<ts>.json рядом с summary остаётся только разница за прогон, report.py и
+suite_report.py показывают самые тяжёлые команды/запросы рядом с результатами сценария.
+
+  - Redis (python3-app): INFO commandstats (вызовы и время по командам), INFO stats (hits/misses,
+    evicted/expired), новые записи SLOWLOG и события LATENCY LATEST, случившиеся за прогон.
+    Адрес — --redis / REDIS_URL (redis://[:password@]host:port[/db]); auto — localhost:6379, если он
+    отвечает. Разговор идёт по RESP через обычный сокет: redis-py не нужен.
+  - SQL Server (Mockups): sys.dm_exec_query_stats + sys.dm_exec_sql_text, сгруппировано по query_hash:
+    разница выполнений, CPU (total_worker_time), длительности (total_elapsed_time) и logical reads.
+    Запрос идёт через `docker exec <контейнер> sqlcmd` в тот же контейнер, что находит run.sh
+    (hits-sql, затем mssql); пароль sa — MSSQL_SA_PASSWORD из окружения контейнера (или хоста, если задан).
+    Видно только то, что лежит в plan cache: планы, вытесненные за прогон, и OPTION(RECOMPILE) теряются.
+
+Ошибки источника (нет sqlcmd, неверный пароль, Redis недоступен) записываются в файл и не ломают прогон.
+
+  python3 dbstats.py before --out out/x/dbstats_x.json --redis auto --container hits-sql
+  k6 run ...
+  python3 dbstats.py after --out out/x/dbstats_x.json
+"""
+import argparse
+import json
+import os
+import pathlib
+import socket
+import subprocess
+import sys
+import time
+import urllib.parse
+from datetime import datetime, timezone
+from html import escape
+from typing import Any, Dict, List, Optional
+
+import resource_sampler
+
+DEFAULT_REDIS = "localhost:6379"
+SLOWLOG_FETCH = 128  # записей SLOWLOG за один GET
+KEEP_TOP = 50  # строк каждой таблицы в файле
+SHOW_TOP = 10  # строк в отчёте
+TEXT_CHARS = 400  # символов текста SQL-запроса в файле
+SQLCMD_TIMEOUT = 60  # с
+REDIS_STATS = ("total_commands_processed", "keyspace_hits", "keyspace_misses", "evicted_keys",
+               "expired_keys", "rejected_connections", "total_connections_received")
+
+# запрос самой статистики в ней тоже появится — его отфильтровываем по метке
+MSSQL_MARK = "loadtest-dbstats"
+MSSQL_QUERY = f"""SET NOCOUNT ON; /* {MSSQL_MARK} */
+SELECT CONVERT(varchar(18), qs.query_hash, 1), SUM(qs.execution_count), SUM(qs.total_worker_time),
+       SUM(qs.total_elapsed_time), SUM(qs.total_logical_reads),
+       MIN(LEFT(REPLACE(REPLACE(REPLACE(SUBSTRING(st.text, qs.statement_start_offset / 2 + 1,
+           (CASE qs.statement_end_offset WHEN -1 THEN DATALENGTH(st.text) ELSE qs.statement_end_offset END
+            - qs.statement_start_offset) / 2 + 1), CHAR(13), ' '), CHAR(10), ' '), CHAR(9), ' '), {TEXT_CHARS}))
+FROM sys.dm_exec_query_stats qs CROSS APPLY sys.dm_exec_sql_text(qs.sql_handle) st
+WHERE st.text NOT LIKE '%{MSSQL_MARK}%'
+GROUP BY qs.query_hash"""
+# sqlcmd из mssql-tools18 (образы 2022) требует -C для самоподписанного сертификата, из mssql-tools — не знает его
+SQLCMD_SH = """for s in /opt/mssql-tools18/bin/sqlcmd /opt/mssql-tools/bin/sqlcmd; do
+  [ -x "$s" ] || continue
+  [ "$s" = /opt/mssql-tools18/bin/sqlcmd ] && c=-C || c=
+  exec "$s" $c -S localhost -U sa -P "${MSSQL_SA_PASSWORD:-$SA_PASSWORD}" -b -h -1 -W -s "|" -Q "$0"
+done
+echo "sqlcmd not found in the container" >&2
+exit 127"""
+
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+# ---------- Redis ----------
+
+class RedisError(Exception):
+    pass
+
+
+class Redis:
+    """Минимальный RESP-клиент: команды статистики, без пула и pipeline."""
+
+    def __init__(self, url: str, timeout: float = 2.0):
+        u = urllib.parse.urlparse(url if "://" in url else "redis://" + url)
+        if u.scheme != "redis":
+            raise RedisError(f"unsupported scheme {u.scheme}:// (TLS is not supported)")
+        self.target = f"{u.hostname or 'localhost'}:{u.port or 6379}"
+        self._sock = socket.create_connection((u.hostname or "localhost", u.port or 6379), timeout)
+        self._file = self._sock.makefile("rb")
+        if u.password:
+            self.call("AUTH", *([u.username] if u.username else []), urllib.parse.unquote(u.password))
+        if u.path.strip("/"):
+            self.call("SELECT", u.path.strip("/"))
+
+    def call(self, *args: Any) -> Any:
+        parts = [str(a).encode() for a in args]
+        self._sock.sendall(b"*%d\r\n" % len(parts) + b"".join(b"$%d\r\n%s\r\n" % (len(p), p) for p in parts))
+        return self._read()
+
+    def _read(self) -> Any:
+        line = self._file.readline()
+        if not line:
+            raise RedisError("connection closed")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest.decode()
+        if kind == b"-":
+            raise RedisError(rest.decode())
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            n = int(rest)
+            return None if n < 0 else self._file.read(n + 2)[:-2].decode("utf-8", "replace")
+        if kind == b"*":
+            n = int(rest)
+            return None if n < 0 else [self._read() for _ in range(n)]
+        raise RedisError(f"unexpected reply {line[:40]!r}")
+
+    def close(self):
+        self._sock.close()
+
+
+def parse_info(text: str) -> Dict[str, str]:
+    info = {}
+    for line in text.splitlines():
+        if ":" in line and not line.startswith("#"):
+            k, v = line.split(":", 1)
+            info[k] = v.strip()
+    return info
+
+
+def parse_commandstats(info: Dict[str, str]) -> Dict[str, Dict[str, float]]:
+    """cmdstat_get:calls=10,usec=25,usec_per_call=2.50,rejected_calls=0,failed_calls=0 -> {"get": {...}}"""
+    stats = {}
+    for k, v in info.items():
+        if k.startswith("cmdstat_"):
+            fields = dict(kv.split("=", 1) for kv in v.split(",") if "=" in kv)
+            stats[k[len("cmdstat_"):]] = {f: float(fields.get(f, 0)) for f in ("calls", "usec", "rejected_calls", "failed_calls")}
+    return stats
+
+
+def redis_config(client: Redis, name: str) -> Optional[str]:
+    # CONFIG бывает переименован/запрещён (managed Redis) — тогда просто не знаем
+    try:
+        reply = client.call("CONFIG", "GET", name)
+    except RedisError:
+        return None
+    return reply[1] if reply and len(reply) > 1 else None
+
+
+def redis_snapshot(url: str) -> Dict[str, Any]:
+    client = Redis(url)
+    try:
+        info = parse_info(client.call("INFO", "all"))
+        last = client.call("SLOWLOG", "GET", 1) or []
+        return {
+            "target": client.target,
+            "version": info.get("redis_version"),
+            "commands": parse_commandstats(info),
+            "stats": {k: int(info[k]) for k in REDIS_STATS if k in info},
+            "slowlog": client.call("SLOWLOG", "GET", SLOWLOG_FETCH) or [],
+            "slowlog_last_id": last[0][0] if last else -1,
+            "slowlog_threshold_us": redis_config(client, "slowlog-log-slower-than"),
+            "latency_threshold_ms": redis_config(client, "latency-monitor-threshold"),
+            "latency": client.call("LATENCY", "LATEST") or [],
+            "epoch": time.time(),
+        }
+    finally:
+        client.close()
+
+
+def _slowlog_entry(e: List[Any]) -> Dict[str, Any]:
+    # [id, unix time, микросекунды, [argv...], client addr, client name] (последние два — с Redis 4)
+    args = [str(a) for a in (e[3] or [])]
+    return {"id": e[0], "time": e[1], "duration_us": e[2],
+            "command": " ".join(args)[:200], "client": e[4] if len(e) > 4 else None}
+
+
+def redis_diff(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Any]:
+    commands = []
+    total_usec = 0.0
+    for name, a in after["commands"].items():
+        b = before["commands"].get(name, {})
+        d = {f: a[f] - b.get(f, 0) for f in a}
+        if d["calls"] <= 0:
+            continue
+        total_usec += d["usec"]
+        commands.append({"command": name, "calls": int(d["calls"]), "usec": d["usec"],
+                         "usec_per_call": d["usec"] / d["calls"],
+                         "failed_calls": int(d["failed_calls"]), "rejected_calls": int(d["rejected_calls"])})
+    for c in commands:
+        c["share"] = c["usec"] / total_usec if total_usec else None
+    commands.sort(key=lambda c: c["usec"], reverse=True)
+
+    new = [e for e in after["slowlog"] if e[0] > before["slowlog_last_id"]]
+    # SLOWLOG — кольцевой буфер: если старейшая из полученных записей не следующая за «до», часть потеряна
+    lost = bool(new) and min(e[0] for e in new) > before["slowlog_last_id"] + 1
+    slowlog = sorted((_slowlog_entry(e) for e in new), key=lambda e: e["duration_us"], reverse=True)
+
+    # LATENCY LATEST: [event, время последнего всплеска, последний мс, максимум мс за всё время]
+    latency = [{"event": e[0], "time": e[1], "latest_ms": e[2], "max_ms": e[3]}
+               for e in after["latency"] if e[1] >= int(before["epoch"])]
+
+    return {
+        "target": after["target"],
+        "version": after.get("version"),
+        "total_usec": total_usec,
+        "commands": commands[:KEEP_TOP],
+        "stats": {k: v - before["stats"].get(k, 0) for k, v in after["stats"].items()},
+        "slowlog": slowlog[:KEEP_TOP],
+        "slowlog_new": len(new),
+        "slowlog_lost": lost,
+        "slowlog_threshold_us": after.get("slowlog_threshold_us"),
+        "latency": sorted(latency, key=lambda e: e["latest_ms"], reverse=True),
+        "latency_threshold_ms": after.get("latency_threshold_ms"),
+    }
+
+
+def resolve_redis(value: str) -> Optional[str]:
+    """off -> None; auto -> localhost:6379, если он принимает соединения; иначе сам адрес."""
+    if value in ("off", "", None):
+        return None
+    if value != "auto":
+        return value
+    host, port = DEFAULT_REDIS.split(":")
+    try:
+        socket.create_connection((host, int(port)), 0.5).close()
+    except OSError:
+        return None
+    return DEFAULT_REDIS
+
+
+# ---------- SQL Server ----------
+
+def mssql_snapshot(container: str) -> Dict[str, Dict[str, Any]]:
+    cmd = ["docker", "exec"]
+    if os.environ.get("MSSQL_SA_PASSWORD"):
+        cmd += ["-e", "MSSQL_SA_PASSWORD"]  # значение docker возьмёт из окружения, не из argv
+    cmd += [container, "/bin/sh", "-c", SQLCMD_SH, MSSQL_QUERY]
+    try:
+        p = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, timeout=SQLCMD_TIMEOUT)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise RuntimeError(f"docker exec {container}: {e}")
+    if p.returncode != 0:
+        msg = (p.stderr.strip() or p.stdout.strip()).splitlines()
+        raise RuntimeError(f"sqlcmd in {container} exited with {p.returncode}: {msg[-1] if msg else ''}")
+    queries = {}
+    for line in p.stdout.splitlines():
+        parts = line.split("|", 5)
+        if len(parts) < 6 or not parts[0].startswith("0x"):
+            continue
+        try:
+            queries[parts[0]] = {"executions": int(parts[1]), "cpu_us": int(parts[2]), "elapsed_us": int(parts[3]),
+                                 "logical_reads": int(parts[4]), "text": parts[5].strip()}
+        except ValueError:
+            continue
+    return queries
+
+
+def mssql_diff(container: str, before: Dict[str, Dict[str, Any]], after: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    queries = []
+    evicted = 0
+    for h, a in after.items():
+        b = before.get(h)
+        if b and a["executions"] < b["executions"]:
+            # план вытеснили и скомпилировали заново: счётчики начались с нуля
+            evicted += 1
+            b = None
+        execs = a["executions"] - (b["executions"] if b else 0)
+        if execs <= 0:
+            continue
+        d = {k: a[k] - (b[k] if b else 0) for k in ("cpu_us", "elapsed_us", "logical_reads")}
+        queries.append({"query_hash": h, "executions": execs,
+                        "cpu_ms": d["cpu_us"] / 1000, "elapsed_ms": d["elapsed_us"] / 1000,
+                        "avg_cpu_ms": d["cpu_us"] / 1000 / execs, "avg_elapsed_ms": d["elapsed_us"] / 1000 / execs,
+                        "logical_reads": d["logical_reads"], "text": a["text"]})
+    total_cpu = sum(q["cpu_ms"] for q in queries)
+    total_elapsed = sum(q["elapsed_ms"] for q in queries)
+    for q in queries:
+        q["cpu_share"] = q["cpu_ms"] / total_cpu if total_cpu else None
+    by_cpu = sorted(queries, key=lambda q: q["cpu_ms"], reverse=True)[:KEEP_TOP]
+    by_elapsed = sorted(queries, key=lambda q: q["elapsed_ms"], reverse=True)[:KEEP_TOP]
+    return {
+        "container": container,
+        "total_cpu_ms": total_cpu,
+        "total_elapsed_ms": total_elapsed,
+        "executions": sum(q["executions"] for q in queries),
+        "distinct_queries": len(queries),
+        "evicted": evicted + sum(1 for h in before if h not in after),
+        "top_cpu": by_cpu,
+        "top_elapsed": by_elapsed,
+    }
+
+
+# ---------- снимки ----------
+
+def snapshot(redis_url: Optional[str], container: Optional[str]) -> Dict[str, Any]:
+    snap: Dict[str, Any] = {"at": now_iso(), "errors": []}
+    if redis_url:
+        try:
+            snap["redis"] = redis_snapshot(redis_url)
+        except (OSError, RedisError) as e:
+            snap["errors"].append(f"redis {redis_url}: {e}")
+    if container:
+        try:
+            snap["mssql"] = mssql_snapshot(container)
+        except RuntimeError as e:
+            snap["errors"].append(str(e))
+    return snap
+
+
+def diff(sources: Dict[str, Any], before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Any]:
+    doc: Dict[str, Any] = {
+        "started": before["at"], "finished": after["at"], "sources": sources,
+        "errors": before["errors"] + [e for e in after["errors"] if e not in before["errors"]],
+        "redis": None, "mssql": None,
+    }
+    if before.get("redis") and after.get("redis"):
+        doc["redis"] = redis_diff(before["redis"], after["redis"])
+    if before.get("mssql") is not None and after.get("mssql") is not None:
+        doc["mssql"] = mssql_diff(sources["container"], before["mssql"], after["mssql"])
+    return doc
+
+
+def write_json(path: pathlib.Path, doc: Dict[str, Any]):
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(doc, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+class Capture:
+    """Для run_loadtest.py: start() перед k6, finish() после — то же, что before/after в CLI."""
+
+    def __init__(self, out: pathlib.Path, redis: str = "auto", container: Optional[str] = "auto"):
+        self.out = out
+        if container == "auto":
+            container = resource_sampler.detect_db_container()
+        self.sources = {"redis": resolve_redis(redis), "container": container if container != "off" else None}
+        self.before: Optional[Dict[str, Any]] = None
+
+    def start(self) -> "Capture":
+        self.before = snapshot(self.sources["redis"], self.sources["container"])
+        return self
+
+    def finish(self) -> Optional[Dict[str, Any]]:
+        if self.before is None or not any(self.sources.values()):
+            return None
+        doc = diff(self.sources, self.before, snapshot(self.sources["redis"], self.sources["container"]))
+        write_json(self.out, doc)
+        return doc
+
+
+# ---------- анализ (используется report.py) ----------
+
+def dbstats_path_for(summary_path: pathlib.Path) -> pathlib.Path:
+    """summary_<scenario>_<ts>.json -> dbstats_<scenario>_<ts>.json (рядом)."""
+    return summary_path.with_name("dbstats_" + summary_path.name[len("summary_"):])
+
+
+def load(path: pathlib.Path) -> Optional[Dict[str, Any]]:
+    if not path.exists():
+        return None
+    try:
+        doc = json.loads(path.read_text(encoding="utf-8"))
+    except ValueError:
+        return None
+    # снимок «до» без «после»: прогон оборвался
+    return None if doc.get("pending") else doc
+
+
+def _short(text: str, n: int = 120) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= n else text[:n - 1] + "…"
+
+
+def _pct(v: Optional[float]) -> str:
+    return "—" if v is None else f"{v * 100:.1f}%"
+
+
+def findings(doc: Optional[Dict[str, Any]]) -> List[str]:
+    if not doc:
+        return []
+    out = []
+    ms = doc.get("mssql")
+    if ms and ms["top_cpu"]:
+        q = ms["top_cpu"][0]
+        out.append(f"🗄️ SQL Server: больше всего CPU за прогон — {_short(q['text'], 80)} "
+                   f"({_pct(q['cpu_share'])} CPU запросов, {q['executions']} выполнений, "
+                   f"{q['avg_elapsed_ms']:.2f} ms в среднем).")
+    rd = doc.get("redis")
+    if rd:
+        if rd["commands"]:
+            c = rd["commands"][0]
+            out.append(f"🗄️ Redis: больше всего времени — {c['command'].upper()} ({_pct(c['share'])}, "
+                       f"{c['calls']} вызовов, {c['usec_per_call']:.1f} µs/вызов).")
+        if rd["slowlog_new"]:
+            e = rd["slowlog"][0]
+            out.append(f"⚠️ Redis SLOWLOG: {rd['slowlog_new']} медленных команд за прогон, худшая — "
+                       f"{e['duration_us'] / 1000:.1f} ms: {_short(e['command'], 60)}")
+        if rd["latency"]:
+            e = rd["latency"][0]
+            out.append(f"⚠️ Redis LATENCY: событие {e['event']} до {e['latest_ms']} ms за прогон.")
+    for e in doc.get("errors") or []:
+        out.append(f"ℹ️ Статистика БД снята не полностью: {e}")
+    return out
+
+
+def md_section(doc: Optional[Dict[str, Any]]) -> List[str]:
+    if not doc:
+        return []
+    lines = ["## Datastore (before → after)", "", f"{doc['started']} → {doc['finished']}", ""]
+    ms = doc.get("mssql")
+    if ms:
+        lines.append(f"### SQL Server ({ms['container']}): {ms['executions']} выполнений, "
+                     f"{ms['distinct_queries']} запросов, CPU {ms['total_cpu_ms']:.0f} ms, "
+                     f"длительность {ms['total_elapsed_ms']:.0f} ms")
+        for title, key in (("Top by CPU", "top_cpu"), ("Top by duration", "top_elapsed")):
+            lines += ["", f"**{title}**", "",
+                      "| Query | exec | CPU ms | CPU share | elapsed ms | avg ms | logical reads |",
+                      "|---|---:|---:|---:|---:|---:|---:|"]
+            for q in ms[key][:SHOW_TOP]:
+                lines.append(f"| `{_short(q['text']).replace('|', '/')}` | {q['executions']} | {q['cpu_ms']:.1f} | "
+                             f"{_pct(q['cpu_share'])} | {q['elapsed_ms']:.1f} | {q['avg_elapsed_ms']:.2f} | "
+                             f"{q['logical_reads']} |")
+        if ms["evicted"]:
+            lines += ["", f"⚠️ {ms['evicted']} планов вытеснено из кеша за прогон — их вклад занижен."]
+        lines.append("")
+    rd = doc.get("redis")
+    if rd:
+        lines.append(f"### Redis {rd['target']} (v{rd.get('version') or '?'}): "
+                     f"команды {rd['total_usec'] / 1000:.0f} ms")
+        lines += ["", "| Command | calls | total ms | share | µs/call | failed |", "|---|---:|---:|---:|---:|---:|"]
+        for c in rd["commands"][:SHOW_TOP]:
+            lines.append(f"| {c['command']} | {c['calls']} | {c['usec'] / 1000:.1f} | {_pct(c['share'])} | "
+                         f"{c['usec_per_call']:.1f} | {c['failed_calls']} |")
+        stats = rd.get("stats") or {}
+        if stats:
+            lines += ["", ", ".join(f"{k} +{v}" for k, v in stats.items())]
+        if rd["slowlog_new"]:
+            lines += ["", f"**SLOWLOG**: {rd['slowlog_new']} записей (порог {rd.get('slowlog_threshold_us') or '?'} µs)"
+                      + (", часть вытеснена из буфера" if rd["slowlog_lost"] else ""), "",
+                      "| ms | command | client |", "|---:|---|---|"]
+            for e in rd["slowlog"][:SHOW_TOP]:
+                lines.append(f"| {e['duration_us'] / 1000:.1f} | `{_short(e['command']).replace('|', '/')}` | {e['client'] or ''} |")
+        if rd["latency"]:
+            lines += ["", "**LATENCY**: " + ", ".join(f"{e['event']} {e['latest_ms']} ms" for e in rd["latency"])]
+        elif rd.get("latency_threshold_ms") == "0":
+            lines += ["", "LATENCY monitor выключен (CONFIG SET latency-monitor-threshold 100)."]
+        lines.append("")
+    for e in doc.get("errors") or []:
+        lines.append(f"- ⚠️ {e}")
+    lines.append("")
+    return lines
+
+
+def _query_rows(queries: List[Dict[str, Any]]) -> str:
+    return "".join(
+        f"<tr><td class='mono' title='{escape(q['text'])}'>{escape(_short(q['text']))}</td><td>{q['executions']}</td>"
+        f"<td>{q['cpu_ms']:.1f}</td><td>{_pct(q['cpu_share'])}</td><td>{q['elapsed_ms']:.1f}</td>"
+        f"<td>{q['avg_elapsed_ms']:.2f}</td><td>{q['logical_reads']}</td></tr>"
+        for q in queries[:SHOW_TOP])
+
+
+def html_section(doc: Optional[Dict[str, Any]]) -> str:
+    if not doc:
+        return ""
+    parts = [f"<div class='muted'>{escape(doc['started'])} → {escape(doc['finished'])}</div>"]
+    ms = doc.get("mssql")
+    if ms:
+        head = ("<tr><th>Query</th><th>exec</th><th>CPU ms</th><th>CPU share</th><th>elapsed ms</th>"
+                "<th>avg ms</th><th>logical reads</th></tr>")
+        evicted = (f"<div class='muted'>⚠️ {ms['evicted']} планов вытеснено из кеша за прогон — их вклад занижен.</div>"
+                   if ms["evicted"] else "")
+        parts.append(
+            f"<h3>SQL Server <span class='mono'>{escape(ms['container'])}</span></h3>"
+            f"<div class='muted'>{ms['executions']} выполнений, {ms['distinct_queries']} запросов, "
+            f"CPU {ms['total_cpu_ms']:.0f} ms, длительность {ms['total_elapsed_ms']:.0f} ms</div>{evicted}"
+            f"<h4>Top by CPU</h4><table>{head}{_query_rows(ms['top_cpu'])}</table>"
+            f"<h4>Top by duration</h4><table>{head}{_query_rows(ms['top_elapsed'])}</table>")
+    rd = doc.get("redis")
+    if rd:
+        rows = "".join(
+            f"<tr><td class='mono'>{escape(c['command'])}</td><td>{c['calls']}</td><td>{c['usec'] / 1000:.1f}</td>"
+            f"<td>{_pct(c['share'])}</td><td>{c['usec_per_call']:.1f}</td><td>{c['failed_calls']}</td></tr>"
+            for c in rd["commands"][:SHOW_TOP])
+        stats = ", ".join(f"{escape(k)} +{v}" for k, v in (rd.get("stats") or {}).items())
+        slow = ""
+        if rd["slowlog_new"]:
+            slow_rows = "".join(
+                f"<tr><td>{e['duration_us'] / 1000:.1f}</td><td class='mono'>{escape(_short(e['command']))}</td>"
+                f"<td class='mono'>{escape(e['client'] or '')}</td></tr>" for e in rd["slowlog"][:SHOW_TOP])
+            lost = ", часть вытеснена из буфера" if rd["slowlog_lost"] else ""
+            slow = (f"<h4>SLOWLOG: {rd['slowlog_new']} записей (порог {escape(str(rd.get('slowlog_threshold_us') or '?'))} µs{lost})</h4>"
+                    f"<table><tr><th>ms</th><th>Command</th><th>Client</th></tr>{slow_rows}</table>")
+        latency = ""
+        if rd["latency"]:
+            latency = "<div>LATENCY: " + ", ".join(f"{escape(e['event'])} {e['latest_ms']} ms" for e in rd["latency"]) + "</div>"
+        elif rd.get("latency_threshold_ms") == "0":
+            latency = "<div class='muted'>LATENCY monitor выключен (CONFIG SET latency-monitor-threshold 100).</div>"
+        parts.append(
+            f"<h3>Redis <span class='mono'>{escape(rd['target'])}</span></h3>"
+            f"<div class='muted'>v{escape(rd.get('version') or '?')}, команды {rd['total_usec'] / 1000:.0f} ms. {stats}</div>"
+            f"<table><tr><th>Command</th><th>calls</th><th>total ms</th><th>share</th><th>µs/call</th><th>failed</th></tr>{rows}</table>"
+            f"{slow}{latency}")
+    if doc.get("errors"):
+        parts.append("<ul>" + "".join(f"<li>⚠️ {escape(e)}</li>" for e in doc["errors"]) + "</ul>")
+    return f"""<div class="card" style="margin-top:16px">
+  <h2 style="margin-top:0">Datastore (before → after)</h2>
+  {"".join(parts)}
+</div>"""
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Snapshot datastore stats before/after a k6 run and store the difference.")
+    ap.add_argument("phase", choices=("before", "after"))
+    ap.add_argument("--out", required=True, help="dbstats_<scenario>_<ts>.json")
+    ap.add_argument("--redis", default=os.environ.get("REDIS_URL", "auto"),
+                    help="redis://host:port[/db], auto (localhost:6379 if it answers) or off")
+    ap.add_argument("--container", default="auto", help="SQL Server container, auto (as run.sh) or off")
+    args = ap.parse_args()
+    out = pathlib.Path(args.out)
+
+    if args.phase == "before":
+        cap = Capture(out, args.redis, args.container)
+        if not any(cap.sources.values()):
+            print("[dbstats] no datastore found (no Redis, no SQL Server container)", file=sys.stderr)
+            return 0
+        write_json(out, {"pending": True, "sources": cap.sources, "before": cap.start().before})
+        for e in cap.before["errors"]:
+            print(f"[dbstats] {e}", file=sys.stderr)
+        return 0
+
+    try:
+        pending = json.loads(out.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        print(f"[dbstats] no 'before' snapshot in {out}", file=sys.stderr)
+        return 0
+    sources = pending["sources"]
+    doc = diff(sources, pending["before"], snapshot(sources["redis"], sources["container"]))
+    write_json(out, doc)
+    for e in doc["errors"]:
+        print(f"[dbstats] {e}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
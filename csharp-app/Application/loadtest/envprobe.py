@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Сведения об окружении прогона (ОС, .NET, Docker, k6, контейнер БД) — один раз на suite.
+
+Раньше их заново выяснял каждый run.sh (`docker ps`, `dotnet --version`), а run_loadtest.py ради
+строки версии k6 поднимал отдельный контейнер `docker run grafana/k6 version`. Теперь run_suite.py
+и sweep.py пробуют окружение один раз за запуск (результат — только в памяти этого процесса) и
+передают его в run.sh через переменные PROBE_*. Git-ревизию run.sh всегда читает сам: она может
+смениться между прогонами, а регрессии и тренды привязываются именно к ней.
+
+  python3 envprobe.py
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+from typing import Any, Dict, List, Optional
+
+K6_IMAGE = "grafana/k6:latest"
+
+
+def try_cmd(cmd: List[str]) -> Optional[str]:
+    try:
+        p = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, timeout=30)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return p.stdout.strip() if p.returncode == 0 else None
+
+
+def db_container_line() -> str:
+    """Та же строка, что писал run.sh: "<id> <name> <image> <status> <ports>", сначала hits-sql, потом mssql."""
+    out = try_cmd(["docker", "ps", "--format", "{{.ID}} {{.Names}} {{.Image}} {{.Status}} {{.Ports}}"])
+    lines = [l for l in (out or "").splitlines() if l.strip()]
+    for pattern in ("hits-sql", "mssql"):
+        for l in lines:
+            if pattern in l:
+                return l
+    return ""
+
+
+def k6_version(engine: str) -> str:
+    if engine == "local":
+        return try_cmd(["k6", "version"]) or "unknown"
+    # метаданные образа вместо запуска контейнера
+    label = try_cmd(["docker", "image", "inspect", K6_IMAGE, "--format",
+                     '{{index .Config.Labels "org.opencontainers.image.version"}}'])
+    if label and label != "<no value>":
+        return f"k6 {label} ({K6_IMAGE})"
+    image_id = try_cmd(["docker", "image", "inspect", K6_IMAGE, "--format", "{{.Id}}"])
+    return f"{K6_IMAGE} {image_id[7:19]}" if image_id else "unknown"
+
+
+def probe(engine: str = "docker") -> Dict[str, Any]:
+    return {
+        "probed_at": time.time(),
+        "engine": engine,
+        "os_name": platform.system(),
+        "os_version": platform.release(),
+        "platform": f"{platform.platform()} ({platform.machine()})",
+        "dotnet_version": try_cmd(["dotnet", "--version"]) or "",
+        "docker_version": try_cmd(["docker", "--version"]) or "",
+        "k6_version": k6_version(engine),
+        "db_container": db_container_line(),
+    }
+
+
+def run_sh_env(doc: Dict[str, Any]) -> Dict[str, str]:
+    """Переменные, при наличии которых run.sh не повторяет пробы (кроме git — его run.sh читает всегда)."""
+    return {
+        "PROBE_OS_NAME": doc["os_name"],
+        "PROBE_OS_VER": doc["os_version"],
+        "PROBE_DOTNET_VER": doc["dotnet_version"],
+        "PROBE_DB_LINE": doc["db_container"],
+    }
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Probe the load test environment.")
+    ap.add_argument("--engine", default=os.environ.get("ENGINE", "docker"))
+    args = ap.parse_args()
+    print(json.dumps(probe(args.engine), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+Потоковый разбор NDJSON-вывода k6 (`k6 run --out json=metrics.ndjson[.gz]`).
+
+Файл читается построчно, в памяти живут только агрегаты: по одному бакету на каждую
+секунду прогона (число запросов, ошибок, VUs и гистограмма latency). Потребление памяти
+зависит от длительности прогона, а не от числа запросов, так что многогигабайтные
+файлы обрабатываются за один проход.
+
+Гистограммы — логарифмические (как DDSketch): относительная точность квантилей ~1%,
+и их можно складывать (merge), поэтому перцентили по окну/по всему прогону/по нескольким
+генераторам считаются честно, а не усреднением перцентилей.
+
+  python3 k6_stream.py --in out/01_anonymous_menu/metrics_01_anonymous_menu_<ts>.ndjson.gz \\
+                       --out out/01_anonymous_menu/timeseries_01_anonymous_menu_<ts>.json
+
+Несколько --in (по файлу на k6-воркер, см. workers.py) сводятся в один ряд: бакеты — по времени
+стены, гистограммы складываются, а в "workers" остаётся статистика каждого генератора отдельно.
+"""
+import argparse
+import calendar
+import gzip
+import io
+import json
+import math
+import pathlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+RELATIVE_ACCURACY = 0.01
+MIN_VALUE = 1e-3  # ms; всё, что меньше, попадает в нулевой бакет
+
+
+class Histogram:
+    """Мёрджируемая логарифмическая гистограмма (значения >= 0)."""
+
+    __slots__ = ("counts", "zero", "count", "sum", "min", "max")
+
+    GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+    LOG_GAMMA = math.log(GAMMA)
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.zero = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def add(self, v: float, n: int = 1) -> None:
+        self.count += n
+        self.sum += v * n
+        if self.min is None or v < self.min:
+            self.min = v
+        if self.max is None or v > self.max:
+            self.max = v
+        if v <= MIN_VALUE:
+            self.zero += n
+            return
+        i = math.ceil(math.log(v) / self.LOG_GAMMA)
+        self.counts[i] = self.counts.get(i, 0) + n
+
+    def merge(self, other: "Histogram") -> "Histogram":
+        for i, c in other.counts.items():
+            self.counts[i] = self.counts.get(i, 0) + c
+        self.zero += other.zero
+        self.count += other.count
+        self.sum += other.sum
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+        return self
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero
+        if rank < seen:
+            return self.min if self.min is not None else 0.0
+        for i in sorted(self.counts):
+            seen += self.counts[i]
+            if rank < seen:
+                v = 2 * self.GAMMA ** i / (self.GAMMA + 1)
+                # оценка бакета не должна выходить за реально наблюдённые границы
+                return min(max(v, self.min), self.max)
+        return self.max
+
+    def corrected(self, expected_interval: float) -> "Histogram":
+        """
+        Копия с поправкой на coordinated omission (как HdrHistogram copyCorrectedForCoordinatedOmission):
+        каждое значение v > expected_interval дополняется «пропущенными» v - k·interval, пока они
+        >= interval — это запросы, которые пользователь отправил бы, пока генератор ждал ответа.
+        """
+        out = Histogram().merge(self)
+        if not expected_interval or expected_interval <= 0:
+            return out
+        for i, c in self.counts.items():
+            v = 2 * self.GAMMA ** i / (self.GAMMA + 1)
+            missing = v - expected_interval
+            while missing >= expected_interval:
+                out.add(missing, c)
+                missing -= expected_interval
+        return out
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "accuracy": RELATIVE_ACCURACY,
+            "counts": {str(k): v for k, v in self.counts.items()},
+            "zero": self.zero, "count": self.count, "sum": self.sum,
+            "min": self.min, "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "Histogram":
+        h = cls()
+        h.counts = {int(k): int(v) for k, v in (d.get("counts") or {}).items()}
+        h.zero = int(d.get("zero", 0))
+        h.count = int(d.get("count", 0))
+        h.sum = float(d.get("sum", 0.0))
+        h.min = d.get("min")
+        h.max = d.get("max")
+        return h
+
+
+class Bucket:
+    __slots__ = ("reqs", "errors", "dropped", "vus_by", "hist")
+
+    def __init__(self):
+        self.reqs = 0
+        self.errors = 0
+        self.dropped = 0
+        self.vus_by: Dict[str, float] = {}  # последнее значение vus каждого воркера
+        self.hist = Histogram()
+
+    @property
+    def vus(self) -> Optional[float]:
+        return sum(self.vus_by.values()) if self.vus_by else None
+
+
+class _TimeParser:
+    """k6 пишет время как 2024-05-09T14:34:45.625742514+02:00 — парсим только до секунд, с кэшем."""
+
+    def __init__(self):
+        self._key = None
+        self._epoch = 0
+
+    def epoch_second(self, s: str) -> int:
+        key = s[:19] + s[-6:]
+        if key == self._key:
+            return self._epoch
+        base = calendar.timegm((int(s[0:4]), int(s[5:7]), int(s[8:10]),
+                                int(s[11:13]), int(s[14:16]), int(s[17:19])))
+        tz = s[-6:]
+        if s.endswith("Z"):
+            offset = 0
+        elif tz[0] in "+-" and tz[3] == ":":
+            offset = (int(tz[1:3]) * 3600 + int(tz[4:6]) * 60) * (1 if tz[0] == "+" else -1)
+        else:
+            offset = 0
+        self._key = key
+        self._epoch = base - offset
+        return self._epoch
+
+
+WANTED = ('"metric":"http_req_duration"', '"metric":"http_req_failed"', '"metric":"vus"',
+          '"metric":"dropped_iterations"')
+
+
+def iter_points(lines: Iterable[str], extra_metrics: Sequence[str] = ()) -> Iterator[Dict[str, Any]]:
+    """Только Point-строки нужных метрик; остальное отбрасывается до json.loads (это дёшево)."""
+    wanted = WANTED + tuple(f'"metric":"{m}"' for m in extra_metrics)
+    for line in lines:
+        if '"type":"Point"' not in line:
+            continue
+        if not any(w in line for w in wanted):
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            continue  # обрезанная последняя строка при падении k6 и т.п.
+
+
+class EndpointStats:
+    __slots__ = ("count", "errors", "hist")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.hist = Histogram()
+
+
+class WorkerStats:
+    """Один k6-генератор: сколько он реально отправил и какую latency увидел."""
+    __slots__ = ("reqs", "errors", "dropped", "first", "last", "hist")
+
+    def __init__(self):
+        self.reqs = 0
+        self.errors = 0
+        self.dropped = 0
+        self.first: Optional[int] = None
+        self.last: Optional[int] = None
+        self.hist = Histogram()
+
+    def to_dict(self) -> Dict[str, Any]:
+        span = (self.last - self.first + 1) if self.first is not None else None
+        return {
+            "reqs": self.reqs, "errors": self.errors, "dropped": self.dropped,
+            "first": self.first, "last": self.last,
+            "rps": self.reqs / span if span else None,
+            "p50": self.hist.quantile(0.50), "p95": self.hist.quantile(0.95),
+            "p99": self.hist.quantile(0.99), "max": self.hist.max,
+            "hist": self.hist.to_dict(),
+        }
+
+
+def endpoint_of(tags: Dict[str, Any]) -> str:
+    # тег endpoint ставят наши сценарии; для чужих скриптов — k6-тег name (по умолчанию = URL)
+    return tags.get("endpoint") or tags.get("name") or tags.get("url") or "(untagged)"
+
+
+class TimeSeries:
+    def __init__(self, bucket_seconds: int = 1, extra_metrics: Sequence[str] = ()):
+        self.bucket_seconds = bucket_seconds
+        self.buckets: Dict[int, Bucket] = {}
+        self.total = Histogram()
+        self.endpoints: Dict[str, EndpointStats] = {}
+        self.points = 0
+        self.dropped = 0
+        # для сведения нескольких воркеров: гистограммы прочих Trend-метрик и разбивка по тегу scenario
+        self.extra = {m: Histogram() for m in extra_metrics}
+        self.flows: Dict[str, EndpointStats] = {}
+        self.workers: Dict[str, WorkerStats] = {}
+
+    def _endpoint(self, data: Dict[str, Any]) -> EndpointStats:
+        name = endpoint_of(data.get("tags") or {})
+        e = self.endpoints.get(name)
+        if e is None:
+            e = self.endpoints[name] = EndpointStats()
+        return e
+
+    def _bucket(self, sec: int) -> Bucket:
+        key = sec - sec % self.bucket_seconds
+        b = self.buckets.get(key)
+        if b is None:
+            b = self.buckets[key] = Bucket()
+        return b
+
+    def _flow(self, data: Dict[str, Any]) -> Optional[EndpointStats]:
+        name = (data.get("tags") or {}).get("scenario")
+        if name is None:
+            return None
+        f = self.flows.get(name)
+        if f is None:
+            f = self.flows[name] = EndpointStats()
+        return f
+
+    def feed(self, points: Iterable[Dict[str, Any]], worker: Optional[str] = None) -> "TimeSeries":
+        tp = _TimeParser()
+        w = None
+        if worker is not None:
+            w = self.workers.get(worker)
+            if w is None:
+                w = self.workers[worker] = WorkerStats()
+        for p in points:
+            data = p.get("data") or {}
+            t = data.get("time")
+            v = data.get("value")
+            if t is None or v is None:
+                continue
+            self.points += 1
+            sec = tp.epoch_second(t)
+            b = self._bucket(sec)
+            metric = p.get("metric")
+            if metric == "http_req_duration":
+                b.reqs += 1
+                b.hist.add(float(v))
+                self.total.add(float(v))
+                e = self._endpoint(data)
+                e.count += 1
+                e.hist.add(float(v))
+                if w is not None:
+                    w.reqs += 1
+                    w.hist.add(float(v))
+                    w.first = sec if w.first is None else min(w.first, sec)
+                    w.last = sec if w.last is None else max(w.last, sec)
+                if self.extra:
+                    f = self._flow(data)
+                    if f is not None:
+                        f.count += 1
+                        f.hist.add(float(v))
+            elif metric == "http_req_failed":
+                if v:
+                    b.errors += 1
+                    self._endpoint(data).errors += 1
+                    if w is not None:
+                        w.errors += 1
+                    if self.extra:
+                        f = self._flow(data)
+                        if f is not None:
+                            f.errors += 1
+            elif metric == "vus":
+                b.vus_by[worker or ""] = float(v)
+            elif metric == "dropped_iterations":
+                # open model: итерация не стартовала по расписанию (нет свободного VU)
+                b.dropped += int(v)
+                self.dropped += int(v)
+                if w is not None:
+                    w.dropped += int(v)
+            elif metric in self.extra:
+                self.extra[metric].add(float(v))
+        return self
+
+    def endpoints_dict(self) -> Dict[str, Any]:
+        return {name: {"count": e.count, "errors": e.errors, "hist": e.hist.to_dict()}
+                for name, e in self.endpoints.items()}
+
+    def _extras(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        if self.extra:
+            doc["trends"] = {m: h.to_dict() for m, h in self.extra.items()}
+            doc["flows"] = {name: {"count": f.count, "errors": f.errors, "hist": f.hist.to_dict()}
+                            for name, f in self.flows.items()}
+        if self.workers:
+            doc["workers"] = {name: w.to_dict() for name, w in self.workers.items()}
+        return doc
+
+    def to_dict(self) -> Dict[str, Any]:
+        if not self.buckets:
+            return self._extras({"bucket_seconds": self.bucket_seconds, "start": None, "points": [], "dropped": 0,
+                                 "total": self.total.to_dict(), "endpoints": self.endpoints_dict()})
+        start = min(self.buckets)
+        rows = []
+        for sec in range(start, max(self.buckets) + 1, self.bucket_seconds):
+            b = self.buckets.get(sec) or Bucket()
+            rows.append({
+                "t": sec - start,
+                "rps": b.reqs / self.bucket_seconds,
+                "reqs": b.reqs,
+                "errors": b.errors,
+                "dropped": b.dropped,
+                "vus": b.vus,
+                "p50": b.hist.quantile(0.50),
+                "p95": b.hist.quantile(0.95),
+                "p99": b.hist.quantile(0.99),
+                "max": b.hist.max,
+                "hist": b.hist.to_dict() if b.hist.count else None,
+            })
+        return self._extras({
+            "bucket_seconds": self.bucket_seconds,
+            "start": start,
+            "points": rows,
+            "dropped": self.dropped,
+            "total": self.total.to_dict(),
+            "endpoints": self.endpoints_dict(),
+        })
+
+
+def open_text(path: pathlib.Path) -> io.TextIOBase:
+    if path.suffix == ".gz":
+        return io.TextIOWrapper(gzip.open(path, "rb"), encoding="utf-8", errors="replace")
+    return path.open("r", encoding="utf-8", errors="replace")
+
+
+def reduce_file(path: pathlib.Path, bucket_seconds: int = 1) -> Dict[str, Any]:
+    with open_text(path) as f:
+        return TimeSeries(bucket_seconds).feed(iter_points(f)).to_dict()
+
+
+def reduce_files(paths: List[pathlib.Path], bucket_seconds: int = 1,
+                 extra_metrics: Sequence[str] = ()) -> Dict[str, Any]:
+    """Файлы нескольких генераторов одного прогона; имя воркера — имя каталога файла (w1, w2, ...)."""
+    ts = TimeSeries(bucket_seconds, extra_metrics)
+    for path in paths:
+        with open_text(path) as f:
+            ts.feed(iter_points(f, extra_metrics), worker=path.parent.name)
+    return ts.to_dict()
+
+
+def timeseries_path_for(summary_path: pathlib.Path) -> pathlib.Path:
+    """summary_<scenario>_<ts>.json -> timeseries_<scenario>_<ts>.json (рядом)."""
+    return summary_path.with_name("timeseries_" + summary_path.name[len("summary_"):])
+
+
+def load_timeseries(path: pathlib.Path) -> Optional[Dict[str, Any]]:
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Reduce k6 NDJSON output into per-second buckets.")
+    ap.add_argument("--in", dest="inp", required=True, action="append",
+                    help="k6 --out json file (.ndjson or .ndjson.gz); repeat to merge several generators")
+    ap.add_argument("--out", required=True)
+    ap.add_argument("--bucket", type=int, default=1, help="bucket size in seconds")
+    args = ap.parse_args()
+
+    paths = [pathlib.Path(p) for p in args.inp]
+    ts = reduce_file(paths[0], args.bucket) if len(paths) == 1 else reduce_files(paths, args.bucket)
+    pathlib.Path(args.out).write_text(json.dumps(ts), encoding="utf-8")
+    total = Histogram.from_dict(ts["total"])
+    print(f"[k6_stream] {len(ts['points'])} buckets, {total.count} requests -> {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
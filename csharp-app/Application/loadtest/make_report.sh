@@ -44,6 +44,7 @@ echo " - summary: $LATEST_SUMMARY"
 echo " - env:     $ENV_JSON"
 
 python3 "$(dirname "$0")/report.py" \
+  --out "$OUT_ROOT" \
   --summary "$LATEST_SUMMARY" \
   --env "$ENV_JSON" \
   --out-md "$REPORT_MD" \
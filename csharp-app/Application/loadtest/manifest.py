@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Манифест сценариев (scenarios.json): скрипт, профили нагрузки по режимам, SLO-пороги и env.
+
+Новый сценарий = JS-файл в scripts/scenarios/ + запись в манифесте; run.sh, run_loadtest.py,
+run_suite.py и capacity.py берут профиль отсюда, а env_*.json фиксирует то, что реально запускалось.
+
+Профиль: profiles.<mode>.<closed|open> сценария поверх defaults.profiles.<mode>.<...>.
+  closed — {vus, duration} (--vus/--duration, think time в сценарии);
+  open   — {rate} или {stages} (+ duration, vus для preAllocatedVUs), см. scripts/lib/profile.js.
+Явно заданные VUS/DURATION/RATE/STAGES в окружении имеют приоритет над манифестом.
+
+  python3 manifest.py list [--suite]
+  python3 manifest.py show --scenario 03_checkout_flow --mode stress --profile open
+  eval "$(python3 manifest.py shell --scenario 01_anonymous_menu --mode baseline)"   # так делает run.sh
+"""
+import argparse
+import json
+import os
+import pathlib
+import shlex
+import sys
+from typing import Any, Dict, List, Optional
+
+HERE = pathlib.Path(__file__).resolve().parent
+MANIFEST = HERE / "scenarios.json"
+PROFILE_KINDS = ("closed", "open")
+
+
+class ManifestError(Exception):
+    pass
+
+
+def load(path: pathlib.Path = MANIFEST) -> Dict[str, Any]:
+    doc = json.loads(path.read_text(encoding="utf-8"))
+    for name, sc in (doc.get("scenarios") or {}).items():
+        if not sc.get("script"):
+            raise ManifestError(f"{path.name}: scenario {name} has no script")
+        if not (HERE / sc["script"]).is_file():
+            raise ManifestError(f"{path.name}: script of {name} not found: {sc['script']}")
+    return doc
+
+
+def suite_scenarios(doc: Dict[str, Any]) -> List[str]:
+    """Сценарии, которые гоняются в наборе (suite: false — только по явному запросу, как mixed)."""
+    return [name for name, sc in doc["scenarios"].items() if sc.get("suite", True)]
+
+
+def resolve(doc: Dict[str, Any], scenario: str, mode: str, profile: str = "closed",
+            environ: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Итоговый профиль прогона: манифест + переопределения из окружения."""
+    environ = os.environ if environ is None else environ
+    sc = (doc.get("scenarios") or {}).get(scenario)
+    if sc is None:
+        raise ManifestError(f"unknown scenario {scenario!r}; known: {', '.join(doc['scenarios'])}")
+    if profile not in PROFILE_KINDS:
+        raise ManifestError(f"unknown profile {profile!r}; expected one of {', '.join(PROFILE_KINDS)}")
+    defaults = doc.get("defaults") or {}
+
+    def pick(src: Dict[str, Any]) -> Dict[str, Any]:
+        by_mode = (src.get("profiles") or {}).get(mode) or {}
+        # soak/capacity описаны только как open — берём то, что есть
+        return by_mode.get(profile) or by_mode.get("open" if profile == "closed" else "closed") or {}
+
+    # профиль сценария заменяет профиль по умолчанию целиком (не смешиваем rate одного со stages другого)
+    load_profile = dict(pick(sc) or pick(defaults))
+    for key, var in (("vus", "VUS"), ("duration", "DURATION"), ("rate", "RATE"), ("stages", "STAGES")):
+        if environ.get(var):
+            load_profile[key] = environ[var]
+    # явный RATE/STAGES из окружения отменяет противоположный вариант из манифеста
+    if environ.get("RATE") and not environ.get("STAGES"):
+        load_profile.pop("stages", None)
+    elif environ.get("STAGES") and not environ.get("RATE"):
+        load_profile.pop("rate", None)
+    if not load_profile.get("duration") and not load_profile.get("stages"):
+        # RATE из окружения поверх профиля со stages: длительность берём из closed-профиля режима
+        for src in (sc, defaults):
+            closed = ((src.get("profiles") or {}).get(mode) or {}).get("closed") or {}
+            if closed.get("duration"):
+                load_profile["duration"] = closed["duration"]
+                break
+
+    if sc.get("executor"):
+        executor = sc["executor"]
+    elif load_profile.get("stages"):
+        executor = "ramping-arrival-rate"
+    elif load_profile.get("rate"):
+        executor = "constant-arrival-rate"
+    else:
+        executor = "constant-vus"
+
+    slo = dict(defaults.get("slo") or {})
+    slo.update(sc.get("slo") or {})
+    if environ.get("SLO_P95_MS"):
+        slo["p95_ms"] = float(environ["SLO_P95_MS"])
+    if environ.get("SLO_ERROR_RATE"):
+        slo["error_rate"] = float(environ["SLO_ERROR_RATE"])
+
+    env = {k: environ.get(k) or str(v) for k, v in (sc.get("env") or {}).items()}
+    required = list(dict.fromkeys((defaults.get("required_env") or []) + (sc.get("required_env") or [])))
+    missing = [k for k in required if not (env.get(k) or environ.get(k))]
+
+    return {
+        "scenario": scenario,
+        "mode": mode,
+        "profile": profile,
+        "script": sc["script"],
+        "description": sc.get("description", ""),
+        "executor": executor,
+        "vus": int(load_profile["vus"]) if load_profile.get("vus") else None,
+        "duration": load_profile.get("duration"),
+        "rate": float(load_profile["rate"]) if load_profile.get("rate") else None,
+        "stages": load_profile.get("stages") or None,
+        "slo": slo,
+        "env": env,
+        "required_env": required,
+        "missing_env": missing,
+    }
+
+
+def k6_load_args(r: Dict[str, Any]) -> List[str]:
+    """Аргументы k6 run для профиля (то же, что LOAD_ARGS в run.sh)."""
+    if r["executor"] == "mixed":
+        args = ["-e", f"VUS={r['vus'] or ''}", "-e", f"DURATION={r['duration'] or ''}"]
+        if r["rate"]:
+            args += ["-e", f"RATE={r['rate']:g}"]
+    elif r["stages"]:
+        args = ["-e", f"STAGES={r['stages']}"]
+    elif r["rate"]:
+        args = ["-e", f"RATE={r['rate']:g}", "-e", f"DURATION={r['duration']}"]
+    else:
+        return ["--vus", str(r["vus"]), "--duration", str(r["duration"])]
+    if r["vus"] and r["executor"] != "mixed":
+        args += ["-e", f"PRE_VUS={r['vus']}"]
+    return args
+
+
+def k6_env_args(r: Dict[str, Any]) -> List[str]:
+    """-e для env сценария и SLO-порогов (scripts/lib/profile.js: sloThresholds)."""
+    args = []
+    for k, v in r["env"].items():
+        args += ["-e", f"{k}={v}"]
+    if r["slo"].get("p95_ms") is not None:
+        args += ["-e", f"SLO_P95_MS={r['slo']['p95_ms']:g}"]
+    if r["slo"].get("error_rate") is not None:
+        args += ["-e", f"SLO_ERROR_RATE={r['slo']['error_rate']:g}"]
+    return args
+
+
+def shell_exports(r: Dict[str, Any]) -> str:
+    def q(v: Any) -> str:
+        return shlex.quote("" if v is None else (f"{v:g}" if isinstance(v, float) else str(v)))
+
+    lines = [
+        f"M_SCRIPT={q(r['script'])}",
+        f"M_EXECUTOR={q(r['executor'])}",
+        f"M_VUS={q(r['vus'])}",
+        f"M_DURATION={q(r['duration'])}",
+        f"M_RATE={q(r['rate'])}",
+        f"M_STAGES={q(r['stages'])}",
+        f"M_SLO_JSON={q(json.dumps(r['slo']))}",
+        f"M_MIX={q(r['env'].get('MIX'))}",
+        "M_ENV_ARGS=(" + " ".join(q(a) for a in k6_env_args(r)) + ")",
+        f"M_MISSING_ENV={q(' '.join(r['missing_env']))}",
+    ]
+    return "\n".join(lines)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Scenario manifest (scenarios.json).")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    ls = sub.add_parser("list", help="scenarios and their scripts")
+    ls.add_argument("--suite", action="store_true", help="only names of the suite scenarios (for run_all.sh)")
+    for name in ("show", "shell"):
+        p = sub.add_parser(name)
+        p.add_argument("--scenario", required=True)
+        p.add_argument("--mode", default="baseline")
+        p.add_argument("--profile", default="closed", choices=PROFILE_KINDS)
+    args = ap.parse_args()
+
+    try:
+        doc = load()
+        if args.cmd == "list" and args.suite:
+            print("\n".join(suite_scenarios(doc)))
+            return 0
+        if args.cmd == "list":
+            for name, sc in doc["scenarios"].items():
+                flag = "" if sc.get("suite", True) else "  (not in suite)"
+                print(f"{name:20s} {sc['script']}{flag}")
+            return 0
+        r = resolve(doc, args.scenario, args.mode, args.profile)
+    except (ManifestError, ValueError) as e:
+        print(f"[manifest] {e}", file=sys.stderr)
+        return 1
+    print(shell_exports(r) if args.cmd == "shell" else json.dumps(r, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+Профиль CPU приложения в установившейся фазе прогона — чтобы плохой p95 не воспроизводить руками.
+
+run.sh (PROFILER=auto|py-spy|dotnet-trace) и run_loadtest.py (--profiler) запускают профилировщик
+вместе с k6, но снимают профиль только в окне установившейся нагрузки:
+  - closed / constant-arrival-rate: после прогрева (PROFILE_WARMUP, по умолчанию 15% длительности,
+    не меньше 5 с) и до начала завершения (PROFILE_COOLDOWN, 5%);
+  - stages: самое длинное плато (стадия с той же целевой интенсивностью, что и предыдущая),
+    без плато — средняя половина профиля.
+Окно ограничено PROFILE_SECONDS (по умолчанию 60 с): многочасовой soak не превращается в гигабайты.
+Отсчёт — от появления файла NDJSON k6 (--anchor): k6 создаёт его при старте, а не при запуске контейнера.
+
+Инструмент выбирается по процессу (auto):
+  - Python (Tornado, main.py) — py-spy record --nonblocking --subprocesses, speedscope или flame graph SVG;
+  - .NET (Mockups) — dotnet-trace collect --profile cpu-sampling (nettrace + speedscope) и
+    dotnet-counters (System.Runtime, ASP.NET Core hosting, Kestrel) за то же окно в CSV.
+Файлы ложатся рядом с summary: profile_<scenario>_<ts>.{speedscope.json,svg,nettrace,counters.csv},
+описание — profile_<scenario>_<ts>.json; report.py показывает ссылки на них в HTML.
+
+py-spy нужен доступ к чужому процессу (root или CAP_SYS_PTRACE); dotnet-trace/dotnet-counters —
+тот же пользователь, что у приложения (`dotnet tool install -g dotnet-trace dotnet-counters`).
+
+  PROFILER=auto APP_PROCESS=main.py SCENARIO=01_anonymous_menu ./run.sh
+  python3 profiler.py --out out/x/profile_x.json --process Mockups --duration 100s --anchor out/x/metrics.ndjson.gz
+"""
+import argparse
+import json
+import os
+import pathlib
+import re
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+import time
+from html import escape
+from typing import Any, Dict, List, Optional, Tuple
+
+import resource_sampler
+
+TOOLS = ("auto", "py-spy", "dotnet-trace")
+DEFAULT_MAX_SECONDS = 60
+DEFAULT_RATE = 100  # сэмплов/с для py-spy
+ANCHOR_TIMEOUT = 120  # с: сколько ждать старта k6
+FINISH_TIMEOUT = 180  # с: конвертация nettrace -> speedscope бывает небыстрой
+DOTNET_COUNTERS = "System.Runtime,Microsoft.AspNetCore.Hosting,Microsoft-AspNetCore-Server-Kestrel"
+DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+
+
+def parse_duration(s: Optional[str]) -> Optional[float]:
+    """k6-длительность ("100s", "1m30s", "2h", "500ms", "90") -> секунды."""
+    if not s:
+        return None
+    s = str(s).strip()
+    try:
+        return float(s)
+    except ValueError:
+        pass
+    parts = DURATION_RE.findall(s)
+    if not parts or "".join(v + u for v, u in parts) != s:
+        raise ValueError(f"bad duration: {s!r}")
+    mult = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    return sum(float(v) * mult[u] for v, u in parts)
+
+
+def parse_stages(spec: str) -> List[Tuple[float, float]]:
+    out = []
+    for part in spec.split(","):
+        duration, target = part.strip().split(":")
+        out.append((parse_duration(duration), float(target)))
+    return out
+
+
+def steady_window(duration: Optional[str] = None, stages: Optional[str] = None,
+                  start_rate: Optional[float] = None, warmup: Optional[float] = None,
+                  cooldown: Optional[float] = None,
+                  max_seconds: float = DEFAULT_MAX_SECONDS) -> Optional[Tuple[float, float]]:
+    """(смещение от старта k6, длина) окна установившейся нагрузки или None, если профиль пуст."""
+    if stages:
+        plan = parse_stages(stages)
+        total = sum(d for d, _ in plan)
+        t, prev, best = 0.0, start_rate or 0.0, None
+        for d, target in plan:
+            if target == prev and target > 0 and (best is None or d > best[1]):
+                best = (t, d)
+            t, prev = t + d, target
+        start, length = best if best else (total / 4, total / 2)
+    else:
+        total = parse_duration(duration)
+        if not total:
+            return None
+        start = warmup if warmup is not None else max(5.0, 0.15 * total)
+        end = total - (cooldown if cooldown is not None else 0.05 * total)
+        length = end - start
+    if length <= 0:
+        return None
+    return start, min(length, max_seconds)
+
+
+def detect_runtime(pid: int) -> Optional[str]:
+    """python | dotnet по исполняемому файлу процесса (apphost Mockups — по загруженному libcoreclr)."""
+    proc = pathlib.Path(f"/proc/{pid}")
+    try:
+        exe = os.readlink(proc / "exe")
+    except OSError:
+        exe = ""
+    try:
+        cmd = (proc / "cmdline").read_bytes().replace(b"\0", b" ").decode(errors="replace")
+    except OSError:
+        cmd = ""
+    name = pathlib.Path(exe).name or (cmd.split() or [""])[0]
+    if "python" in name:
+        return "python"
+    if name == "dotnet" or ".dll" in cmd:
+        return "dotnet"
+    try:
+        if "libcoreclr" in (proc / "maps").read_text(errors="replace"):
+            return "dotnet"
+    except OSError:
+        pass
+    return None
+
+
+def pick_tool(runtime: Optional[str], requested: str) -> Optional[str]:
+    if requested != "auto":
+        return requested
+    return {"python": "py-spy", "dotnet": "dotnet-trace"}.get(runtime or "")
+
+
+def _dotnet_duration(seconds: float) -> str:
+    s = int(round(seconds))
+    return f"00:{s // 3600:02d}:{s % 3600 // 60:02d}:{s % 60:02d}"  # dd:hh:mm:ss
+
+
+def build_commands(tool: str, pid: int, seconds: float, prefix: pathlib.Path, fmt: str = "speedscope",
+                   rate: int = DEFAULT_RATE) -> List[Dict[str, Any]]:
+    """Команды захвата: [{kind, argv, files, stop}] — stop=True: процесс останавливается по SIGINT."""
+    if tool == "py-spy":
+        out = prefix.with_name(prefix.name + (".svg" if fmt == "flamegraph" else ".speedscope.json"))
+        # --nonblocking: не останавливаем интерпретатор на каждый сэмпл — профиль не искажает latency
+        return [{"kind": fmt, "files": [out], "stop": False,
+                 "argv": ["py-spy", "record", "--pid", str(pid), "--duration", str(int(round(seconds))),
+                          "--rate", str(rate), "--nonblocking", "--subprocesses",
+                          "--format", "flamegraph" if fmt == "flamegraph" else "speedscope", "--output", str(out)]}]
+    if tool == "dotnet-trace":
+        trace = prefix.with_name(prefix.name + ".nettrace")
+        counters = prefix.with_name(prefix.name + ".counters.csv")
+        cmds = [{"kind": "speedscope", "stop": False,
+                 "files": [trace.with_suffix(".speedscope.json"), trace],
+                 "argv": ["dotnet-trace", "collect", "--process-id", str(pid), "--profile", "cpu-sampling",
+                          "--duration", _dotnet_duration(seconds), "--format", "Speedscope", "--output", str(trace)]}]
+        if shutil.which("dotnet-counters"):
+            cmds.append({"kind": "counters", "stop": True, "files": [counters],
+                         "argv": ["dotnet-counters", "collect", "--process-id", str(pid), "--refresh-interval", "1",
+                                  "--format", "csv", "--output", str(counters), "--counters", DOTNET_COUNTERS]})
+        return cmds
+    raise ValueError(f"unknown profiler tool: {tool}")
+
+
+class Capture:
+    """Захват в фоне: ждёт старта k6 и окна, пишет описание (profile_*.json) при stop()/по окончании."""
+
+    def __init__(self, out: pathlib.Path, window: Optional[Tuple[float, float]], tool: str = "auto",
+                 pid: Optional[int] = None, process: str = "Mockups", anchor: Optional[pathlib.Path] = None,
+                 fmt: str = "speedscope", rate: int = DEFAULT_RATE):
+        self.out = out
+        self.window = window
+        self.anchor = anchor
+        self.fmt = fmt
+        self.rate = rate
+        self.pid = pid or (resource_sampler.find_pid(process) if process else None)
+        self.runtime = detect_runtime(self.pid) if self.pid else None
+        self.tool = pick_tool(self.runtime, tool)
+        self.process = process
+        self.doc: Dict[str, Any] = {"tool": self.tool, "runtime": self.runtime, "pid": self.pid,
+                                    "process": process, "artifacts": [], "errors": []}
+        self._stop = threading.Event()
+        self._procs: List[Tuple[Dict[str, Any], subprocess.Popen]] = []
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> "Capture":
+        self._thread.start()
+        return self
+
+    def request_stop(self):
+        """Прогон закончился: не начатый захват отменяется, начатый — корректно останавливается."""
+        self._stop.set()
+
+    def join(self) -> Dict[str, Any]:
+        # join с таймаутом: обработчики сигналов главного потока продолжают работать
+        while self._thread.is_alive():
+            self._thread.join(0.5)
+        return self.doc
+
+    def stop(self) -> Dict[str, Any]:
+        self.request_stop()
+        return self.join()
+
+    def _skip(self, reason: str):
+        self.doc["skipped"] = reason
+        print(f"[profiler] skipped: {reason}", file=sys.stderr)
+
+    def _run(self):
+        try:
+            self._capture()
+        except Exception as e:  # описание пишем в любом случае — отчёт покажет причину
+            self.doc["errors"].append(f"{type(e).__name__}: {e}")
+        finally:
+            self.out.write_text(json.dumps(self.doc, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    def _capture(self):
+        if not self.pid:
+            return self._skip(f"app process '{self.process}' not found (set APP_PID)")
+        if not self.tool:
+            return self._skip(f"unknown runtime of pid {self.pid}; set PROFILER=py-spy|dotnet-trace")
+        if not shutil.which(self.tool):
+            return self._skip(f"{self.tool} is not installed")
+        if not self.window:
+            return self._skip("no steady-state window in the load profile")
+
+        t0 = time.time()
+        if self.anchor is not None:
+            deadline = t0 + ANCHOR_TIMEOUT
+            while not self.anchor.exists():
+                if self._stop.wait(0.2) or time.time() > deadline:
+                    return self._skip("k6 did not start (no output file)")
+            t0 = time.time()
+        offset, seconds = self.window
+        self.doc["window"] = {"offset": round(offset, 1), "seconds": round(seconds, 1)}
+        if self._stop.wait(max(0.0, t0 + offset - time.time())):
+            return self._skip("run ended before the steady-state window")
+
+        prefix = self.out.with_suffix("")
+        started = time.time()
+        for cmd in build_commands(self.tool, self.pid, seconds, prefix, self.fmt, self.rate):
+            p = subprocess.Popen(cmd["argv"], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+            self._procs.append((cmd, p))
+        print(f"[profiler] {self.tool} on pid {self.pid}: {seconds:.0f}s from +{offset:.0f}s", file=sys.stderr)
+
+        # досрочный stop() — k6 закончил раньше (ошибка/прерывание): просим инструменты дописать файлы
+        interrupted = self._stop.wait(seconds)
+        for cmd, p in self._procs:
+            if p.poll() is None and (cmd["stop"] or interrupted):
+                p.send_signal(signal.SIGINT)
+        for cmd, p in self._procs:
+            try:
+                _, err = p.communicate(timeout=FINISH_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                p.kill()
+                _, err = p.communicate()
+            if p.returncode not in (0, -signal.SIGINT, 130) or not any(f.exists() for f in cmd["files"]):
+                tail = (err or "").strip().splitlines()[-3:]
+                self.doc["errors"].append(f"{cmd['argv'][0]} exit {p.returncode}: {' | '.join(tail)}")
+            for f in cmd["files"]:
+                if f.exists():
+                    self.doc["artifacts"].append({"kind": cmd["kind"] if f == cmd["files"][0] else f.suffix.lstrip("."),
+                                                  "file": f.name, "bytes": f.stat().st_size})
+        self.doc["window"].update({"started_at": round(started, 3), "finished_at": round(time.time(), 3),
+                                   "interrupted": interrupted})
+
+
+# ---------- отчёт (используется report.py) ----------
+
+def profile_path_for(summary_path: pathlib.Path) -> pathlib.Path:
+    """summary_<scenario>_<ts>.json -> profile_<scenario>_<ts>.json (рядом)."""
+    return summary_path.with_name("profile_" + summary_path.name[len("summary_"):])
+
+
+def load(path: pathlib.Path) -> Optional[Dict[str, Any]]:
+    if not path.exists():
+        return None
+    try:
+        doc = json.loads(path.read_text(encoding="utf-8"))
+    except ValueError:
+        return None
+    doc["dir"] = str(path.resolve().parent)
+    return doc
+
+
+def _href(doc: Dict[str, Any], name: str, report_dir: pathlib.Path) -> str:
+    return os.path.relpath(pathlib.Path(doc["dir"]) / name, report_dir)
+
+
+def _window_text(doc: Dict[str, Any]) -> str:
+    w = doc.get("window") or {}
+    if "offset" not in w:
+        return "-"
+    text = f"{w['seconds']:g} s from +{w['offset']:g} s"
+    return text + " (interrupted)" if w.get("interrupted") else text
+
+
+def md_section(doc: Optional[Dict[str, Any]], report_dir: pathlib.Path) -> List[str]:
+    if not doc:
+        return []
+    lines = ["## Profile (steady state)", ""]
+    if doc.get("skipped"):
+        return lines + [f"Not captured: {doc['skipped']}", ""]
+    lines.append(f"{doc['tool']} on pid {doc['pid']} ({doc.get('runtime') or '?'}), window {_window_text(doc)}")
+    lines.append("")
+    for a in doc["artifacts"]:
+        lines.append(f"- [{a['file']}]({_href(doc, a['file'], report_dir)}) — {a['kind']}")
+    for e in doc["errors"]:
+        lines.append(f"- ⚠️ {e}")
+    if any(a["kind"] == "speedscope" for a in doc["artifacts"]):
+        lines += ["", "speedscope-файлы открываются на https://www.speedscope.app (перетащить файл)."]
+    lines.append("")
+    return lines
+
+
+def html_section(doc: Optional[Dict[str, Any]], report_dir: pathlib.Path) -> str:
+    if not doc:
+        return ""
+    if doc.get("skipped"):
+        body = f"<div class='muted'>Not captured: {escape(doc['skipped'])}</div>"
+    else:
+        links = "".join(
+            f"<li><a href='{escape(_href(doc, a['file'], report_dir))}'>{escape(a['file'])}</a> "
+            f"<span class='muted'>{escape(a['kind'])}, {a['bytes'] / 1024:.0f} KB</span></li>"
+            for a in doc["artifacts"])
+        errors = "".join(f"<li>⚠️ {escape(e)}</li>" for e in doc["errors"])
+        hint = (" speedscope-файлы открываются на <a href='https://www.speedscope.app'>speedscope.app</a>."
+                if any(a["kind"] == "speedscope" for a in doc["artifacts"]) else "")
+        body = (f"<div class='muted'>{escape(doc['tool'])} on pid {doc['pid']} ({escape(doc.get('runtime') or '?')}), "
+                f"window {escape(_window_text(doc))}.{hint}</div><ul>{links}{errors}</ul>")
+    return f"""<div class="card" style="margin-top:16px">
+  <h2 style="margin-top:0">Profile (steady state)</h2>
+  {body}
+</div>"""
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Capture an app CPU profile during the steady-state phase of a k6 run.")
+    ap.add_argument("--out", required=True, help="profile_<scenario>_<ts>.json; artifacts get the same prefix")
+    ap.add_argument("--tool", choices=TOOLS, default="auto")
+    ap.add_argument("--pid", type=int)
+    ap.add_argument("--process", default="Mockups", help="substring of the app command line")
+    ap.add_argument("--anchor", help="file created when k6 starts (metrics NDJSON); default: now")
+    ap.add_argument("--duration", help="k6 duration of the run (100s, 2h)")
+    ap.add_argument("--stages", help="ramping-arrival-rate stages (30s:5,1m:20,...)")
+    ap.add_argument("--start-rate", type=float)
+    ap.add_argument("--warmup", type=float, default=float(os.environ["PROFILE_WARMUP"]) if os.environ.get("PROFILE_WARMUP") else None)
+    ap.add_argument("--cooldown", type=float, default=float(os.environ["PROFILE_COOLDOWN"]) if os.environ.get("PROFILE_COOLDOWN") else None)
+    ap.add_argument("--max-seconds", type=float, default=float(os.environ.get("PROFILE_SECONDS", DEFAULT_MAX_SECONDS)))
+    ap.add_argument("--format", choices=("speedscope", "flamegraph"), default=os.environ.get("PROFILE_FORMAT", "speedscope"),
+                    help="py-spy output (dotnet-trace always writes speedscope + nettrace)")
+    ap.add_argument("--rate", type=int, default=DEFAULT_RATE, help="py-spy samples per second")
+    args = ap.parse_args()
+
+    window = steady_window(args.duration, args.stages, args.start_rate, args.warmup, args.cooldown, args.max_seconds)
+    cap = Capture(pathlib.Path(args.out), window, args.tool, args.pid, args.process,
+                  pathlib.Path(args.anchor) if args.anchor else None, args.format, args.rate)
+
+    # SIGTERM от run.sh = k6 закончил: отменить ожидание или остановить начатый захват
+    signal.signal(signal.SIGTERM, lambda *_: cap.request_stop())
+    signal.signal(signal.SIGINT, lambda *_: cap.request_stop())
+    doc = cap.start().join()
+    if doc.get("artifacts"):
+        print(f"[profiler] {', '.join(a['file'] for a in doc['artifacts'])} -> {pathlib.Path(args.out).parent}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Поиск регрессий производительности между прогонами (по данным runstore).
+
+Текущий прогон (или последние K прогонов) сценария сравнивается с базой:
+либо с явно указанным прогоном (--baseline-ts), либо с N предыдущими прогонами
+того же сценария, mode и профиля нагрузки (--compare-last N; профиль — runstore.profile_key:
+base_url, vus, rate, executor, stages, workers). Если таких прогонов меньше --min-baseline,
+сравнение пропускается и gate не срабатывает.
+
+- RPS / p95 / p99: при K=1 — prediction interval по базе (mean ± t·s·sqrt(1+1/n)),
+  при K>=2 — t-тест Уэлча и доверительный интервал разницы средних.
+  Если в базе один прогон, дисперсию оценить нельзя — используется порог --threshold-pct.
+- error rate: тест двух пропорций по числу запросов (http_req_failed passes/fails).
+
+Изменение считается регрессией, только если оно статистически значимо И больше
+--min-effect-pct (чтобы не ловить шум в пару процентов).
+
+  python3 regress.py --out ./out --compare-last 5           # exit 2, если есть регрессии
+  python3 regress.py --out ./out --scenario 03_checkout_flow --baseline-ts 20240101_120000
+"""
+import argparse
+import math
+import pathlib
+import sqlite3
+from html import escape
+from typing import Any, Dict, List, Optional
+
+import runstore
+
+EXIT_REGRESSION = 2
+
+# (key в runs, подпись, "хорошее" направление: +1 больше = лучше, -1 меньше = лучше)
+METRICS = [
+    ("rps", "RPS", +1),
+    ("p95_ms", "p95 ms", -1),
+    ("p99_ms", "p99 ms", -1),
+]
+
+# двусторонние 95% критические значения t-распределения
+T975 = {1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306,
+        9: 2.262, 10: 2.228, 12: 2.179, 15: 2.131, 20: 2.086, 25: 2.060, 30: 2.042,
+        40: 2.021, 60: 2.000, 120: 1.980}
+Z975 = 1.96
+
+
+def t_crit(df: float) -> float:
+    # берём ближайшую меньшую степень свободы — интервал чуть шире, т.е. консервативнее
+    if df < 1:
+        return T975[1]
+    best = T975[1]
+    for k in sorted(T975):
+        if k <= df:
+            best = T975[k]
+    return best if df <= 120 else Z975
+
+
+def mean_sd(xs: List[float]):
+    n = len(xs)
+    m = sum(xs) / n
+    sd = math.sqrt(sum((x - m) ** 2 for x in xs) / (n - 1)) if n > 1 else 0.0
+    return m, sd
+
+
+def _status(change: float, good_dir: int, significant: bool, min_effect: float, rel: Optional[float]) -> str:
+    if not significant or rel is None or abs(rel) < min_effect:
+        return "ok"
+    return "improvement" if change * good_dir > 0 else "regression"
+
+
+def compare_metric(key: str, label: str, good_dir: int, cur: List[float], base: List[float],
+                   min_effect: float, threshold: float) -> Dict[str, Any]:
+    res: Dict[str, Any] = {"metric": key, "label": label, "n_current": len(cur), "n_baseline": len(base)}
+    if not cur or not base:
+        res.update(status="insufficient", method="no data")
+        return res
+
+    cm, cs = mean_sd(cur)
+    bm, bs = mean_sd(base)
+    change = cm - bm
+    rel = (change / bm) if bm else None
+    res.update(current=cm, baseline=bm, change=change, change_pct=None if rel is None else rel * 100)
+
+    if len(base) == 1 and len(cur) == 1:
+        # дисперсию не оценить — только относительный порог
+        res.update(method=f"single baseline, ±{threshold * 100:.0f}%",
+                   ci_low=bm * (1 - threshold), ci_high=bm * (1 + threshold))
+        res["status"] = _status(change, good_dir, rel is not None and abs(rel) >= threshold, min_effect, rel)
+        return res
+
+    if len(cur) == 1:
+        half = t_crit(len(base) - 1) * bs * math.sqrt(1 + 1 / len(base))
+        res.update(method=f"95% prediction interval (n={len(base)})", ci_low=bm - half, ci_high=bm + half)
+        significant = abs(change) > half
+    else:
+        se = math.sqrt(bs ** 2 / len(base) + cs ** 2 / len(cur))
+        if se == 0:
+            significant = change != 0
+            half = 0.0
+        else:
+            # степени свободы Уэлча–Саттертуэйта
+            num = se ** 4
+            den = 0.0
+            if len(base) > 1:
+                den += (bs ** 2 / len(base)) ** 2 / (len(base) - 1)
+            if len(cur) > 1:
+                den += (cs ** 2 / len(cur)) ** 2 / (len(cur) - 1)
+            df = num / den if den else 1
+            half = t_crit(df) * se
+            significant = abs(change) > half
+        # интервал для разницы средних переносим на шкалу базы
+        res.update(method=f"Welch t-test (n={len(base)} vs {len(cur)})",
+                   ci_low=bm + change - half, ci_high=bm + change + half)
+
+    res["status"] = _status(change, good_dir, significant, min_effect, rel)
+    return res
+
+
+def _failed_counts(summary: Dict[str, Any]):
+    # для Rate-метрики в summary-export passes = число "true", т.е. упавших запросов
+    m = (summary.get("metrics") or {}).get("http_req_failed") or {}
+    failed, ok = m.get("passes"), m.get("fails")
+    if failed is None or ok is None:
+        return None
+    return int(failed), int(failed) + int(ok)
+
+
+def compare_errors(cur_runs: List[Dict[str, Any]], base_runs: List[Dict[str, Any]],
+                   min_abs: float) -> Dict[str, Any]:
+    res: Dict[str, Any] = {"metric": "error_rate", "label": "error rate",
+                           "n_current": len(cur_runs), "n_baseline": len(base_runs)}
+    cur = [c for c in (_failed_counts(r["summary"]) for r in cur_runs) if c]
+    base = [c for c in (_failed_counts(r["summary"]) for r in base_runs) if c]
+    if not cur or not base:
+        res.update(status="insufficient", method="no data")
+        return res
+
+    f1, n1 = sum(c[0] for c in cur), sum(c[1] for c in cur)
+    f0, n0 = sum(c[0] for c in base), sum(c[1] for c in base)
+    if not n1 or not n0:
+        res.update(status="insufficient", method="no requests")
+        return res
+
+    p1, p0 = f1 / n1, f0 / n0
+    diff = p1 - p0
+    half = Z975 * math.sqrt(p1 * (1 - p1) / n1 + p0 * (1 - p0) / n0)
+    pooled = (f0 + f1) / (n0 + n1)
+    se0 = math.sqrt(pooled * (1 - pooled) * (1 / n0 + 1 / n1))
+    significant = (abs(diff) / se0 > Z975) if se0 else diff != 0
+
+    res.update(method=f"two-proportion z-test ({n0} vs {n1} req)",
+               current=p1, baseline=p0, change=diff,
+               change_pct=(diff / p0 * 100) if p0 else None,
+               ci_low=p0 + diff - half, ci_high=p0 + diff + half)
+    if not significant or abs(diff) < min_abs:
+        res["status"] = "ok"
+    else:
+        res["status"] = "regression" if diff > 0 else "improvement"
+    return res
+
+
+def compare_scenario(conn: sqlite3.Connection, scenario: str, mode: Optional[str],
+                     last: int = 5, current_runs: int = 1, baseline_ts: Optional[str] = None,
+                     min_effect_pct: float = 5.0, threshold_pct: float = 10.0,
+                     min_error_delta: float = 0.001, current_ts: Optional[str] = None,
+                     min_baseline: int = 3) -> Optional[Dict[str, Any]]:
+    # current_ts — сравниваемый прогон (по умолчанию самый новый); его профиль нагрузки задаёт выборку
+    newest = runstore.history(conn, scenario, mode, 1, until_ts=current_ts)
+    if not newest or (current_ts and newest[0]["ts"] != current_ts):
+        return None
+    profile = newest[0]["profile_key"]
+    mode = mode or newest[0]["mode"]
+    cur_rows = list(runstore.history(conn, scenario, mode, current_runs, until_ts=newest[0]["ts"], profile=profile))
+    oldest_cur = cur_rows[-1]["ts"]
+
+    if baseline_ts:
+        base_rows = [r for r in runstore.history(conn, scenario, mode, 1000) if r["ts"] == baseline_ts]
+    else:
+        base_rows = runstore.history(conn, scenario, mode, last, before_ts=oldest_cur, profile=profile)
+
+    result: Dict[str, Any] = {
+        "scenario": scenario,
+        "mode": mode,
+        "profile": profile,
+        "current": [r["ts"] for r in cur_rows],
+        "baseline": [r["ts"] for r in base_rows],
+        "metrics": [],
+    }
+    if not base_rows:
+        result["regressed"] = False
+        return result
+    if not baseline_ts and len(base_rows) < min_baseline:
+        result["skipped"] = (f"{len(base_rows)} baseline-прогон(ов) с тем же профилем нагрузки, "
+                             f"нужно не меньше {min_baseline} — сравнение пропущено.")
+        result["regressed"] = False
+        return result
+
+    min_effect = min_effect_pct / 100.0
+    threshold = threshold_pct / 100.0
+    for key, label, good_dir in METRICS:
+        cur = [r[key] for r in cur_rows if r[key] is not None]
+        base = [r[key] for r in base_rows if r[key] is not None]
+        result["metrics"].append(compare_metric(key, label, good_dir, cur, base, min_effect, threshold))
+
+    cur_full = [runstore.load_run(runstore.get_run(conn, r["id"])) for r in cur_rows]
+    base_full = [runstore.load_run(runstore.get_run(conn, r["id"])) for r in base_rows]
+    result["metrics"].append(compare_errors(cur_full, base_full, min_error_delta))
+
+    result["regressed"] = any(m["status"] == "regression" for m in result["metrics"])
+    return result
+
+
+def add_cli_args(ap: argparse.ArgumentParser) -> None:
+    """Общие флаги сравнения для report.py / suite_report.py / regress.py."""
+    ap.add_argument("--compare-last", type=int, default=0,
+                    help="compare with N previous runs of the same scenario/mode (0 = off)")
+    ap.add_argument("--baseline-ts", help="compare with this exact run (ts from the file name)")
+    ap.add_argument("--current-runs", type=int, default=1,
+                    help="treat the K newest runs as repeated runs of the current build")
+    ap.add_argument("--min-effect-pct", type=float, default=5.0)
+    ap.add_argument("--threshold-pct", type=float, default=10.0,
+                    help="relative threshold when the baseline is a single run")
+    ap.add_argument("--min-baseline", type=int, default=3,
+                    help="skip the comparison when fewer previous runs share the load profile")
+    ap.add_argument("--fail-on-regression", action="store_true",
+                    help=f"exit with code {EXIT_REGRESSION} when a regression is found")
+
+
+def compare_from_args(conn: sqlite3.Connection, scenario: str, mode: Optional[str], args,
+                      current_ts: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    if not (args.compare_last or args.baseline_ts):
+        return None
+    return compare_scenario(
+        conn, scenario, mode,
+        last=args.compare_last or 5, current_runs=args.current_runs, baseline_ts=args.baseline_ts,
+        min_effect_pct=args.min_effect_pct, threshold_pct=args.threshold_pct,
+        current_ts=current_ts, min_baseline=args.min_baseline,
+    )
+
+
+# ---------- rendering ----------
+def _fmt(metric: str, v: Optional[float]) -> str:
+    if v is None:
+        return "-"
+    if metric == "error_rate":
+        return f"{v * 100:.3f}%"
+    return f"{v:.2f}"
+
+
+def _fmt_change(m: Dict[str, Any]) -> str:
+    if m.get("change_pct") is None:
+        return "-" if m.get("change") is None else _fmt(m["metric"], m["change"])
+    return f"{m['change_pct']:+.1f}%"
+
+
+STATUS_ICON = {"regression": "❌ regression", "improvement": "✅ improvement", "ok": "ok", "insufficient": "—"}
+
+
+def md_section(cmp: Optional[Dict[str, Any]]) -> List[str]:
+    if not cmp:
+        return []
+    lines = ["## Regression check", ""]
+    if not cmp["baseline"]:
+        lines += ["- Нет baseline-прогонов с тем же профилем нагрузки для сравнения.", ""]
+        return lines
+    if cmp.get("skipped"):
+        lines += [f"- {cmp['skipped']}", ""]
+        return lines
+    lines.append(f"- Current: {', '.join(cmp['current'])}")
+    lines.append(f"- Baseline ({cmp['mode'] or '-'}, profile {cmp['profile'] or '-'}): {', '.join(cmp['baseline'])}")
+    lines.append("")
+    lines.append("| Metric | Baseline | Current | Change | 95% interval | Method | Status |")
+    lines.append("|---|---:|---:|---:|---|---|---|")
+    for m in cmp["metrics"]:
+        ci = "-" if m.get("ci_low") is None else f"{_fmt(m['metric'], m['ci_low'])} … {_fmt(m['metric'], m['ci_high'])}"
+        lines.append(
+            f"| {m['label']} | {_fmt(m['metric'], m.get('baseline'))} | {_fmt(m['metric'], m.get('current'))} | "
+            f"{_fmt_change(m)} | {ci} | {m['method']} | {STATUS_ICON[m['status']]} |"
+        )
+    lines.append("")
+    return lines
+
+
+def html_section(cmp: Optional[Dict[str, Any]]) -> str:
+    if not cmp:
+        return ""
+    if not cmp["baseline"]:
+        body = "<div class='muted'>Нет baseline-прогонов с тем же профилем нагрузки для сравнения.</div>"
+    elif cmp.get("skipped"):
+        body = f"<div class='muted'>{escape(cmp['skipped'])}</div>"
+    else:
+        rows = []
+        for m in cmp["metrics"]:
+            ci = "-" if m.get("ci_low") is None else f"{_fmt(m['metric'], m['ci_low'])} … {_fmt(m['metric'], m['ci_high'])}"
+            bg = {"regression": "#fee2e2", "improvement": "#d1fae5"}.get(m["status"], "transparent")
+            rows.append(
+                f"<tr style='background:{bg}'><td>{escape(m['label'])}</td><td>{_fmt(m['metric'], m.get('baseline'))}</td>"
+                f"<td>{_fmt(m['metric'], m.get('current'))}</td><td>{escape(_fmt_change(m))}</td>"
+                f"<td class='mono'>{escape(ci)}</td><td>{escape(m['method'])}</td><td>{escape(STATUS_ICON[m['status']])}</td></tr>"
+            )
+        body = f"""<div class="muted">Current: <span class="mono">{escape(', '.join(cmp['current']))}</span>;
+  baseline ({escape(cmp['mode'] or '-')}, profile {escape(cmp['profile'] or '-')}): <span class="mono">{escape(', '.join(cmp['baseline']))}</span></div>
+  <table>
+    <tr><th>Metric</th><th>Baseline</th><th>Current</th><th>Change</th><th>95% interval</th><th>Method</th><th>Status</th></tr>
+    {''.join(rows)}
+  </table>"""
+    return f"""<div class="card" style="margin-top:16px">
+  <h2 style="margin-top:0">Regression check — {escape(cmp['scenario'])}</h2>
+  {body}
+</div>"""
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Detect perf regressions between k6 runs in the run store.")
+    ap.add_argument("--out", required=True)
+    ap.add_argument("--db")
+    ap.add_argument("--scenario", help="default: every scenario in the store")
+    ap.add_argument("--mode")
+    add_cli_args(ap)
+    ap.set_defaults(compare_last=5, fail_on_regression=True)
+    args = ap.parse_args()
+
+    conn = runstore.open_store(pathlib.Path(args.out), pathlib.Path(args.db) if args.db else None)
+    scenarios = [args.scenario] if args.scenario else [r["scenario"] for r in runstore.latest_runs(conn, args.mode)]
+
+    regressed = False
+    for sc in scenarios:
+        cmp = compare_from_args(conn, sc, args.mode, args)
+        if not cmp:
+            continue
+        print(f"=== {sc} ===")
+        print("\n".join(md_section(cmp)))
+        regressed = regressed or cmp["regressed"]
+
+    if regressed and args.fail_on_regression:
+        print("REGRESSION DETECTED")
+        return EXIT_REGRESSION
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
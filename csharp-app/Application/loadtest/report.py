@@ -6,6 +6,12 @@ import pathlib
 from datetime import datetime
 from html import escape
 
+import dbstats
+import k6_stream
+import profiler
+import resource_sampler
+import workers
+
 # ---------- helpers ----------
 def ms(v):
     if v is None:
@@ -46,9 +52,392 @@ def fmt_bytes(n):
         i += 1
     return f"{n:.2f} {units[i]}"
 
+SERIES_COLORS = ["#2563eb", "#f59e0b", "#dc2626", "#16a34a", "#7c3aed", "#0891b2"]
+
+def svg_line_chart(title, xs, series, x_label="", y_label="", width=900, height=220):
+    """Простой inline-SVG график (без внешних JS). series: [(label, [y|None...]), ...]"""
+    pad_l, pad_r, pad_t, pad_b = 56, 12, 24, 30
+    ys = [y for _, vals in series for y in vals if y is not None]
+    if not xs or not ys:
+        return f"<div class='muted'>{escape(title)}: no data</div>"
+    x0, x1 = min(xs), max(xs)
+    y1 = max(ys) * 1.05 or 1.0
+    w, h = width - pad_l - pad_r, height - pad_t - pad_b
+
+    def px(x):
+        return pad_l + (w * (x - x0) / (x1 - x0) if x1 != x0 else w / 2)
+
+    def py(y):
+        return pad_t + h - h * y / y1
+
+    parts = [f"<svg viewBox='0 0 {width} {height}' width='100%' style='max-width:{width}px' xmlns='http://www.w3.org/2000/svg' font-size='11' font-family='system-ui'>"]
+    parts.append(f"<text x='{pad_l}' y='14' font-weight='600'>{escape(title)}</text>")
+    for k in range(5):
+        yv = y1 * k / 4
+        parts.append(f"<line x1='{pad_l}' x2='{width - pad_r}' y1='{py(yv):.1f}' y2='{py(yv):.1f}' stroke='#e5e7eb'/>")
+        parts.append(f"<text x='{pad_l - 4}' y='{py(yv) + 4:.1f}' text-anchor='end' fill='#666'>{yv:.4g}</text>")
+    parts.append(f"<text x='{pad_l}' y='{height - 6}' fill='#666'>{escape(str(x0))}</text>")
+    parts.append(f"<text x='{width - pad_r}' y='{height - 6}' text-anchor='end' fill='#666'>{escape(str(x1))} {escape(x_label)}</text>")
+    if y_label:
+        parts.append(f"<text x='{pad_l + w / 2:.0f}' y='{height - 6}' text-anchor='middle' fill='#666'>{escape(y_label)}</text>")
+
+    for idx, (label, vals) in enumerate(series):
+        color = SERIES_COLORS[idx % len(SERIES_COLORS)]
+        segs, cur = [], []
+        for x, y in zip(xs, vals):
+            if y is None:
+                if cur:
+                    segs.append(cur)
+                cur = []
+            else:
+                cur.append(f"{px(x):.1f},{py(y):.1f}")
+        if cur:
+            segs.append(cur)
+        for seg in segs:
+            if len(seg) == 1:
+                cx, cy = seg[0].split(",")
+                parts.append(f"<circle cx='{cx}' cy='{cy}' r='2' fill='{color}'/>")
+            else:
+                parts.append(f"<polyline fill='none' stroke='{color}' stroke-width='1.5' points='{' '.join(seg)}'/>")
+        lx = width - pad_r - (len(series) - idx) * 90
+        parts.append(f"<rect x='{lx}' y='6' width='10' height='10' fill='{color}'/>")
+        parts.append(f"<text x='{lx + 14}' y='15'>{escape(label)}</text>")
+    parts.append("</svg>")
+    return "".join(parts)
+
+def timeseries_card(ts):
+    if not ts or not ts.get("points"):
+        return ""
+    pts = ts["points"]
+    xs = [p["t"] for p in pts]
+    rps_chart = svg_line_chart(
+        "Throughput", xs,
+        [("RPS", [p["rps"] for p in pts]), ("errors/s", [p["errors"] / ts["bucket_seconds"] for p in pts])]
+        + ([("dropped it/s", [(p.get("dropped") or 0) / ts["bucket_seconds"] for p in pts])] if ts.get("dropped") else []),
+        x_label="s")
+    lat_chart = svg_line_chart(
+        "Latency (http_req_duration), ms", xs,
+        [("p50", [p["p50"] for p in pts]), ("p95", [p["p95"] for p in pts]), ("p99", [p["p99"] for p in pts])],
+        x_label="s")
+    vus = [p.get("vus") for p in pts]
+    vus_chart = svg_line_chart("VUs", xs, [("vus", vus)], x_label="s", height=140) if any(v is not None for v in vus) else ""
+    return f"""<div class="card" style="margin-top:16px">
+  <h2 style="margin-top:0">Time series ({ts['bucket_seconds']} s buckets)</h2>
+  {rps_chart}
+  {lat_chart}
+  {vus_chart}
+</div>"""
+
+def timeseries_md(ts):
+    if not ts or not ts.get("points"):
+        return []
+    pts = [p for p in ts["points"] if p["reqs"]]
+    if not pts:
+        return []
+    total = k6_stream.Histogram.from_dict(ts["total"])
+    worst = max(pts, key=lambda p: p["p95"] or 0)
+    slowest = min(pts, key=lambda p: p["rps"])
+    err_secs = sum(1 for p in pts if p["errors"])
+    return [
+        f"## Time series ({ts['bucket_seconds']} s buckets)",
+        "",
+        f"- Buckets: {len(ts['points'])}, requests: {total.count}",
+        f"- Overall p50 / p95 / p99 (merged histogram): {fmt_ms(total.quantile(0.5))} / {fmt_ms(total.quantile(0.95))} / {fmt_ms(total.quantile(0.99))}",
+        f"- Worst p95 bucket: t={worst['t']}s — {fmt_ms(worst['p95'])} ({worst['rps']:.2f}/s)",
+        f"- Lowest throughput bucket: t={slowest['t']}s — {slowest['rps']:.2f}/s",
+        f"- Buckets with errors: {err_secs}",
+        "",
+    ]
+
+def fmt_kb(v):
+    return "-" if v is None else fmt_bytes(v * 1024)
+
+def resources_card(res, doc):
+    if not res or not doc or not doc.get("samples"):
+        return ""
+    samples = doc["samples"]
+    xs = [round(x["t"]) for x in samples]
+    cpu_series = [("app CPU %", [(x.get("app") or {}).get("cpu_pct") for x in samples])]
+    mem_series = [("app RSS MB", [None if (x.get("app") or {}).get("rss_kb") is None else x["app"]["rss_kb"] / 1024
+                                  for x in samples])]
+    for name in doc.get("containers") or []:
+        cpu_series.append((f"{name} CPU %", [((x.get("containers") or {}).get(name) or {}).get("cpu_pct") for x in samples]))
+        mem_series.append((f"{name} MB", [None if ((x.get("containers") or {}).get(name) or {}).get("mem_bytes") is None
+                                          else x["containers"][name]["mem_bytes"] / 1024 ** 2 for x in samples]))
+    rows = [
+        ("requests / app CPU-second", "-" if res.get("reqs_per_cpu_second") is None else f"{res['reqs_per_cpu_second']:.1f}"),
+        ("app CPU avg / max", f"{fmt_num(res.get('app_cpu_avg_pct'))}% / {fmt_num(res.get('app_cpu_max_pct'))}%"),
+        ("app RSS start / end / peak", f"{fmt_kb(res.get('app_rss_start_kb'))} / {fmt_kb(res.get('app_rss_end_kb'))} / {fmt_kb(res.get('app_rss_peak_kb'))}"),
+        ("app RSS growth per 1k requests", fmt_kb(res.get("app_rss_kb_per_1k_reqs"))),
+        ("app threads / sockets (max)", f"{fmt_int(res.get('app_threads_max'))} / {fmt_int(res.get('app_sockets_max'))}"),
+    ]
+    if res.get("app_gc_heap_mb_max") is not None:
+        rows.append(("GC heap max", f"{res['app_gc_heap_mb_max']:.1f} MB"))
+    if res.get("app_gc_counts"):
+        rows.append(("GC gen0 / gen1 / gen2", " / ".join(fmt_int(res["app_gc_counts"].get(g)) for g in ("gen0_gc", "gen1_gc", "gen2_gc"))))
+    for name, c in res.get("containers", {}).items():
+        rows.append((f"{name} CPU avg / max", f"{fmt_num(c['cpu_avg_pct'])}% / {fmt_num(c['cpu_max_pct'])}%"))
+        rows.append((f"{name} memory peak", fmt_bytes(c["mem_peak_bytes"])))
+    table = "".join(f"<tr><td>{escape(k)}</td><td>{escape(v)}</td></tr>" for k, v in rows)
+    return f"""<div class="card" style="margin-top:16px">
+  <h2 style="margin-top:0">Server resources ({res['samples']} samples)</h2>
+  <table><tr><th>Metric</th><th>Value</th></tr>{table}</table>
+  {svg_line_chart("CPU, %", xs, cpu_series, x_label="s", height=180)}
+  {svg_line_chart("Memory, MB", xs, mem_series, x_label="s", height=180)}
+</div>"""
+
+def resources_md(res):
+    if not res or not res.get("samples"):
+        return []
+    lines = [f"## Server resources ({res['samples']} samples)", ""]
+    if res.get("reqs_per_cpu_second") is not None:
+        lines.append(f"- Requests per app CPU-second: {res['reqs_per_cpu_second']:.1f}")
+    if res.get("app_cpu_avg_pct") is not None:
+        lines.append(f"- App CPU avg / max: {fmt_num(res['app_cpu_avg_pct'])}% / {fmt_num(res['app_cpu_max_pct'])}%")
+    if res.get("app_rss_peak_kb") is not None:
+        lines.append(f"- App RSS start / end / peak: {fmt_kb(res['app_rss_start_kb'])} / "
+                     f"{fmt_kb(res['app_rss_end_kb'])} / {fmt_kb(res['app_rss_peak_kb'])}")
+    if res.get("app_rss_kb_per_1k_reqs") is not None:
+        lines.append(f"- App RSS growth per 1k requests: {fmt_kb(res['app_rss_kb_per_1k_reqs'])} (R² {res['app_rss_r2']:.2f})")
+    if res.get("app_threads_max") is not None:
+        lines.append(f"- App threads / sockets (max): {fmt_int(res.get('app_threads_max'))} / {fmt_int(res.get('app_sockets_max'))}")
+    if res.get("app_gc_counts"):
+        lines.append("- GC gen0 / gen1 / gen2: " + " / ".join(fmt_int(res["app_gc_counts"].get(g)) for g in ("gen0_gc", "gen1_gc", "gen2_gc")))
+    for name, c in res.get("containers", {}).items():
+        lines.append(f"- {name}: CPU avg {fmt_num(c['cpu_avg_pct'])}%, max {fmt_num(c['cpu_max_pct'])}%, "
+                     f"memory peak {fmt_bytes(c['mem_peak_bytes'])}")
+    lines.append("")
+    return lines
+
+def fmt_num(v):
+    return "-" if v is None else f"{v:.1f}"
+
+def _quantiles(h):
+    return {"p50": h.quantile(0.50), "p95": h.quantile(0.95), "p99": h.quantile(0.99), "max": h.max}
+
+def coordinated_omission(env, s, ts):
+    """
+    Latency с поправкой на coordinated omission.
+
+    open model (arrival-rate): k6 шлёт по расписанию, но итерации без свободного VU отбрасываются
+    (dropped_iterations = missed schedule). Каждую такую итерацию учитываем как http_reqs/iterations
+    запросов с latency не меньше максимальной в этой секунде — оценка снизу того, что увидел бы пользователь.
+
+    closed model (--vus): пока VU ждёт медленный ответ, он не шлёт следующие запросы. Ожидаемый интервал
+    между запросами одного VU берём из лучших секунд прогона (vus / p95 посекундного RPS) и дополняем
+    гистограмму «пропущенными» значениями (HdrHistogram-поправка, Histogram.corrected).
+    """
+    open_model = "arrival-rate" in (env.get("executor") or "")
+    dropped = s.get("dropped_iterations") or 0
+    iters = s.get("iter_count") or 0
+    out = {
+        "model": "open" if open_model else "closed",
+        "scheduled": iters + dropped,
+        "dropped": dropped,
+        "missed_ratio": (dropped / (iters + dropped)) if (iters + dropped) else None,
+    }
+    if not ts or not ts.get("points"):
+        return out
+    raw = k6_stream.Histogram.from_dict(ts["total"])
+    if not raw.count:
+        return out
+    out["raw"] = _quantiles(raw)
+
+    if open_model:
+        reqs_per_iter = (s["http_reqs_count"] / iters) if iters and s.get("http_reqs_count") else 1.0
+        corrected = k6_stream.Histogram().merge(raw)
+        synthetic = 0
+        for p in ts["points"]:
+            n = int(round((p.get("dropped") or 0) * reqs_per_iter))
+            floor = p.get("max") or raw.max
+            if n and floor is not None:
+                corrected.add(floor, n)
+                synthetic += n
+    else:
+        rates = sorted(p["rps"] for p in ts["points"] if p["reqs"])
+        vus = env.get("vus") or s.get("vus_max")
+        if not rates or not vus:
+            return out
+        best_rps = rates[min(len(rates) - 1, int(0.95 * (len(rates) - 1)))]
+        interval = 1000.0 * float(vus) / best_rps if best_rps else None
+        corrected = raw.corrected(interval)
+        synthetic = corrected.count - raw.count
+        out["expected_interval_ms"] = interval
+
+    out["synthetic"] = synthetic
+    out["corrected"] = _quantiles(corrected)
+    return out
+
+def co_md(co):
+    if not co or (not co.get("corrected") and not co.get("dropped")):
+        return []
+    lines = [f"## Coordinated omission ({co['model']} model)", ""]
+    if co["model"] == "open":
+        lines.append(f"- Scheduled iterations: {fmt_int(co['scheduled'])}, missed schedule (dropped): "
+                     f"{fmt_int(co['dropped'])} ({fmt_pct(co['missed_ratio'])})")
+    elif co.get("expected_interval_ms") is not None:
+        lines.append(f"- Expected request interval per VU: {fmt_ms(co['expected_interval_ms'])}")
+    if co.get("corrected"):
+        lines.append(f"- Synthetic samples added: {fmt_int(co['synthetic'])}")
+        lines.append("")
+        lines.append("| | p50 | p95 | p99 | max |")
+        lines.append("|---|---:|---:|---:|---:|")
+        for key in ("raw", "corrected"):
+            q = co[key]
+            lines.append(f"| {key} | {fmt_ms(q['p50'])} | {fmt_ms(q['p95'])} | {fmt_ms(q['p99'])} | {fmt_ms(q['max'])} |")
+    lines.append("")
+    return lines
+
+def co_card(co):
+    if not co or (not co.get("corrected") and not co.get("dropped")):
+        return ""
+    head = ""
+    if co["model"] == "open":
+        head = (f"<div>Scheduled iterations: <b>{escape(fmt_int(co['scheduled']))}</b>, missed schedule (dropped): "
+                f"<b>{escape(fmt_int(co['dropped']))}</b> ({escape(fmt_pct(co['missed_ratio']))})</div>")
+    elif co.get("expected_interval_ms") is not None:
+        head = f"<div>Expected request interval per VU: <b>{escape(fmt_ms(co['expected_interval_ms']))}</b></div>"
+    table = ""
+    if co.get("corrected"):
+        rows = "".join(
+            f"<tr><td>{key}</td>" + "".join(f"<td>{escape(fmt_ms(co[key][q]))}</td>" for q in ("p50", "p95", "p99", "max")) + "</tr>"
+            for key in ("raw", "corrected"))
+        table = f"""<div class="muted">Synthetic samples added: {escape(fmt_int(co['synthetic']))}</div>
+  <table><tr><th></th><th>p50</th><th>p95</th><th>p99</th><th>max</th></tr>{rows}</table>"""
+    return f"""<div class="card" style="margin-top:16px">
+  <h2 style="margin-top:0">Coordinated omission ({escape(co['model'])} model)</h2>
+  {head}
+  {table}
+</div>"""
+
 def get_metric(metrics, name):
     return metrics.get(name, {})
 
+# пороги-заглушки, которыми сценарии включают sub-метрики по endpoint (см. endpointThresholds в *.js)
+TRIVIAL_THRESHOLDS = {"max>=0", "count>=0", "rate>=0"}
+
+def tag_breakdown(metrics, tag):
+    """Sub-метрики вида http_req_duration{<tag>:<value>} из summary-export, сгруппированные по value."""
+    out = {}
+    marker = "{" + tag + ":"
+    for key, m in metrics.items():
+        if not key.endswith("}") or marker not in key:
+            continue
+        base, tag_part = key[:-1].split("{", 1)
+        name = tag_part.split(":", 1)[1]
+        e = out.setdefault(name, {"name": name})
+        if base == "http_req_duration":
+            e.update(avg=m.get("avg"), p95=m.get("p(95)"), p99=m.get("p(99)"), max=m.get("max"))
+        elif base == "http_reqs":
+            e["count"] = m.get("count")
+            e["rate"] = m.get("rate")
+        elif base == "http_req_failed":
+            e["error_rate"] = m.get("value")
+        elif base == "iterations":
+            e["iterations"] = m.get("count")
+            e["iter_rate"] = m.get("rate")
+    return out
+
+# Фазы запроса k6. http_req_duration = sending + waiting + receiving; blocked идёт до них
+# и уже включает DNS, connecting и tls_handshaking (у переиспользованного соединения всё это 0).
+PHASES = ("blocked", "connecting", "tls_handshaking", "sending", "waiting", "receiving")
+# непересекающиеся части полного времени запроса (blocked + duration) для долей
+PHASE_PARTS = (
+    ("queue", "blocked: DNS / ожидание соединения"),
+    ("connecting", "TCP connect"),
+    ("tls_handshaking", "TLS handshake"),
+    ("sending", "sending"),
+    ("waiting", "waiting (сервер + RTT)"),
+    ("receiving", "receiving"),
+)
+PHASE_COLORS = {"queue": "#c4b5fd", "connecting": "#fdba74", "tls_handshaking": "#fca5a5",
+                "sending": "#fde68a", "waiting": "#93c5fd", "receiving": "#86efac"}
+# доля полного времени, начиная с которой фаза вне сервера попадает в findings
+PHASE_SHARE_WARN = 0.2
+
+def phase_stats(trends):
+    """{phase: trend-метрика http_req_<phase>} -> avg/p95/max по фазам и доли непересекающихся частей."""
+    phases = {p: {"avg": m.get("avg"), "p95": m.get("p(95)"), "max": m.get("max")}
+              for p, m in trends.items() if m.get("avg") is not None}
+    # старые summary без фаз (только http_req_waiting) не разбираем
+    if not all(p in phases for p in ("blocked", "sending", "waiting", "receiving")):
+        return None
+    avg = {p: phases[p]["avg"] if p in phases else 0.0 for p in PHASES}
+    parts = {
+        "queue": max(0.0, avg["blocked"] - avg["connecting"] - avg["tls_handshaking"]),
+        "connecting": avg["connecting"],
+        "tls_handshaking": avg["tls_handshaking"],
+        "sending": avg["sending"],
+        "waiting": avg["waiting"],
+        "receiving": avg["receiving"],
+    }
+    total = sum(parts.values())
+    return {
+        "phases": phases,
+        "total_avg": total,
+        "shares": {k: (v / total if total else None) for k, v in parts.items()},
+        # всё, кроме waiting: установка соединения и передача данных
+        "client_share": (1 - parts["waiting"] / total) if total else None,
+    }
+
+def phase_breakdown(metrics):
+    """Фазы запроса по прогону в целом и по endpoint (sub-метрики http_req_<phase>{endpoint:...})."""
+    total = phase_stats({p: metrics["http_req_" + p] for p in PHASES if "http_req_" + p in metrics})
+    if not total:
+        return None
+    by_endpoint = {}
+    for key, m in metrics.items():
+        if not key.endswith("}") or "{endpoint:" not in key:
+            continue
+        base, tag_part = key[:-1].split("{", 1)
+        if base.startswith("http_req_") and base[len("http_req_"):] in PHASES:
+            by_endpoint.setdefault(tag_part.split(":", 1)[1], {})[base[len("http_req_"):]] = m
+    endpoints = []
+    for name, trends in by_endpoint.items():
+        st = phase_stats(trends)
+        if st:
+            endpoints.append(dict(st, name=name))
+    total["endpoints"] = sorted(endpoints, key=lambda e: -(e["client_share"] or 0))
+    return total
+
+def endpoint_breakdown(metrics):
+    """Sub-метрики вида http_req_duration{endpoint:login_post} из summary-export."""
+    return rank_endpoints(tag_breakdown(metrics, "endpoint").values())
+
+def flow_breakdown(metrics):
+    """Потоки смешанной нагрузки (mixed.js): sub-метрики по k6-тегу scenario."""
+    flows = [f for f in tag_breakdown(metrics, "scenario").values() if f.get("avg") is not None]
+    total = sum(f.get("count") or 0 for f in flows)
+    for f in flows:
+        f["share"] = (f.get("count") or 0) / total if total else None
+    return sorted(flows, key=lambda f: f["name"])
+
+def endpoints_from_timeseries(ts):
+    """То же, но из NDJSON (k6_stream): точные перцентили по мёрджируемым гистограммам."""
+    out = []
+    for name, d in ((ts or {}).get("endpoints") or {}).items():
+        h = k6_stream.Histogram.from_dict(d["hist"])
+        out.append({
+            "name": name, "count": d["count"], "avg": h.mean, "p95": h.quantile(0.95),
+            "p99": h.quantile(0.99), "max": h.max,
+            "error_rate": (d["errors"] / d["count"]) if d["count"] else None,
+        })
+    return rank_endpoints(out)
+
+def rank_endpoints(items):
+    items = [dict(e) for e in items if e.get("avg") is not None]
+    for e in items:
+        e["total_ms"] = (e.get("avg") or 0) * (e.get("count") or 0)
+    total = sum(e["total_ms"] for e in items)
+    for e in items:
+        e["share"] = (e["total_ms"] / total) if total else None
+    # по доле суммарного времени, а при отсутствии count — по p95
+    return sorted(items, key=lambda e: (e["total_ms"], e.get("p95") or 0), reverse=True)
+
+def slowest_endpoint(endpoints):
+    with_p95 = [e for e in endpoints if e.get("p95") is not None]
+    return max(with_p95, key=lambda e: e["p95"]) if with_p95 else None
+
 def get_thresholds(metric_obj):
     # In k6 summary-export, threshold value is usually "breached" boolean:
     # false => OK (not breached), true => FAIL (breached)
@@ -100,6 +489,8 @@ def summarize(summary):
     thresholds = []
     for mname, mobj in metrics.items():
         for expr, breached in get_thresholds(mobj):
+            if expr.replace(" ", "") in TRIVIAL_THRESHOLDS:
+                continue
             thresholds.append({
                 "metric": mname,
                 "expr": expr,
@@ -131,6 +522,11 @@ def summarize(summary):
         "iter_dur_p95": iter_dur.get("p(95)"),
         "vus": vus.get("value"),
         "vus_max": vus_max.get("value"),
+        "dropped_iterations": get_metric(metrics, "dropped_iterations").get("count"),
+
+        "endpoints": endpoint_breakdown(metrics),
+        "flows": flow_breakdown(metrics),
+        "phases": phase_breakdown(metrics),
 
         "data_in": data_in.get("count"),
         "data_in_rate": data_in.get("rate"),
@@ -138,6 +534,36 @@ def summarize(summary):
         "data_out_rate": data_out.get("rate"),
     }
 
+PHASE_ADVICE = {
+    "tls_handshaking": ("❌", "TLS handshakes: переиспользование соединений сломано "
+                              "(нет keep-alive, noConnectionReuse/noVUConnectionReuse или сервер закрывает соединение)"),
+    "connecting": ("⚠️", "установка TCP-соединений: соединения не переиспользуются или переполнена accept-очередь сервера"),
+    "queue": ("⚠️", "blocked до отправки (DNS, ожидание свободного соединения): упирается генератор, а не сервер"),
+    "sending": ("⚠️", "отправка запроса: большие тела запросов или узкий канал от генератора"),
+    "receiving": ("⚠️", "приём ответа: крупные ответы или узкий канал (сжатие, пагинация)"),
+}
+
+def phase_findings(ph):
+    if not ph:
+        return []
+    out = []
+    for part, (icon, text) in PHASE_ADVICE.items():
+        share = ph["shares"].get(part)
+        if share is not None and share >= PHASE_SHARE_WARN:
+            out.append(f"{icon} {fmt_pct(share)} latency — {text}.")
+    if not out and ph["shares"].get("waiting") is not None:
+        out.append(f"ℹ️ {fmt_pct(ph['shares']['waiting'])} latency — waiting (сервер + RTT); "
+                   f"соединение, TLS и передача данных заметной доли не дают.")
+    worst = []
+    for e in ph.get("endpoints") or []:
+        if (e["client_share"] or 0) < PHASE_SHARE_WARN:
+            continue
+        part = max((k for k in e["shares"] if k != "waiting"), key=lambda k: e["shares"][k] or 0)
+        worst.append(f"{e['name']} ({dict(PHASE_PARTS)[part]} {fmt_pct(e['shares'][part])})")
+    if worst:
+        out.append("⚠️ Endpoint'ы, где заметная доля latency вне сервера: " + ", ".join(worst[:3]))
+    return out
+
 def build_auto_findings(env, s):
     findings = []
 
@@ -184,7 +610,51 @@ def build_auto_findings(env, s):
     if rps is not None:
         findings.append(f"ℹ️ Наблюдаемый RPS: {rps:.2f}/s (зависит от VUs и 'think time' в сценарии).")
 
-    # 6) Environment note
+    # 5b) Open model: missed schedule и поправка на coordinated omission
+    dropped = s.get("dropped_iterations")
+    if dropped:
+        findings.append(f"⚠️ k6 не смог запустить {fmt_int(dropped)} итераций по расписанию (dropped_iterations) — "
+                        f"не хватило VUs или сервер не успевал; эти пользователи не попали в latency.")
+    co = s.get("coordinated_omission") or {}
+    if co.get("corrected") and co["raw"]["p99"] and co["corrected"]["p99"] > co["raw"]["p99"] * 1.2:
+        findings.append(f"⚠️ С поправкой на coordinated omission p99 = {fmt_ms(co['corrected']['p99'])} "
+                        f"(сырой {fmt_ms(co['raw']['p99'])}) — реальные пользователи видят хвост хуже.")
+
+    # 5c) Несколько k6-воркеров (WORKERS>1): перекос между генераторами
+    findings.extend(s.get("worker_findings") or [])
+
+    # 6) Slowest endpoint
+    eps = s.get("endpoints") or []
+    slow = slowest_endpoint(eps)
+    if slow:
+        top = eps[0]
+        msg = f"🐢 Самый медленный endpoint: {slow['name']} (p95 {fmt_ms(slow['p95'])})"
+        if top.get("share") is not None:
+            msg += f"; больше всего суммарного времени — {top['name']} ({fmt_pct(top['share'])})"
+        findings.append(msg)
+
+    # 6b) Фазы запроса: где уходит время — соединение/TLS, сервер или передача данных
+    findings.extend(phase_findings(s.get("phases")))
+
+    # 7) Server resources (resource_sampler.py)
+    res = s.get("resources") or {}
+    if res.get("reqs_per_cpu_second") is not None:
+        findings.append(f"ℹ️ Эффективность: {res['reqs_per_cpu_second']:.1f} запросов на CPU-секунду приложения "
+                        f"(CPU avg {fmt_num(res.get('app_cpu_avg_pct'))}%).")
+    growth = res.get("app_rss_kb_per_1k_reqs")
+    if growth is not None and growth > 1024 and (res.get("app_rss_r2") or 0) > 0.5:
+        findings.append(f"⚠️ RSS приложения стабильно растёт: ~{fmt_kb(growth)} на 1000 запросов — возможна утечка памяти.")
+    for name, c in (res.get("containers") or {}).items():
+        if c.get("cpu_max_pct") is not None and c["cpu_max_pct"] > 90:
+            findings.append(f"⚠️ Контейнер {name} упирался в CPU (max {fmt_num(c['cpu_max_pct'])}%).")
+
+    # 7b) Datastore (dbstats.py): самые тяжёлые запросы/команды за прогон
+    findings.extend(s.get("dbstats_findings") or [])
+
+    # 8) Soak trends (soak.py; заполняется только для MODE=soak)
+    findings.extend(s.get("soak_findings") or [])
+
+    # 9) Environment note
     engine = env.get("engine", "")
     base = env.get("base_url", "")
     if engine == "docker" and "localhost" in base:
@@ -192,7 +662,24 @@ def build_auto_findings(env, s):
 
     return findings
 
-def md_report(env, s, summary_path, env_path):
+def load_profile_line(env):
+    """Профиль из env_*.json (run.sh пишет то, что разрешил manifest.py): executor, rate/stages, SLO."""
+    parts = []
+    if env.get("executor"):
+        parts.append(f"{env.get('profile') or 'closed'} / {env['executor']}")
+    if env.get("stages"):
+        parts.append(f"stages {env['stages']}")
+    elif env.get("rate"):
+        parts.append(f"{env['rate']:g} it/s")
+    slo = env.get("slo") or {}
+    if slo.get("p95_ms") is not None:
+        parts.append(f"SLO p95 < {slo['p95_ms']:g} ms")
+    if slo.get("error_rate") is not None:
+        parts.append(f"errors < {slo['error_rate'] * 100:g}%")
+    return "; ".join(parts)
+
+
+def md_report(env, s, summary_path, env_path, history=()):
     lines = []
     lines.append(f"# Load test report — {env.get('scenario','')} ({env.get('mode','')})")
     lines.append("")
@@ -200,6 +687,8 @@ def md_report(env, s, summary_path, env_path):
     lines.append(f"- Base URL: {env.get('base_url','')}")
     lines.append(f"- Engine: {env.get('engine','')}")
     lines.append(f"- VUs: {env.get('vus','')}  Duration: {env.get('duration','')}")
+    if load_profile_line(env):
+        lines.append(f"- Load profile: {load_profile_line(env)}")
     lines.append(f"- OS: {env.get('os',{}).get('name','')} {env.get('os',{}).get('version','')}")
     lines.append(f"- .NET: {env.get('dotnet_version','')}")
     if env.get("git"):
@@ -224,6 +713,54 @@ def md_report(env, s, summary_path, env_path):
     lines.append(f"| data sent | {fmt_bytes(s['data_out'])} ({fmt_bytes(s['data_out_rate'])}/s) |")
     lines.append("")
 
+    if s.get("flows"):
+        lines.append(f"## Flows (mixed workload, combined {fmt_rate(s['http_reqs_rate'])} requests)")
+        lines.append("")
+        lines.append("| Flow | Iterations | it/s | Requests | req/s | traffic | avg | p95 | p99 | errors |")
+        lines.append("|---|---:|---:|---:|---:|---:|---:|---:|---:|---:|")
+        for f in s["flows"]:
+            lines.append(
+                f"| {f['name']} | {fmt_int(f.get('iterations'))} | {fmt_rate(f.get('iter_rate'))} | "
+                f"{fmt_int(f.get('count'))} | {fmt_rate(f.get('rate'))} | {fmt_pct(f.get('share'))} | "
+                f"{fmt_ms(f.get('avg'))} | {fmt_ms(f.get('p95'))} | {fmt_ms(f.get('p99'))} | "
+                f"{fmt_pct(f.get('error_rate'))} |"
+            )
+        lines.append("")
+
+    if s.get("endpoints"):
+        lines.append("## Endpoints (by share of total time)")
+        lines.append("")
+        lines.append("| Endpoint | Count | avg | p95 | p99 | max | errors | share |")
+        lines.append("|---|---:|---:|---:|---:|---:|---:|---:|")
+        for e in s["endpoints"]:
+            lines.append(
+                f"| {e['name']} | {fmt_int(e.get('count'))} | {fmt_ms(e.get('avg'))} | {fmt_ms(e.get('p95'))} | "
+                f"{fmt_ms(e.get('p99'))} | {fmt_ms(e.get('max'))} | {fmt_pct(e.get('error_rate'))} | {fmt_pct(e.get('share'))} |"
+            )
+        lines.append("")
+
+    ph = s.get("phases")
+    if ph:
+        lines.append("## Request phases (share of blocked + duration, by avg)")
+        lines.append("")
+        lines.append("| Phase | avg | p95 | max | share |")
+        lines.append("|---|---:|---:|---:|---:|")
+        for p in PHASES:
+            st = ph["phases"].get(p)
+            if st:
+                share = ph["shares"].get("queue" if p == "blocked" else p)
+                lines.append(f"| {p} | {fmt_ms(st['avg'])} | {fmt_ms(st['p95'])} | {fmt_ms(st['max'])} | {fmt_pct(share)} |")
+        lines.append("")
+        lines.append("share у blocked — без connecting и tls_handshaking (DNS и ожидание свободного соединения).")
+        lines.append("")
+        if ph.get("endpoints"):
+            lines.append("| Endpoint | " + " | ".join(label for _, label in PHASE_PARTS) + " | outside server |")
+            lines.append("|---|" + "---:|" * (len(PHASE_PARTS) + 1))
+            for e in ph["endpoints"]:
+                lines.append(f"| {e['name']} | " + " | ".join(fmt_pct(e["shares"][k]) for k, _ in PHASE_PARTS)
+                             + f" | {fmt_pct(e['client_share'])} |")
+            lines.append("")
+
     lines.append("## Auto findings")
     lines.append("")
     for f in build_auto_findings(env, s):
@@ -249,6 +786,18 @@ def md_report(env, s, summary_path, env_path):
     for c in s["checks_details"][:20]:
         lines.append(f"| {c['path'] or c['name']} | {c['passes']} | {c['fails']} |")
     lines.append("")
+    if history:
+        lines.append("## Previous runs")
+        lines.append("")
+        lines.append("| Timestamp | Git | VUs | RPS | p95 | p99 | http err |")
+        lines.append("|---|---|---:|---:|---:|---:|---:|")
+        for h in history:
+            lines.append(
+                f"| {h['ts']} | {h['git'] or ''} | {fmt_int(h['vus'])} | {fmt_rate(h['rps'])} | "
+                f"{fmt_ms(h['p95_ms'])} | {fmt_ms(h['p99_ms'])} | {fmt_pct(h['error_rate'])} |"
+            )
+        lines.append("")
+
     lines.append("## Raw files")
     lines.append("")
     lines.append(f"- Summary JSON: {summary_path}")
@@ -256,7 +805,116 @@ def md_report(env, s, summary_path, env_path):
     lines.append("")
     return "\n".join(lines)
 
-def html_report(env, s, summary_path, env_path):
+def slowest_li(endpoints):
+    slow = slowest_endpoint(endpoints or [])
+    if not slow:
+        return ""
+    return f"<li>Slowest route: <b class='mono'>{escape(slow['name'])}</b> (p95 {escape(fmt_ms(slow['p95']))})</li>"
+
+def endpoints_card(endpoints):
+    if not endpoints:
+        return ""
+    slow = slowest_endpoint(endpoints)
+    rows = []
+    for e in endpoints:
+        share = e.get("share")
+        bar = "" if share is None else f"<div style='background:#fca5a5;height:8px;width:{share * 100:.1f}%'></div>"
+        hl = " style='background:#fef3c7'" if slow and e["name"] == slow["name"] else ""
+        rows.append(
+            f"<tr{hl}><td class='mono'>{escape(e['name'])}</td><td>{escape(fmt_int(e.get('count')))}</td>"
+            f"<td>{escape(fmt_ms(e.get('avg')))}</td><td>{escape(fmt_ms(e.get('p95')))}</td>"
+            f"<td>{escape(fmt_ms(e.get('p99')))}</td><td>{escape(fmt_ms(e.get('max')))}</td>"
+            f"<td>{escape(fmt_pct(e.get('error_rate')))}</td><td>{escape(fmt_pct(share))}{bar}</td></tr>"
+        )
+    return f"""<div class="card" style="margin-top:16px">
+  <h2 style="margin-top:0">Endpoints (by share of total time)</h2>
+  <table>
+    <tr><th>Endpoint</th><th>Count</th><th>avg</th><th>p95</th><th>p99</th><th>max</th><th>errors</th><th>share</th></tr>
+    {''.join(rows)}
+  </table>
+</div>"""
+
+def phase_bar(shares):
+    return "<div style='display:flex;height:12px;min-width:160px'>" + "".join(
+        f"<div title='{escape(label)} {escape(fmt_pct(shares[k]))}' "
+        f"style='background:{PHASE_COLORS[k]};width:{shares[k] * 100:.1f}%'></div>"
+        for k, label in PHASE_PARTS if shares.get(k)) + "</div>"
+
+def phases_card(ph):
+    if not ph:
+        return ""
+    rows = "".join(
+        f"<tr><td class='mono'>{p}</td><td>{escape(fmt_ms(st['avg']))}</td><td>{escape(fmt_ms(st['p95']))}</td>"
+        f"<td>{escape(fmt_ms(st['max']))}</td><td>{escape(fmt_pct(ph['shares'].get('queue' if p == 'blocked' else p)))}</td></tr>"
+        for p in PHASES for st in [ph["phases"].get(p)] if st
+    )
+    legend = " ".join(
+        f"<span style='display:inline-block;width:10px;height:10px;background:{PHASE_COLORS[k]}'></span> {escape(label)}"
+        for k, label in PHASE_PARTS)
+    ep_rows = "".join(
+        f"<tr><td class='mono'>{escape(e['name'])}</td>"
+        + "".join(f"<td>{escape(fmt_pct(e['shares'][k]))}</td>" for k, _ in PHASE_PARTS)
+        + f"<td>{escape(fmt_pct(e['client_share']))}</td><td>{phase_bar(e['shares'])}</td></tr>"
+        for e in ph.get("endpoints") or []
+    )
+    ep_table = "" if not ep_rows else f"""
+  <h3>By endpoint</h3>
+  <table>
+    <tr><th>Endpoint</th>{''.join(f"<th>{escape(label)}</th>" for _, label in PHASE_PARTS)}<th>outside server</th><th></th></tr>
+    {ep_rows}
+  </table>"""
+    return f"""<div class="card" style="margin-top:16px">
+  <h2 style="margin-top:0">Request phases</h2>
+  <div class="muted">Доли от blocked + duration по avg; share у blocked — без connecting и tls_handshaking.</div>
+  <div style="margin:8px 0">{phase_bar(ph['shares'])}</div>
+  <div class="muted">{legend}</div>
+  <table>
+    <tr><th>Phase</th><th>avg</th><th>p95</th><th>max</th><th>share</th></tr>
+    {rows}
+  </table>{ep_table}
+</div>"""
+
+def flows_card(s):
+    flows = s.get("flows")
+    if not flows:
+        return ""
+    rows = []
+    for f in flows:
+        rows.append(
+            f"<tr><td class='mono'>{escape(f['name'])}</td><td>{escape(fmt_int(f.get('iterations')))}</td>"
+            f"<td>{escape(fmt_rate(f.get('iter_rate')))}</td><td>{escape(fmt_int(f.get('count')))}</td>"
+            f"<td>{escape(fmt_rate(f.get('rate')))}</td><td>{escape(fmt_pct(f.get('share')))}</td>"
+            f"<td>{escape(fmt_ms(f.get('avg')))}</td><td>{escape(fmt_ms(f.get('p95')))}</td>"
+            f"<td>{escape(fmt_ms(f.get('p99')))}</td><td>{escape(fmt_pct(f.get('error_rate')))}</td></tr>"
+        )
+    return f"""<div class="card" style="margin-top:16px">
+  <h2 style="margin-top:0">Flows (mixed workload)</h2>
+  <div class="muted">Все потоки шли одновременно; суммарная пропускная способность: <b>{escape(fmt_rate(s['http_reqs_rate']))}</b> req</div>
+  <table>
+    <tr><th>Flow</th><th>Iterations</th><th>it/s</th><th>Requests</th><th>req/s</th><th>traffic</th><th>avg</th><th>p95</th><th>p99</th><th>errors</th></tr>
+    {''.join(rows)}
+  </table>
+</div>"""
+
+def history_card(history):
+    if not history:
+        return ""
+    rows = "".join(
+        f"<tr><td class='mono'>{escape(h['ts'])}</td><td class='mono'>{escape(h['git'] or '')}</td>"
+        f"<td>{escape(fmt_int(h['vus']))}</td><td>{escape(fmt_rate(h['rps']))}</td>"
+        f"<td>{escape(fmt_ms(h['p95_ms']))}</td><td>{escape(fmt_ms(h['p99_ms']))}</td>"
+        f"<td>{escape(fmt_pct(h['error_rate']))}</td></tr>"
+        for h in history
+    )
+    return f"""<div class="card" style="margin-top:16px">
+  <h2 style="margin-top:0">Previous runs</h2>
+  <table>
+    <tr><th>Timestamp</th><th>Git</th><th>VUs</th><th>RPS</th><th>p95</th><th>p99</th><th>http err</th></tr>
+    {rows}
+  </table>
+</div>"""
+
+def html_report(env, s, summary_path, env_path, history=(), timeseries=None, resources=None):
     def badge(ok, text_ok="OK", text_fail="FAIL"):
         return f"<span style='padding:2px 8px;border-radius:999px;background:{'#d1fae5' if ok else '#fee2e2'}'>{escape(text_ok if ok else text_fail)}</span>"
 
@@ -291,6 +949,7 @@ def html_report(env, s, summary_path, env_path):
       <li>Base URL: <span class="mono">{escape(env.get('base_url',''))}</span></li>
       <li>Engine: {escape(env.get('engine',''))}</li>
       <li>VUs: {escape(str(env.get('vus','')))} Duration: {escape(str(env.get('duration','')))}</li>
+      {f"<li>Load profile: {escape(load_profile_line(env))}</li>" if load_profile_line(env) else ""}
       <li>DB container: <span class="mono">{escape(env.get('db_container',''))}</span></li>
       <li>Git: <span class="mono">{escape(env.get('git',''))}</span></li>
     </ul>
@@ -304,6 +963,7 @@ def html_report(env, s, summary_path, env_path):
       <li>HTTP error rate: <b>{escape(fmt_pct(s['http_failed_rate']))}</b></li>
       <li>RPS: <b>{escape(f"{s['http_reqs_rate']:.2f}/s" if s['http_reqs_rate'] is not None else "-")}</b></li>
       <li>Latency p95: <b>{escape(fmt_ms(s['http_dur_p95']))}</b></li>
+      {slowest_li(s.get('endpoints'))}
     </ul>
   </div>
 </div>
@@ -328,6 +988,10 @@ def html_report(env, s, summary_path, env_path):
   </table>
 </div>
 
+{flows_card(s)}
+{endpoints_card(s.get('endpoints'))}
+{phases_card(s.get('phases'))}
+
 <div class="card" style="margin-top:16px">
   <h2 style="margin-top:0">Auto findings</h2>
   <ul>
@@ -357,6 +1021,14 @@ def html_report(env, s, summary_path, env_path):
   </div>
 </div>
 
+{timeseries_card(timeseries)}
+
+{co_card(s.get("coordinated_omission"))}
+
+{resources_card(s.get("resources"), resources)}
+
+{history_card(history)}
+
 <div class="card" style="margin-top:16px">
   <h2 style="margin-top:0">Raw files</h2>
   <div>Summary JSON: <span class="mono">{escape(str(summary_path))}</span></div>
@@ -365,22 +1037,112 @@ def html_report(env, s, summary_path, env_path):
 """
 
 def main():
+    # lazy: runstore/regress/soak import summarize() from this module (через runstore)
+    import regress
+    import runstore
+    import soak
+
     ap = argparse.ArgumentParser()
-    ap.add_argument("--summary", required=True)
-    ap.add_argument("--env", required=True)
+    ap.add_argument("--summary", help="summary JSON (or use --out/--scenario to take it from the run store)")
+    ap.add_argument("--env")
+    ap.add_argument("--out", help="loadtest out dir; enables the SQLite run store")
+    ap.add_argument("--db", help="run store path (default: <out>/runs.sqlite)")
+    ap.add_argument("--scenario")
+    ap.add_argument("--mode")
+    ap.add_argument("--timeseries", help="reduced NDJSON (default: timeseries_<scenario>_<ts>.json next to the summary)")
+    ap.add_argument("--resources", help="resource samples (default: resources_<scenario>_<ts>.json next to the summary)")
+    ap.add_argument("--profile", help="profiler capture (default: profile_<scenario>_<ts>.json next to the summary)")
+    ap.add_argument("--dbstats", help="datastore stats diff (default: dbstats_<scenario>_<ts>.json next to the summary)")
+    ap.add_argument("--history", type=int, default=10, help="previous runs to show from the run store")
+    regress.add_cli_args(ap)
+    soak.add_cli_args(ap)
     ap.add_argument("--out-md", required=True)
     ap.add_argument("--out-html", required=True)
     args = ap.parse_args()
 
-    summary_path = pathlib.Path(args.summary)
-    env_path = pathlib.Path(args.env)
-    summary = json.loads(summary_path.read_text(encoding="utf-8"))
-    env = json.loads(env_path.read_text(encoding="utf-8"))
+    conn = None
+    if args.out or args.db:
+        out_dir = pathlib.Path(args.out or ".")
+        conn = runstore.open_store(out_dir, pathlib.Path(args.db) if args.db else None)
+
+    if args.summary:
+        if not args.env:
+            ap.error("--env is required with --summary")
+        summary_path = pathlib.Path(args.summary)
+        env_path = pathlib.Path(args.env)
+        summary = json.loads(summary_path.read_text(encoding="utf-8"))
+        env = json.loads(env_path.read_text(encoding="utf-8"))
+    elif conn is not None and args.scenario:
+        row = runstore.latest_run(conn, args.scenario, args.mode)
+        if row is None:
+            raise SystemExit(f"No runs for scenario {args.scenario} in the run store")
+        run = runstore.load_run(row)
+        summary_path, env_path = run["summary_path"], run["env_path"]
+        summary, env = run["summary"], run["env"]
+    else:
+        ap.error("either --summary/--env or --out/--db with --scenario is required")
+
+    history = []
+    cmp = None
+    if conn is not None and env.get("scenario"):
+        m = runstore.SUMMARY_RE.match(pathlib.Path(str(summary_path)).name)
+        before = m.group(2) if m else None
+        history = runstore.history(conn, env["scenario"], env.get("mode"), args.history, before_ts=before)
+        # сравниваем именно переданный прогон, а не самый свежий в хранилище
+        cmp = regress.compare_from_args(conn, env["scenario"], env.get("mode"), args, current_ts=before)
 
     s = summarize(summary)
 
-    pathlib.Path(args.out_md).write_text(md_report(env, s, summary_path, env_path), encoding="utf-8")
-    pathlib.Path(args.out_html).write_text(html_report(env, s, summary_path, env_path), encoding="utf-8")
+    ts_path = pathlib.Path(args.timeseries) if args.timeseries else k6_stream.timeseries_path_for(pathlib.Path(str(summary_path)))
+    timeseries = k6_stream.load_timeseries(ts_path)
+    if timeseries and timeseries.get("endpoints"):
+        s["endpoints"] = endpoints_from_timeseries(timeseries)
+    s["coordinated_omission"] = coordinated_omission(env, s, timeseries)
+
+    res_path = pathlib.Path(args.resources) if args.resources else resource_sampler.resources_path_for(pathlib.Path(str(summary_path)))
+    resources = resource_sampler.load_resources(res_path)
+    if resources:
+        s["resources"] = resource_sampler.resource_stats(resources, s["http_reqs_count"], s["http_reqs_rate"])
+
+    workers_doc = workers.load(workers.workers_path_for(pathlib.Path(str(summary_path))))
+    s["worker_findings"] = workers.findings(workers_doc)
+
+    prof_path = pathlib.Path(args.profile) if args.profile else profiler.profile_path_for(pathlib.Path(str(summary_path)))
+    profile_doc = profiler.load(prof_path)
+
+    db_path = pathlib.Path(args.dbstats) if args.dbstats else dbstats.dbstats_path_for(pathlib.Path(str(summary_path)))
+    dbstats_doc = dbstats.load(db_path)
+    s["dbstats_findings"] = dbstats.findings(dbstats_doc)
+
+    soak_res = None
+    if env.get("mode") == "soak":
+        soak_res = soak.analyze(timeseries, resources, args.soak_window, args.soak_warmup, args.soak_min_effect_pct)
+        s["soak_findings"] = soak.findings(soak_res)
+
+    md = md_report(env, s, summary_path, env_path, history)
+    md += "\n" + "\n".join(timeseries_md(timeseries))
+    md += "\n" + "\n".join(co_md(s["coordinated_omission"]))
+    md += "\n" + "\n".join(workers.md_section(workers_doc))
+    md += "\n" + "\n".join(resources_md(s.get("resources")))
+    md += "\n" + "\n".join(dbstats.md_section(dbstats_doc))
+    md += "\n" + "\n".join(profiler.md_section(profile_doc, pathlib.Path(args.out_md).resolve().parent))
+    md += "\n" + "\n".join(soak.md_section(soak_res))
+    if cmp:
+        md += "\n" + "\n".join(regress.md_section(cmp))
+    pathlib.Path(args.out_md).write_text(md, encoding="utf-8")
+    pathlib.Path(args.out_html).write_text(
+        html_report(env, s, summary_path, env_path, history, timeseries, resources)
+        + workers.html_section(workers_doc)
+        + dbstats.html_section(dbstats_doc)
+        + profiler.html_section(profile_doc, pathlib.Path(args.out_html).resolve().parent)
+        + soak.html_section(soak_res, svg_line_chart)
+        + regress.html_section(cmp), encoding="utf-8")
+
+    if cmp and cmp["regressed"]:
+        print(f"REGRESSION DETECTED: {env['scenario']}")
+        if args.fail_on_regression:
+            return regress.EXIT_REGRESSION
+    return 0
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    raise SystemExit(main())
\ No newline at end of file
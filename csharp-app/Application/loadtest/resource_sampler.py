@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+"""
+Сэмплер ресурсов сервера во время прогона k6 (раз в --interval секунд, по умолчанию 1 с).
+
+- процесс приложения (Mockups): CPU, RSS, потоки, открытые сокеты — из /proc/<pid>
+  (на macOS — через ps, без потоков/сокетов);
+- GC .NET: если установлен dotnet-counters, параллельно пишется System.Runtime
+  (размер кучи, число сборок gen0/1/2, % времени в GC);
+- контейнеры (hits-sql / mssql и любые из --container): `docker stats` в потоковом режиме.
+
+run.sh запускает сэмплер в фоне до k6 и останавливает (SIGTERM) после; результат лежит рядом
+с summary: resources_<scenario>_<ts>.json. report.py сопоставляет его с пропускной способностью.
+
+  python3 resource_sampler.py --out out/resources.json --process Mockups --container hits-sql
+"""
+import argparse
+import csv
+import json
+import os
+import pathlib
+import re
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+OWN_TOOLS = ("resource_sampler", "profiler.py")
+FLUSH_EVERY = 10  # samples; файл переписывается целиком, чтобы пережить kill -9
+ANSI_RE = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
+SIZE_RE = re.compile(r"^\s*([0-9.]+)\s*([A-Za-z]*)\s*$")
+SIZE_UNITS = {"": 1, "b": 1, "kb": 1e3, "kib": 1024, "mb": 1e6, "mib": 1024 ** 2,
+              "gb": 1e9, "gib": 1024 ** 3, "tb": 1e12, "tib": 1024 ** 4}
+
+# dotnet-counters (System.Runtime) -> ключ в сэмпле
+GC_COUNTERS = {
+    "GC Heap Size": "gc_heap_mb",
+    "Gen 0 GC Count": "gen0_gc",
+    "Gen 1 GC Count": "gen1_gc",
+    "Gen 2 GC Count": "gen2_gc",
+    "% Time in GC": "time_in_gc_pct",
+    "Allocation Rate": "alloc_bytes",
+    "ThreadPool Thread Count": "threadpool_threads",
+    "ThreadPool Queue Length": "threadpool_queue",
+}
+
+
+def parse_size(s: str) -> Optional[float]:
+    m = SIZE_RE.match(s or "")
+    if not m:
+        return None
+    return float(m.group(1)) * SIZE_UNITS.get(m.group(2).lower(), 1)
+
+
+def _session_of(pid_dir: pathlib.Path) -> Optional[int]:
+    try:
+        stat = (pid_dir / "stat").read_text()
+        return int(stat[stat.rindex(")") + 2:].split()[3])
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def find_pid(name: str, session: Optional[int] = None) -> Optional[int]:
+    """
+    Первый процесс, в cmdline которого встречается name (Mockups / Mockups.dll).
+    session — только среди процессов этой сессии (экземпляры, поднятые run_suite.py --app-cmd).
+    """
+    me = os.getpid()
+    proc = pathlib.Path("/proc")
+    if proc.is_dir():
+        for d in proc.iterdir():
+            if not d.name.isdigit() or int(d.name) == me:
+                continue
+            try:
+                cmd = (d / "cmdline").read_bytes().replace(b"\0", b" ").decode(errors="replace")
+            except OSError:
+                continue
+            # свои процессы (--process Mockups в командной строке) за приложение не принимаем
+            if name in cmd and not any(tool in cmd for tool in OWN_TOOLS):
+                if session is not None and _session_of(d) != session:
+                    continue
+                return int(d.name)
+        return None
+    try:
+        out = subprocess.run(["pgrep", "-f", name], stdout=subprocess.PIPE, text=True).stdout.split()
+    except OSError:
+        return None
+    pids = [int(p) for p in out if p.isdigit() and int(p) != me]
+    return pids[0] if pids else None
+
+
+class ProcSampler:
+    """CPU/RSS/потоки/сокеты процесса из /proc/<pid> (Linux) или ps (macOS)."""
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.source = "proc" if pathlib.Path(f"/proc/{pid}/stat").exists() else "ps"
+        self._prev = None  # (monotonic, cpu_seconds)
+
+    def _cpu_seconds_proc(self) -> float:
+        stat = pathlib.Path(f"/proc/{self.pid}/stat").read_text()
+        fields = stat[stat.rindex(")") + 2:].split()
+        # fields[11]/[12] = utime/stime (поля 14/15 в man proc)
+        return (int(fields[11]) + int(fields[12])) / CLK_TCK
+
+    def _status_proc(self) -> Dict[str, int]:
+        out = {}
+        for line in pathlib.Path(f"/proc/{self.pid}/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                out["rss_kb"] = int(line.split()[1])
+            elif line.startswith("Threads:"):
+                out["threads"] = int(line.split()[1])
+        return out
+
+    def _fds_proc(self) -> Dict[str, int]:
+        fds = sockets = 0
+        fd_dir = f"/proc/{self.pid}/fd"
+        for fd in os.listdir(fd_dir):
+            fds += 1
+            try:
+                if os.readlink(os.path.join(fd_dir, fd)).startswith("socket:"):
+                    sockets += 1
+            except OSError:
+                continue
+        return {"fds": fds, "sockets": sockets}
+
+    def sample(self) -> Optional[Dict[str, Any]]:
+        now = time.monotonic()
+        try:
+            if self.source == "proc":
+                cpu = self._cpu_seconds_proc()
+                row: Dict[str, Any] = {"cpu_seconds": cpu}
+                row.update(self._status_proc())
+                try:
+                    row.update(self._fds_proc())
+                except OSError:
+                    pass  # fd/ чужого пользователя без прав
+            else:
+                out = subprocess.run(["ps", "-o", "rss=,time=", "-p", str(self.pid)],
+                                     stdout=subprocess.PIPE, text=True).stdout.split()
+                if len(out) < 2:
+                    return None
+                cpu = 0.0
+                for part in out[1].replace("-", ":").split(":"):
+                    cpu = cpu * 60 + float(part)
+                row = {"cpu_seconds": cpu, "rss_kb": int(out[0])}
+        except (OSError, ValueError, IndexError):
+            return None  # процесс завершился
+        if self._prev is not None and now > self._prev[0]:
+            row["cpu_pct"] = 100.0 * (cpu - self._prev[1]) / (now - self._prev[0])
+        self._prev = (now, cpu)
+        return row
+
+
+class DockerStats:
+    """Фоновое чтение `docker stats --format '{{json .}}'` (обновляется само раз в ~1 с)."""
+
+    def __init__(self, containers: List[str]):
+        self.latest: Dict[str, Dict[str, Any]] = {}
+        self._proc = subprocess.Popen(
+            ["docker", "stats", "--format", "{{json .}}"] + containers,
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        self._thread = threading.Thread(target=self._read, daemon=True)
+        self._thread.start()
+
+    def _read(self):
+        for line in self._proc.stdout:
+            line = ANSI_RE.sub("", line).strip()
+            if not line.startswith("{"):
+                continue
+            try:
+                d = json.loads(line)
+            except ValueError:
+                continue
+            mem_used = (d.get("MemUsage") or "").split("/")[0]
+            net = (d.get("NetIO") or "").split("/")
+            self.latest[d.get("Name") or d.get("Container")] = {
+                "cpu_pct": parse_size((d.get("CPUPerc") or "").rstrip("%")),
+                "mem_bytes": parse_size(mem_used),
+                "net_in_bytes": parse_size(net[0]) if net[0] else None,
+                "net_out_bytes": parse_size(net[1]) if len(net) > 1 else None,
+                "pids": int(d["PIDs"]) if str(d.get("PIDs", "")).isdigit() else None,
+            }
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {k: dict(v) for k, v in self.latest.items()}
+
+    def stop(self):
+        self._proc.terminate()
+
+
+def detect_db_container() -> Optional[str]:
+    """Как в run.sh: сначала hits-sql по имени, затем любой контейнер с образом mssql."""
+    try:
+        out = subprocess.run(["docker", "ps", "--format", "{{.Names}} {{.Image}}"],
+                             stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True).stdout
+    except OSError:
+        return None
+    lines = [l.split() for l in out.splitlines() if l.strip()]
+    for pattern in ("hits-sql", "mssql"):
+        for parts in lines:
+            if any(pattern in p for p in parts):
+                return parts[0]
+    return None
+
+
+def start_dotnet_counters(pid: int, csv_path: pathlib.Path, interval: int) -> Optional[subprocess.Popen]:
+    exe = shutil.which("dotnet-counters")
+    if not exe:
+        return None
+    return subprocess.Popen(
+        [exe, "collect", "--process-id", str(pid), "--refresh-interval", str(interval),
+         "--format", "csv", "--output", str(csv_path), "--counters", "System.Runtime"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def read_gc_csv(csv_path: pathlib.Path) -> Dict[int, Dict[str, float]]:
+    """CSV dotnet-counters -> {epoch_second: {gc_heap_mb: ..., gen0_gc: ...}}."""
+    out: Dict[int, Dict[str, float]] = {}
+    if not csv_path.exists():
+        return out
+    with csv_path.open(encoding="utf-8", errors="replace") as f:
+        for row in csv.DictReader(f):
+            name = row.get("Counter Name") or ""
+            key = next((v for k, v in GC_COUNTERS.items() if name.startswith(k)), None)
+            if key is None:
+                continue
+            try:
+                ts = time.mktime(time.strptime(row["Timestamp"][:19], "%m/%d/%Y %H:%M:%S"))
+                val = float(row.get("Mean/Increment") or row.get("Mean") or "nan")
+            except (KeyError, ValueError):
+                continue
+            out.setdefault(int(ts), {})[key] = val
+    return out
+
+
+class Sampler:
+    def __init__(self, args):
+        self.args = args
+        self.out_path = pathlib.Path(args.out)
+        self.samples: List[Dict[str, Any]] = []
+        self.stopping = False
+
+        pid = args.pid or (find_pid(args.process) if args.process else None)
+        self.proc = ProcSampler(pid) if pid else None
+
+        containers = [c for c in args.container if c]
+        if args.detect_db:
+            db = detect_db_container()
+            if db and db not in containers:
+                containers.append(db)
+        self.containers = containers
+        self.docker = DockerStats(containers) if containers and shutil.which("docker") else None
+
+        self.gc_csv = self.out_path.with_suffix(".gc.csv")
+        self.gc_proc = start_dotnet_counters(pid, self.gc_csv, args.interval) if pid and args.gc else None
+
+    def meta(self) -> Dict[str, Any]:
+        return {
+            "interval": self.args.interval,
+            "app": {"pid": self.proc.pid if self.proc else None,
+                    "process": self.args.process,
+                    "source": self.proc.source if self.proc else None,
+                    "gc": self.gc_proc is not None},
+            "containers": self.containers,
+        }
+
+    def flush(self):
+        doc = dict(self.meta(), samples=self.samples)
+        tmp = self.out_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(doc), encoding="utf-8")
+        tmp.replace(self.out_path)
+
+    def run(self):
+        t0 = time.time()
+        next_t = time.monotonic()
+        while not self.stopping:
+            epoch = time.time()
+            row: Dict[str, Any] = {"t": round(epoch - t0, 3), "epoch": epoch}
+            if self.proc:
+                row["app"] = self.proc.sample()
+            if self.docker:
+                row["containers"] = self.docker.snapshot()
+            self.samples.append(row)
+            if len(self.samples) % FLUSH_EVERY == 0:
+                self.flush()
+            next_t += self.args.interval
+            time.sleep(max(0.0, next_t - time.monotonic()))
+        self.finish()
+
+    def finish(self):
+        if self.docker:
+            self.docker.stop()
+        if self.gc_proc:
+            self.gc_proc.send_signal(signal.SIGINT)  # dotnet-counters дописывает CSV по Ctrl+C
+            try:
+                self.gc_proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.gc_proc.kill()
+            gc = read_gc_csv(self.gc_csv)
+            for row in self.samples:
+                if row.get("app") is not None and int(row["epoch"]) in gc:
+                    row["app"].update(gc[int(row["epoch"])])
+        self.flush()
+
+
+# ---------- анализ (используется report.py) ----------
+
+def resources_path_for(summary_path: pathlib.Path) -> pathlib.Path:
+    """summary_<scenario>_<ts>.json -> resources_<scenario>_<ts>.json (рядом)."""
+    return summary_path.with_name("resources_" + summary_path.name[len("summary_"):])
+
+
+def load_resources(path: pathlib.Path) -> Optional[Dict[str, Any]]:
+    if not path.exists():
+        return None
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except ValueError:
+        return None
+
+
+def linear_fit(xs: List[float], ys: List[float]):
+    """МНК: (slope, intercept, r2) или None, если точек меньше трёх."""
+    pts = [(x, y) for x, y in zip(xs, ys) if x is not None and y is not None]
+    n = len(pts)
+    if n < 3:
+        return None
+    mx = sum(x for x, _ in pts) / n
+    my = sum(y for _, y in pts) / n
+    sxx = sum((x - mx) ** 2 for x, _ in pts)
+    if sxx == 0:
+        return None
+    sxy = sum((x - mx) * (y - my) for x, y in pts)
+    syy = sum((y - my) ** 2 for _, y in pts)
+    slope = sxy / sxx
+    r2 = (sxy * sxy / (sxx * syy)) if syy else 1.0
+    return slope, my - slope * mx, r2
+
+
+def _series(samples, *path):
+    out = []
+    for s in samples:
+        v = s
+        for k in path:
+            v = (v or {}).get(k)
+        out.append(v)
+    return out
+
+
+def resource_stats(doc: Dict[str, Any], http_reqs: Optional[float], http_rps: Optional[float]) -> Dict[str, Any]:
+    """Сводка по сэмплам + корреляция с нагрузкой: запросов на CPU-секунду, рост RSS на 1k запросов."""
+    samples = doc.get("samples") or []
+    xs = _series(samples, "t")
+    out: Dict[str, Any] = {"samples": len(samples)}
+
+    cpu_s = [v for v in _series(samples, "app", "cpu_seconds") if v is not None]
+    rss = _series(samples, "app", "rss_kb")
+    if cpu_s:
+        cpu_used = cpu_s[-1] - cpu_s[0]
+        out["app_cpu_seconds"] = cpu_used
+        cpu_pct = [v for v in _series(samples, "app", "cpu_pct") if v is not None]
+        out["app_cpu_avg_pct"] = sum(cpu_pct) / len(cpu_pct) if cpu_pct else None
+        out["app_cpu_max_pct"] = max(cpu_pct) if cpu_pct else None
+        out["reqs_per_cpu_second"] = (http_reqs / cpu_used) if http_reqs and cpu_used > 0 else None
+    rss_v = [v for v in rss if v is not None]
+    if rss_v:
+        out["app_rss_start_kb"] = rss_v[0]
+        out["app_rss_end_kb"] = rss_v[-1]
+        out["app_rss_peak_kb"] = max(rss_v)
+        fit = linear_fit(xs, rss)
+        if fit:
+            out["app_rss_slope_kb_s"] = fit[0]
+            out["app_rss_r2"] = fit[2]
+            # наклон RSS по времени / темп запросов => КБ на 1000 запросов (устойчивее, чем end - start)
+            out["app_rss_kb_per_1k_reqs"] = (fit[0] / http_rps * 1000) if http_rps else None
+    for key in ("threads", "sockets", "gc_heap_mb"):
+        vals = [v for v in _series(samples, "app", key) if v is not None]
+        if vals:
+            out[f"app_{key}_max"] = max(vals)
+    gcs = {}
+    for gen in ("gen0_gc", "gen1_gc", "gen2_gc"):
+        vals = [v for v in _series(samples, "app", gen) if v is not None]
+        if vals:
+            gcs[gen] = sum(vals)  # dotnet-counters отдаёт приращение за интервал
+    if gcs:
+        out["app_gc_counts"] = gcs
+
+    containers = {}
+    for name in doc.get("containers") or []:
+        cpu = [v for v in _series(samples, "containers", name, "cpu_pct") if v is not None]
+        mem = [v for v in _series(samples, "containers", name, "mem_bytes") if v is not None]
+        if cpu or mem:
+            containers[name] = {
+                "cpu_avg_pct": sum(cpu) / len(cpu) if cpu else None,
+                "cpu_max_pct": max(cpu) if cpu else None,
+                "mem_peak_bytes": max(mem) if mem else None,
+                "mem_growth_bytes": (mem[-1] - mem[0]) if mem else None,
+            }
+    out["containers"] = containers
+    return out
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Sample app/container resources while k6 is running.")
+    ap.add_argument("--out", required=True)
+    ap.add_argument("--interval", type=int, default=1, help="seconds")
+    ap.add_argument("--pid", type=int, help="app pid (default: find by --process)")
+    ap.add_argument("--process", default="Mockups", help="substring of the app command line")
+    ap.add_argument("--container", action="append", default=[], help="docker container to sample (repeatable)")
+    ap.add_argument("--no-detect-db", dest="detect_db", action="store_false",
+                    help="do not add the hits-sql/mssql container automatically")
+    ap.add_argument("--no-gc", dest="gc", action="store_false", help="do not start dotnet-counters")
+    args = ap.parse_args()
+
+    sampler = Sampler(args)
+    if not sampler.proc:
+        print(f"[resources] app process '{args.process}' not found; sampling containers only", file=sys.stderr)
+
+    def stop(*_):
+        sampler.stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    sampler.run()
+    print(f"[resources] {len(sampler.samples)} samples -> {sampler.out_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -2,7 +2,7 @@
 set -euo pipefail
 
 SCENARIO="${SCENARIO:-01_anonymous_menu}"
-MODE="${MODE:-baseline}"          # baseline | stress
+MODE="${MODE:-baseline}"          # baseline | stress | soak | capacity
 ENGINE="${ENGINE:-docker}"        # docker | local
 BASE_URL="${BASE_URL:-http://host.docker.internal:5146}"
 OUT_ROOT="${OUT_DIR:-./out}"
@@ -10,36 +10,86 @@ OUT_ROOT="${OUT_DIR:-./out}"
 # Optional overrides
 VUS="${VUS:-}"
 DURATION="${DURATION:-}"
+PROFILE="${PROFILE:-closed}"      # closed (--vus, think time) | open (arrival rate, см. scripts/lib/profile.js)
+RATE="${RATE:-}"                  # итераций/с => constant-arrival-rate вместо --vus (open model)
+STAGES="${STAGES:-}"              # "1m:5,5m:20,1m:0" (длит.:итераций/с) => ramping-arrival-rate
+START_RATE="${START_RATE:-}"
+PRE_VUS="${PRE_VUS:-}"
+MAX_VUS="${MAX_VUS:-}"
+NDJSON="${NDJSON:-true}"          # true => k6 --out json (per-request точки) + timeseries_*.json
+TS_BUCKET="${TS_BUCKET:-}"        # секунд на бакет timeseries (по умолчанию 1, в soak — 10)
+RESOURCES="${RESOURCES:-true}"    # true => resource_sampler.py: CPU/RSS/потоки/сокеты/GC приложения и БД раз в секунду
+APP_PROCESS="${APP_PROCESS:-Mockups}"
+APP_PID="${APP_PID:-}"
+WORKERS="${WORKERS:-1}"           # >1 => N k6-генераторов параллельно, профиль делится между ними (workers.py)
+POOL_FILE="${POOL_FILE:-}"        # пул заранее созданных аккаунтов для 02/03 (seed_pool.py), вместо регистрации в setup()
+SEED_POOL="${SEED_POOL:-0}"       # >0 => засеять пул из N аккаунтов перед прогоном и удалить после (нужен LoadTestSeed__Enabled=true)
+PROFILER="${PROFILER:-off}"       # auto | py-spy | dotnet-trace => CPU-профиль приложения в установившейся фазе (profiler.py)
+DBSTATS="${DBSTATS:-true}"        # true => dbstats.py: статистика SQL Server / Redis до и после k6 (топ запросов за прогон)
+REDIS_URL="${REDIS_URL:-auto}"    # Redis для dbstats (python3-app): redis://host:port[/db] | auto (localhost:6379) | off
 
-SCRIPT_DIR="$(dirname "$0")/scripts/scenarios"
-SCRIPT="$SCRIPT_DIR/${SCENARIO}.js"
+# Профиль нагрузки, SLO и env сценария — из манифеста scenarios.json (manifest.py);
+# явно заданные VUS/DURATION/RATE/STAGES/SLO_* имеют приоритет.
+MANIFEST_OUT="$(BASE_URL="$BASE_URL" VUS="$VUS" DURATION="$DURATION" RATE="$RATE" STAGES="$STAGES" \
+  python3 "$(dirname "$0")/manifest.py" shell --scenario "$SCENARIO" --mode "$MODE" --profile "$PROFILE")" || {
+  echo "Cannot resolve $SCENARIO/$MODE from scenarios.json (see: python3 manifest.py list)"
+  exit 1
+}
+eval "$MANIFEST_OUT"
 
+SCRIPT="$(dirname "$0")/$M_SCRIPT"
 if [[ ! -f "$SCRIPT" ]]; then
   echo "Scenario script not found: $SCRIPT"
   exit 1
 fi
+if [[ -n "$M_MISSING_ENV" ]]; then
+  echo "Required env for $SCENARIO is not set: $M_MISSING_ENV"
+  exit 1
+fi
+
+VUS="$M_VUS"
+DURATION="$M_DURATION"
+RATE="$M_RATE"
+STAGES="$M_STAGES"
+EXECUTOR="$M_EXECUTOR"
+[[ -n "$PRE_VUS" || "$EXECUTOR" == "constant-vus" || "$EXECUTOR" == "mixed" ]] || PRE_VUS="$VUS"
 
-# Default load profiles (tweak as you wish)
-if [[ -z "$VUS" || -z "$DURATION" ]]; then
-  if [[ "$MODE" == "baseline" ]]; then
-    case "$SCENARIO" in
-      01_anonymous_menu) VUS="${VUS:-15}"; DURATION="${DURATION:-100s}" ;;
-      02_auth_flow)      VUS="${VUS:-8}";  DURATION="${DURATION:-100s}" ;;
-      03_checkout_flow)  VUS="${VUS:-8}";  DURATION="${DURATION:-100s}" ;;
-      04_admin_browse)   VUS="${VUS:-8}";  DURATION="${DURATION:-100s}" ;;
-      *)                 VUS="${VUS:-10}"; DURATION="${DURATION:-100s}" ;;
-    esac
-  else
-    # stress
-    case "$SCENARIO" in
-      01_anonymous_menu) VUS="${VUS:-50}";  DURATION="${DURATION:-180s}" ;;
-      02_auth_flow)      VUS="${VUS:-30}";  DURATION="${DURATION:-180s}" ;;
-      03_checkout_flow)  VUS="${VUS:-25}";  DURATION="${DURATION:-180s}" ;;
-      04_admin_browse)   VUS="${VUS:-25}";  DURATION="${DURATION:-180s}" ;;
-      *)                 VUS="${VUS:-25}";  DURATION="${DURATION:-180s}" ;;
-    esac
+# open model: профиль нагрузки задаёт сам сценарий (scripts/lib/profile.js),
+# а --vus/--duration не передаём: они перебили бы options.scenarios.
+# build_load_args <vus> <rate> <stages> <start_rate> <pre_vus> <max_vus> -> LOAD_ARGS
+build_load_args() {
+  local vus="$1" rate="$2" stages="$3" start_rate="$4" pre_vus="$5" max_vus="$6"
+  case "$EXECUTOR" in
+    mixed)
+      # mixed.js сам раскладывает VUS/RATE по потокам согласно MIX
+      LOAD_ARGS=(-e VUS="$vus" -e DURATION="$DURATION")
+      [[ -n "$rate" ]] && LOAD_ARGS+=(-e RATE="$rate")
+      ;;
+    ramping-arrival-rate)
+      LOAD_ARGS=(-e STAGES="$stages")
+      [[ -n "$start_rate" ]] && LOAD_ARGS+=(-e START_RATE="$start_rate")
+      ;;
+    constant-arrival-rate)
+      LOAD_ARGS=(-e RATE="$rate" -e DURATION="$DURATION")
+      ;;
+    *)
+      LOAD_ARGS=(--vus "$vus" --duration "$DURATION")
+      ;;
+  esac
+  if [[ "$EXECUTOR" == *arrival-rate ]]; then
+    [[ -n "$pre_vus" ]] && LOAD_ARGS+=(-e PRE_VUS="$pre_vus")
+    [[ -n "$max_vus" ]] && LOAD_ARGS+=(-e MAX_VUS="$max_vus")
   fi
+  LOAD_ARGS+=(${M_ENV_ARGS[@]+"${M_ENV_ARGS[@]}"})
+}
+build_load_args "$VUS" "$RATE" "$STAGES" "$START_RATE" "$PRE_VUS" "$MAX_VUS"
+
+if [[ "$WORKERS" -gt 1 && "$NDJSON" != "true" ]]; then
+  # перцентили воркеров сводятся только через гистограммы из NDJSON
+  echo "WORKERS=$WORKERS requires NDJSON=true, enabling it"
+  NDJSON=true
 fi
+TS_BUCKET="${TS_BUCKET:-$([[ "$MODE" == "soak" ]] && echo 10 || echo 1)}"
 
 mkdir -p "$OUT_ROOT"
 TS="$(date +%Y%m%d_%H%M%S)"
@@ -48,6 +98,29 @@ mkdir -p "$SC_OUT"
 
 SUMMARY_JSON="$SC_OUT/summary_${SCENARIO}_${TS}.json"
 ENV_JSON="$SC_OUT/env_${SCENARIO}_${TS}.json"
+METRICS_NDJSON="$SC_OUT/metrics_${SCENARIO}_${TS}.ndjson.gz"
+TIMESERIES_JSON="$SC_OUT/timeseries_${SCENARIO}_${TS}.json"
+RESOURCES_JSON="$SC_OUT/resources_${SCENARIO}_${TS}.json"
+PROFILE_JSON="$SC_OUT/profile_${SCENARIO}_${TS}.json"
+DBSTATS_JSON="$SC_OUT/dbstats_${SCENARIO}_${TS}.json"
+
+if [[ -z "$POOL_FILE" && "$SEED_POOL" -gt 0 ]]; then
+  POOL_FILE="$SC_OUT/pool_${SCENARIO}_${TS}.json"
+  python3 "$(dirname "$0")/seed_pool.py" --base-url "$BASE_URL" seed --count "$SEED_POOL" --out "$POOL_FILE"
+  # пул этого прогона удаляем при любом выходе (в т.ч. по ошибке k6)
+  trap 'python3 "$(dirname "$0")/seed_pool.py" cleanup --pool "$POOL_FILE" || true' EXIT
+fi
+# k6 в контейнере видит файл пула только через отдельный read-only mount
+POOL_MOUNT=()
+POOL_DOCKER_ENV=()
+POOL_LOCAL_ENV=()
+if [[ -n "$POOL_FILE" ]]; then
+  [[ -f "$POOL_FILE" ]] || { echo "POOL_FILE not found: $POOL_FILE"; exit 1; }
+  POOL_ABS="$(cd "$(dirname "$POOL_FILE")" && pwd)/$(basename "$POOL_FILE")"
+  POOL_MOUNT=(-v "$POOL_ABS:/pool/user_pool.json:ro")
+  POOL_DOCKER_ENV=(-e POOL_FILE=/pool/user_pool.json)
+  POOL_LOCAL_ENV=(-e POOL_FILE="$POOL_ABS")
+fi
 
 # Helpful warning
 if [[ "$ENGINE" == "docker" && "$BASE_URL" == *"localhost"* ]]; then
@@ -57,16 +130,21 @@ if [[ "$ENGINE" == "docker" && "$BASE_URL" == *"localhost"* ]]; then
   echo ""
 fi
 
-# Collect env info (best-effort)
-OS_NAME="$(uname -s || true)"
-OS_VER="$(uname -r || true)"
-DOTNET_VER="$(dotnet --version 2>/dev/null || true)"
+# Collect env info (best-effort). PROBE_* передаёт run_suite.py (envprobe.py): пробы делаются один раз на suite.
+# Git-ревизия читается всегда: к ней привязываются регрессии и тренды в runstore
+OS_NAME="${PROBE_OS_NAME-$(uname -s || true)}"
+OS_VER="${PROBE_OS_VER-$(uname -r || true)}"
+DOTNET_VER="${PROBE_DOTNET_VER-$(dotnet --version 2>/dev/null || true)}"
 GIT_REV="$(git rev-parse --short HEAD 2>/dev/null || true)"
 
 # Find DB container (prefer hits-sql name, fallback mssql image)
-DB_LINE="$(docker ps --format '{{.ID}} {{.Names}} {{.Image}} {{.Status}} {{.Ports}}' 2>/dev/null | (grep -E 'hits-sql' || true) | head -n 1)"
-if [[ -z "$DB_LINE" ]]; then
-  DB_LINE="$(docker ps --format '{{.ID}} {{.Names}} {{.Image}} {{.Status}} {{.Ports}}' 2>/dev/null | (grep -E 'mssql' || true) | head -n 1)"
+if [[ -n "${PROBE_DB_LINE+set}" ]]; then
+  DB_LINE="$PROBE_DB_LINE"
+else
+  DB_LINE="$(docker ps --format '{{.ID}} {{.Names}} {{.Image}} {{.Status}} {{.Ports}}' 2>/dev/null | (grep -E 'hits-sql' || true) | head -n 1)"
+  if [[ -z "$DB_LINE" ]]; then
+    DB_LINE="$(docker ps --format '{{.ID}} {{.Names}} {{.Image}} {{.Status}} {{.Ports}}' 2>/dev/null | (grep -E 'mssql' || true) | head -n 1)"
+  fi
 fi
 
 cat > "$ENV_JSON" <<EOF
@@ -76,7 +154,16 @@ cat > "$ENV_JSON" <<EOF
   "mode": "$MODE",
   "engine": "$ENGINE",
   "base_url": "$BASE_URL",
-  "vus": $VUS,
+  "vus": ${VUS:-null},
+  "rate": ${RATE:-null},
+  "executor": "$EXECUTOR",
+  "stages": "$STAGES",
+  "profile": "$PROFILE",
+  "slo": $M_SLO_JSON,
+  "mix": "$M_MIX",
+  "workers": $WORKERS,
+  "user_pool": "$POOL_FILE",
+  "profiler": "$PROFILER",
   "duration": "$DURATION",
   "os": { "name": "$OS_NAME", "version": "$OS_VER" },
   "dotnet_version": "$DOTNET_VER",
@@ -85,36 +172,198 @@ cat > "$ENV_JSON" <<EOF
 }
 EOF
 
+# p(99) нужен для сравнения прогонов (regress.py)
+TREND_STATS="avg,min,med,max,p(90),p(95),p(99)"
+
+# опции k6 из окружения (K6_NO_CONNECTION_REUSE, K6_BATCH_PER_HOST, ...; sweep.py) нужны и k6 в контейнере
+K6_ENV_ARGS=()
+for name in $(compgen -e); do
+  [[ "$name" == K6_* ]] && K6_ENV_ARGS+=(-e "$name")
+done
+
+DOCKER_OUT_ARGS=()
+LOCAL_OUT_ARGS=()
+if [[ "$NDJSON" == "true" ]]; then
+  DOCKER_OUT_ARGS=(--out "json=/out/$(basename "$METRICS_NDJSON")")
+  LOCAL_OUT_ARGS=(--out "json=$METRICS_NDJSON")
+fi
+
 echo "=== k6 run ==="
 echo " scenario: $SCENARIO"
 echo " mode:     $MODE"
 echo " engine:   $ENGINE"
 echo " base_url: $BASE_URL"
 echo " vus:      $VUS"
+echo " rate:     ${RATE:--}"
+echo " stages:   ${STAGES:--}"
 echo " duration: $DURATION"
+echo " workers:  $WORKERS"
+echo " pool:     ${POOL_FILE:--}"
 echo " out:      $SC_OUT"
 echo ""
 
-if [[ "$ENGINE" == "docker" ]]; then
+SAMPLER_PID=""
+if [[ "$RESOURCES" == "true" ]]; then
+  SAMPLER_ARGS=(--out "$RESOURCES_JSON" --process "$APP_PROCESS")
+  [[ -n "$APP_PID" ]] && SAMPLER_ARGS+=(--pid "$APP_PID")
+  python3 "$(dirname "$0")/resource_sampler.py" "${SAMPLER_ARGS[@]}" &
+  SAMPLER_PID=$!
+fi
+
+PROFILER_PID=""
+if [[ "$PROFILER" != "off" ]]; then
+  PROFILER_ARGS=(--out "$PROFILE_JSON" --tool "$PROFILER" --process "$APP_PROCESS")
+  [[ -n "$APP_PID" ]] && PROFILER_ARGS+=(--pid "$APP_PID")
+  [[ -n "$STAGES" ]] && PROFILER_ARGS+=(--stages "$STAGES") || PROFILER_ARGS+=(--duration "$DURATION")
+  [[ -n "$START_RATE" ]] && PROFILER_ARGS+=(--start-rate "$START_RATE")
+  # окно отсчитывается от старта k6 (появления NDJSON), а не от запуска контейнера
+  if [[ "$NDJSON" == "true" && "$WORKERS" -gt 1 ]]; then
+    PROFILER_ARGS+=(--anchor "$SC_OUT/workers_${SCENARIO}_${TS}/w1/metrics.ndjson.gz")
+  elif [[ "$NDJSON" == "true" ]]; then
+    PROFILER_ARGS+=(--anchor "$METRICS_NDJSON")
+  fi
+  python3 "$(dirname "$0")/profiler.py" "${PROFILER_ARGS[@]}" &
+  PROFILER_PID=$!
+fi
+
+if [[ "$DBSTATS" == "true" ]]; then
+  # тот же контейнер БД, что в env_*.json (имя — второе поле DB_LINE)
+  DB_NAME="$(echo "$DB_LINE" | awk '{print $2}')"
+  python3 "$(dirname "$0")/dbstats.py" before --out "$DBSTATS_JSON" \
+    --redis "$REDIS_URL" --container "${DB_NAME:-off}" || true
+fi
+
+# exit 99 = breached thresholds: артефакты всё равно нужно дообработать, код вернём в конце
+set +e
+if [[ "$WORKERS" -gt 1 ]]; then
+  # каждый воркер — свой k6 со своей долей профиля; результаты сводит workers.py merge
+  WORKERS_DIR="$SC_OUT/workers_${SCENARIO}_${TS}"
+  mkdir -p "$WORKERS_DIR"
+  PLAN_ARGS=(--workers "$WORKERS" --save "$WORKERS_DIR/plan.json")
+  [[ -n "$VUS" ]] && PLAN_ARGS+=(--vus "$VUS")
+  [[ -n "$RATE" ]] && PLAN_ARGS+=(--rate "$RATE")
+  [[ -n "$STAGES" ]] && PLAN_ARGS+=(--stages "$STAGES")
+  [[ -n "$START_RATE" ]] && PLAN_ARGS+=(--start-rate "$START_RATE")
+  [[ -n "$PRE_VUS" ]] && PLAN_ARGS+=(--pre-vus "$PRE_VUS")
+  [[ -n "$MAX_VUS" ]] && PLAN_ARGS+=(--max-vus "$MAX_VUS")
+  eval "$(python3 "$(dirname "$0")/workers.py" plan "${PLAN_ARGS[@]}")"
+
+  WORKER_PIDS=()
+  for i in "${!W_WORKER[@]}"; do
+    W_DIR="$WORKERS_DIR/${W_WORKER[$i]}"
+    mkdir -p "$W_DIR"
+    build_load_args "${W_VUS[$i]}" "${W_RATE[$i]}" "${W_STAGES[$i]}" "${W_START_RATE[$i]}" "${W_PRE_VUS[$i]}" "${W_MAX_VUS[$i]}"
+    if [[ "$ENGINE" == "docker" ]]; then
+      docker run --rm \
+        -e K6_INSECURE_SKIP_TLS_VERIFY=true \
+        -v "$(cd "$W_DIR" && pwd):/out" \
+        -v "$(cd "$(dirname "$0")" && pwd)/scripts:/scripts:ro" \
+        ${POOL_MOUNT[@]+"${POOL_MOUNT[@]}"} \
+        ${K6_ENV_ARGS[@]+"${K6_ENV_ARGS[@]}"} \
+        grafana/k6:latest run "/$M_SCRIPT" \
+          "${LOAD_ARGS[@]}" \
+          --summary-trend-stats "$TREND_STATS" \
+          --summary-export /out/summary.json \
+          --out json=/out/metrics.ndjson.gz \
+          --tag worker="${W_WORKER[$i]}" \
+          ${POOL_DOCKER_ENV[@]+"${POOL_DOCKER_ENV[@]}"} -e POOL_WORKER="$i" -e POOL_WORKERS="$WORKERS" \
+          -e BASE_URL="$BASE_URL" -e SCENARIO="$SCENARIO" -e MODE="$MODE" \
+        </dev/null >"$W_DIR/k6.log" 2>&1 &
+    else
+      k6 run "$SCRIPT" \
+        "${LOAD_ARGS[@]}" \
+        --summary-trend-stats "$TREND_STATS" \
+        --summary-export "$W_DIR/summary.json" \
+        --out "json=$W_DIR/metrics.ndjson.gz" \
+        --tag worker="${W_WORKER[$i]}" \
+        ${POOL_LOCAL_ENV[@]+"${POOL_LOCAL_ENV[@]}"} -e POOL_WORKER="$i" -e POOL_WORKERS="$WORKERS" \
+        -e BASE_URL="$BASE_URL" -e SCENARIO="$SCENARIO" -e MODE="$MODE" \
+        </dev/null >"$W_DIR/k6.log" 2>&1 &
+    fi
+    WORKER_PIDS+=($!)
+    echo " worker ${W_WORKER[$i]}: pid $! (log: $W_DIR/k6.log)"
+  done
+  WORKER_FAILED=0
+  for pid in "${WORKER_PIDS[@]}"; do
+    wait "$pid"
+    rc=$?
+    [[ $rc -ne 0 && $rc -ne 99 ]] && WORKER_FAILED=1
+  done
+  # пороги перепроверяются на сведённых данных: 99 — нарушены, 1 — какой-то воркер не отдал summary
+  python3 "$(dirname "$0")/workers.py" merge --dir "$WORKERS_DIR" \
+    --summary "$SUMMARY_JSON" --timeseries "$TIMESERIES_JSON" --bucket "$TS_BUCKET"
+  K6_RC=$?
+  [[ $WORKER_FAILED -eq 1 && $K6_RC -eq 0 ]] && K6_RC=1
+elif [[ "$ENGINE" == "docker" ]]; then
   docker run --rm -i \
     -e K6_INSECURE_SKIP_TLS_VERIFY=true \
     -v "$(cd "$SC_OUT" && pwd):/out" \
     -v "$(cd "$(dirname "$0")" && pwd)/scripts:/scripts:ro" \
-    grafana/k6:latest run "/scripts/scenarios/${SCENARIO}.js" \
-      --vus "$VUS" --duration "$DURATION" \
+    ${POOL_MOUNT[@]+"${POOL_MOUNT[@]}"} \
+    ${K6_ENV_ARGS[@]+"${K6_ENV_ARGS[@]}"} \
+    grafana/k6:latest run "/$M_SCRIPT" \
+      "${LOAD_ARGS[@]}" \
+      --summary-trend-stats "$TREND_STATS" \
       --summary-export "/out/$(basename "$SUMMARY_JSON")" \
+      ${DOCKER_OUT_ARGS[@]+"${DOCKER_OUT_ARGS[@]}"} \
+      ${POOL_DOCKER_ENV[@]+"${POOL_DOCKER_ENV[@]}"} \
       -e BASE_URL="$BASE_URL" -e SCENARIO="$SCENARIO" -e MODE="$MODE"
+  K6_RC=$?
 else
   k6 run "$SCRIPT" \
-    --vus "$VUS" --duration "$DURATION" \
+    "${LOAD_ARGS[@]}" \
+    --summary-trend-stats "$TREND_STATS" \
     --summary-export "$SUMMARY_JSON" \
+    ${LOCAL_OUT_ARGS[@]+"${LOCAL_OUT_ARGS[@]}"} \
+    ${POOL_LOCAL_ENV[@]+"${POOL_LOCAL_ENV[@]}"} \
     -e BASE_URL="$BASE_URL" -e SCENARIO="$SCENARIO" -e MODE="$MODE"
+  K6_RC=$?
+fi
+set -e
+
+if [[ -f "$DBSTATS_JSON" ]]; then
+  python3 "$(dirname "$0")/dbstats.py" after --out "$DBSTATS_JSON" || true
+fi
+
+if [[ -n "$SAMPLER_PID" ]]; then
+  kill -TERM "$SAMPLER_PID" 2>/dev/null || true
+  wait "$SAMPLER_PID" 2>/dev/null || true
+fi
+
+if [[ -n "$PROFILER_PID" ]]; then
+  # k6 закончил: профилировщик отменяет ещё не начатый захват или дописывает начатый
+  kill -TERM "$PROFILER_PID" 2>/dev/null || true
+  wait "$PROFILER_PID" 2>/dev/null || true
+fi
+
+if [[ "$NDJSON" == "true" && -f "$METRICS_NDJSON" ]]; then
+  python3 "$(dirname "$0")/k6_stream.py" --in "$METRICS_NDJSON" --out "$TIMESERIES_JSON" \
+    --bucket "$TS_BUCKET"
 fi
 
 echo ""
 echo "Saved:"
 echo " - $SUMMARY_JSON"
 echo " - $ENV_JSON"
+if [[ -f "$TIMESERIES_JSON" ]]; then
+  [[ -f "$METRICS_NDJSON" ]] && echo " - $METRICS_NDJSON"
+  echo " - $TIMESERIES_JSON"
+fi
+if [[ -n "${WORKERS_DIR:-}" ]]; then
+  echo " - $WORKERS_DIR/ (per-worker k6 output)"
+  echo " - $SC_OUT/workers_${SCENARIO}_${TS}.json"
+fi
+if [[ -f "$RESOURCES_JSON" ]]; then
+  echo " - $RESOURCES_JSON"
+fi
+if [[ -f "$PROFILE_JSON" ]]; then
+  echo " - $PROFILE_JSON (+ profile_${SCENARIO}_${TS}.* artifacts)"
+fi
+if [[ -f "$DBSTATS_JSON" ]]; then
+  echo " - $DBSTATS_JSON"
+fi
 echo ""
 echo "Next:"
-echo " - SCENARIO=$SCENARIO ./make_report.sh"
\ No newline at end of file
+echo " - SCENARIO=$SCENARIO ./make_report.sh"
+
+exit "$K6_RC"
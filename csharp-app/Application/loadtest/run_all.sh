@@ -4,21 +4,60 @@ set -euo pipefail
 BASE_URL="${BASE_URL:-http://host.docker.internal:5146}"
 ENGINE="${ENGINE:-docker}"
 OUT_DIR="${OUT_DIR:-./out}"
-MODE="${MODE:-baseline}"   # baseline | stress
+MODE="${MODE:-baseline}"   # baseline | stress | soak | capacity — профили в scenarios.json
+COMPARE_LAST="${COMPARE_LAST:-5}"              # 0 = не сравнивать с предыдущими прогонами
+FAIL_ON_REGRESSION="${FAIL_ON_REGRESSION:-true}"
 
-SCENARIOS=(01_anonymous_menu 02_auth_flow 03_checkout_flow 04_admin_browse)
+WORKLOAD="${WORKLOAD:-sequential}"   # sequential | mixed (все потоки одновременно, доли — MIX)
+SEED_POOL="${SEED_POOL:-0}"          # >0 => один пул из N аккаунтов на весь набор (seed_pool.py), удаляется в конце
 
+if [[ "$WORKLOAD" == "mixed" ]]; then
+  SCENARIOS=(mixed)
+else
+  # набор — сценарии из scenarios.json (кроме помеченных "suite": false)
+  mapfile -t SCENARIOS < <(python3 "$(dirname "$0")/manifest.py" list --suite)
+fi
+
+if [[ -z "${POOL_FILE:-}" && "$SEED_POOL" -gt 0 ]]; then
+  export POOL_FILE="$OUT_DIR/user_pool_$(date +%Y%m%d_%H%M%S).json"
+  python3 "$(dirname "$0")/seed_pool.py" --base-url "$BASE_URL" seed --count "$SEED_POOL" --out "$POOL_FILE"
+  trap 'python3 "$(dirname "$0")/seed_pool.py" cleanup --pool "$POOL_FILE" || true' EXIT
+fi
+
+# как в run_suite.py: 99 (пороги нарушены) — результат прогона, а не сбой; остальные сценарии идут дальше
+FAILED=""
 for s in "${SCENARIOS[@]}"; do
   echo ""
   echo "=============================="
   echo "Running scenario: $s ($MODE)"
   echo "=============================="
-  SCENARIO="$s" MODE="$MODE" BASE_URL="$BASE_URL" ENGINE="$ENGINE" OUT_DIR="$OUT_DIR" \
-    ./run.sh
+  rc=0
+  SCENARIO="$s" MODE="$MODE" BASE_URL="$BASE_URL" ENGINE="$ENGINE" OUT_DIR="$OUT_DIR" SEED_POOL=0 \
+    ./run.sh || rc=$?
+  if [[ $rc -eq 99 ]]; then
+    echo "Scenario $s: thresholds breached"
+  elif [[ $rc -ne 0 ]]; then
+    echo "Scenario $s failed (exit $rc), stopping the suite"
+    FAILED="$s"
+    break
+  fi
 done
 
 echo ""
 echo "=============================="
 echo "Building suite report"
 echo "=============================="
-OUT_DIR="$OUT_DIR" ./make_suite_report.sh
\ No newline at end of file
+REPORT_ARGS=(--mode "$MODE" --compare-last "$COMPARE_LAST")
+if [[ "$FAIL_ON_REGRESSION" == "true" ]]; then
+  REPORT_ARGS+=(--fail-on-regression)
+fi
+# exit 2 => найдена регрессия относительно предыдущих прогонов (можно использовать как gate в CI)
+# soak: exit 2 также при значимом росте latency/памяти за прогон (soak.py)
+# отчёт строится всегда, в том числе после сбоя сценария
+REPORT_RC=0
+OUT_DIR="$OUT_DIR" ./make_suite_report.sh "${REPORT_ARGS[@]}" || REPORT_RC=$?
+
+if [[ -n "$FAILED" ]]; then
+  exit 1
+fi
+exit "$REPORT_RC"
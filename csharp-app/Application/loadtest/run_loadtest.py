@@ -1,13 +1,20 @@
 #!/usr/bin/env python3
 import argparse
 import json
+import os
 import platform
-import re
 import subprocess
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, Optional, Tuple, List
 
+import dbstats
+import envprobe
+import manifest
+import profiler
+
+HERE = Path(__file__).resolve().parent
+
 
 def run_cmd(cmd: List[str], cwd: Optional[str] = None) -> Tuple[int, str]:
     p = subprocess.run(cmd, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
@@ -27,41 +34,16 @@ def try_cmd(cmd: List[str]) -> Optional[str]:
     return out.strip() if code == 0 else None
 
 
-def parse_duration_to_seconds(s: str) -> int:
-    # "15s" / "2m" / "1h"
-    m = re.match(r"^\s*(\d+)\s*([smh])\s*$", s)
-    if not m:
-        return 0
-    n = int(m.group(1))
-    unit = m.group(2)
-    if unit == "s":
-        return n
-    if unit == "m":
-        return n * 60
-    if unit == "h":
-        return n * 3600
-    return 0
-
-
-def parse_k6_stages(js_path: Path) -> Dict[str, Any]:
-    """
-    Очень простая эвристика: ищем duration:".." и target: N
-    Работает для наших скриптов (stages: [{duration:"..", target:..}, ...])
-    """
-    txt = js_path.read_text(encoding="utf-8", errors="ignore")
-
-    durations = re.findall(r'duration\s*:\s*["\']([^"\']+)["\']', txt)
-    targets = re.findall(r'target\s*:\s*(\d+)', txt)
-
-    total_sec = sum(parse_duration_to_seconds(d) for d in durations)
-    max_vu = max([int(x) for x in targets], default=0)
-
-    return {
-        "stages": [{"duration": d} for d in durations],
-        "duration_seconds": total_sec,
-        "duration_human": f"{total_sec // 60}m{total_sec % 60:02d}s" if total_sec else "unknown",
-        "max_vus": max_vu,
-    }
+def describe_profile(r: Dict[str, Any]) -> str:
+    """Профиль нагрузки, который реально передан в k6 (manifest.resolve)."""
+    if r["stages"]:
+        load = f"ramping-arrival-rate, stages {r['stages']}"
+    elif r["rate"]:
+        load = f"{r['executor']}, {r['rate']:g} it/s × {r['duration']}"
+    else:
+        load = f"{r['executor']}, {r['vus']} VUs × {r['duration']}"
+    slo = r["slo"]
+    return f"{r['mode']}/{r['profile']}: {load}; SLO p95<{slo.get('p95_ms', '—')}ms, errors<{slo.get('error_rate', '—')}"
 
 
 def detect_db_container() -> str:
@@ -91,15 +73,17 @@ def detect_db_container() -> str:
 
 
 def docker_k6_version() -> str:
-    out = try_cmd(["docker", "run", "--rm", "grafana/k6", "version"])
-    return out or "unknown"
+    # без запуска контейнера: версия из метаданных образа (envprobe.py)
+    return envprobe.k6_version("docker")
 
 
-def docker_k6_run(script_base: str, base_url: str, scripts_dir: Path, out_dir: Path,
-                  extra_env: Dict[str, str]) -> Tuple[Path, Path]:
+def docker_k6_run(r: Dict[str, Any], base_url: str, scripts_dir: Path, out_dir: Path,
+                  extra_env: Dict[str, str], profiler_tool: Optional[str] = None,
+                  app_process: str = "Mockups", dbstats_redis: Optional[str] = None) -> Tuple[Path, Path]:
     ts = now_ts()
-    summary_path = out_dir / f"{script_base}_{ts}.json"
-    log_path = out_dir / f"{script_base}_{ts}.log"
+    scenario = r["scenario"]
+    summary_path = out_dir / f"{scenario}_{ts}.json"
+    log_path = out_dir / f"{scenario}_{ts}.log"
 
     env_args = []
     for k, v in extra_env.items():
@@ -108,19 +92,39 @@ def docker_k6_run(script_base: str, base_url: str, scripts_dir: Path, out_dir: P
     cmd = [
         "docker", "run", "--rm", "-i",
         "-e", f"BASE_URL={base_url}",
+        "-e", f"SCENARIO={scenario}",
+        "-e", f"MODE={r['mode']}",
         *env_args,
-        "-v", f"{scripts_dir}:/scripts",
+        "-v", f"{scripts_dir}:/scripts:ro",
+        "-v", f"{out_dir}:/out",
         "grafana/k6", "run",
-        f"--summary-export=/scripts/out/{summary_path.name}",
-        f"/scripts/{script_base}.js",
+        *manifest.k6_load_args(r),
+        *manifest.k6_env_args(r),
+        f"--summary-export=/out/{summary_path.name}",
+        f"/{r['script']}",
     ]
 
+    capture = None
+    if profiler_tool:
+        # без NDJSON окно отсчитывается от запуска контейнера (старт k6 — на 1-2 с позже)
+        window = profiler.steady_window(r["duration"], r["stages"])
+        capture = profiler.Capture(out_dir / f"profile_{scenario}_{ts}.json", window, profiler_tool,
+                                   process=app_process).start()
+    db_capture = None
+    if dbstats_redis:
+        # контейнер БД — тот же, что в detect_db_container(); Redis — по --redis
+        db_capture = dbstats.Capture(out_dir / f"dbstats_{scenario}_{ts}.json", dbstats_redis).start()
     code, out = run_cmd(cmd)
+    if db_capture:
+        db_capture.finish()
+    if capture:
+        capture.stop()
     log_path.write_text(out, encoding="utf-8")
 
-    if code != 0:
+    # 99 — нарушены пороги (SLO): summary есть, результат всё равно нужен в отчёте
+    if code not in (0, 99):
         print(out)
-        raise SystemExit(f"k6 failed for {script_base}. See log: {log_path}")
+        raise SystemExit(f"k6 failed for {scenario}. See log: {log_path}")
 
     if not summary_path.exists():
         raise SystemExit(f"Expected summary json not found: {summary_path}")
@@ -183,6 +187,13 @@ def html_escape(s: str) -> str:
             .replace('"', "&quot;").replace("'", "&#39;"))
 
 
+def profile_links(files: List[str]) -> str:
+    # отчёт лежит в той же папке out, что и файлы профилировщика
+    if not files:
+        return "—"
+    return "<br/>".join(f'<a href="{html_escape(f)}">{html_escape(f)}</a>' for f in files)
+
+
 def make_html_report(report_path: Path, env_lines: List[str], notes: str,
                      results: Dict[str, Dict[str, Any]]) -> None:
     rows = []
@@ -206,6 +217,9 @@ def make_html_report(report_path: Path, env_lines: List[str], notes: str,
             <td>{err_s}</td>
             <td>{html_escape(lat_grade)}</td>
             <td>{html_escape(err_grade)}</td>
+            <td class="muted">{html_escape(r.get("load_profile") or "—")}</td>
+            <td>{profile_links(r.get("profile_files") or [])}</td>
+            <td class="muted">{"<br/>".join(html_escape(f) for f in r.get("dbstats") or []) or "—"}</td>
           </tr>
         """)
 
@@ -247,6 +261,9 @@ def make_html_report(report_path: Path, env_lines: List[str], notes: str,
           <th>Error rate</th>
           <th>Оценка latency</th>
           <th>Оценка ошибок</th>
+          <th>Профиль нагрузки</th>
+          <th>CPU-профиль</th>
+          <th>БД за прогон</th>
         </tr>
       </thead>
       <tbody>
@@ -276,25 +293,45 @@ def make_html_report(report_path: Path, env_lines: List[str], notes: str,
 
 
 def main() -> int:
+    doc = manifest.load()
     parser = argparse.ArgumentParser(
         description="Run k6 load tests via Docker and generate JSON + HTML + meta.",
         formatter_class=argparse.ArgumentDefaultsHelpFormatter
     )
 
-    parser.add_argument("--scenario", choices=["browse", "auth", "both"], default="both")
+    parser.add_argument("--scenario", choices=list(doc["scenarios"]) + ["all"], default="all",
+                        help="scenario from scenarios.json; all = every scenario of the suite")
+    parser.add_argument("--mode", default="baseline", help="load profile set from scenarios.json")
+    parser.add_argument("--profile", choices=manifest.PROFILE_KINDS, default="closed")
     parser.add_argument("--base-url", default="https://host.docker.internal:7146")
     parser.add_argument("--email", default="Java@DlyaLox.ov")
     parser.add_argument("--password", default=".NetDlyaPacan0v")
-    parser.add_argument("--out-dir", default="loadtest/out")
+    parser.add_argument("--out-dir", default=str(HERE / "out"))
     parser.add_argument("--html", action="store_true")
+    parser.add_argument("--profiler", choices=profiler.TOOLS, default=None,
+                        help="capture an app CPU profile during the steady-state phase (see profiler.py)")
+    parser.add_argument("--app-process", default=os.environ.get("APP_PROCESS", "Mockups"),
+                        help="substring of the app command line for --profiler")
+    parser.add_argument("--dbstats", default=os.environ.get("REDIS_URL", "auto"),
+                        help="datastore stats before/after each run (see dbstats.py): Redis URL, auto or off; "
+                             "the SQL Server container is found as in run.sh")
     parser.add_argument("--notes", default="App: dotnet run (macOS). DB: SQL Server in Docker. Load tool: k6 in Docker.")
     args = parser.parse_args()
 
-    root = Path.cwd()
-    loadtest_dir = (root / "loadtest").resolve()
-    out_dir = (root / args.out_dir).resolve()
-    ensure_dir(out_dir)
-    ensure_dir(loadtest_dir / "out")  # must exist for docker volume write
+    out_dir = Path(args.out_dir).resolve()
+    ensure_dir(out_dir)  # must exist for docker volume write
+
+    scenarios = manifest.suite_scenarios(doc) if args.scenario == "all" else [args.scenario]
+    environ = dict(os.environ, BASE_URL=args.base_url, EMAIL=args.email, PASSWORD=args.password)
+    resolved = []
+    for name in scenarios:
+        try:
+            r = manifest.resolve(doc, name, args.mode, args.profile, environ)
+        except manifest.ManifestError as e:
+            raise SystemExit(str(e))
+        if r["missing_env"]:
+            raise SystemExit(f"{name}: required env is not set: {', '.join(r['missing_env'])}")
+        resolved.append(r)
 
     # Auto env collection
     docker_ver = (try_cmd(["docker", "--version"]) or "unknown").strip()
@@ -311,39 +348,38 @@ def main() -> int:
         f"k6: {k6_ver}",
         f"DB container: {db_info}",
     ]
-
-    # parse scenario durations from JS files
-    browse_meta = parse_k6_stages(loadtest_dir / "k6_menu_browse.js")
-    auth_meta = parse_k6_stages(loadtest_dir / "k6_auth_flow.js")
+    env_lines += [f"Load {r['scenario']}: {describe_profile(r)}" for r in resolved]
 
     results: Dict[str, Dict[str, Any]] = {}
-    produced: Dict[str, Any] = {"browse": None, "auth": None}
-
-    if args.scenario in ("browse", "both"):
-        summary, log = docker_k6_run(
-            script_base="k6_menu_browse",
-            base_url=args.base_url,
-            scripts_dir=loadtest_dir,
-            out_dir=out_dir,
-            extra_env={}
-        )
-        data = json.loads(summary.read_text(encoding="utf-8"))
-        results["Browse (anonymous menu)"] = extract_core(data)
-        produced["browse"] = {"summary": summary.name, "log": log.name, "script": "k6_menu_browse.js", "script_meta": browse_meta}
-        print(f"[OK] Browse: {summary.name} / {log.name}")
+    produced: Dict[str, Any] = {}
 
-    if args.scenario in ("auth", "both"):
+    for r in resolved:
         summary, log = docker_k6_run(
-            script_base="k6_auth_flow",
+            r,
             base_url=args.base_url,
-            scripts_dir=loadtest_dir,
+            scripts_dir=HERE / "scripts",
             out_dir=out_dir,
-            extra_env={"EMAIL": args.email, "PASSWORD": args.password}
+            extra_env={},
+            profiler_tool=args.profiler,
+            app_process=args.app_process,
+            dbstats_redis=args.dbstats if args.dbstats != "off" else None,
         )
         data = json.loads(summary.read_text(encoding="utf-8"))
-        results["Auth flow (login→account→logout)"] = extract_core(data)
-        produced["auth"] = {"summary": summary.name, "log": log.name, "script": "k6_auth_flow.js", "script_meta": auth_meta}
-        print(f"[OK] Auth: {summary.name} / {log.name}")
+        title = f"{r['scenario']} ({r['description']})" if r["description"] else r["scenario"]
+        prof = profiler.load(summary.with_name(f"profile_{summary.name}"))
+        prof_files = [a["file"] for a in prof["artifacts"]] if prof else []
+        db = dbstats.load(summary.with_name(f"dbstats_{summary.name}"))
+        results[title] = dict(extract_core(data), load_profile=describe_profile(r), profile_files=prof_files,
+                              dbstats=dbstats.findings(db))
+        # пароль из env сценария в meta не пишем
+        produced[r["scenario"]] = {"summary": summary.name, "log": log.name, "script": r["script"],
+                                   "load_profile": {k: v for k, v in r.items() if k != "env"}}
+        if prof:
+            produced[r["scenario"]]["profile"] = {"files": prof_files, "skipped": prof.get("skipped"),
+                                                  "errors": prof["errors"]}
+        if db:
+            produced[r["scenario"]]["dbstats"] = f"dbstats_{summary.name}"
+        print(f"[OK] {r['scenario']}: {summary.name} / {log.name}")
 
     # write meta file for "latest report" discovery
     meta_ts = now_ts()
@@ -351,6 +387,8 @@ def main() -> int:
     meta = {
         "timestamp": meta_ts,
         "base_url": args.base_url,
+        "mode": args.mode,
+        "profile": args.profile,
         "env_lines": env_lines,
         "notes": args.notes,
         "produced": produced,
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Запуск набора сценариев (Python-аналог run_all.sh) с параллельным выполнением.
+
+- окружение (ОС, .NET, k6, контейнер БД) выясняется один раз (envprobe.py) и передаётся
+  в каждый run.sh через PROBE_*, а не пробуется заново на каждый сценарий;
+- независимые сценарии идут параллельно (--parallel N). Чтобы они не мешали друг другу,
+  каждому воркеру можно выдать свой экземпляр приложения: --base-urls (уже запущенные) или
+  --app-cmd с плейсхолдером {port} и --ports (run_suite.py сам поднимет и остановит их);
+- вывод k6 каждого сценария пишется в out/<scenario>/k6_<scenario>_<ts>.log, в консоль — только статус;
+- в конце строится suite-отчёт (suite_report.py) с теми же опциями сравнения, что и в run_all.sh.
+
+  python3 run_suite.py --mode baseline
+  python3 run_suite.py --parallel 4 --app-cmd "dotnet run --project ../Mockups --urls http://0.0.0.0:{port}" \\
+                       --ports 5146,5147,5148,5149
+"""
+import argparse
+import json
+import os
+import pathlib
+import queue
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import envprobe
+import manifest
+import resource_sampler
+import seed_pool
+
+HERE = pathlib.Path(__file__).resolve().parent
+DEFAULT_SCENARIOS = ",".join(manifest.suite_scenarios(manifest.load()))
+DOCKER_HOST = "host.docker.internal"
+
+
+class AppInstance:
+    """Экземпляр приложения на своём порту (--app-cmd); env — дополнительное окружение (sweep.py)."""
+
+    def __init__(self, cmd: str, port: int, log_dir: pathlib.Path, engine: str,
+                 env: Optional[Dict[str, str]] = None):
+        self.port = port
+        host = DOCKER_HOST if engine == "docker" else "localhost"
+        self.base_url = f"http://{host}:{port}"
+        self.health_url = f"http://localhost:{port}/"
+        self.log_path = log_dir / f"app_{port}.log"
+        self._log = self.log_path.open("w", encoding="utf-8")
+        self.proc = subprocess.Popen(cmd.format(port=port), shell=True, cwd=str(HERE),
+                                     env=dict(os.environ, **env) if env else None,
+                                     stdout=self._log, stderr=subprocess.STDOUT, start_new_session=True)
+
+    def wait_ready(self, timeout: float) -> bool:
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.proc.poll() is not None:
+                return False
+            try:
+                urllib.request.urlopen(self.health_url, timeout=2)
+                return True
+            except OSError as e:
+                # HTTP-ответ с ошибкой — приложение уже слушает порт
+                if getattr(e, "code", None):
+                    return True
+            time.sleep(1)
+        return False
+
+    def stop(self):
+        if self.proc.poll() is None:
+            os.killpg(self.proc.pid, signal.SIGTERM)
+            try:
+                self.proc.wait(timeout=20)
+            except subprocess.TimeoutExpired:
+                os.killpg(self.proc.pid, signal.SIGKILL)
+        self._log.close()
+
+
+def run_scenario(scenario: str, base_url: str, app_pid: Optional[int], args,
+                 probe_env: Dict[str, str]) -> Dict[str, object]:
+    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    sc_dir = pathlib.Path(args.out) / scenario
+    sc_dir.mkdir(parents=True, exist_ok=True)
+    log_path = sc_dir / f"k6_{scenario}_{ts}.log"
+
+    env = dict(os.environ)
+    env.update(probe_env)
+    env.update({
+        "SCENARIO": scenario,
+        "MODE": args.mode,
+        "ENGINE": args.engine,
+        "BASE_URL": base_url,
+        "OUT_DIR": str(pathlib.Path(args.out).resolve()),
+        "WORKERS": str(args.workers),
+        "SEED_POOL": "0",
+    })
+    if app_pid:
+        env["APP_PID"] = str(app_pid)
+
+    t0 = time.time()
+    print(f"[suite] start {scenario} -> {base_url} (log: {log_path})", flush=True)
+    with log_path.open("w", encoding="utf-8") as log:
+        rc = subprocess.run([str(HERE / "run.sh")], env=env, cwd=str(HERE),
+                            stdout=log, stderr=subprocess.STDOUT).returncode
+    elapsed = time.time() - t0
+    status = "ok" if rc == 0 else ("thresholds breached" if rc == 99 else f"failed (exit {rc})")
+    print(f"[suite] done  {scenario}: {status} in {elapsed:.0f}s", flush=True)
+    return {"scenario": scenario, "rc": rc, "log": str(log_path), "seconds": elapsed}
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Run load test scenarios (optionally in parallel) and build the suite report.")
+    ap.add_argument("--scenarios", default=DEFAULT_SCENARIOS)
+    ap.add_argument("--mode", default=os.environ.get("MODE", "baseline"))
+    ap.add_argument("--engine", default=os.environ.get("ENGINE", "docker"))
+    ap.add_argument("--out", default=os.environ.get("OUT_DIR", str(HERE / "out")))
+    ap.add_argument("--base-url", default=os.environ.get("BASE_URL", f"http://{DOCKER_HOST}:5146"))
+    ap.add_argument("--parallel", type=int, default=1, help="scenarios running at the same time")
+    ap.add_argument("--workers", type=int, default=int(os.environ.get("WORKERS", "1")),
+                    help="k6 generators per scenario (run.sh WORKERS, see workers.py)")
+    ap.add_argument("--base-urls", help="comma-separated app instances, one per parallel worker")
+    ap.add_argument("--app-cmd", help="command starting one app instance; {port} is substituted")
+    ap.add_argument("--ports", help="comma-separated ports for --app-cmd")
+    ap.add_argument("--app-start-timeout", type=float, default=120.0)
+    ap.add_argument("--seed-pool", type=int, default=int(os.environ.get("SEED_POOL", "0")),
+                    help="seed N accounts once for the suite (seed_pool.py) and clean them up at the end")
+    ap.add_argument("--no-report", action="store_true")
+    ap.add_argument("report_args", nargs=argparse.REMAINDER,
+                    help="after --: passed to suite_report.py (e.g. -- --compare-last 5 --fail-on-regression)")
+    args = ap.parse_args()
+
+    out_dir = pathlib.Path(args.out)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+
+    probe = envprobe.probe(args.engine)
+    print(f"[suite] env: {probe['platform']}; .NET {probe['dotnet_version'] or '-'}; {probe['k6_version']}; "
+          f"DB: {probe['db_container'] or 'not detected'}")
+    probe_env = envprobe.run_sh_env(probe)
+
+    apps: List[AppInstance] = []
+    targets: "queue.Queue" = queue.Queue()
+    pool_prefix = None
+    try:
+        if args.app_cmd:
+            if not args.ports:
+                ap.error("--app-cmd requires --ports")
+            for port in [int(p) for p in args.ports.split(",") if p.strip()]:
+                apps.append(AppInstance(args.app_cmd, port, out_dir, args.engine))
+            for app in apps:
+                if not app.wait_ready(args.app_start_timeout):
+                    raise SystemExit(f"app on port {app.port} did not start, see {app.log_path}")
+                # --app-cmd запускается через shell: для сэмплера нужен pid самого приложения в этой сессии
+                pid = resource_sampler.find_pid(os.environ.get("APP_PROCESS", "Mockups"), session=app.proc.pid)
+                targets.put((app.base_url, pid))
+        elif args.base_urls:
+            for url in args.base_urls.split(","):
+                if url.strip():
+                    targets.put((url.strip(), None))
+        else:
+            if args.parallel > 1:
+                print("[suite] WARNING: parallel scenarios share one app instance — they will skew each other's "
+                      "latency; use --base-urls or --app-cmd/--ports for isolated instances", file=sys.stderr)
+            for _ in range(args.parallel):
+                targets.put((args.base_url, None))
+
+        if args.seed_pool > 0 and not os.environ.get("POOL_FILE"):
+            # экземпляры приложения работают с одной БД — одного пула хватает всем
+            pool_url = targets.queue[0][0]
+            pool_path = out_dir / f"user_pool_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+            pool = seed_pool.seed(pool_url, args.seed_pool, seed_pool.new_prefix(), seed_pool.new_password(),
+                                  5, 0, os.environ.get("SEED_TOKEN", ""), os.environ.get("INSECURE") == "true")
+            pool_path.write_text(json.dumps(pool, indent=2, ensure_ascii=False), encoding="utf-8")
+            pool_prefix = pool["prefix"]
+            probe_env["POOL_FILE"] = str(pool_path.resolve())
+            print(f"[suite] user pool: {len(pool['users'])} accounts -> {pool_path}")
+
+        workers = max(1, min(args.parallel, targets.qsize(), len(scenarios)))
+
+        def job(scenario: str):
+            # экземпляр приложения занят сценарием целиком, затем возвращается в пул
+            base_url, pid = targets.get()
+            try:
+                return run_scenario(scenario, base_url, pid, args, probe_env)
+            finally:
+                targets.put((base_url, pid))
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(job, scenarios))
+    except seed_pool.SeedError as e:
+        raise SystemExit(f"[suite] {e}")
+    finally:
+        if pool_prefix:
+            try:
+                seed_pool.cleanup(pool_url, pool_prefix, os.environ.get("SEED_TOKEN", ""),
+                                  os.environ.get("INSECURE") == "true")
+            except seed_pool.SeedError as e:
+                print(f"[suite] pool cleanup failed: {e}", file=sys.stderr)
+        for app in apps:
+            app.stop()
+
+    failed = [r for r in results if r["rc"] not in (0, 99)]
+    for r in failed:
+        print(f"[suite] {r['scenario']} failed, see {r['log']}", file=sys.stderr)
+
+    rc = 1 if failed else 0
+    if not args.no_report:
+        report_args = [a for a in args.report_args if a != "--"]
+        rep = subprocess.run([sys.executable, str(HERE / "suite_report.py"), "--out", str(out_dir),
+                              "--mode", args.mode] + report_args, cwd=str(HERE))
+        rc = rc or rep.returncode
+    return rc
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
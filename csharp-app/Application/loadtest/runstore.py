@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Историческое хранилище прогонов k6 в SQLite.
+
+run.sh пишет пары summary_<scenario>_<ts>.json + env_<scenario>_<ts>.json в out/<scenario>/.
+ingest() один раз загружает каждую пару в БД (повторно — только если файл изменился),
+а отчёты дальше работают с запросами к БД, не перечитывая JSON.
+
+  python3 runstore.py ingest --out ./out
+  python3 runstore.py trend --out ./out --scenario 01_anonymous_menu --mode baseline
+"""
+import argparse
+import hashlib
+import json
+import pathlib
+import re
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+from report import summarize
+
+DB_NAME = "runs.sqlite"
+SUMMARY_RE = re.compile(r"^summary_(.*)_([0-9]{8}_[0-9]{6})\.json$")
+# поля env_*.json, задающие нагрузку: сравнивать между собой можно только прогоны с одинаковыми
+PROFILE_FIELDS = ("base_url", "vus", "rate", "executor", "stages", "profile", "workers")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id                  INTEGER PRIMARY KEY,
+    scenario            TEXT NOT NULL,
+    ts                  TEXT NOT NULL,
+    mode                TEXT,
+    git                 TEXT,
+    timestamp           TEXT,
+    engine              TEXT,
+    base_url            TEXT,
+    vus                 INTEGER,
+    duration            TEXT,
+    profile_key         TEXT,
+    rps                 REAL,
+    avg_ms              REAL,
+    p95_ms              REAL,
+    p99_ms              REAL,
+    error_rate          REAL,
+    checks_pass_rate    REAL,
+    thresholds_breached INTEGER,
+    summary_path        TEXT NOT NULL UNIQUE,
+    summary_mtime       REAL NOT NULL,
+    env_path            TEXT NOT NULL,
+    env_json            TEXT NOT NULL,
+    summary_json        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_runs_scenario_mode_ts ON runs(scenario, mode, ts);
+CREATE INDEX IF NOT EXISTS ix_runs_git ON runs(git);
+CREATE INDEX IF NOT EXISTS ix_runs_ts ON runs(ts);
+"""
+
+
+def default_db_path(out_dir: pathlib.Path) -> pathlib.Path:
+    return out_dir / DB_NAME
+
+
+def profile_key(env: Dict[str, Any]) -> str:
+    """Короткий хеш профиля нагрузки (PROFILE_FIELDS) из env_*.json."""
+    doc = json.dumps({f: env.get(f) or None for f in PROFILE_FIELDS}, sort_keys=True)
+    return hashlib.sha1(doc.encode("utf-8")).hexdigest()[:12]
+
+
+def _migrate(conn: sqlite3.Connection) -> None:
+    # БД, созданные до появления profile_key: добавляем колонку и заполняем её из env_json
+    cols = {row["name"] for row in conn.execute("PRAGMA table_info(runs)")}
+    if "profile_key" in cols:
+        return
+    conn.execute("ALTER TABLE runs ADD COLUMN profile_key TEXT")
+    for row in conn.execute("SELECT id, env_json FROM runs").fetchall():
+        conn.execute("UPDATE runs SET profile_key = ? WHERE id = ?",
+                     (profile_key(json.loads(row["env_json"])), row["id"]))
+    conn.commit()
+
+
+def connect(db_path: pathlib.Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(str(db_path))
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    _migrate(conn)
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_runs_profile ON runs(scenario, mode, profile_key, ts)")
+    return conn
+
+
+def _p99(summary: Dict[str, Any]) -> Optional[float]:
+    # p(99) есть в summary-export, только если включён в summaryTrendStats
+    return (summary.get("metrics", {}).get("http_req_duration") or {}).get("p(99)")
+
+
+def ingest(conn: sqlite3.Connection, out_dir: pathlib.Path) -> int:
+    """Загружает новые/изменённые пары summary+env из out/<scenario>/. Возвращает число загруженных."""
+    known = {row["summary_path"]: row["summary_mtime"]
+             for row in conn.execute("SELECT summary_path, summary_mtime FROM runs")}
+    loaded = 0
+
+    for summary_p in sorted(out_dir.glob("*/summary_*.json")):
+        m = SUMMARY_RE.match(summary_p.name)
+        if not m:
+            continue
+        scenario, ts = m.group(1), m.group(2)
+        env_p = summary_p.parent / f"env_{scenario}_{ts}.json"
+        if not env_p.exists():
+            continue
+
+        key = str(summary_p.resolve())
+        mtime = summary_p.stat().st_mtime
+        if known.get(key) == mtime:
+            continue
+
+        try:
+            summary_txt = summary_p.read_text(encoding="utf-8")
+            env_txt = env_p.read_text(encoding="utf-8")
+            summary = json.loads(summary_txt)
+            env = json.loads(env_txt)
+        except (OSError, ValueError) as e:
+            print(f"[runstore] skip {summary_p.name}: {e}")
+            continue
+
+        s = summarize(summary)
+        conn.execute(
+            """
+            INSERT INTO runs (scenario, ts, mode, git, timestamp, engine, base_url, vus, duration,
+                              profile_key, rps, avg_ms, p95_ms, p99_ms, error_rate, checks_pass_rate,
+                              thresholds_breached, summary_path, summary_mtime, env_path,
+                              env_json, summary_json)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(summary_path) DO UPDATE SET
+                mode=excluded.mode, git=excluded.git, timestamp=excluded.timestamp,
+                engine=excluded.engine, base_url=excluded.base_url, vus=excluded.vus,
+                duration=excluded.duration, profile_key=excluded.profile_key, rps=excluded.rps, avg_ms=excluded.avg_ms,
+                p95_ms=excluded.p95_ms, p99_ms=excluded.p99_ms, error_rate=excluded.error_rate,
+                checks_pass_rate=excluded.checks_pass_rate,
+                thresholds_breached=excluded.thresholds_breached,
+                summary_mtime=excluded.summary_mtime, env_path=excluded.env_path,
+                env_json=excluded.env_json, summary_json=excluded.summary_json
+            """,
+            (
+                scenario, ts, env.get("mode"), env.get("git") or None, env.get("timestamp"),
+                env.get("engine"), env.get("base_url"), env.get("vus"), env.get("duration"),
+                profile_key(env), s["http_reqs_rate"], s["http_dur_avg"], s["http_dur_p95"], _p99(summary),
+                s["http_failed_rate"], s["checks_pass_rate"],
+                len([t for t in s["thresholds"] if t["breached"]]),
+                key, mtime, str(env_p.resolve()), env_txt, summary_txt,
+            ),
+        )
+        loaded += 1
+
+    conn.commit()
+    return loaded
+
+
+def open_store(out_dir: pathlib.Path, db_path: Optional[pathlib.Path] = None) -> sqlite3.Connection:
+    """connect() + ingest() — то, с чего начинают отчёты."""
+    conn = connect(db_path or default_db_path(out_dir))
+    if out_dir.is_dir():
+        ingest(conn, out_dir)
+    return conn
+
+
+def load_run(row: sqlite3.Row) -> Dict[str, Any]:
+    """Строка runs -> dict с распарсенными env/summary (как раньше читалось из файлов)."""
+    run = dict(row)
+    run["env"] = json.loads(run.pop("env_json"))
+    run["summary"] = json.loads(run.pop("summary_json"))
+    return run
+
+
+def latest_runs(conn: sqlite3.Connection, mode: Optional[str] = None) -> List[sqlite3.Row]:
+    """Последний прогон по каждому сценарию (опционально — только для заданного mode)."""
+    return conn.execute(
+        """
+        SELECT r.* FROM runs r
+        WHERE r.id = (
+            SELECT r2.id FROM runs r2
+            WHERE r2.scenario = r.scenario AND (? IS NULL OR r2.mode = ?)
+            ORDER BY r2.ts DESC, r2.id DESC LIMIT 1
+        )
+        ORDER BY r.scenario
+        """,
+        (mode, mode),
+    ).fetchall()
+
+
+def latest_run(conn: sqlite3.Connection, scenario: str, mode: Optional[str] = None) -> Optional[sqlite3.Row]:
+    return conn.execute(
+        "SELECT * FROM runs WHERE scenario = ? AND (? IS NULL OR mode = ?) ORDER BY ts DESC, id DESC LIMIT 1",
+        (scenario, mode, mode),
+    ).fetchone()
+
+
+def get_run(conn: sqlite3.Connection, run_id: int) -> Optional[sqlite3.Row]:
+    return conn.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+
+
+def history(conn: sqlite3.Connection, scenario: str, mode: Optional[str] = None,
+            limit: int = 20, before_ts: Optional[str] = None, until_ts: Optional[str] = None,
+            profile: Optional[str] = None) -> List[sqlite3.Row]:
+    """Последние `limit` прогонов сценария, от новых к старым (без тяжёлых JSON-колонок).
+
+    before_ts/until_ts — только прогоны раньше (включительно для until_ts) заданного ts,
+    profile — только прогоны с этим profile_key.
+    """
+    return conn.execute(
+        """
+        SELECT id, scenario, ts, mode, git, vus, duration, profile_key, rps, avg_ms, p95_ms, p99_ms,
+               error_rate, checks_pass_rate, thresholds_breached
+        FROM runs
+        WHERE scenario = ? AND (? IS NULL OR mode = ?) AND (? IS NULL OR ts < ?) AND (? IS NULL OR ts <= ?)
+              AND (? IS NULL OR profile_key = ?)
+        ORDER BY ts DESC, id DESC
+        LIMIT ?
+        """,
+        (scenario, mode, mode, before_ts, before_ts, until_ts, until_ts, profile, profile, limit),
+    ).fetchall()
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="SQLite store of k6 runs (out/<scenario>/summary_*.json).")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p_ing = sub.add_parser("ingest", help="load every summary/env pair into the DB")
+    p_ing.add_argument("--out", required=True)
+    p_ing.add_argument("--db")
+
+    p_tr = sub.add_parser("trend", help="print the last runs of a scenario")
+    p_tr.add_argument("--out", required=True)
+    p_tr.add_argument("--db")
+    p_tr.add_argument("--scenario", required=True)
+    p_tr.add_argument("--mode")
+    p_tr.add_argument("--limit", type=int, default=20)
+
+    args = ap.parse_args()
+    out_dir = pathlib.Path(args.out)
+    conn = connect(pathlib.Path(args.db) if args.db else default_db_path(out_dir))
+
+    if args.cmd == "ingest":
+        n = ingest(conn, out_dir)
+        total = conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+        print(f"[runstore] ingested {n} new run(s), {total} total")
+        return 0
+
+    ingest(conn, out_dir)
+    rows = history(conn, args.scenario, args.mode, args.limit)
+    print(f"{'ts':15s} {'mode':9s} {'git':9s} {'rps':>9s} {'p95 ms':>9s} {'p99 ms':>9s} {'err %':>7s}")
+    for r in rows:
+        def f(v, nd=2):
+            return "-" if v is None else f"{v:.{nd}f}"
+        err = None if r["error_rate"] is None else r["error_rate"] * 100
+        print(f"{r['ts']:15s} {r['mode'] or '-':9s} {r['git'] or '-':9s} {f(r['rps']):>9s} "
+              f"{f(r['p95_ms']):>9s} {f(r['p99_ms']):>9s} {f(err):>7s}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
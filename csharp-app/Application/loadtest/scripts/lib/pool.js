@@ -0,0 +1,24 @@
+// Пул заранее созданных аккаунтов (seed_pool.py): POOL_FILE — путь к файлу пула внутри k6.
+// Аккаунт закреплён за VU: VU n берёт аккаунт n, так что пока пул >= числа VU, аккаунты
+// (и их корзины) не делятся. При WORKERS>1 run.sh передаёт POOL_WORKER/POOL_WORKERS,
+// и генераторы берут непересекающиеся аккаунты (n-й VU воркера w — аккаунт n*W + w).
+import { SharedArray } from 'k6/data';
+
+const POOL_FILE = __ENV.POOL_FILE || '';
+const POOL_WORKER = parseInt(__ENV.POOL_WORKER || '0', 10);
+const POOL_WORKERS = parseInt(__ENV.POOL_WORKERS || '1', 10);
+
+// SharedArray: файл читается один раз, а не копируется в память каждого VU
+const accounts = POOL_FILE ? new SharedArray('user pool', () => JSON.parse(open(POOL_FILE)).users) : [];
+
+export function hasPool() {
+    return accounts.length > 0;
+}
+
+export function poolSize() {
+    return accounts.length;
+}
+
+export function poolAccount() {
+    return accounts[((__VU - 1) * POOL_WORKERS + POOL_WORKER) % accounts.length];
+}
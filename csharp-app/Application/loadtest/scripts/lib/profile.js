@@ -0,0 +1,98 @@
+// Общие куски options для сценариев.
+
+// Всегда выполняющиеся пороги: нужны только для того, чтобы k6 выгрузил
+// sub-метрики по тегу в summary-export (report.py строит по ним разбивку).
+export function tagThresholds(tag, names) {
+    const t = {};
+    for (const n of names) {
+        t[`http_req_duration{${tag}:${n}}`] = ['max>=0'];
+        t[`http_reqs{${tag}:${n}}`] = ['count>=0'];
+        t[`http_req_failed{${tag}:${n}}`] = ['rate>=0'];
+    }
+    return t;
+}
+
+// То же для фаз запроса (blocked/connecting/tls_handshaking/sending/waiting/receiving) по endpoint.
+export function phaseThresholds(tag, names) {
+    const t = {};
+    for (const n of names) {
+        for (const phase of ['blocked', 'connecting', 'tls_handshaking', 'sending', 'waiting', 'receiving']) {
+            t[`http_req_${phase}{${tag}:${n}}`] = ['max>=0'];
+        }
+    }
+    return t;
+}
+
+export function iterationThresholds(tag, names) {
+    const t = {};
+    for (const n of names) {
+        t[`iterations{${tag}:${n}}`] = ['count>=0'];
+    }
+    return t;
+}
+
+// SLO-пороги сценария: значения из scenarios.json приходят через SLO_P95_MS/SLO_ERROR_RATE (manifest.py),
+// аргументы — на случай запуска скрипта напрямую, без run.sh.
+export function sloThresholds(p95Ms, errorRate) {
+    const p95 = parseFloat(__ENV.SLO_P95_MS || '') || p95Ms;
+    const err = parseFloat(__ENV.SLO_ERROR_RATE || '') || errorRate;
+    return {
+        http_req_failed: [`rate<${err}`],
+        http_req_duration: [`p(95)<${p95}`],
+    };
+}
+
+export function endpointThresholds(names) {
+    return Object.assign(tagThresholds('endpoint', names), phaseThresholds('endpoint', names));
+}
+
+// "1m:5,5m:20,1m:0" -> [{ duration: '1m', target: 5000 }, ...] (target в итерациях за 1000s)
+export function parseStages(spec) {
+    return spec.split(',').map((part) => {
+        const [duration, target] = part.trim().split(':');
+        return { duration, target: Math.round(parseFloat(target) * 1000) };
+    });
+}
+
+// Профиль нагрузки из env. По умолчанию (нет RATE/STAGES) — ничего не задаём, и работают
+// --vus/--duration из run.sh (closed model). Open model — нагрузка не падает, когда сервер
+// замедляется (нет coordinated omission со стороны генератора):
+//   RATE=<итераций/с>                 -> constant-arrival-rate
+//   STAGES=<длит.>:<итераций/с>,...   -> ramping-arrival-rate (START_RATE — стартовая интенсивность)
+// Итерации, которые k6 не смог запустить вовремя (нет свободного VU), попадают в dropped_iterations.
+export function loadProfile() {
+    const stages = __ENV.STAGES || '';
+    const rate = parseFloat(__ENV.RATE || '');
+    if (!rate && !stages) {
+        return {};
+    }
+    const peak = stages ? Math.max(...parseStages(stages).map((s) => s.target / 1000)) : rate;
+    const preVUs = parseInt(__ENV.PRE_VUS || `${Math.max(10, Math.ceil(peak * 2))}`, 10);
+    const maxVUs = parseInt(__ENV.MAX_VUS || `${Math.max(50, Math.ceil(peak * 20))}`, 10);
+    if (stages) {
+        return {
+            scenarios: {
+                main: {
+                    executor: 'ramping-arrival-rate',
+                    startRate: Math.round(parseFloat(__ENV.START_RATE || '0') * 1000),
+                    timeUnit: '1000s',
+                    stages: parseStages(stages),
+                    preAllocatedVUs: preVUs,
+                    maxVUs: maxVUs,
+                },
+            },
+        };
+    }
+    return {
+        scenarios: {
+            main: {
+                executor: 'constant-arrival-rate',
+                rate: Math.round(rate * 1000),
+                timeUnit: '1000s', // rate может быть дробным: 2.5 it/s == 2500 it / 1000s
+                duration: __ENV.DURATION || '60s',
+                preAllocatedVUs: preVUs,
+                maxVUs: maxVUs,
+            },
+        },
+    };
+}
@@ -1,17 +1,17 @@
 import http from 'k6/http';
 import { check, sleep } from 'k6';
+import { endpointThresholds, loadProfile, sloThresholds } from '../lib/profile.js';
 
-export const options = {
-    thresholds: {
-        http_req_failed: ['rate<0.01'],
-        http_req_duration: ['p(95)<800'],
-    },
-};
+export const ENDPOINTS = ['menu_index'];
+
+export const options = Object.assign(loadProfile(), {
+    thresholds: Object.assign(sloThresholds(800, 0.01), endpointThresholds(ENDPOINTS)),
+});
 
 const BASE_URL = __ENV.BASE_URL || 'http://host.docker.internal:5146 ';
 
 export default function () {
-    const res = http.get(`${BASE_URL}/Menu/Index`, { redirects: 0 });
+    const res = http.get(`${BASE_URL}/Menu/Index`, { redirects: 0, tags: { endpoint: 'menu_index' } });
     check(res, { 'menu page 200': (r) => r.status === 200 });
 
     // лёгкая имитация "юзер читает страницу"
@@ -1,12 +1,13 @@
 import http from 'k6/http';
 import { check, group, sleep } from 'k6';
+import { endpointThresholds, loadProfile, sloThresholds } from '../lib/profile.js';
+import { hasPool, poolAccount } from '../lib/pool.js';
 
-export const options = {
-    thresholds: {
-        http_req_failed: ['rate<0.02'],
-        http_req_duration: ['p(95)<1200'],
-    },
-};
+export const ENDPOINTS = ['login_get', 'login_post', 'account_index', 'logout'];
+
+export const options = Object.assign(loadProfile(), {
+    thresholds: Object.assign(sloThresholds(1200, 0.02), endpointThresholds(ENDPOINTS)),
+});
 
 const BASE_URL = __ENV.BASE_URL || 'http://host.docker.internal:5146';
 const EMAIL = __ENV.EMAIL || 'Java@DlyaLox.ov';
@@ -24,29 +25,33 @@ function formEncode(obj) {
 }
 
 export default function () {
+    // с пулом (POOL_FILE) у каждого VU свой аккаунт, иначе все логинятся под EMAIL
+    const account = hasPool() ? poolAccount() : { email: EMAIL, password: PASSWORD };
+
     group('auth flow', () => {
-        const loginGet = http.get(`${BASE_URL}/Account/Login`);
+        const loginGet = http.get(`${BASE_URL}/Account/Login`, { tags: { endpoint: 'login_get' } });
         check(loginGet, { 'login page 200': (r) => r.status === 200 });
 
         const token = extractToken(loginGet.body);
         check(token, { 'antiforgery token extracted': (t) => t !== null });
 
         const payload = formEncode({
-            Email: EMAIL,
-            Password: PASSWORD,
+            Email: account.email,
+            Password: account.password,
             __RequestVerificationToken: token,
         });
 
         const loginPost = http.post(`${BASE_URL}/Account/Login`, payload, {
             redirects: 0,
             headers: { 'Content-Type': 'application/x-www-form-urlencoded' },
+            tags: { endpoint: 'login_post' },
         });
         check(loginPost, { 'login redirect 302': (r) => r.status === 302 });
 
-        const acc = http.get(`${BASE_URL}/Account/Index`);
+        const acc = http.get(`${BASE_URL}/Account/Index`, { tags: { endpoint: 'account_index' } });
         check(acc, { 'account page 200': (r) => r.status === 200 });
 
-        const logout = http.get(`${BASE_URL}/Account/Logout`, { redirects: 0 });
+        const logout = http.get(`${BASE_URL}/Account/Logout`, { redirects: 0, tags: { endpoint: 'logout' } });
         check(logout, { 'logout redirect 302': (r) => r.status === 302 });
     });
 
@@ -1,12 +1,13 @@
 import http from 'k6/http';
 import { check, group, sleep } from 'k6';
+import { endpointThresholds, loadProfile, sloThresholds } from '../lib/profile.js';
+import { hasPool, poolAccount, poolSize } from '../lib/pool.js';
 
-export const options = {
-    thresholds: {
-        http_req_failed: ['rate<0.02'],
-        http_req_duration: ['p(95)<1500'],
-    },
-};
+export const ENDPOINTS = ['register_get', 'register_post', 'login_get', 'login_post', 'address_get', 'address_post', 'menu_index', 'add_to_cart_get', 'add_to_cart_post', 'cart_index', 'order_create_get', 'order_create_post', 'orders_index'];
+
+export const options = Object.assign(loadProfile(), {
+    thresholds: Object.assign(sloThresholds(1500, 0.02), endpointThresholds(ENDPOINTS)),
+});
 
 const BASE_URL = __ENV.BASE_URL || 'http://host.docker.internal:5146';
 const USER_COUNT = parseInt(__ENV.USER_COUNT || '10', 10);
@@ -23,7 +24,7 @@ function formEncode(obj) {
 }
 
 function registerUser(email, password) {
-    const regGet = http.get(`${BASE_URL}/Account/Register`);
+    const regGet = http.get(`${BASE_URL}/Account/Register`, { tags: { endpoint: 'register_get' } });
     const token = extractToken(regGet.body);
     check(token, { 'register token extracted': (t) => t !== null });
 
@@ -39,6 +40,7 @@ function registerUser(email, password) {
     const regPost = http.post(`${BASE_URL}/Account/Register`, payload, {
         redirects: 0,
         headers: { 'Content-Type': 'application/x-www-form-urlencoded' },
+        tags: { endpoint: 'register_post' },
     });
 
     // может быть 302 на меню, или 200 с ошибкой валидации — считаем ок только успешный редирект
@@ -46,7 +48,7 @@ function registerUser(email, password) {
 }
 
 function login(email, password) {
-    const loginGet = http.get(`${BASE_URL}/Account/Login`);
+    const loginGet = http.get(`${BASE_URL}/Account/Login`, { tags: { endpoint: 'login_get' } });
     const token = extractToken(loginGet.body);
     check(token, { 'login token extracted': (t) => t !== null });
 
@@ -59,13 +61,14 @@ function login(email, password) {
     const loginPost = http.post(`${BASE_URL}/Account/Login`, payload, {
         redirects: 0,
         headers: { 'Content-Type': 'application/x-www-form-urlencoded' },
+        tags: { endpoint: 'login_post' },
     });
 
     check(loginPost, { 'login ok (302)': (r) => r.status === 302 });
 }
 
 function ensureAddress() {
-    const addrGet = http.get(`${BASE_URL}/Account/AddAddress`);
+    const addrGet = http.get(`${BASE_URL}/Account/AddAddress`, { tags: { endpoint: 'address_get' } });
     const token = extractToken(addrGet.body);
     check(token, { 'add address token extracted': (t) => t !== null });
 
@@ -83,6 +86,7 @@ function ensureAddress() {
     const addrPost = http.post(`${BASE_URL}/Account/AddAddress`, payload, {
         redirects: 0,
         headers: { 'Content-Type': 'application/x-www-form-urlencoded' },
+        tags: { endpoint: 'address_post' },
     });
 
     check(addrPost, { 'address saved (302)': (r) => r.status === 302 });
@@ -102,7 +106,8 @@ function addToCart(addToCartUrl) {
     if (!addToCartUrl) return null;
     const url = addToCartUrl.startsWith('http') ? addToCartUrl : `${BASE_URL}${addToCartUrl}`;
 
-    const get = http.get(url);
+    // name: один URL-шаблон вместо отдельной метрики на каждый id
+    const get = http.get(url, { tags: { endpoint: 'add_to_cart_get', name: 'GET /Menu/AddToCart/{id}' } });
     check(get, { 'add-to-cart page 200': (r) => r.status === 200 });
 
     const token = extractToken(get.body);
@@ -116,6 +121,7 @@ function addToCart(addToCartUrl) {
     const post = http.post(url, payload, {
         redirects: 0,
         headers: { 'Content-Type': 'application/x-www-form-urlencoded' },
+        tags: { endpoint: 'add_to_cart_post', name: 'POST /Menu/AddToCart/{id}' },
     });
 
     check(post, { 'add-to-cart redirect 302': (r) => r.status === 302 });
@@ -129,7 +135,7 @@ function firstOptionValueBySelectId(html, selectId) {
 }
 
 function createOrder() {
-    const createGet = http.get(`${BASE_URL}/Orders/Create`);
+    const createGet = http.get(`${BASE_URL}/Orders/Create`, { tags: { endpoint: 'order_create_get' } });
     check(createGet, { 'orders/create 200': (r) => r.status === 200 });
 
     const token = extractToken(createGet.body);
@@ -155,13 +161,20 @@ function createOrder() {
     const post = http.post(`${BASE_URL}/Orders/Create`, payload, {
         redirects: 0,
         headers: { 'Content-Type': 'application/x-www-form-urlencoded' },
+        tags: { endpoint: 'order_create_post' },
     });
 
     check(post, { 'order create redirect 302': (r) => r.status === 302 });
 }
 
 export function setup() {
-    // создаём пользователей заранее (чтобы VU не делили одну корзину)
+    if (hasPool()) {
+        // аккаунты с адресом созданы заранее (seed_pool.py): регистрация не попадает в замер
+        console.log(`user pool: ${poolSize()} accounts`);
+        return { pooled: true };
+    }
+
+    // без пула создаём пользователей здесь (чтобы VU не делили одну корзину)
     const users = [];
     const stamp = Date.now();
 
@@ -175,15 +188,17 @@ export function setup() {
 }
 
 export default function (data) {
-    const u = data.users[(__VU - 1) % data.users.length];
+    const u = data.pooled ? poolAccount() : data.users[(__VU - 1) % data.users.length];
 
     group('checkout flow', () => {
         login(u.email, u.password);
 
-        // адрес добавляем один раз в начале “жизни” пользователя — но для простоты можно держать так:
-        ensureAddress();
+        // у аккаунтов из пула основной адрес уже есть
+        if (!data.pooled) {
+            ensureAddress();
+        }
 
-        const menu = http.get(`${BASE_URL}/Menu/Index`);
+        const menu = http.get(`${BASE_URL}/Menu/Index`, { tags: { endpoint: 'menu_index' } });
         check(menu, { 'menu 200': (r) => r.status === 200 });
 
         check(menu, { 'menu has AddToCart button': (r) => r.body.includes('AddToCart') });
@@ -199,12 +214,12 @@ export default function (data) {
 
         addToCart(addUrl);
 
-        const cart = http.get(`${BASE_URL}/Cart/Index`);
+        const cart = http.get(`${BASE_URL}/Cart/Index`, { tags: { endpoint: 'cart_index' } });
         check(cart, { 'cart 200': (r) => r.status === 200 });
 
         createOrder();
 
-        const orders = http.get(`${BASE_URL}/Orders/Index`);
+        const orders = http.get(`${BASE_URL}/Orders/Index`, { tags: { endpoint: 'orders_index' } });
         check(orders, { 'orders page 200': (r) => r.status === 200 });
     });
 
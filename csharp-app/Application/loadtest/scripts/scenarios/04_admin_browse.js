@@ -1,12 +1,12 @@
 import http from 'k6/http';
 import { check, group, sleep } from 'k6';
+import { endpointThresholds, loadProfile, sloThresholds } from '../lib/profile.js';
 
-export const options = {
-    thresholds: {
-        http_req_failed: ['rate<0.02'],
-        http_req_duration: ['p(95)<1200'],
-    },
-};
+export const ENDPOINTS = ['login_get', 'login_post', 'orders_management_index', 'menu_create'];
+
+export const options = Object.assign(loadProfile(), {
+    thresholds: Object.assign(sloThresholds(1200, 0.02), endpointThresholds(ENDPOINTS)),
+});
 
 const BASE_URL = __ENV.BASE_URL || 'http://host.docker.internal:5146';
 const EMAIL = __ENV.EMAIL || 'Java@DlyaLox.ov';
@@ -22,13 +22,14 @@ function formEncode(obj) {
 }
 
 function login() {
-    const get = http.get(`${BASE_URL}/Account/Login`);
+    const get = http.get(`${BASE_URL}/Account/Login`, { tags: { endpoint: 'login_get' } });
     const token = extractToken(get.body);
     const payload = formEncode({ Email: EMAIL, Password: PASSWORD, __RequestVerificationToken: token });
 
     const post = http.post(`${BASE_URL}/Account/Login`, payload, {
         redirects: 0,
         headers: { 'Content-Type': 'application/x-www-form-urlencoded' },
+        tags: { endpoint: 'login_post' },
     });
 
     check(post, { 'admin login 302': (r) => r.status === 302 });
@@ -38,11 +39,11 @@ export default function () {
     group('admin browse', () => {
         login();
 
-        const idx = http.get(`${BASE_URL}/OrdersManagement/Index`);
+        const idx = http.get(`${BASE_URL}/OrdersManagement/Index`, { tags: { endpoint: 'orders_management_index' } });
         check(idx, { 'orders management index 200': (r) => r.status === 200 });
 
         // можно ещё сходить в Create в меню (админу доступно)
-        const menuCreate = http.get(`${BASE_URL}/Menu/Create`);
+        const menuCreate = http.get(`${BASE_URL}/Menu/Create`, { tags: { endpoint: 'menu_create' } });
         check(menuCreate, { 'menu/create 200': (r) => r.status === 200 });
     });
 
@@ -0,0 +1,105 @@
+// Смешанная нагрузка: все потоки одновременно, каждый своим executor'ом и со своей долей трафика.
+//
+//   MIX="01_anonymous_menu=60,02_auth_flow=15,03_checkout_flow=15,04_admin_browse=10"
+//   VUS=40 DURATION=100s   — closed model: VUs делятся по долям
+//   RATE=20                — open model: итераций/с делятся по долям
+//
+// Метрики каждого потока помечаются тегом scenario=<имя потока> (его ставит сам k6).
+import { endpointThresholds, iterationThresholds, sloThresholds, tagThresholds } from '../lib/profile.js';
+import anonymousMenu, { ENDPOINTS as MENU_ENDPOINTS } from './01_anonymous_menu.js';
+import authFlow, { ENDPOINTS as AUTH_ENDPOINTS } from './02_auth_flow.js';
+import checkoutFlow, { setup as checkoutSetup, ENDPOINTS as CHECKOUT_ENDPOINTS } from './03_checkout_flow.js';
+import adminBrowse, { ENDPOINTS as ADMIN_ENDPOINTS } from './04_admin_browse.js';
+
+const FLOWS = {
+    '01_anonymous_menu': MENU_ENDPOINTS,
+    '02_auth_flow': AUTH_ENDPOINTS,
+    '03_checkout_flow': CHECKOUT_ENDPOINTS,
+    '04_admin_browse': ADMIN_ENDPOINTS,
+};
+
+const DEFAULT_MIX = '01_anonymous_menu=60,02_auth_flow=15,03_checkout_flow=15,04_admin_browse=10';
+
+function parseMix(s) {
+    const mix = {};
+    for (const part of s.split(',')) {
+        const [name, weight] = part.split('=').map((x) => x.trim());
+        if (!FLOWS[name]) {
+            throw new Error(`unknown flow in MIX: ${name}`);
+        }
+        const w = parseFloat(weight);
+        if (w > 0) {
+            mix[name] = w;
+        }
+    }
+    return mix;
+}
+
+const MIX = parseMix(__ENV.MIX || DEFAULT_MIX);
+const TOTAL_WEIGHT = Object.values(MIX).reduce((a, b) => a + b, 0);
+const DURATION = __ENV.DURATION || '100s';
+const RATE = parseFloat(__ENV.RATE || '');
+const VUS = parseInt(__ENV.VUS || '40', 10);
+
+function mixEndpoints() {
+    const all = new Set();
+    for (const name of Object.keys(MIX)) {
+        FLOWS[name].forEach((e) => all.add(e));
+    }
+    return [...all];
+}
+
+function buildScenarios() {
+    const scenarios = {};
+    for (const [name, w] of Object.entries(MIX)) {
+        const share = w / TOTAL_WEIGHT;
+        if (RATE) {
+            const rate = RATE * share;
+            scenarios[name] = {
+                executor: 'constant-arrival-rate',
+                exec: 'flow_' + name,
+                rate: Math.max(1, Math.round(rate * 1000)),
+                timeUnit: '1000s',
+                duration: DURATION,
+                preAllocatedVUs: Math.max(5, Math.ceil(rate * 2)),
+                maxVUs: Math.max(20, Math.ceil(rate * 20)),
+            };
+        } else {
+            scenarios[name] = {
+                executor: 'constant-vus',
+                exec: 'flow_' + name,
+                vus: Math.max(1, Math.round(VUS * share)),
+                duration: DURATION,
+            };
+        }
+    }
+    return scenarios;
+}
+
+export const options = {
+    scenarios: buildScenarios(),
+    thresholds: Object.assign(sloThresholds(1500, 0.02),
+    tagThresholds('scenario', Object.keys(MIX)),
+    iterationThresholds('scenario', Object.keys(MIX)),
+    endpointThresholds(mixEndpoints())),
+};
+
+export function setup() {
+    return MIX['03_checkout_flow'] ? checkoutSetup() : {};
+}
+
+export function flow_01_anonymous_menu() {
+    anonymousMenu();
+}
+
+export function flow_02_auth_flow() {
+    authFlow();
+}
+
+export function flow_03_checkout_flow(data) {
+    checkoutFlow(data);
+}
+
+export function flow_04_admin_browse() {
+    adminBrowse();
+}
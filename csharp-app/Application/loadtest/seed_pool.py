@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Пул заранее созданных аккаунтов для сценариев 02/03 (вместо регистрации через UI в setup()).
+
+Регистрация через /Account/Register — это парсинг anti-forgery токена и PBKDF2-хеш пароля на каждого
+пользователя; внутри замеряемого прогона она искажает latency. seed_pool.py создаёт N пользователей
+(с основным адресом), блюда меню и, по желанию, наполненные корзины одним запросом к /LoadTest/Seed
+приложения (включается LoadTestSeed__Enabled=true, токен — LoadTestSeed__Token / SEED_TOKEN) и пишет
+файл пула. Сценарии читают его из POOL_FILE (scripts/lib/pool.js): VU с номером n берёт аккаунт n.
+После прогона пул удаляется (cleanup): пользователи, их адреса и заказы, созданные блюда.
+
+  python3 seed_pool.py seed --count 50 --out out/user_pool.json
+  python3 seed_pool.py cleanup --pool out/user_pool.json
+"""
+import argparse
+import json
+import os
+import pathlib
+import secrets
+import ssl
+import sys
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Any, Dict, Optional
+
+HERE = pathlib.Path(__file__).resolve().parent
+DEFAULT_POOL = HERE / "out" / "user_pool.json"
+DOCKER_HOST = "host.docker.internal"
+
+
+class SeedError(Exception):
+    pass
+
+
+def api_url(base_url: str) -> str:
+    # BASE_URL для k6 в контейнере указывает на host.docker.internal, а seed_pool.py работает на хосте
+    return base_url.rstrip("/").replace(DOCKER_HOST, "localhost")
+
+
+def _post(url: str, body: Optional[Dict[str, Any]], token: str, insecure: bool, timeout: float) -> Dict[str, Any]:
+    data = json.dumps(body).encode("utf-8") if body is not None else b""
+    req = urllib.request.Request(url, data=data, method="POST")
+    req.add_header("Content-Type", "application/json")
+    if token:
+        req.add_header("X-Seed-Token", token)
+    ctx = ssl._create_unverified_context() if insecure else None
+    try:
+        with urllib.request.urlopen(req, timeout=timeout, context=ctx) as resp:
+            return json.loads(resp.read().decode("utf-8"))
+    except urllib.error.HTTPError as e:
+        if e.code == 404:
+            raise SeedError(f"{url}: 404 — seed endpoint is disabled (start the app with LoadTestSeed__Enabled=true, "
+                            f"and SEED_TOKEN must match LoadTestSeed__Token)")
+        raise SeedError(f"{url}: HTTP {e.code}: {e.read().decode('utf-8', 'replace')[:300]}")
+    except OSError as e:
+        raise SeedError(f"{url}: {e}")
+
+
+def seed(base_url: str, count: int, prefix: str, password: str, menu_items: int, cart_items: int,
+         token: str = "", insecure: bool = False, timeout: float = 300.0) -> Dict[str, Any]:
+    t0 = time.time()
+    res = _post(f"{api_url(base_url)}/LoadTest/Seed", {
+        "prefix": prefix,
+        "count": count,
+        "password": password,
+        "menuItems": menu_items,
+        "cartItems": cart_items,
+    }, token, insecure, timeout)
+    return {
+        "prefix": res["prefix"],
+        "base_url": base_url,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "seconds": round(time.time() - t0, 2),
+        "created_users": res["createdUsers"],
+        "users": [{"email": email, "password": password} for email in res["users"]],
+        "menu_items": res["menuItems"],
+        "prefilled_carts": res["prefilledCarts"],
+    }
+
+
+def cleanup(base_url: str, prefix: str, token: str = "", insecure: bool = False,
+            timeout: float = 300.0) -> Dict[str, Any]:
+    query = urllib.parse.urlencode({"prefix": prefix})
+    return _post(f"{api_url(base_url)}/LoadTest/Cleanup?{query}", None, token, insecure, timeout)
+
+
+def new_prefix() -> str:
+    # свой префикс на прогон: параллельные прогоны не делят и не удаляют чужие аккаунты
+    return f"lt_{time.strftime('%Y%m%d_%H%M%S')}_{secrets.token_hex(2)}"
+
+
+def new_password() -> str:
+    # требования Identity по умолчанию: цифра, строчная, заглавная, спецсимвол
+    return f"Lt{secrets.token_hex(6)}!9"
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Seed / clean up the load test account pool.")
+    ap.add_argument("--base-url", default=os.environ.get("BASE_URL", f"http://{DOCKER_HOST}:5146"))
+    ap.add_argument("--token", default=os.environ.get("SEED_TOKEN", ""))
+    ap.add_argument("--insecure", action="store_true", default=os.environ.get("INSECURE") == "true")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sd = sub.add_parser("seed")
+    sd.add_argument("--count", type=int, default=50, help="accounts; >= max VUs of the run")
+    sd.add_argument("--prefix", default=None, help="default: lt_<timestamp>_<random>")
+    sd.add_argument("--password", default=None)
+    sd.add_argument("--menu-items", type=int, default=5, help="menu items that must exist (created if missing)")
+    sd.add_argument("--cart-items", type=int, default=0, help="pre-fill each cart with N portions (0 = no)")
+    sd.add_argument("--out", default=str(DEFAULT_POOL))
+    cl = sub.add_parser("cleanup")
+    cl.add_argument("--pool", default=str(DEFAULT_POOL), help="pool file written by seed")
+    cl.add_argument("--prefix", default=None, help="instead of --pool")
+    args = ap.parse_args()
+
+    try:
+        if args.cmd == "seed":
+            pool = seed(args.base_url, args.count, args.prefix or new_prefix(), args.password or new_password(),
+                        args.menu_items, args.cart_items, args.token, args.insecure)
+            out = pathlib.Path(args.out)
+            out.parent.mkdir(parents=True, exist_ok=True)
+            out.write_text(json.dumps(pool, indent=2, ensure_ascii=False), encoding="utf-8")
+            print(f"[seed] pool {pool['prefix']}: {len(pool['users'])} accounts ({pool['created_users']} new), "
+                  f"{len(pool['menu_items'])} menu items, {pool['prefilled_carts']} carts in {pool['seconds']}s -> {out}")
+            return 0
+
+        prefix, base_url = args.prefix, args.base_url
+        if not prefix:
+            pool_path = pathlib.Path(args.pool)
+            if not pool_path.is_file():
+                raise SeedError(f"pool file not found: {pool_path}")
+            pool = json.loads(pool_path.read_text(encoding="utf-8"))
+            prefix, base_url = pool["prefix"], pool.get("base_url") or base_url
+        res = cleanup(base_url, prefix, args.token, args.insecure)
+        print(f"[seed] cleanup {prefix}: {res['deletedUsers']} users, {res['deletedOrders']} orders, "
+              f"{res['deletedMenuItems']} menu items")
+        return 0
+    except SeedError as e:
+        print(f"[seed] {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
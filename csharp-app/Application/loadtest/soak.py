@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Анализ soak-прогонов (MODE=soak: многочасовая постоянная arrival rate).
+
+Посекундные бакеты timeseries_*.json (k6_stream) сливаются в окна по --window секунд
+(гистограммы мёрджатся, так что p95 окна честный), сэмплы resources_*.json (resource_sampler)
+усредняются по тем же окнам. По окнам строится линейный тренд (МНК) для p95/p99 latency,
+RSS и GC heap приложения, RSS контейнера БД и RPS.
+
+Тренд помечается, если наклон статистически значим (t-тест коэффициента, 95%) И за весь прогон
+набегает больше --min-effect-pct относительно начала. Первые --warmup секунд отбрасываются
+(JIT, прогрев кэшей и пула соединений). Окна по 5 минут заметно ослабляют автокорреляцию
+соседних точек, но p-value всё равно стоит считать оптимистичным — смотрите и на графики.
+
+  python3 soak.py --out ./out --scenario 03_checkout_flow           # exit 2, если найден рост
+  python3 soak.py --summary out/03_checkout_flow/summary_03_checkout_flow_<ts>.json --window 600
+"""
+import argparse
+import math
+import pathlib
+from typing import Any, Dict, List, Optional
+
+import k6_stream
+import resource_sampler
+from regress import EXIT_REGRESSION, t_crit
+
+DEFAULT_WINDOW = 300
+DEFAULT_WARMUP = 300
+DEFAULT_MIN_EFFECT_PCT = 10.0
+
+# (key в окне, подпись, "плохое" направление, тип находки)
+TRENDS = [
+    ("p95", "p95 latency, ms", +1, "degradation"),
+    ("p99", "p99 latency, ms", +1, "degradation"),
+    ("rps", "RPS", -1, "degradation"),
+    ("error_rate", "error rate", +1, "degradation"),
+    ("app_rss_mb", "app RSS, MB", +1, "leak"),
+    ("app_gc_heap_mb", "GC heap, MB", +1, "leak"),
+    ("db_mem_mb", "DB container memory, MB", +1, "leak"),
+]
+
+
+def _mean(xs: List[float]) -> Optional[float]:
+    xs = [x for x in xs if x is not None]
+    return sum(xs) / len(xs) if xs else None
+
+
+def windows(timeseries: Optional[Dict[str, Any]], resources: Optional[Dict[str, Any]],
+            window: int, warmup: int) -> List[Dict[str, Any]]:
+    """Окна [t, t+window) относительно начала прогона; неполное последнее окно отбрасывается."""
+    acc: Dict[int, Dict[str, Any]] = {}
+
+    def slot(t: float) -> Optional[Dict[str, Any]]:
+        if t < warmup:
+            return None
+        k = int((t - warmup) // window)
+        return acc.setdefault(k, {"hist": k6_stream.Histogram(), "reqs": 0, "errors": 0, "secs": 0,
+                                  "rss": [], "gc": [], "db": []})
+
+    start = None
+    if timeseries and timeseries.get("points"):
+        start = timeseries.get("start")
+        bs = timeseries.get("bucket_seconds", 1)
+        for p in timeseries["points"]:
+            w = slot(p["t"])
+            if w is None:
+                continue
+            w["secs"] += bs
+            w["reqs"] += p["reqs"]
+            w["errors"] += p["errors"]
+            if p.get("hist"):
+                w["hist"].merge(k6_stream.Histogram.from_dict(p["hist"]))
+
+    if resources and resources.get("samples"):
+        samples = resources["samples"]
+        t0 = start if start is not None else samples[0]["epoch"]
+        db_name = (resources.get("containers") or [None])[0]
+        for sm in samples:
+            w = slot(sm["epoch"] - t0)
+            if w is None:
+                continue
+            app = sm.get("app") or {}
+            if app.get("rss_kb") is not None:
+                w["rss"].append(app["rss_kb"] / 1024)
+            if app.get("gc_heap_mb") is not None:
+                w["gc"].append(app["gc_heap_mb"])
+            db = ((sm.get("containers") or {}).get(db_name) or {}) if db_name else {}
+            if db.get("mem_bytes") is not None:
+                w["db"].append(db["mem_bytes"] / 1024 ** 2)
+
+    if not acc:
+        return []
+    last = max(acc)
+    out = []
+    for k in sorted(acc):
+        w = acc[k]
+        if k == last and len(acc) > 1 and 0 < w["secs"] < window * 0.9:
+            continue
+        h = w["hist"]
+        out.append({
+            "t": warmup + k * window + window / 2,
+            "p50": h.quantile(0.50), "p95": h.quantile(0.95), "p99": h.quantile(0.99),
+            "rps": (w["reqs"] / w["secs"]) if w["secs"] else None,
+            "error_rate": (w["errors"] / w["reqs"]) if w["reqs"] else None,
+            "app_rss_mb": _mean(w["rss"]), "app_gc_heap_mb": _mean(w["gc"]), "db_mem_mb": _mean(w["db"]),
+        })
+    return out
+
+
+def trend(xs: List[float], ys: List[float]) -> Optional[Dict[str, Any]]:
+    """МНК-наклон + t-статистика коэффициента."""
+    pts = [(x, y) for x, y in zip(xs, ys) if x is not None and y is not None]
+    n = len(pts)
+    fit = resource_sampler.linear_fit([x for x, _ in pts], [y for _, y in pts])
+    if fit is None or n < 4:
+        return None
+    slope, intercept, r2 = fit
+    mx = sum(x for x, _ in pts) / n
+    sxx = sum((x - mx) ** 2 for x, _ in pts)
+    ssr = sum((y - (intercept + slope * x)) ** 2 for x, y in pts)
+    se = math.sqrt(ssr / (n - 2) / sxx) if sxx else 0.0
+    t = slope / se if se else (math.inf if slope else 0.0)
+    x0, x1 = pts[0][0], pts[-1][0]
+    y_start = intercept + slope * x0
+    return {
+        "n": n, "slope": slope, "intercept": intercept, "r2": r2, "t": t,
+        "significant": abs(t) > t_crit(n - 2),
+        "start": y_start, "end": intercept + slope * x1,
+        "change_pct": (slope * (x1 - x0) / y_start * 100) if y_start else None,
+    }
+
+
+def analyze(timeseries: Optional[Dict[str, Any]], resources: Optional[Dict[str, Any]],
+            window: int = DEFAULT_WINDOW, warmup: int = DEFAULT_WARMUP,
+            min_effect_pct: float = DEFAULT_MIN_EFFECT_PCT) -> Optional[Dict[str, Any]]:
+    ws = windows(timeseries, resources, window, warmup)
+    if len(ws) < 4:
+        return None  # на коротком прогоне тренд не оценить
+    xs = [w["t"] / 3600 for w in ws]  # наклон — в единицах метрики за час
+    trends = []
+    for key, label, bad_dir, kind in TRENDS:
+        tr = trend(xs, [w[key] for w in ws])
+        if tr is None:
+            continue
+        if key == "error_rate":
+            # доля ошибок часто около нуля — относительный эффект бессмыслен, берём абсолютный рост
+            effect = (tr["end"] - tr["start"]) > 0.005
+        else:
+            effect = tr["change_pct"] is not None and abs(tr["change_pct"]) >= min_effect_pct
+        flagged = tr["significant"] and effect and tr["slope"] * bad_dir > 0
+        trends.append(dict(tr, metric=key, label=label, kind=kind, flagged=flagged))
+    return {
+        "window": window, "warmup": warmup, "min_effect_pct": min_effect_pct,
+        "windows": ws, "trends": trends,
+        "flagged": [t for t in trends if t["flagged"]],
+    }
+
+
+def _fmt(v: Optional[float], nd: int = 2) -> str:
+    return "-" if v is None else f"{v:.{nd}f}"
+
+
+def findings(res: Optional[Dict[str, Any]]) -> List[str]:
+    if not res:
+        return []
+    out = []
+    for t in res["flagged"]:
+        if t["kind"] == "leak":
+            out.append(f"❌ Soak: {t['label']} растёт на {_fmt(t['slope'])}/ч "
+                       f"({_fmt(t['start'])} → {_fmt(t['end'])}, +{_fmt(t['change_pct'], 1)}%) — вероятная утечка памяти.")
+        else:
+            out.append(f"❌ Soak: {t['label']} деградирует на {_fmt(t['slope'])}/ч "
+                       f"({_fmt(t['start'])} → {_fmt(t['end'])}) — производительность падает со временем.")
+    if not out:
+        out.append(f"✅ Soak: значимых трендов latency/памяти не найдено ({len(res['windows'])} окон по {res['window']} с).")
+    return out
+
+
+def md_section(res: Optional[Dict[str, Any]]) -> List[str]:
+    if not res:
+        return []
+    lines = [f"## Soak trends ({len(res['windows'])} windows × {res['window']} s, warmup {res['warmup']} s)", ""]
+    lines.append("| Metric | Start | End | Slope / h | Change | t | R² | Status |")
+    lines.append("|---|---:|---:|---:|---:|---:|---:|---|")
+    for t in res["trends"]:
+        status = ("❌ " + t["kind"]) if t["flagged"] else ("significant" if t["significant"] else "ok")
+        lines.append(f"| {t['label']} | {_fmt(t['start'])} | {_fmt(t['end'])} | {_fmt(t['slope'])} | "
+                     f"{_fmt(t['change_pct'], 1)}% | {_fmt(t['t'])} | {_fmt(t['r2'])} | {status} |")
+    lines.append("")
+    return lines
+
+
+def html_section(res: Optional[Dict[str, Any]], chart) -> str:
+    """chart = report.svg_line_chart (передаётся, чтобы не импортировать report отсюда)."""
+    if not res:
+        return ""
+    ws = res["windows"]
+    xs = [round(w["t"] / 60) for w in ws]
+    rows = []
+    for t in res["trends"]:
+        bg = "#fee2e2" if t["flagged"] else "transparent"
+        rows.append(f"<tr style='background:{bg}'><td>{t['label']}</td><td>{_fmt(t['start'])}</td><td>{_fmt(t['end'])}</td>"
+                    f"<td>{_fmt(t['slope'])}</td><td>{_fmt(t['change_pct'], 1)}%</td><td>{_fmt(t['t'])}</td>"
+                    f"<td>{'❌ ' + t['kind'] if t['flagged'] else ('significant' if t['significant'] else 'ok')}</td></tr>")
+    lat = chart("Latency per window, ms", xs, [("p50", [w["p50"] for w in ws]), ("p95", [w["p95"] for w in ws]),
+                                               ("p99", [w["p99"] for w in ws])], x_label="min")
+    mem_series = [(lbl, [w[k] for w in ws]) for k, lbl in
+                  (("app_rss_mb", "app RSS"), ("app_gc_heap_mb", "GC heap"), ("db_mem_mb", "DB memory"))
+                  if any(w[k] is not None for w in ws)]
+    mem = chart("Memory per window, MB", xs, mem_series, x_label="min") if mem_series else ""
+    return f"""<div class="card" style="margin-top:16px">
+  <h2 style="margin-top:0">Soak trends ({len(ws)} windows × {res['window']} s)</h2>
+  <table>
+    <tr><th>Metric</th><th>Start</th><th>End</th><th>Slope / h</th><th>Change</th><th>t</th><th>Status</th></tr>
+    {''.join(rows)}
+  </table>
+  {lat}
+  {mem}
+</div>"""
+
+
+def analyze_run(summary_path: pathlib.Path, window: int = DEFAULT_WINDOW, warmup: int = DEFAULT_WARMUP,
+                min_effect_pct: float = DEFAULT_MIN_EFFECT_PCT) -> Optional[Dict[str, Any]]:
+    """По пути summary_*.json находит соседние timeseries_*/resources_* и анализирует их."""
+    ts = k6_stream.load_timeseries(k6_stream.timeseries_path_for(summary_path))
+    res = resource_sampler.load_resources(resource_sampler.resources_path_for(summary_path))
+    return analyze(ts, res, window, warmup, min_effect_pct)
+
+
+def add_cli_args(ap: argparse.ArgumentParser) -> None:
+    ap.add_argument("--soak-window", type=int, default=DEFAULT_WINDOW, help="seconds per trend window")
+    ap.add_argument("--soak-warmup", type=int, default=DEFAULT_WARMUP, help="seconds ignored at the start")
+    ap.add_argument("--soak-min-effect-pct", type=float, default=DEFAULT_MIN_EFFECT_PCT,
+                    help="flag only trends that add at least this much over the run")
+
+
+def main() -> int:
+    import runstore
+
+    ap = argparse.ArgumentParser(description="Fit latency/memory trends over a soak run.")
+    ap.add_argument("--summary", help="summary JSON of the soak run")
+    ap.add_argument("--out", help="loadtest out dir (latest soak run of --scenario)")
+    ap.add_argument("--db")
+    ap.add_argument("--scenario")
+    add_cli_args(ap)
+    args = ap.parse_args()
+
+    if args.summary:
+        summary_path = pathlib.Path(args.summary)
+    elif args.out and args.scenario:
+        conn = runstore.open_store(pathlib.Path(args.out), pathlib.Path(args.db) if args.db else None)
+        row = runstore.latest_run(conn, args.scenario, "soak")
+        if row is None:
+            raise SystemExit(f"No soak runs for scenario {args.scenario}")
+        summary_path = pathlib.Path(row["summary_path"])
+    else:
+        ap.error("either --summary or --out with --scenario is required")
+
+    res = analyze_run(summary_path, args.soak_window, args.soak_warmup, args.soak_min_effect_pct)
+    if res is None:
+        print("[soak] not enough windows for a trend (run longer or use a smaller --soak-window)")
+        return 0
+    print("\n".join(md_section(res)))
+    for f in findings(res):
+        print(f"- {f}")
+    return EXIT_REGRESSION if res["flagged"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,26 +1,16 @@
 #!/usr/bin/env python3
 import argparse
-import json
 import pathlib
-import re
 from datetime import datetime
 from html import escape
 
-from report import summarize as summarize_one, build_auto_findings
-
-def latest_pair(folder: pathlib.Path):
-    files = sorted(folder.glob("summary_*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
-    if not files:
-        return None
-    summary = files[0]
-    m = re.match(r"^summary_(.*)_([0-9]{8}_[0-9]{6})\.json$", summary.name)
-    if not m:
-        return None
-    scenario, ts = m.group(1), m.group(2)
-    env = folder / f"env_{scenario}_{ts}.json"
-    if not env.exists():
-        return None
-    return summary, env, scenario, ts
+import dbstats
+import regress
+import runstore
+import soak
+import workers
+from capacity import latest_capacity
+from report import summarize as summarize_one, build_auto_findings, flows_card, phases_card, svg_line_chart
 
 def fmt_pct(v):
     if v is None:
@@ -37,31 +27,78 @@ def fmt_rate(v):
         return "-"
     return f"{float(v):.2f}/s"
 
+def fmt_num(v):
+    if v is None:
+        return "-"
+    return f"{float(v):.2f}"
+
 def badge(ok):
     return f"<span style='padding:2px 8px;border-radius:999px;background:{'#d1fae5' if ok else '#fee2e2'}'>{'OK' if ok else 'FAIL'}</span>"
 
+def capacity_card(capacity):
+    if not capacity:
+        return ""
+    slo = capacity["slo"]
+    blocks = []
+    for c in capacity["results"]:
+        steps = c["steps"]
+        xs = [st["rate"] for st in steps]
+        chart = svg_line_chart(
+            f"{c['scenario']}: latency vs offered load", xs,
+            [("p95", [st["p95"] for st in steps]), ("p99", [st.get("p99") for st in steps]),
+             ("SLO p95", [slo["p95_ms"] for _ in steps])],
+            x_label="it/s", height=200)
+        rows = "".join(
+            f"<tr style='background:{'#d1fae5' if st.get('ok') else '#fee2e2'}'><td>{st['rate']:g}</td>"
+            f"<td>{fmt_num(st['rps'])}</td><td>{fmt_num(st['p95'])}</td><td>{escape(fmt_pct(st['error_rate']))}</td>"
+            f"<td>{st['dropped']}</td><td>{escape('; '.join(st.get('slo_violations') or []))}</td></tr>"
+            for st in steps
+        )
+        mx = c["max_sustainable_rps"]
+        blocks.append(f"""
+  <h3>{escape(c['scenario'])} — max sustainable: <b>{'-' if mx is None else f'{mx:.2f} req/s'}</b>
+    <span class="muted">({'knee found' if c['knee_found'] else 'knee not reached'})</span></h3>
+  {chart}
+  <details><summary>Steps</summary>
+  <table><tr><th>rate it/s</th><th>RPS</th><th>p95 ms</th><th>http err</th><th>dropped</th><th>SLO violations</th></tr>{rows}</table>
+  </details>""")
+    return f"""<div class="card">
+  <h2 style="margin-top:0">Capacity (search {escape(capacity['timestamp'])})</h2>
+  <div class="muted">SLO: p95 ≤ {slo['p95_ms']:g} ms, errors ≤ {slo['error_rate'] * 100:g}%, dropped iterations ≤ {slo['max_dropped'] * 100:g}%</div>
+  {''.join(blocks)}
+</div>"""
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--out", required=True)
+    ap.add_argument("--db", help=f"SQLite run store (default: <out>/{runstore.DB_NAME})")
+    ap.add_argument("--mode", help="only runs of this mode (baseline/stress/soak)")
+    ap.add_argument("--trend", type=int, default=10, help="runs per scenario in the trend table")
+    regress.add_cli_args(ap)
+    soak.add_cli_args(ap)
     args = ap.parse_args()
 
     out_dir = pathlib.Path(args.out)
-    scenario_dirs = [p for p in out_dir.iterdir() if p.is_dir()]
+    conn = runstore.open_store(out_dir, pathlib.Path(args.db) if args.db else None)
 
     rows = []
     env_any = None
 
-    for d in sorted(scenario_dirs):
-        pair = latest_pair(d)
-        if not pair:
-            continue
-
-        summary_p, env_p, scenario, ts = pair
-        summary = json.loads(summary_p.read_text(encoding="utf-8"))
-        env = json.loads(env_p.read_text(encoding="utf-8"))
+    for run in map(runstore.load_run, runstore.latest_runs(conn, args.mode)):
+        summary_p, env_p = run["summary_path"], run["env_path"]
+        scenario, ts = run["scenario"], run["ts"]
+        summary, env = run["summary"], run["env"]
         env_any = env_any or env
 
         s = summarize_one(summary)
+        s["worker_findings"] = workers.findings(workers.load(workers.workers_path_for(pathlib.Path(summary_p))))
+        db_doc = dbstats.load(dbstats.dbstats_path_for(pathlib.Path(summary_p)))
+        s["dbstats_findings"] = dbstats.findings(db_doc)
+        soak_res = None
+        if env.get("mode") == "soak":
+            soak_res = soak.analyze_run(pathlib.Path(summary_p), args.soak_window, args.soak_warmup,
+                                        args.soak_min_effect_pct)
+            s["soak_findings"] = soak.findings(soak_res)
         breached = [t for t in s["thresholds"] if t["breached"]]
         checks_ok = (s["checks_pass_rate"] is None) or (s["checks_pass_rate"] >= 1.0)
         thresholds_ok = (len(breached) == 0)
@@ -70,8 +107,8 @@ def main():
             "scenario": scenario,
             "ts": ts,
             "env": env,
-            "summary_path": str(summary_p),
-            "env_path": str(env_p),
+            "summary_path": summary_p,
+            "env_path": env_p,
             "rps": s["http_reqs_rate"],
             "avg": s["http_dur_avg"],
             "p95": s["http_dur_p95"],
@@ -82,6 +119,10 @@ def main():
             "checks_ok": checks_ok,
             "thresholds_ok": thresholds_ok,
             "details": s,
+            "trend": runstore.history(conn, scenario, env.get("mode"), args.trend),
+            "regression": regress.compare_from_args(conn, scenario, env.get("mode"), args, current_ts=ts),
+            "soak": soak_res,
+            "dbstats": db_doc,
         })
 
     now = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -115,14 +156,58 @@ def main():
         )
     md.append("")
 
+    md.append(f"## Trend (last {args.trend} runs per scenario)\n")
+    md.append("| Scenario | Timestamp | Git | VUs | RPS | p95 ms | p99 ms | http err |")
+    md.append("|---|---:|---|---:|---:|---:|---:|---:|")
+    for r in rows:
+        for h in r["trend"]:
+            md.append(
+                f"| {r['scenario']} | {h['ts']} | {h['git'] or ''} | {h['vus'] if h['vus'] is not None else ''} | "
+                f"{fmt_num(h['rps'])} | {fmt_num(h['p95_ms'])} | {fmt_num(h['p99_ms'])} | {fmt_pct(h['error_rate'])} |"
+            )
+    md.append("")
+
+    capacity = latest_capacity(out_dir)
+    if capacity:
+        slo = capacity["slo"]
+        md.append(f"## Capacity (search {capacity['timestamp']}, SLO: p95 ≤ {slo['p95_ms']:g} ms, errors ≤ {slo['error_rate'] * 100:g}%)\n")
+        md.append("| Scenario | max sustainable RPS | rate (it/s) | p95 at max | knee | steps |")
+        md.append("|---|---:|---:|---:|---|---:|")
+        for c in capacity["results"]:
+            md.append(
+                f"| {c['scenario']} | {fmt_num(c['max_sustainable_rps'])} | {fmt_num(c['max_sustainable_rate'])} | "
+                f"{fmt_ms(c['p95_at_max'])} | {'found' if c['knee_found'] else 'not reached'} | {len(c['steps'])} |"
+            )
+        md.append("")
+
     md.append("## Auto findings (suite)\n")
     for r in rows:
         md.append(f"### {r['scenario']}\n")
         for f in build_auto_findings(r["env"], r["details"]):
             md.append(f"- {f}")
+        if r["regression"] and r["regression"]["regressed"]:
+            bad = [m["label"] for m in r["regression"]["metrics"] if m["status"] == "regression"]
+            md.append(f"- ❌ Регрессия относительно baseline: {', '.join(bad)}")
+        for fl in r["details"].get("flows") or []:
+            md.append(f"- Flow {fl['name']}: {fmt_pct(fl.get('share'))} запросов, "
+                      f"p95 {fmt_ms(fl.get('p95'))}, errors {fmt_pct(fl.get('error_rate'))}")
         md.append(f"- Raw summary: {r['summary_path']}")
         md.append(f"- Raw env: {r['env_path']}\n")
 
+    if any(r["regression"] for r in rows):
+        md.append("## Regression check\n")
+    for r in rows:
+        section = regress.md_section(r["regression"])
+        if section:
+            md.append(f"### {r['scenario']}\n")
+            md.extend(section[2:])
+
+    for r in rows:
+        section = soak.md_section(r["soak"])
+        if section:
+            md.append(f"## Soak trends — {r['scenario']}\n")
+            md.extend(section[2:])
+
     md_path.write_text("\n".join(md), encoding="utf-8")
 
     # HTML
@@ -163,6 +248,12 @@ def main():
   <h3>Auto findings</h3>
   <ul>{"".join(f"<li>{escape(x)}</li>" for x in findings)}</ul>
 
+  {regress.html_section(r["regression"])}
+  {flows_card(r["details"])}
+  {phases_card(r["details"].get("phases"))}
+  {dbstats.html_section(r["dbstats"])}
+  {soak.html_section(r["soak"], svg_line_chart)}
+
   <details>
     <summary>Details</summary>
 
@@ -186,6 +277,16 @@ def main():
 </div>
 """)
 
+    trend_rows = []
+    for r in rows:
+        for h in r["trend"]:
+            trend_rows.append(
+                f"<tr><td class='mono'>{escape(r['scenario'])}</td><td class='mono'>{escape(h['ts'])}</td>"
+                f"<td class='mono'>{escape(h['git'] or '')}</td><td>{escape(str(h['vus'] if h['vus'] is not None else ''))}</td>"
+                f"<td>{fmt_num(h['rps'])}</td><td>{fmt_num(h['p95_ms'])}</td><td>{fmt_num(h['p99_ms'])}</td>"
+                f"<td>{escape(fmt_pct(h['error_rate']))}</td></tr>"
+            )
+
     html = f"""<!doctype html>
 <meta charset="utf-8">
 <title>Load testing suite report</title>
@@ -224,6 +325,16 @@ def main():
   </table>
 </div>
 
+{capacity_card(capacity)}
+
+<div class="card">
+  <h2 style="margin-top:0">Trend (last {args.trend} runs per scenario)</h2>
+  <table>
+    <tr><th>Scenario</th><th>Timestamp</th><th>Git</th><th>VUs</th><th>RPS</th><th>p95 ms</th><th>p99 ms</th><th>http err</th></tr>
+    {''.join(trend_rows)}
+  </table>
+</div>
+
 {''.join(cards)}
 """
     html_path.write_text(html, encoding="utf-8")
@@ -232,5 +343,13 @@ def main():
     print(" -", md_path)
     print(" -", html_path)
 
+    regressed = [r["scenario"] for r in rows if r["regression"] and r["regression"]["regressed"]]
+    regressed += [r["scenario"] for r in rows if r["soak"] and r["soak"]["flagged"] and r["scenario"] not in regressed]
+    if regressed:
+        print("REGRESSION DETECTED:", ", ".join(regressed))
+        if args.fail_on_regression:
+            return regress.EXIT_REGRESSION
+    return 0
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    raise SystemExit(main())
\ No newline at end of file
@@ -0,0 +1,477 @@
+#!/usr/bin/env python3
+"""
+Матрица конфигураций (sweep): один сценарий на всех сочетаниях параметров, с повторами.
+
+Вместо ручных пар run.sh («HTTP или HTTPS на 7146», «keep-alive вкл/выкл», «пул соединений 10 или 100»)
+задаётся матрица осей; sweep.py запускает run.sh на каждом сочетании (ячейке) --repeat раз и строит один
+сравнительный отчёт: таблицу ячеек (среднее ± sd, сравнение с первой ячейкой t-тестом Уэлча из regress.py)
+и heat map RPS и p95 по ячейкам.
+
+Оси:
+  - base_url               — варианты BASE_URL;
+  - k6.<опция>             — опции k6 через K6_* (no-connection-reuse -> K6_NO_CONNECTION_REUSE,
+                             batchPerHost -> K6_BATCH_PER_HOST); run.sh передаёт K6_* и в docker-k6;
+  - run.<ПЕРЕМЕННАЯ>       — переменные run.sh (VUS, RATE, DURATION, WORKERS, PROFILE, ...);
+  - app.<ПЕРЕМЕННАЯ>       — окружение приложения под нагрузкой: нужен --app-cmd, приложение
+                             перезапускается, когда эти значения меняются.
+Значения — список или объект {"метка": "значение"} (для длинных строк подключения).
+
+Оси app.* меняются медленнее всех: приложение стартует один раз на набор своих значений, и прогрев
+после перезапуска не ложится на отдельные ячейки. Внутри такого набора повторы идут вперемешку
+(все ячейки, затем снова все), чтобы дрейф стенда (прогрев, рост БД) не ложился на одну ячейку.
+Результат — out/sweep/<ts>/: sweep.json (пишется после каждого прогона), sweep_report.md и
+sweep_report.html; прогоны run.sh — в out/sweep/<ts>/<ячейка>/r<N>/.
+
+  python3 sweep.py --scenario 01_anonymous_menu --repeat 3 \\
+      --axis base_url=http://host.docker.internal:5146,https://host.docker.internal:7146 \\
+      --axis k6.no-connection-reuse=false,true
+  python3 sweep.py --matrix pool_matrix.json --app-cmd "dotnet run --project ../Mockups --urls http://0.0.0.0:{port}"
+  python3 sweep.py --report out/sweep/20240101_120000 --rows k6.no-connection-reuse --cols base_url
+"""
+import argparse
+import itertools
+import json
+import os
+import pathlib
+import re
+import subprocess
+from datetime import datetime
+from html import escape
+from typing import Any, Dict, List, Optional, Tuple
+
+import envprobe
+import regress
+import resource_sampler
+from report import fmt_pct, summarize
+from run_suite import AppInstance
+
+HERE = pathlib.Path(__file__).resolve().parent
+AXIS_KINDS = ("base_url", "k6", "run", "app")
+# метрика ячейки, подпись, «хорошее» направление (как в regress.METRICS)
+CELL_METRICS = [("rps", "RPS", +1), ("p95", "p95 ms", -1), ("p99", "p99 ms", -1), ("error_rate", "http err", -1)]
+HEATMAPS = [("rps", "RPS", +1), ("p95", "p95 ms", -1)]
+
+
+# ---------- матрица ----------
+
+def _text(v: Any) -> str:
+    if isinstance(v, bool):
+        return "true" if v else "false"
+    return str(v)
+
+
+def k6_env_name(option: str) -> str:
+    """no-connection-reuse / noConnectionReuse / K6_NO_CONNECTION_REUSE -> K6_NO_CONNECTION_REUSE"""
+    if option.upper().startswith("K6_"):
+        return option.upper()
+    return "K6_" + re.sub(r"(?<=[a-z0-9])(?=[A-Z])", "_", option).replace("-", "_").upper()
+
+
+def make_axis(name: str, raw: Any) -> Dict[str, Any]:
+    kind, _, key = name.partition(".")
+    if kind not in AXIS_KINDS or (kind == "base_url") != (not key):
+        raise SystemExit(f"bad axis {name!r}: expected base_url, k6.<option>, run.<VAR> or app.<VAR>")
+    if isinstance(raw, dict):
+        values = [(str(label), _text(v)) for label, v in raw.items()]
+    else:
+        values = [(_text(v), _text(v)) for v in raw]
+    if not values:
+        raise SystemExit(f"axis {name!r} has no values")
+    env = {"base_url": "BASE_URL", "k6": k6_env_name(key) if key else "", "run": key, "app": key}[kind]
+    return {"name": name, "kind": kind, "env": env, "values": values}
+
+
+def parse_axis(text: str) -> Dict[str, Any]:
+    """--axis k6.no-connection-reuse=false,true"""
+    name, sep, values = text.partition("=")
+    if not sep:
+        raise SystemExit(f"bad --axis {text!r}: expected NAME=v1,v2,...")
+    return make_axis(name.strip(), [v.strip() for v in values.split(",") if v.strip()])
+
+
+def load_matrix(path: pathlib.Path) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """JSON: {"scenario": ..., "repeat": 3, "base_url": [...], "k6": {...}, "run": {...}, "app": {...}}"""
+    spec = json.loads(path.read_text(encoding="utf-8"))
+    axes = []
+    if "base_url" in spec:
+        axes.append(make_axis("base_url", spec["base_url"]))
+    for kind in ("k6", "run", "app"):
+        for key, raw in (spec.get(kind) or {}).items():
+            axes.append(make_axis(f"{kind}.{key}", raw))
+    return spec, axes
+
+
+def build_cells(axes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # app.* — внешние оси product: ячейки с одним окружением приложения идут подряд
+    axes = sorted(axes, key=lambda a: a["kind"] != "app")
+    cells = []
+    for i, combo in enumerate(itertools.product(*[a["values"] for a in axes]), 1):
+        cell = {"id": f"c{i:02d}", "labels": {}, "env": {}, "app_env": {}, "runs": []}
+        for axis, (label, value) in zip(axes, combo):
+            cell["labels"][axis["name"]] = label
+            cell["app_env" if axis["kind"] == "app" else "env"][axis["env"]] = value
+        cells.append(cell)
+    return cells
+
+
+# ---------- прогоны ----------
+
+def run_once(cell: Dict[str, Any], rep: int, args, session_dir: pathlib.Path, probe_env: Dict[str, str],
+             app_pid: Optional[int]) -> Dict[str, Any]:
+    run_dir = session_dir / cell["id"] / f"r{rep}"
+    run_dir.mkdir(parents=True, exist_ok=True)
+    env = dict(os.environ)
+    env.update(probe_env)
+    env.update({
+        "SCENARIO": args.scenario,
+        "MODE": args.mode,
+        "ENGINE": args.engine,
+        "BASE_URL": args.base_url,
+        "OUT_DIR": str(run_dir),
+        "SEED_POOL": "0",
+    })
+    env.update(cell["env"])
+    if app_pid:
+        env["APP_PID"] = str(app_pid)
+
+    log_path = run_dir / "run.log"
+    labels = ", ".join(f"{k}={v}" for k, v in cell["labels"].items())
+    print(f"[sweep] {cell['id']} r{rep}: {labels}", flush=True)
+    with log_path.open("w", encoding="utf-8") as log:
+        rc = subprocess.run([str(HERE / "run.sh")], env=env, cwd=str(HERE),
+                            stdout=log, stderr=subprocess.STDOUT).returncode
+    summaries = sorted((run_dir / args.scenario).glob("summary_*.json"))
+    res: Dict[str, Any] = {"rep": rep, "rc": rc, "log": str(log_path)}
+    # 99 = нарушены пороги k6: это результат ячейки, а не сбой прогона
+    if rc not in (0, 99) or not summaries:
+        print(f"[sweep] {cell['id']} r{rep}: failed (exit {rc}), see {log_path}", flush=True)
+        res["ok"] = False
+        return res
+    summary = json.loads(summaries[-1].read_text(encoding="utf-8"))
+    s = summarize(summary)
+    res.update(ok=True, summary_path=str(summaries[-1]), rps=s["http_reqs_rate"], p95=s["http_dur_p95"],
+               p99=(summary.get("metrics", {}).get("http_req_duration") or {}).get("p(99)"),
+               error_rate=s["http_failed_rate"])
+    return res
+
+
+def cell_stats(cells: List[Dict[str, Any]], min_effect: float, threshold: float):
+    """mean/sd по успешным повторам и сравнение каждой ячейки с первой (базовой)."""
+    def values(cell, key):
+        return [r[key] for r in cell["runs"] if r.get("ok") and r.get(key) is not None]
+
+    for cell in cells:
+        cell["stats"] = {}
+        for key, _, _ in CELL_METRICS:
+            xs = values(cell, key)
+            if xs:
+                m, sd = regress.mean_sd(xs)
+                cell["stats"][key] = {"mean": m, "sd": sd, "min": min(xs), "max": max(xs), "n": len(xs),
+                                      "cv": sd / m if m else None}
+        cell["vs_baseline"] = {}
+        if cell is not cells[0]:
+            for key, label, good_dir in HEATMAPS:
+                cell["vs_baseline"][key] = regress.compare_metric(
+                    key, label, good_dir, values(cell, key), values(cells[0], key), min_effect, threshold)
+
+
+def run_sweep(args, axes: List[Dict[str, Any]], session_dir: pathlib.Path) -> Dict[str, Any]:
+    cells = build_cells(axes)
+    if any(c["app_env"] for c in cells) and not args.app_cmd:
+        raise SystemExit("app.* axes need --app-cmd: the app has to be restarted with the new environment")
+    probe = envprobe.probe(args.engine)
+    probe_env = envprobe.run_sh_env(probe)
+    doc = {
+        "timestamp": session_dir.name,
+        "scenario": args.scenario,
+        "mode": args.mode,
+        "engine": args.engine,
+        "base_url": args.base_url,
+        "repeat": args.repeat,
+        "app_cmd": args.app_cmd,
+        "axes": [{"name": a["name"], "env": a["env"], "values": [label for label, _ in a["values"]]} for a in axes],
+        "min_effect_pct": args.min_effect_pct,
+        "cells": cells,
+    }
+    print(f"[sweep] {len(cells)} cells x {args.repeat} repeats = {len(cells) * args.repeat} runs of "
+          f"{args.scenario} ({args.mode}) -> {session_dir}", flush=True)
+
+    app: Optional[AppInstance] = None
+    app_env: Optional[Dict[str, str]] = None
+    app_pid: Optional[int] = None
+    out_path = session_dir / "sweep.json"
+    # группы ячеек с одним окружением приложения (build_cells кладёт их подряд)
+    groups = [list(g) for _, g in itertools.groupby(cells, key=lambda c: sorted(c["app_env"].items()))]
+    try:
+        for group, rep in itertools.product(groups, range(1, args.repeat + 1)):
+            for cell in group:
+                if args.app_cmd and (app is None or cell["app_env"] != app_env):
+                    if app:
+                        app.stop()
+                    run_dir = session_dir / cell["id"] / f"r{rep}"
+                    run_dir.mkdir(parents=True, exist_ok=True)
+                    app_env = cell["app_env"]
+                    app = AppInstance(args.app_cmd, args.app_port, run_dir, args.engine, env=app_env)
+                    if not app.wait_ready(args.app_start_timeout):
+                        print(f"[sweep] {cell['id']} r{rep}: app did not start, see {app.log_path}", flush=True)
+                        cell["runs"].append({"rep": rep, "rc": None, "ok": False, "log": str(app.log_path)})
+                        app.stop()
+                        app = None
+                        continue
+                    app_pid = resource_sampler.find_pid(os.environ.get("APP_PROCESS", "Mockups"), session=app.proc.pid)
+                cell["runs"].append(run_once(cell, rep, args, session_dir, probe_env, app_pid))
+                cell_stats(cells, args.min_effect_pct / 100, args.threshold_pct / 100)
+                out_path.write_text(json.dumps(doc, indent=2, ensure_ascii=False), encoding="utf-8")
+    finally:
+        if app:
+            app.stop()
+    return doc
+
+
+# ---------- отчёт ----------
+
+def _num(v: Optional[float], nd: int = 2) -> str:
+    return "-" if v is None else f"{v:.{nd}f}"
+
+
+def _mean_sd(st: Optional[Dict[str, Any]], key: str) -> str:
+    if not st:
+        return "-"
+    if key == "error_rate":
+        return fmt_pct(st["mean"])
+    return f"{st['mean']:.2f} ± {st['sd']:.2f}" if st["n"] > 1 else f"{st['mean']:.2f}"
+
+
+def _vs(cmp: Optional[Dict[str, Any]]) -> str:
+    if not cmp or cmp.get("change_pct") is None:
+        return "—"
+    return f"{cmp['change_pct']:+.1f}% {regress.STATUS_ICON[cmp['status']]}"
+
+
+def grid_axes(doc: Dict[str, Any], rows: Optional[str], cols: Optional[str]):
+    """Оси heat map: по умолчанию две оси с наибольшим числом значений, остальные — отдельные карты."""
+    names = [a["name"] for a in doc["axes"]]
+    for n in (rows, cols):
+        if n and n not in names:
+            raise SystemExit(f"unknown axis {n!r}; axes: {', '.join(names)}")
+    by_size = sorted((a for a in doc["axes"] if len(a["values"]) > 1), key=lambda a: -len(a["values"]))
+    free = [a["name"] for a in by_size if a["name"] not in (rows, cols)]
+    rows = rows or (free.pop(0) if free else None)
+    cols = cols or (free.pop(0) if free else None)
+    facets = [a for a in doc["axes"] if a["name"] not in (rows, cols)]
+    return rows, cols, facets
+
+
+def _values(doc: Dict[str, Any], name: Optional[str]) -> List[Optional[str]]:
+    if not name:
+        return [None]
+    return next(a["values"] for a in doc["axes"] if a["name"] == name)
+
+
+def heatmaps(doc: Dict[str, Any], rows: Optional[str], cols: Optional[str]):
+    """[(подпись фасета, [[ячейка|None по колонкам] по строкам])]"""
+    rows, cols, facets = grid_axes(doc, rows, cols)
+    index = {tuple(sorted(c["labels"].items())): c for c in doc["cells"]}
+    maps = []
+    for combo in itertools.product(*[a["values"] for a in facets]):
+        fixed = dict(zip([a["name"] for a in facets], combo))
+        grid = []
+        for rv in _values(doc, rows):
+            line = []
+            for cv in _values(doc, cols):
+                labels = dict(fixed)
+                if rows:
+                    labels[rows] = rv
+                if cols:
+                    labels[cols] = cv
+                line.append(index.get(tuple(sorted(labels.items()))))
+            grid.append(line)
+        title = ", ".join(f"{k}={v}" for k, v in fixed.items() if len(_values(doc, k)) > 1)
+        maps.append((title, grid))
+    return rows, cols, maps
+
+
+def _color(v: Optional[float], lo: float, hi: float, good_dir: int) -> str:
+    if v is None:
+        return "#f3f4f6"
+    t = 0.5 if hi == lo else (v - lo) / (hi - lo)
+    good = t if good_dir > 0 else 1 - t
+    return f"hsl({good * 120:.0f}, 70%, 85%)"
+
+
+def md_report(doc: Dict[str, Any], rows: Optional[str] = None, cols: Optional[str] = None) -> str:
+    names = [a["name"] for a in doc["axes"]]
+    md = [f"# Config sweep — {doc['scenario']} ({doc['mode']}), {doc['timestamp']}", ""]
+    md.append(f"- Cells: {len(doc['cells'])}, repeats: {doc['repeat']}, engine: {doc['engine']}")
+    for a in doc["axes"]:
+        md.append(f"- `{a['name']}` ({a['env']}): {', '.join(a['values'])}")
+    md.append(f"- Baseline: {doc['cells'][0]['id']}; значимость — t-тест Уэлча (regress.py), "
+              f"минимальный эффект {doc['min_effect_pct']:g}%")
+    md += ["", "## Cells", "",
+           "| Cell | " + " | ".join(names) + " | runs | RPS | p95 ms | p99 ms | http err | RPS vs base | p95 vs base |",
+           "|---|" + "---|" * len(names) + "---:|---:|---:|---:|---:|---|---|"]
+    for c in doc["cells"]:
+        ok = sum(1 for r in c["runs"] if r.get("ok"))
+        st = c.get("stats") or {}
+        vs = c.get("vs_baseline") or {}
+        md.append(f"| {c['id']} | " + " | ".join(c["labels"][n] for n in names) + f" | {ok}/{len(c['runs'])} | "
+                  + " | ".join(_mean_sd(st.get(k), k) for k, _, _ in CELL_METRICS)
+                  + f" | {_vs(vs.get('rps'))} | {_vs(vs.get('p95'))} |")
+    md.append("")
+
+    rows, cols, maps = heatmaps(doc, rows, cols)
+    for key, label, _ in HEATMAPS:
+        md.append(f"## Heat map: {label} (строки — {rows or '-'}, колонки — {cols or '-'})")
+        md.append("")
+        for title, grid in maps:
+            if title:
+                md += [f"**{title}**", ""]
+            md.append(f"| {rows or ''} \\ {cols or ''} | " + " | ".join(str(v) for v in _values(doc, cols)) + " |")
+            md.append("|---|" + "---:|" * len(grid[0]))
+            for rv, line in zip(_values(doc, rows), grid):
+                md.append(f"| {rv or ''} | " + " | ".join(_mean_sd((c or {}).get("stats", {}).get(key), key) for c in line) + " |")
+            md.append("")
+    return "\n".join(md)
+
+
+def html_report(doc: Dict[str, Any], rows: Optional[str] = None, cols: Optional[str] = None) -> str:
+    names = [a["name"] for a in doc["axes"]]
+    axes_li = "".join(f"<li><span class='mono'>{escape(a['name'])}</span> ({escape(a['env'])}): "
+                      f"{escape(', '.join(a['values']))}</li>" for a in doc["axes"])
+
+    trs = []
+    for c in doc["cells"]:
+        ok = sum(1 for r in c["runs"] if r.get("ok"))
+        st = c.get("stats") or {}
+        vs = c.get("vs_baseline") or {}
+        cv = (st.get("rps") or {}).get("cv")
+        trs.append(
+            f"<tr><td class='mono'>{escape(c['id'])}</td>"
+            + "".join(f"<td class='mono'>{escape(c['labels'][n])}</td>" for n in names)
+            + f"<td>{ok}/{len(c['runs'])}</td>"
+            + "".join(f"<td>{escape(_mean_sd(st.get(k), k))}</td>" for k, _, _ in CELL_METRICS)
+            + f"<td>{_num(None if cv is None else cv * 100, 1)}%</td>"
+            + f"<td>{escape(_vs(vs.get('rps')))}</td><td>{escape(_vs(vs.get('p95')))}</td></tr>")
+
+    rows, cols, maps = heatmaps(doc, rows, cols)
+    blocks = []
+    for key, label, good_dir in HEATMAPS:
+        means = [c["stats"][key]["mean"] for c in doc["cells"] if (c.get("stats") or {}).get(key)]
+        lo, hi = (min(means), max(means)) if means else (0.0, 0.0)
+        for title, grid in maps:
+            head = "".join(f"<th>{escape(str(v))}</th>" for v in _values(doc, cols))
+            body = []
+            for rv, line in zip(_values(doc, rows), grid):
+                tds = []
+                for c in line:
+                    st = (c or {}).get("stats", {}).get(key)
+                    mark = _vs(((c or {}).get("vs_baseline") or {}).get(key))
+                    tds.append(
+                        f"<td style='background:{_color(st['mean'] if st else None, lo, hi, good_dir)};text-align:center'>"
+                        f"<b>{escape(_mean_sd(st, key))}</b><br><span class='muted'>{escape(c['id'] if c else '')} "
+                        f"{escape(mark) if mark != '—' else ''}</span></td>")
+                body.append(f"<tr><th class='mono'>{escape(rv or '')}</th>{''.join(tds)}</tr>")
+            caption = f"<div class='muted'>{escape(title)}</div>" if title else ""
+            blocks.append(f"<h3>{escape(label)}</h3>{caption}"
+                          f"<table><tr><th class='mono'>{escape(rows or '')} \\ {escape(cols or '')}</th>{head}</tr>"
+                          f"{''.join(body)}</table>")
+
+    return f"""<!doctype html>
+<meta charset="utf-8">
+<title>Config sweep — {escape(doc['scenario'])}</title>
+<style>
+  body{{font-family:system-ui,-apple-system,Segoe UI,Roboto,Arial; margin:40px; color:#111}}
+  .muted{{color:#666}}
+  .mono{{font-family:ui-monospace,SFMono-Regular,Menlo,Monaco,Consolas,monospace}}
+  .card{{border:1px solid #e5e7eb; border-radius:14px; padding:16px; margin-top:16px}}
+  table{{border-collapse:collapse; width:100%}}
+  th,td{{border:1px solid #e5e7eb; padding:8px; text-align:left}}
+  th{{background:#f9fafb}}
+</style>
+
+<h1>Config sweep — {escape(doc['scenario'])} ({escape(doc['mode'])})</h1>
+<div class="muted mono">{escape(doc['timestamp'])}; {len(doc['cells'])} cells × {doc['repeat']} repeats; engine {escape(doc['engine'])}</div>
+<ul>{axes_li}</ul>
+<div class="muted">Baseline — {escape(doc['cells'][0]['id'])}; значимость — t-тест Уэлча (regress.py), минимальный эффект {doc['min_effect_pct']:g}%.</div>
+
+<div class="card">
+  <h2 style="margin-top:0">Heat map (строки — {escape(rows or '-')}, колонки — {escape(cols or '-')})</h2>
+  {''.join(blocks)}
+</div>
+
+<div class="card">
+  <h2 style="margin-top:0">Cells</h2>
+  <table>
+    <tr><th>Cell</th>{''.join(f"<th class='mono'>{escape(n)}</th>" for n in names)}<th>runs</th>
+      <th>RPS</th><th>p95 ms</th><th>p99 ms</th><th>http err</th><th>RPS CV</th><th>RPS vs base</th><th>p95 vs base</th></tr>
+    {''.join(trs)}
+  </table>
+</div>
+"""
+
+
+def write_reports(doc: Dict[str, Any], session_dir: pathlib.Path, rows: Optional[str], cols: Optional[str]):
+    md_path = session_dir / "sweep_report.md"
+    html_path = session_dir / "sweep_report.html"
+    md_path.write_text(md_report(doc, rows, cols), encoding="utf-8")
+    html_path.write_text(html_report(doc, rows, cols), encoding="utf-8")
+    print("Generated:")
+    print(" -", md_path)
+    print(" -", html_path)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Run a scenario over a matrix of configurations and compare the cells.")
+    ap.add_argument("--matrix", help="JSON matrix: base_url / k6 / run / app axes (+ scenario, mode, repeat)")
+    ap.add_argument("--axis", action="append", default=[], help="NAME=v1,v2 (base_url, k6.<opt>, run.<VAR>, app.<VAR>)")
+    ap.add_argument("--scenario")
+    ap.add_argument("--mode", help="load profile from scenarios.json (default: baseline)")
+    ap.add_argument("--repeat", type=int, help="runs per cell (default: 3)")
+    ap.add_argument("--out", default=os.environ.get("OUT_DIR", str(HERE / "out")))
+    ap.add_argument("--engine", default=os.environ.get("ENGINE", "docker"))
+    ap.add_argument("--base-url", default=os.environ.get("BASE_URL", "http://host.docker.internal:5146"),
+                    help="BASE_URL when there is no base_url axis")
+    ap.add_argument("--app-cmd", help="command starting the app under test; {port} is substituted")
+    ap.add_argument("--app-port", type=int, default=5146, help="port for --app-cmd (readiness check)")
+    ap.add_argument("--app-start-timeout", type=float, default=120.0)
+    ap.add_argument("--min-effect-pct", type=float, default=5.0, help="smaller differences from the baseline are noise")
+    ap.add_argument("--threshold-pct", type=float, default=10.0, help="difference that counts with a single run per cell")
+    ap.add_argument("--rows", help="heat map row axis")
+    ap.add_argument("--cols", help="heat map column axis")
+    ap.add_argument("--report", help="only re-render the report of an existing out/sweep/<ts> directory")
+    args = ap.parse_args()
+
+    if args.report:
+        session_dir = pathlib.Path(args.report)
+        doc = json.loads((session_dir / "sweep.json").read_text(encoding="utf-8"))
+        write_reports(doc, session_dir, args.rows, args.cols)
+        return 0
+
+    spec: Dict[str, Any] = {}
+    axes: List[Dict[str, Any]] = []
+    if args.matrix:
+        spec, axes = load_matrix(pathlib.Path(args.matrix))
+    axes += [parse_axis(a) for a in args.axis]
+    if not axes:
+        ap.error("no axes: use --matrix and/or --axis")
+    dup = {a["name"] for a in axes if sum(b["name"] == a["name"] for b in axes) > 1}
+    if dup:
+        ap.error(f"axis given twice: {', '.join(sorted(dup))}")
+    args.scenario = args.scenario or spec.get("scenario") or "01_anonymous_menu"
+    args.mode = args.mode or spec.get("mode") or "baseline"
+    args.repeat = args.repeat or spec.get("repeat") or 3
+    args.app_cmd = args.app_cmd or spec.get("app_cmd")
+
+    session_dir = pathlib.Path(args.out) / "sweep" / datetime.now().strftime("%Y%m%d_%H%M%S")
+    session_dir.mkdir(parents=True, exist_ok=True)
+    doc = run_sweep(args, axes, session_dir)
+    write_reports(doc, session_dir, args.rows, args.cols)
+
+    failed = sum(1 for c in doc["cells"] for r in c["runs"] if not r.get("ok"))
+    if failed:
+        print(f"[sweep] {failed} runs failed, see run.log in their directories")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,461 @@
+#!/usr/bin/env python3
+"""
+Распределённая генерация нагрузки: N k6-воркеров (процессы или контейнеры) на один прогон.
+
+Один k6 в stress упирается в собственный CPU раньше приложения — тогда растут dropped_iterations
+и latency генератора, а не сервера. run.sh при WORKERS>1 делит профиль (RATE/STAGES/VUS) между
+воркерами (`plan`), запускает их параллельно, а затем сводит результат (`merge`):
+
+- перцентили считаются по сложенным гистограммам из NDJSON (k6_stream.py), а не усреднением
+  p95 из summary-export каждого воркера — среднее перцентилей не является перцентилем;
+- counters складываются, rate-метрики пересчитываются из passes/fails, checks суммируются;
+- пороги (thresholds) перепроверяются на сведённых значениях;
+- в workers_<scenario>_<ts>.json — разброс между воркерами (RPS, p95, dropped, сдвиг старта).
+  Сервер у всех воркеров один, поэтому заметная разница между ними — признак узкого места
+  в генераторе, а не в приложении.
+
+  eval "$(python3 workers.py plan --workers 4 --rate 40 --save out/.../plan.json)"
+  python3 workers.py merge --dir out/03_checkout_flow/workers_03_checkout_flow_<ts> \\
+      --summary out/03_checkout_flow/summary_03_checkout_flow_<ts>.json \\
+      --timeseries out/03_checkout_flow/timeseries_03_checkout_flow_<ts>.json
+"""
+import argparse
+import json
+import math
+import operator
+import pathlib
+import re
+import shlex
+import statistics
+import sys
+from html import escape
+from typing import Any, Dict, List, Optional
+
+import k6_stream
+from k6_stream import Histogram
+
+# Trend-метрики (кроме http_req_duration), для которых при сведении собираются гистограммы
+EXTRA_TRENDS = ("http_req_waiting", "iteration_duration")
+
+MAX_DROPPED_SHARE = 0.01
+P95_SKEW_RATIO = 1.25
+MIN_RATE_SHARE = 0.9
+MAX_START_OFFSET = 2
+
+EXIT_THRESHOLDS = 99  # как у k6: пороги нарушены
+
+THRESHOLD_RE = re.compile(r"^\s*(avg|min|max|med|count|rate|value|p\(([\d.]+)\))\s*(<=|>=|==|!=|<|>)\s*([-+\d.eE]+)\s*$")
+OPS = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge, "==": operator.eq, "!=": operator.ne}
+PCT_RE = re.compile(r"^p\(([\d.]+)\)$")
+
+
+# --- plan -------------------------------------------------------------------------------------
+
+def split_int(total: int, n: int) -> List[int]:
+    return [max(1, total // n + (1 if i < total % n else 0)) for i in range(n)]
+
+
+def split_stages(spec: str, n: int) -> str:
+    parts = []
+    for part in spec.split(","):
+        duration, target = part.strip().split(":")
+        parts.append(f"{duration}:{float(target) / n:g}")
+    return ",".join(parts)
+
+
+def plan(n: int, vus: Optional[int] = None, rate: Optional[float] = None, stages: Optional[str] = None,
+         start_rate: Optional[float] = None, pre_vus: Optional[int] = None,
+         max_vus: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Доля каждого воркера: интенсивность делится поровну, VUs — с остатком на первых."""
+    if n < 1:
+        raise ValueError("workers must be >= 1")
+    vus_split = split_int(vus, n) if vus else [None] * n
+    out = []
+    for i in range(n):
+        out.append({
+            "worker": f"w{i + 1}",
+            "vus": vus_split[i],
+            "rate": rate / n if rate else None,
+            "stages": split_stages(stages, n) if stages else None,
+            "start_rate": start_rate / n if start_rate else None,
+            "pre_vus": math.ceil(pre_vus / n) if pre_vus else None,
+            "max_vus": math.ceil(max_vus / n) if max_vus else None,
+        })
+    return out
+
+
+def shell_plan(p: List[Dict[str, Any]]) -> str:
+    def arr(key: str) -> str:
+        vals = []
+        for w in p:
+            v = w[key]
+            vals.append(shlex.quote("" if v is None else (f"{v:g}" if isinstance(v, float) else str(v))))
+        return f"W_{key.upper()}=(" + " ".join(vals) + ")"
+
+    return "\n".join([arr("worker"), arr("vus"), arr("rate"), arr("stages"), arr("start_rate"),
+                      arr("pre_vus"), arr("max_vus")])
+
+
+# --- merge ------------------------------------------------------------------------------------
+
+def hist_stat(h: Histogram, key: str) -> Optional[float]:
+    if key == "avg":
+        return h.mean
+    if key == "min":
+        return h.min
+    if key == "max":
+        return h.max
+    if key == "med":
+        return h.quantile(0.5)
+    m = PCT_RE.match(key)
+    return h.quantile(float(m.group(1)) / 100) if m else None
+
+
+def metric_hist(name: str, ts: Dict[str, Any]) -> Optional[Histogram]:
+    """Сведённая гистограмма для метрики summary-export (если её можно восстановить из NDJSON)."""
+    if name == "http_req_duration":
+        return Histogram.from_dict(ts["total"])
+    if name in (ts.get("trends") or {}):
+        return Histogram.from_dict(ts["trends"][name])
+    m = re.match(r"^http_req_duration\{(endpoint|scenario):(.*)\}$", name)
+    if m:
+        src = ts.get("endpoints") if m.group(1) == "endpoint" else ts.get("flows")
+        e = (src or {}).get(m.group(2))
+        return Histogram.from_dict(e["hist"]) if e else None
+    return None
+
+
+def metric_kind(m: Dict[str, Any]) -> str:
+    if "passes" in m and "fails" in m:
+        return "rate"
+    if "count" in m:
+        return "counter"
+    if "avg" in m or any(PCT_RE.match(k) for k in m):
+        return "trend"
+    return "gauge"
+
+
+def merge_metric(name: str, parts: List[Dict[str, Any]], weights: List[float],
+                 ts: Dict[str, Any], approximate: List[str]) -> Dict[str, Any]:
+    kind = metric_kind(parts[0])
+    out: Dict[str, Any] = {}
+    if kind == "counter":
+        out["count"] = sum(p.get("count") or 0 for p in parts)
+        out["rate"] = sum(p.get("rate") or 0 for p in parts)
+        for k in ("min", "max"):
+            if k in parts[0]:
+                out[k] = (min if k == "min" else max)(p[k] for p in parts if k in p)
+    elif kind == "rate":
+        out["passes"] = sum(p.get("passes") or 0 for p in parts)
+        out["fails"] = sum(p.get("fails") or 0 for p in parts)
+        total = out["passes"] + out["fails"]
+        out["value"] = out["passes"] / total if total else 0
+    elif kind == "gauge":
+        # vus/vus_max: воркеры работают одновременно — значения складываются
+        for k in ("value", "min", "max"):
+            if k in parts[0]:
+                out[k] = sum(p.get(k) or 0 for p in parts)
+    else:
+        h = metric_hist(name, ts)
+        keys = [k for k in parts[0] if k != "thresholds"]
+        if h is not None and h.count:
+            for k in keys:
+                out[k] = hist_stat(h, k)
+        else:
+            # без гистограммы честного перцентиля нет: avg — взвешенное, перцентили — худший воркер
+            approximate.append(name)
+            if not sum(weights):
+                weights = [1.0] * len(parts)
+            for k in keys:
+                vals = [p.get(k) for p in parts]
+                if any(v is None for v in vals):
+                    out[k] = None
+                elif k == "avg":
+                    out[k] = sum(v * w for v, w in zip(vals, weights)) / sum(weights)
+                elif k == "min":
+                    out[k] = min(vals)
+                else:
+                    out[k] = max(vals)
+    return out
+
+
+def eval_threshold(expr: str, m: Dict[str, Any], kind: str, h: Optional[Histogram]) -> Optional[bool]:
+    """True — порог нарушен, None — выражение не разобрать (тогда решают сами воркеры)."""
+    mt = THRESHOLD_RE.match(expr)
+    if not mt:
+        return None
+    stat, op, limit = mt.group(1), mt.group(3), float(mt.group(4))
+    if stat == "rate" and kind == "rate":
+        stat = "value"
+    value = m.get(stat)
+    if value is None and h is not None and h.count:
+        value = hist_stat(h, stat)
+    if value is None:
+        return None
+    return not OPS[op](value, limit)
+
+
+def merge_groups(groups: List[Dict[str, Any]]) -> Dict[str, Any]:
+    base = {k: v for k, v in groups[0].items() if k not in ("groups", "checks")}
+    checks: Dict[str, Dict[str, Any]] = {}
+    for g in groups:
+        for key, c in (g.get("checks") or {}).items():
+            acc = checks.setdefault(key, dict(c, passes=0, fails=0))
+            acc["passes"] += c.get("passes", 0)
+            acc["fails"] += c.get("fails", 0)
+    sub: Dict[str, List[Dict[str, Any]]] = {}
+    for g in groups:
+        for key, child in (g.get("groups") or {}).items():
+            sub.setdefault(key, []).append(child)
+    base["checks"] = checks
+    base["groups"] = {key: merge_groups(children) for key, children in sub.items()}
+    return base
+
+
+def merge_summaries(summaries: List[Dict[str, Any]], ts: Dict[str, Any]) -> Dict[str, Any]:
+    """Один summary-export из нескольких: тот же формат, что у k6, поэтому report/runstore не меняются."""
+    weights = [float(((s.get("metrics") or {}).get("http_reqs") or {}).get("count") or 0) for s in summaries]
+    names: List[str] = []
+    for s in summaries:
+        for name in s.get("metrics") or {}:
+            if name not in names:
+                names.append(name)
+
+    metrics: Dict[str, Any] = {}
+    approximate: List[str] = []
+    for name in names:
+        parts = [s["metrics"][name] for s in summaries if name in (s.get("metrics") or {})]
+        part_w = [w for s, w in zip(summaries, weights) if name in (s.get("metrics") or {})]
+        m = merge_metric(name, parts, part_w, ts, approximate)
+        thresholds = {}
+        for expr in (parts[0].get("thresholds") or {}):
+            breached = eval_threshold(expr, m, metric_kind(parts[0]), metric_hist(name, ts))
+            if breached is None:
+                breached = any((p.get("thresholds") or {}).get(expr) for p in parts)
+            thresholds[expr] = breached
+        if thresholds:
+            m["thresholds"] = thresholds
+        metrics[name] = m
+
+    out = {"metrics": metrics, "root_group": merge_groups([s.get("root_group") or {} for s in summaries])}
+    if summaries and "state" in summaries[0]:
+        out["state"] = dict(summaries[0]["state"],
+                            testRunDurationMs=max((s.get("state") or {}).get("testRunDurationMs") or 0
+                                                  for s in summaries))
+    out["merged_from"] = {"workers": len(summaries), "approximate": approximate}
+    return out
+
+
+def breached_thresholds(summary: Dict[str, Any]) -> List[str]:
+    return [f"{name}:{expr}" for name, m in (summary.get("metrics") or {}).items()
+            for expr, b in (m.get("thresholds") or {}).items() if b]
+
+
+# --- skew -------------------------------------------------------------------------------------
+
+def skew(ts: Dict[str, Any], summaries: Dict[str, Dict[str, Any]],
+         plan_doc: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    planned = {w["worker"]: w for w in (plan_doc or [])}
+    stats = ts.get("workers") or {}
+    firsts = [w["first"] for w in stats.values() if w.get("first") is not None]
+    t0 = min(firsts) if firsts else None
+    rows = []
+    for name in sorted(set(stats) | set(summaries), key=lambda x: (len(x), x)):
+        w = stats.get(name) or {}
+        metrics = (summaries.get(name) or {}).get("metrics") or {}
+        iters = (metrics.get("iterations") or {})
+        dropped = (metrics.get("dropped_iterations") or {}).get("count")
+        if dropped is None:
+            dropped = w.get("dropped") or 0
+        it_count = iters.get("count") or 0
+        p = planned.get(name) or {}
+        rows.append({
+            "worker": name,
+            "ok": name in summaries,
+            "planned_rate": p.get("rate"),
+            "planned_vus": p.get("vus"),
+            "reqs": w.get("reqs"),
+            "rps": w.get("rps"),
+            "iter_rate": iters.get("rate"),
+            "errors": w.get("errors"),
+            "dropped": dropped,
+            "dropped_share": dropped / (it_count + dropped) if (it_count + dropped) else 0.0,
+            "p50": w.get("p50"), "p95": w.get("p95"), "p99": w.get("p99"), "max": w.get("max"),
+            "vus_max": (metrics.get("vus_max") or {}).get("value"),
+            "start_offset": (w["first"] - t0) if (t0 is not None and w.get("first") is not None) else None,
+        })
+
+    p95s = [r["p95"] for r in rows if r["p95"] is not None]
+    rpss = [r["rps"] for r in rows if r["rps"]]
+    med_p95 = statistics.median(p95s) if p95s else None
+    flagged = []
+    for r in rows:
+        reasons = []
+        if not r["ok"]:
+            reasons.append("no summary (k6 failed)")
+        if r["dropped_share"] > MAX_DROPPED_SHARE:
+            reasons.append(f"dropped {r['dropped_share'] * 100:.1f}% iterations")
+        if med_p95 and r["p95"] is not None and len(p95s) > 1 and r["p95"] > med_p95 * P95_SKEW_RATIO:
+            reasons.append(f"p95 {r['p95'] / med_p95:.2f}× median")
+        if r["planned_rate"] and r["iter_rate"] is not None and r["iter_rate"] < r["planned_rate"] * MIN_RATE_SHARE:
+            reasons.append(f"{r['iter_rate']:.2f} of {r['planned_rate']:g} it/s")
+        if r["start_offset"] is not None and r["start_offset"] > MAX_START_OFFSET:
+            reasons.append(f"started {r['start_offset']} s late")
+        r["flags"] = reasons
+        if reasons:
+            flagged.append(r["worker"])
+    return {
+        "workers": rows,
+        "flagged": flagged,
+        "rps_spread": (max(rpss) - min(rpss)) / statistics.mean(rpss) if len(rpss) > 1 else None,
+        "p95_ratio": max(p95s) / min(p95s) if len(p95s) > 1 and min(p95s) else None,
+        "start_spread": max(firsts) - min(firsts) if firsts else None,
+    }
+
+
+def merge_dir(worker_dir: pathlib.Path, bucket: int = 1) -> Dict[str, Any]:
+    """workers_<scenario>_<ts>/w<i>/{summary.json,metrics.ndjson.gz} -> summary, timeseries, skew."""
+    dirs = sorted((d for d in worker_dir.iterdir() if d.is_dir() and d.name.startswith("w")),
+                  key=lambda d: (len(d.name), d.name))
+    summaries: Dict[str, Dict[str, Any]] = {}
+    ndjson = []
+    for d in dirs:
+        if (d / "summary.json").exists():
+            summaries[d.name] = json.loads((d / "summary.json").read_text(encoding="utf-8"))
+        for name in ("metrics.ndjson.gz", "metrics.ndjson"):
+            if (d / name).exists():
+                ndjson.append(d / name)
+                break
+    if not summaries:
+        raise SystemExit(f"no worker summaries in {worker_dir}")
+    ts = k6_stream.reduce_files(ndjson, bucket, EXTRA_TRENDS)
+    plan_path = worker_dir / "plan.json"
+    plan_doc = json.loads(plan_path.read_text(encoding="utf-8")) if plan_path.exists() else None
+    summary = merge_summaries(list(summaries.values()), ts)
+    sk = skew(ts, summaries, plan_doc)
+    sk["approximate"] = summary["merged_from"]["approximate"]
+    sk["missing"] = [d.name for d in dirs if d.name not in summaries]
+    return {"summary": summary, "timeseries": ts, "skew": sk}
+
+
+def workers_path_for(summary_path: pathlib.Path) -> pathlib.Path:
+    """summary_<scenario>_<ts>.json -> workers_<scenario>_<ts>.json (рядом)."""
+    return summary_path.with_name("workers_" + summary_path.name[len("summary_"):])
+
+
+def load(path: pathlib.Path) -> Optional[Dict[str, Any]]:
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+# --- report -----------------------------------------------------------------------------------
+
+def _fmt(v: Optional[float], digits: int = 2) -> str:
+    return "-" if v is None else f"{v:.{digits}f}"
+
+
+def findings(doc: Optional[Dict[str, Any]]) -> List[str]:
+    if not doc:
+        return []
+    out = []
+    for r in doc["workers"]:
+        if r["flags"]:
+            out.append(f"⚠️ Генератор {r['worker']}: {', '.join(r['flags'])} — узкое место на стороне k6 "
+                       f"(CPU/VUs воркера), а не приложения; уменьшите долю на воркер или добавьте воркеров.")
+    if doc.get("approximate"):
+        out.append(f"ℹ️ Без гистограмм сведены {len(doc['approximate'])} trend-метрик: их перцентили — "
+                   f"максимум по воркерам (оценка сверху).")
+    if not out:
+        out.append(f"✅ {len(doc['workers'])} воркеров k6 без перекоса (p95 max/min {_fmt(doc.get('p95_ratio'))}).")
+    return out
+
+
+def md_section(doc: Optional[Dict[str, Any]]) -> List[str]:
+    if not doc:
+        return []
+    lines = [f"## Load generators ({len(doc['workers'])} k6 workers)", ""]
+    lines.append(f"RPS spread: {_fmt((doc.get('rps_spread') or 0) * 100, 1)}%, p95 max/min: "
+                 f"{_fmt(doc.get('p95_ratio'))}, start spread: {doc.get('start_spread', '-')} s")
+    lines.append("")
+    lines.append("| Worker | Planned | RPS | it/s | p50 | p95 | p99 | Dropped | Start +s | Status |")
+    lines.append("|---|---:|---:|---:|---:|---:|---:|---:|---:|---|")
+    for r in doc["workers"]:
+        planned = f"{r['planned_rate']:g} it/s" if r["planned_rate"] else (f"{r['planned_vus']} VUs" if r["planned_vus"] else "-")
+        status = "⚠️ " + "; ".join(r["flags"]) if r["flags"] else "ok"
+        lines.append(f"| {r['worker']} | {planned} | {_fmt(r['rps'])} | {_fmt(r['iter_rate'])} | {_fmt(r['p50'])} | "
+                     f"{_fmt(r['p95'])} | {_fmt(r['p99'])} | {r['dropped']} ({_fmt(r['dropped_share'] * 100, 1)}%) | "
+                     f"{r['start_offset'] if r['start_offset'] is not None else '-'} | {status} |")
+    if doc.get("approximate"):
+        lines.append("")
+        lines.append("Merged without histograms (percentile = worst worker): " + ", ".join(doc["approximate"]))
+    lines.append("")
+    return lines
+
+
+def html_section(doc: Optional[Dict[str, Any]]) -> str:
+    if not doc:
+        return ""
+    rows = []
+    for r in doc["workers"]:
+        bg = "#fef3c7" if r["flags"] else "transparent"
+        planned = f"{r['planned_rate']:g} it/s" if r["planned_rate"] else (f"{r['planned_vus']} VUs" if r["planned_vus"] else "-")
+        rows.append(f"<tr style='background:{bg}'><td>{escape(r['worker'])}</td><td>{planned}</td><td>{_fmt(r['rps'])}</td>"
+                    f"<td>{_fmt(r['iter_rate'])}</td><td>{_fmt(r['p50'])}</td><td>{_fmt(r['p95'])}</td><td>{_fmt(r['p99'])}</td>"
+                    f"<td>{r['dropped']} ({_fmt(r['dropped_share'] * 100, 1)}%)</td>"
+                    f"<td>{r['start_offset'] if r['start_offset'] is not None else '-'}</td>"
+                    f"<td>{escape('; '.join(r['flags'])) if r['flags'] else 'ok'}</td></tr>")
+    return f"""<div class="card" style="margin-top:16px">
+  <h2 style="margin-top:0">Load generators ({len(doc['workers'])} k6 workers)</h2>
+  <div class="muted">Percentiles above are computed from merged histograms. RPS spread
+    {_fmt((doc.get('rps_spread') or 0) * 100, 1)}%, p95 max/min {_fmt(doc.get('p95_ratio'))},
+    start spread {doc.get('start_spread', '-')} s</div>
+  <table>
+    <tr><th>Worker</th><th>Planned</th><th>RPS</th><th>it/s</th><th>p50</th><th>p95</th><th>p99</th><th>Dropped</th><th>Start +s</th><th>Status</th></tr>
+    {''.join(rows)}
+  </table>
+</div>"""
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Split a load profile between k6 workers and merge their results.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("plan", help="per-worker share of the profile as shell arrays (W_*)")
+    p.add_argument("--workers", type=int, required=True)
+    p.add_argument("--vus", type=int)
+    p.add_argument("--rate", type=float)
+    p.add_argument("--stages")
+    p.add_argument("--start-rate", type=float)
+    p.add_argument("--pre-vus", type=int)
+    p.add_argument("--max-vus", type=int)
+    p.add_argument("--save", help="write the plan as JSON (merge reads it for planned vs achieved)")
+    m = sub.add_parser("merge", help="merge worker outputs into one summary/timeseries")
+    m.add_argument("--dir", required=True, help="workers_<scenario>_<ts> directory with w1, w2, ...")
+    m.add_argument("--summary", required=True, help="merged summary-export to write")
+    m.add_argument("--timeseries", required=True, help="merged timeseries to write")
+    m.add_argument("--bucket", type=int, default=1)
+    args = ap.parse_args()
+
+    if args.cmd == "plan":
+        pl = plan(args.workers, args.vus, args.rate, args.stages, args.start_rate, args.pre_vus, args.max_vus)
+        if args.save:
+            pathlib.Path(args.save).write_text(json.dumps(pl, indent=2), encoding="utf-8")
+        print(shell_plan(pl))
+        return 0
+
+    res = merge_dir(pathlib.Path(args.dir), args.bucket)
+    summary_path = pathlib.Path(args.summary)
+    summary_path.write_text(json.dumps(res["summary"], indent=2), encoding="utf-8")
+    pathlib.Path(args.timeseries).write_text(json.dumps(res["timeseries"]), encoding="utf-8")
+    workers_path_for(summary_path).write_text(json.dumps(res["skew"], indent=2), encoding="utf-8")
+    sk = res["skew"]
+    print(f"[workers] merged {len(sk['workers']) - len(sk['missing'])} workers -> {summary_path.name}"
+          + (f"; flagged: {', '.join(sk['flagged'])}" if sk["flagged"] else ""))
+    if sk["missing"]:
+        print(f"[workers] no summary from: {', '.join(sk['missing'])}", file=sys.stderr)
+        return 1
+    return EXIT_THRESHOLDS if breached_thresholds(res["summary"]) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,186 @@
+# Admission control for the handlers of main.py.
+#
+# The handlers talk to Redis synchronously, so a worker runs one handler at a
+# time and everything else waits in the kernel socket buffers, invisible to the
+# app, until clients time out. Admission makes that backlog explicit: every
+# request takes a ticket in prepare() and waits for one of max_inflight slots.
+# Slots are handed out from the IOLoop one per iteration, so the loop keeps
+# accepting and parsing new requests between handlers and the queue holds the
+# real backlog. Cheap POSTs are woken before full-table GETs. When the queue is
+# full, or a ticket waited longer than queue_timeout, the request gets a fast
+# 503 with Retry-After instead of a slow failure. Every ticket carries its own
+# IOLoop timer, so it expires on time even while all slots are held by long
+# requests (a streamed list page keeps its slot until the last chunk).
+#
+# Limits and counters are per process (per worker).
+#
+#   ADMISSION_MAX_INFLIGHT=4 ADMISSION_MAX_QUEUE=64 python3 main.py
+#   curl localhost:8888/admission
+
+import collections
+import os
+import time
+
+import tornado.ioloop
+from tornado.concurrent import Future
+
+HIGH = "high"
+LOW = "low"
+
+# client went away while waiting for a slot
+DISCONNECTED = "disconnected"
+# queue was full on arrival
+QUEUE_FULL = "queue_full"
+# queued GET pushed out by an arriving POST
+EVICTED = "evicted"
+# waited in the queue longer than queue_timeout
+TIMEOUT = "timeout"
+
+
+class Ticket:
+    __slots__ = ("priority", "method", "future", "queued_at", "timer")
+
+    def __init__(self, priority, method):
+        self.priority = priority
+        self.method = method
+        self.future = Future()
+        self.queued_at = time.monotonic()
+        self.timer = None
+
+
+class AdmissionControl:
+    def __init__(self, max_inflight=4, max_queue=64, queue_timeout=2.0, retry_after=1):
+        self.max_inflight = max_inflight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+
+        self.in_flight = 0
+        self.queues = {HIGH: collections.deque(), LOW: collections.deque()}
+        self._dispatch_scheduled = False
+
+        self.admitted = collections.Counter()
+        self.shed = collections.Counter()
+        self.shed_by_method = collections.Counter()
+        self.max_queue_seen = 0
+        self.wait_total = 0.0
+
+    @classmethod
+    def from_env(cls, env=os.environ):
+        return cls(max_inflight=int(env.get("ADMISSION_MAX_INFLIGHT", "4")),
+                   max_queue=int(env.get("ADMISSION_MAX_QUEUE", "64")),
+                   queue_timeout=float(env.get("ADMISSION_QUEUE_TIMEOUT", "2.0")),
+                   retry_after=int(env.get("ADMISSION_RETRY_AFTER", "1")))
+
+    @property
+    def enabled(self):
+        return self.max_inflight > 0
+
+    def queued(self):
+        return len(self.queues[HIGH]) + len(self.queues[LOW])
+
+    def enqueue(self, priority, method):
+        # Returns a Ticket whose future resolves to None once a slot is taken,
+        # or to the shed reason. Returns None when the request is shed on arrival.
+        if self.queued() >= self.max_queue:
+            if priority == HIGH and self.queues[LOW]:
+                # the newest GET has the least sunk waiting time
+                self._shed(self.queues[LOW].pop(), EVICTED)
+            else:
+                self._count_shed(method, QUEUE_FULL)
+                return None
+
+        ticket = Ticket(priority, method)
+        self.queues[priority].append(ticket)
+        ticket.timer = tornado.ioloop.IOLoop.current().call_later(self.queue_timeout, self._expire, ticket)
+        self.max_queue_seen = max(self.max_queue_seen, self.queued())
+        self._schedule_dispatch()
+        return ticket
+
+    def cancel(self, ticket):
+        if ticket.future.done():
+            return
+        try:
+            self.queues[ticket.priority].remove(ticket)
+        except ValueError:
+            return
+        self._shed(ticket, DISCONNECTED)
+
+    def release(self):
+        self.in_flight -= 1
+        self._schedule_dispatch()
+
+    def stats(self):
+        admitted = sum(self.admitted.values())
+        return {
+            "enabled": self.enabled,
+            "limits": {
+                "max_inflight": self.max_inflight,
+                "max_queue": self.max_queue,
+                "queue_timeout": self.queue_timeout,
+                "retry_after": self.retry_after,
+            },
+            "in_flight": self.in_flight,
+            "queued": {HIGH: len(self.queues[HIGH]), LOW: len(self.queues[LOW])},
+            "max_queue_seen": self.max_queue_seen,
+            "admitted": dict(self.admitted),
+            "shed": dict(self.shed),
+            "shed_by_method": dict(self.shed_by_method),
+            "avg_wait_ms": round(self.wait_total / admitted * 1000.0, 3) if admitted else None,
+        }
+
+    def _schedule_dispatch(self):
+        # Handing out slots from a separate callback lets the loop poll sockets
+        # before the next handler runs, so new arrivals queue up (and can be
+        # shed) instead of sitting unseen in the kernel.
+        if not self._dispatch_scheduled:
+            self._dispatch_scheduled = True
+            tornado.ioloop.IOLoop.current().add_callback(self._dispatch)
+
+    def _dispatch(self):
+        self._dispatch_scheduled = False
+        now = time.monotonic()
+        while self.in_flight < self.max_inflight:
+            ticket = self._next(now)
+            if ticket is None:
+                break
+            self.in_flight += 1
+            self.admitted[ticket.method] += 1
+            self.wait_total += now - ticket.queued_at
+            self._resolve(ticket, None)
+
+    def _next(self, now):
+        for priority in (HIGH, LOW):
+            queue = self.queues[priority]
+            while queue:
+                ticket = queue.popleft()
+                if now - ticket.queued_at > self.queue_timeout:
+                    # its client has most likely given up already
+                    self._shed(ticket, TIMEOUT)
+                    continue
+                return ticket
+        return None
+
+    def _expire(self, ticket):
+        if ticket.future.done():
+            return
+        try:
+            self.queues[ticket.priority].remove(ticket)
+        except ValueError:
+            return
+        # its client has most likely given up already
+        self._shed(ticket, TIMEOUT)
+
+    def _shed(self, ticket, reason):
+        self._count_shed(ticket.method, reason)
+        self._resolve(ticket, reason)
+
+    def _resolve(self, ticket, result):
+        if ticket.timer is not None:
+            tornado.ioloop.IOLoop.current().remove_timeout(ticket.timer)
+            ticket.timer = None
+        ticket.future.set_result(result)
+
+    def _count_shed(self, method, reason):
+        self.shed[reason] += 1
+        self.shed_by_method[method] += 1
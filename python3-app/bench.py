@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+# Microbenchmarks for the hot handlers of main.py.
+#
+# Each dataset size runs in its own child process, so peak RSS is measured
+# per size. The child seeds Redis (a real redis-server or in-process fakeredis),
+# drives the handlers through tornado's AsyncHTTPTestCase and prints one JSON
+# object; the parent collects them into bench_results/bench_<ts>.json.
+#
+#   python3 bench.py --backend fake --sizes 1000,10000
+#   python3 bench.py --backend redis --redis-port 6379 --redis-db 15
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime
+from urllib.parse import urlencode
+
+import redis
+import tornado
+from tornado.httpclient import AsyncHTTPClient
+from tornado.testing import AsyncHTTPTestCase
+
+import main
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SIZES = "1000,10000,100000,1000000"
+SEED_BATCH = 10000
+MAX_BODY = 2 ** 31 - 1
+
+
+class CommandCounter:
+    # Counts commands sent to Redis and round trips (a pipeline is one trip).
+    def __init__(self):
+        self.commands = 0
+        self.round_trips = 0
+
+    def install(self):
+        counter = self
+        orig_execute = redis.client.Redis.execute_command
+        orig_queue = redis.client.Pipeline.pipeline_execute_command
+        orig_pipe_execute = redis.client.Pipeline.execute
+
+        def execute_command(client, *args, **kwargs):
+            counter.commands += 1
+            counter.round_trips += 1
+            return orig_execute(client, *args, **kwargs)
+
+        def pipeline_execute_command(pipe, *args, **kwargs):
+            counter.commands += 1
+            return orig_queue(pipe, *args, **kwargs)
+
+        def pipe_execute(pipe, *args, **kwargs):
+            if pipe.command_stack:
+                counter.round_trips += 1
+            return orig_pipe_execute(pipe, *args, **kwargs)
+
+        redis.client.Redis.execute_command = execute_command
+        redis.client.Pipeline.pipeline_execute_command = pipeline_execute_command
+        redis.client.Pipeline.execute = pipe_execute
+
+    def reset(self):
+        self.commands = 0
+        self.round_trips = 0
+
+
+def make_client(args):
+    if args.backend == "fake":
+        try:
+            import fakeredis
+        except ImportError:
+            raise SystemExit("fakeredis is not installed: pip3 install -r requirements-bench.txt")
+        return fakeredis.FakeStrictRedis()
+    return redis.StrictRedis(host=args.redis_host, port=args.redis_port, db=args.redis_db)
+
+
+def seed(client, size):
+    # size records of each entity + one doctor-patient link per doctor,
+    # one diagnosis per patient
+    client.flushdb()
+    pipe = client.pipeline(transaction=False)
+    for i in range(size):
+        pipe.hset("hospital:" + str(i), mapping={
+            "name": "Hospital %d" % i, "address": "Street %d" % i,
+            "phone": "+7900%07d" % i, "beds_number": str(100 + i % 400)})
+        pipe.hset("patient:" + str(i), mapping={
+            "surname": "Patient%d" % i, "born_date": "1990-01-01",
+            "sex": "MF"[i % 2], "mpn": "%016d" % i})
+        pipe.hset("doctor:" + str(i), mapping={
+            "surname": "Doctor%d" % i, "profession": "therapist",
+            "hospital_ID": str(i)})
+        pipe.sadd("doctor-patient:" + str(i), str(i))
+        pipe.hset("diagnosis:" + str(i), mapping={
+            "patient_ID": str(i), "type": "flu", "information": "bench"})
+        # chart.py index sets
+        pipe.sadd("patient-diagnosis:" + str(i), str(i))
+        pipe.sadd("patient-doctor:" + str(i), str(i))
+        if (i + 1) % SEED_BATCH == 0:
+            pipe.execute()
+    pipe.execute()
+
+    for entity in ("hospital", "doctor", "patient", "diagnosis"):
+        client.set(entity + ":autoID", size)
+    client.set("db_initiated", 1)
+    client.set("chart_index_built", 1)
+
+
+def percentiles(samples):
+    xs = sorted(samples)
+    if not xs:
+        return {}
+
+    def p(q):
+        return xs[min(len(xs) - 1, int(round(q * (len(xs) - 1))))]
+
+    return {
+        "count": len(xs),
+        "mean": sum(xs) / len(xs),
+        "p50": p(0.50),
+        "p90": p(0.90),
+        "p95": p(0.95),
+        "p99": p(0.99),
+        "max": xs[-1],
+    }
+
+
+def peak_rss_kb():
+    v = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss: KB on Linux, bytes on macOS
+    return v // 1024 if sys.platform == "darwin" else v
+
+
+class BenchCase(AsyncHTTPTestCase):
+    def get_app(self):
+        return main.make_app(autoreload=False, debug=False, serve_traceback=False)
+
+    def get_http_client(self):
+        return AsyncHTTPClient(force_instance=True, max_body_size=MAX_BODY, max_buffer_size=MAX_BODY)
+
+    def get_async_test_timeout(self):
+        return 3600
+
+    def runTest(self):
+        pass
+
+
+def time_requests(case, counter, n, make_request):
+    latencies = []
+    statuses = {}
+    counter.reset()
+    for i in range(n):
+        path, kwargs = make_request(i)
+        t0 = time.perf_counter()
+        resp = case.fetch(path, raise_error=False, request_timeout=3600, **kwargs)
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+        statuses[str(resp.code)] = statuses.get(str(resp.code), 0) + 1
+
+    stats = percentiles(latencies)
+    stats["status_codes"] = statuses
+    stats["redis_commands"] = counter.commands
+    stats["redis_commands_per_request"] = counter.commands / n if n else None
+    stats["redis_round_trips"] = counter.round_trips
+    stats["redis_round_trips_per_request"] = counter.round_trips / n if n else None
+    return stats
+
+
+def run_one_size(args):
+    os.chdir(HERE)  # templates/ and static/ are resolved relative to cwd
+
+    counter = CommandCounter()
+    counter.install()
+
+    client = make_client(args)
+    t0 = time.perf_counter()
+    seed(client, args.size)
+    seed_sec = time.perf_counter() - t0
+    seed_rss = peak_rss_kb()
+
+    main.r = client
+
+    case = BenchCase()
+    case.setUp()
+    try:
+        handlers = {}
+        handlers["HospitalHandler.get"] = time_requests(
+            case, counter, args.requests, lambda i: ("/hospital", {}))
+        handlers["DoctorPatientHandler.get"] = time_requests(
+            case, counter, args.requests, lambda i: ("/doctor-patient", {}))
+        handlers["PatientChartHandler.get"] = time_requests(
+            case, counter, args.requests, lambda i: ("/patient/%d/chart?format=json" % (i % args.size), {}))
+        handlers["PatientHandler.post"] = time_requests(
+            case, counter, args.requests, lambda i: ("/patient", {
+                "method": "POST",
+                "body": urlencode({"surname": "Bench%d" % i, "born_date": "2000-01-01",
+                                   "sex": "F", "mpn": "b%015d" % i}),
+            }))
+    finally:
+        case.tearDown()
+
+    result = {
+        "size": args.size,
+        "requests_per_handler": args.requests,
+        "seed_seconds": seed_sec,
+        "seed_peak_rss_kb": seed_rss,
+        "peak_rss_kb": peak_rss_kb(),
+        "handlers": handlers,
+    }
+    if args.backend == "redis":
+        mem = client.info("memory")
+        result["redis_used_memory_peak"] = mem.get("used_memory_peak")
+        client.flushdb()
+    return result
+
+
+def try_git_rev():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+                             stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        return out.stdout.strip() if out.returncode == 0 else None
+    except OSError:
+        return None
+
+
+def main_cli():
+    ap = argparse.ArgumentParser(description="Benchmark main.py handlers against a seeded Redis.")
+    ap.add_argument("--backend", choices=["fake", "redis"], default="fake")
+    ap.add_argument("--redis-host", default=os.environ.get("REDIS_HOST", "localhost"))
+    ap.add_argument("--redis-port", type=int, default=int(os.environ.get("REDIS_PORT", "6379")))
+    ap.add_argument("--redis-db", type=int, default=15, help="WARNING: this db is flushed")
+    ap.add_argument("--sizes", default=DEFAULT_SIZES)
+    ap.add_argument("--requests", type=int, default=20, help="requests per handler per size")
+    ap.add_argument("--out-dir", default=os.path.join(HERE, "bench_results"))
+    ap.add_argument("--size", type=int, help=argparse.SUPPRESS)  # child mode
+    args = ap.parse_args()
+
+    if args.size is not None:
+        print(json.dumps(run_one_size(args)))
+        return 0
+
+    results = []
+    for size in [int(x) for x in args.sizes.split(",") if x.strip()]:
+        print(f"[bench] size={size} backend={args.backend} ...", flush=True)
+        cmd = [sys.executable, os.path.abspath(__file__),
+               "--backend", args.backend, "--redis-host", args.redis_host,
+               "--redis-port", str(args.redis_port), "--redis-db", str(args.redis_db),
+               "--requests", str(args.requests), "--size", str(size)]
+        p = subprocess.run(cmd, stdout=subprocess.PIPE, text=True)
+        if p.returncode != 0:
+            raise SystemExit(f"benchmark failed for size={size}")
+        res = json.loads(p.stdout.strip().splitlines()[-1])
+        results.append(res)
+        for name, h in res["handlers"].items():
+            print(f"  {name:26s} p50={h['p50']:.2f}ms p95={h['p95']:.2f}ms "
+                  f"p99={h['p99']:.2f}ms redis/req={h['redis_commands_per_request']:.1f}")
+        print(f"  peak RSS: {res['peak_rss_kb'] / 1024:.1f} MB")
+
+    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    os.makedirs(args.out_dir, exist_ok=True)
+    out_path = os.path.join(args.out_dir, f"bench_{ts}.json")
+    doc = {
+        "timestamp": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "git": try_git_rev(),
+        "backend": args.backend,
+        "python": platform.python_version(),
+        "tornado": tornado.version,
+        "redis_py": redis.__version__,
+        "platform": platform.platform(),
+        "results": results,
+    }
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(doc, f, indent=2)
+    print(f"[bench] saved {out_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main_cli())
@@ -0,0 +1,95 @@
+# Patient chart for main.py: the patient record, their diagnoses and their
+# doctors (with hospital names) in one Redis round trip.
+#
+# Two index sets, kept up to date by the create handlers, make the chart
+# independent of the total number of records:
+#   patient-diagnosis:<patient_ID> -> diagnosis IDs
+#   patient-doctor:<patient_ID>    -> doctor IDs (reverse of doctor-patient:*)
+# The lookups run in a Lua script on the server. It builds key names from
+# the index sets, so it is meant for a single Redis instance, not a cluster.
+
+CHART_LUA = """
+local id = ARGV[1]
+local patient = redis.call('HGETALL', 'patient:' .. id)
+if #patient == 0 then
+  return {}
+end
+
+local diagnoses = {}
+for _, diagnosis_id in ipairs(redis.call('SMEMBERS', 'patient-diagnosis:' .. id)) do
+  local diagnosis = redis.call('HGETALL', 'diagnosis:' .. diagnosis_id)
+  if #diagnosis > 0 then
+    table.insert(diagnoses, {diagnosis_id, diagnosis})
+  end
+end
+
+local doctors = {}
+local hospitals = {}
+for _, doctor_id in ipairs(redis.call('SMEMBERS', 'patient-doctor:' .. id)) do
+  local doctor = redis.call('HMGET', 'doctor:' .. doctor_id, 'surname', 'profession', 'hospital_ID')
+  if doctor[1] then
+    local hospital_id = doctor[3] or ''
+    if hospital_id ~= '' and hospitals[hospital_id] == nil then
+      hospitals[hospital_id] = redis.call('HGET', 'hospital:' .. hospital_id, 'name') or ''
+    end
+    table.insert(doctors, {doctor_id, doctor[1], doctor[2] or '', hospital_id, hospitals[hospital_id] or ''})
+  end
+end
+
+return {patient, diagnoses, doctors}
+"""
+
+
+def _pairs(flat):
+    return {flat[i].decode(): flat[i + 1].decode() for i in range(0, len(flat), 2)}
+
+
+def load(client, patient_ID):
+    # EVALSHA (SCRIPT LOAD on the first call); None for an unknown patient
+    reply = client.register_script(CHART_LUA)(args=[patient_ID])
+    if not reply:
+        return None
+
+    patient, diagnoses, doctors = reply
+    chart = {"patient": dict(_pairs(patient), ID=patient_ID), "diagnoses": [], "doctors": []}
+    for diagnosis_ID, fields in sorted(diagnoses, key=lambda d: int(d[0])):
+        chart["diagnoses"].append(dict(_pairs(fields), ID=diagnosis_ID.decode()))
+    for doctor_ID, surname, profession, hospital_ID, hospital in sorted(doctors, key=lambda d: int(d[0])):
+        chart["doctors"].append({
+            "ID": doctor_ID.decode(),
+            "surname": surname.decode(),
+            "profession": profession.decode(),
+            "hospital_ID": hospital_ID.decode(),
+            "hospital": hospital.decode(),
+        })
+    return chart
+
+
+def add_diagnosis(client, patient_ID, diagnosis_ID):
+    client.sadd("patient-diagnosis:" + patient_ID, diagnosis_ID)
+
+
+def add_doctor(client, patient_ID, doctor_ID):
+    client.sadd("patient-doctor:" + patient_ID, doctor_ID)
+
+
+def build_index(client, batch=1000):
+    # One-time backfill of the index sets for records created before them.
+    pipe = client.pipeline(transaction=False)
+    for key in client.scan_iter(match="diagnosis:*", count=batch):
+        diagnosis_ID = key.decode().split(":", 1)[1]
+        if not diagnosis_ID.isdigit():
+            continue
+        patient_ID = client.hget(key, "patient_ID")
+        if patient_ID:
+            add_diagnosis(pipe, patient_ID.decode(), diagnosis_ID)
+        if len(pipe) >= batch:
+            pipe.execute()
+
+    for key in client.scan_iter(match="doctor-patient:*", count=batch):
+        doctor_ID = key.decode().split(":", 1)[1]
+        for patient_ID in client.smembers(key):
+            add_doctor(pipe, patient_ID.decode(), doctor_ID)
+        if len(pipe) >= batch:
+            pipe.execute()
+    pipe.execute()
@@ -0,0 +1,164 @@
+# Live feed of created entities for main.py, served as Server-Sent Events.
+#
+# The create handlers append every new record to a capped Redis stream
+# (events:<entity>:log) and publish it on the events:<entity> channel. Each
+# worker keeps one pattern subscription (EventHub) and fans messages out to its
+# connected /events clients through small in-memory queues. A client that
+# reconnects with Last-Event-ID first gets what it missed from the stream; if
+# that part of the stream has already been trimmed it gets a "reset" event and
+# should reload the full list once. A list page embeds the stream ID current
+# when it was rendered (last_id) and connects with it as last_event_id, so
+# events published between rendering and connecting are replayed too.
+#
+#   curl -N 'localhost:8888/events?entity=diagnosis'
+#   curl -N -H 'Last-Event-ID: 1697700000000-0' 'localhost:8888/events?entity=diagnosis'
+
+import asyncio
+import json
+import logging
+import os
+
+import redis
+
+ENTITIES = ("hospital", "doctor", "patient", "diagnosis", "doctor-patient")
+CHANNEL_PREFIX = "events:"
+
+STREAM_MAXLEN = int(os.environ.get("EVENTS_STREAM_MAXLEN", "10000"))
+# events buffered per client; a client that falls further behind is
+# disconnected and resumes from the stream with Last-Event-ID
+CLIENT_QUEUE = int(os.environ.get("EVENTS_CLIENT_QUEUE", "256"))
+KEEPALIVE = float(os.environ.get("EVENTS_KEEPALIVE", "15"))
+RECONNECT_DELAY = 1.0
+
+
+def channel(entity):
+    return CHANNEL_PREFIX + entity
+
+
+def stream_key(entity):
+    return CHANNEL_PREFIX + entity + ":log"
+
+
+def parse_id(event_id):
+    # stream ids are "<ms>-<seq>"; returns None for anything else
+    if isinstance(event_id, bytes):
+        event_id = event_id.decode()
+    try:
+        ms, seq = event_id.split("-")
+        return int(ms), int(seq)
+    except (AttributeError, ValueError):
+        return None
+
+
+def last_id(client, entity):
+    # ID of the newest event; "0-0" (below any real ID) when the stream is
+    # empty, meaning everything that appears in it later is new
+    entries = client.xrevrange(stream_key(entity), count=1)
+    return entries[0][0].decode() if entries else "0-0"
+
+
+def publish(client, entity, fields):
+    # fields: str -> str, the record as stored in its hash (plus its ID)
+    event_id = client.xadd(stream_key(entity), fields, maxlen=STREAM_MAXLEN, approximate=True).decode()
+    client.publish(channel(entity), json.dumps({"id": event_id, "data": fields}))
+    return event_id
+
+
+def format_event(entity, event_id, fields):
+    return "id: %s\nevent: %s\ndata: %s\n\n" % (event_id, entity, json.dumps(fields))
+
+
+class Subscription:
+    def __init__(self, entity):
+        self.entity = entity
+        self.queue = asyncio.Queue(CLIENT_QUEUE)
+        self.closed = False
+
+    def push(self, event):
+        # event: (parsed id, id, fields); returns False once the client is too slow
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            self.close()
+            return False
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        if not self.queue.full():
+            self.queue.put_nowait(None)
+
+
+class EventHub:
+    def __init__(self, client):
+        # client: redis.asyncio client; one pub/sub connection per hub (per worker)
+        self.client = client
+        self.subscriptions = {entity: set() for entity in ENTITIES}
+        self._task = None
+
+    def subscribe(self, entity):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+        sub = Subscription(entity)
+        self.subscriptions[entity].add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        sub.close()
+        self.subscriptions[sub.entity].discard(sub)
+
+    async def since(self, entity, last_id):
+        # Events after last_id, or None when some of them were trimmed away.
+        last = parse_id(last_id)
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.xrange(stream_key(entity), "-", "+", count=1)
+            pipe.xrange(stream_key(entity), last_id, "+", count=STREAM_MAXLEN)
+            first, entries = await pipe.execute()
+
+        # capped with MAXLEN, a stream that had entries never becomes empty
+        # again, so after "0-0" nothing can have been trimmed
+        if first and last != (0, 0) and parse_id(first[0][0]) > last:
+            return None
+        events = []
+        for entry_id, raw in entries:
+            parsed = parse_id(entry_id)
+            if parsed > last:
+                fields = {k.decode(): v.decode() for k, v in raw.items()}
+                events.append((parsed, entry_id.decode(), fields))
+        return events
+
+    async def _run(self):
+        while True:
+            pubsub = self.client.pubsub()
+            try:
+                await pubsub.psubscribe(CHANNEL_PREFIX + "*")
+                async for message in pubsub.listen():
+                    if message["type"] == "pmessage":
+                        self._fanout(message)
+            except (redis.exceptions.RedisError, OSError) as e:
+                logging.warning("events: pub/sub connection lost: %s", e)
+            finally:
+                # events published while we were away are only in the streams:
+                # let clients reconnect and resume from there
+                self._close_all()
+                await pubsub.reset()
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    def _fanout(self, message):
+        entity = message["channel"].decode()[len(CHANNEL_PREFIX):]
+        subs = self.subscriptions.get(entity)
+        if not subs:
+            return
+        body = json.loads(message["data"])
+        event = (parse_id(body["id"]), body["id"], body["data"])
+        for sub in list(subs):
+            if not sub.push(event):
+                subs.discard(sub)
+
+    def _close_all(self):
+        for subs in self.subscriptions.values():
+            for sub in subs:
+                sub.close()
+            subs.clear()
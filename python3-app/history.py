@@ -0,0 +1,90 @@
+# Time-ordered diagnosis history for main.py.
+#
+# Every new diagnosis gets a "created" field (UTC, ISO 8601) and is indexed by
+# its creation time (unix seconds) in sorted sets:
+#   diagnosis-time                    -> all diagnosis IDs
+#   patient-diagnosis-time:<patient>  -> diagnosis IDs of one patient
+#   diagnosis-type-time:<type>        -> diagnosis IDs of one type
+#   diagnosis-types                   -> set of known types
+# so "since T", "last N" and per-type counts in a window are ZRANGEBYSCORE /
+# ZREVRANGE / ZCOUNT calls, O(log N + k), instead of a scan of diagnosis:*.
+# Diagnoses created before this have no timestamp and are not indexed.
+
+import time
+from datetime import datetime, timezone
+
+GLOBAL_KEY = "diagnosis-time"
+TYPES_KEY = "diagnosis-types"
+MAX_LIMIT = 1000
+
+
+def patient_key(patient_ID):
+    return "patient-diagnosis-time:" + patient_ID
+
+
+def type_key(diagnosis_type):
+    return "diagnosis-type-time:" + diagnosis_type
+
+
+def isoformat(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def parse_time(value):
+    # unix seconds or ISO 8601 (naive means UTC); raises ValueError
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def add_diagnosis(client, diagnosis_ID, patient_ID, diagnosis_type, ts=None):
+    # Indexes a diagnosis whose hash is already written; pass the ts its
+    # "created" field was made from. Returns that "created" value.
+    ts = time.time() if ts is None else ts
+    pipe = client.pipeline(transaction=False)
+    pipe.zadd(GLOBAL_KEY, {diagnosis_ID: ts})
+    pipe.zadd(patient_key(patient_ID), {diagnosis_ID: ts})
+    pipe.zadd(type_key(diagnosis_type), {diagnosis_ID: ts})
+    pipe.sadd(TYPES_KEY, diagnosis_type)
+    pipe.execute()
+    return isoformat(ts)
+
+
+def _load(client, ids_with_scores):
+    pipe = client.pipeline(transaction=False)
+    for diagnosis_ID, _ in ids_with_scores:
+        pipe.hgetall(b"diagnosis:" + diagnosis_ID)
+    items = []
+    for (diagnosis_ID, ts), fields in zip(ids_with_scores, pipe.execute()):
+        if fields:
+            item = {k.decode(): v.decode() for k, v in fields.items()}
+            item["ID"] = diagnosis_ID.decode()
+            item["timestamp"] = ts
+            items.append(item)
+    return items
+
+
+def since(client, start, end="+inf", patient_ID=None, limit=MAX_LIMIT):
+    # oldest first
+    key = patient_key(patient_ID) if patient_ID else GLOBAL_KEY
+    ids = client.zrangebyscore(key, start, end, start=0, num=limit, withscores=True)
+    return _load(client, ids)
+
+
+def last(client, n, patient_ID=None):
+    # newest first
+    key = patient_key(patient_ID) if patient_ID else GLOBAL_KEY
+    return _load(client, client.zrevrange(key, 0, n - 1, withscores=True))
+
+
+def type_counts(client, start="-inf", end="+inf"):
+    types = sorted(client.smembers(TYPES_KEY))
+    pipe = client.pipeline(transaction=False)
+    for diagnosis_type in types:
+        pipe.zcount(type_key(diagnosis_type.decode()), start, end)
+    return {t.decode(): n for t, n in zip(types, pipe.execute()) if n}
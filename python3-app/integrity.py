@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# Integrity scanner for the data of main.py: finds (and with --repair fixes)
+# references to records that do not exist.
+#
+#   doctor:<id>             hospital_ID -> hospital:<id>   repair: clear the field
+#   diagnosis:<id>          patient_ID  -> patient:<id>    repair: delete the diagnosis
+#                                                          and its index entries
+#   doctor-patient:<id>     owner doctor:<id>, members patient:<id>
+#   patient-doctor:<id>     owner patient:<id>, members doctor:<id>
+#   patient-diagnosis:<id>  owner patient:<id>, members diagnosis:<id>
+#                           repair: SREM the member / DEL the set without owner
+#   diagnosis-time, patient-diagnosis-time:<id>, diagnosis-type-time:<type>
+#                           (history.py) members diagnosis:<id>
+#                           repair: ZREM the member
+#
+# The keyspace is walked with SCAN in small batches (no KEYS), each batch costs
+# two pipelined round trips, and the pace is capped at --rate keys per second,
+# so it can run against a production Redis. History zsets can be large, so
+# their members are read with ZSCAN in batches of the same size and count
+# against --rate like keys. Every repair re-checks the missing key under WATCH,
+# so a record created meanwhile is left alone. The SCAN cursor is saved to
+# --checkpoint after each batch; a restarted scan resumes from it (a zset cut
+# short is walked again from its start). Findings are printed as JSON lines.
+#
+#   python3 integrity.py                       # report only
+#   python3 integrity.py --repair --rate 500
+#   python3 integrity.py --repair --loop 3600  # rescan every hour
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+import redis
+
+import history
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CHECKPOINT = os.path.join(HERE, "integrity_checkpoint.json")
+
+# set key prefix -> (owner prefix, member prefix)
+SETS = {
+    "doctor-patient": ("doctor", "patient"),
+    "patient-doctor": ("patient", "doctor"),
+    "patient-diagnosis": ("patient", "diagnosis"),
+}
+
+
+HISTORY_PREFIXES = (history.patient_key(""), history.type_key(""))
+
+
+def is_history_key(key):
+    return key == history.GLOBAL_KEY or key.startswith(HISTORY_PREFIXES)
+
+
+def split_key(key):
+    prefix, _, ID = key.decode().partition(":")
+    return prefix, ID
+
+
+def find_dangling(client, keys):
+    # Returns findings for one SCAN batch: dicts with kind, key, ref and
+    # optionally member/patient_ID/type (needed for the repair).
+    records = []
+    pipe = client.pipeline(transaction=False)
+    for key in keys:
+        prefix, ID = split_key(key)
+        if not ID.isdigit():
+            continue
+        if prefix == "doctor":
+            pipe.hget(key, "hospital_ID")
+        elif prefix == "diagnosis":
+            pipe.hmget(key, "patient_ID", "type")
+        elif prefix in SETS:
+            pipe.smembers(key)
+        else:
+            continue
+        records.append((prefix, ID, key.decode()))
+    if not records:
+        return []
+
+    candidates = []
+    for (prefix, ID, key), value in zip(records, pipe.execute()):
+        if prefix == "doctor":
+            if value:
+                candidates.append({"kind": "doctor.hospital_ID", "key": key,
+                                   "ref": "hospital:" + value.decode()})
+        elif prefix == "diagnosis":
+            patient_ID, diagnosis_type = value
+            if patient_ID is not None:
+                candidates.append({"kind": "diagnosis.patient_ID", "key": key,
+                                   "ref": "patient:" + patient_ID.decode(),
+                                   "patient_ID": patient_ID.decode(),
+                                   "type": diagnosis_type.decode() if diagnosis_type else ""})
+        else:
+            owner, member_prefix = SETS[prefix]
+            candidates.append({"kind": prefix + ".owner", "key": key, "ref": owner + ":" + ID})
+            for member in sorted(value):
+                candidates.append({"kind": prefix + ".member", "key": key, "member": member.decode(),
+                                   "ref": member_prefix + ":" + member.decode()})
+
+    refs = sorted({c["ref"] for c in candidates})
+    pipe = client.pipeline(transaction=False)
+    for ref in refs:
+        pipe.exists(ref)
+    missing = {ref for ref, exists in zip(refs, pipe.execute()) if not exists}
+
+    findings = [c for c in candidates if c["ref"] in missing]
+    # a set without owner is deleted as a whole, its members need no report
+    orphan_sets = {f["key"] for f in findings if f["kind"].endswith(".owner")}
+    return [f for f in findings if not (f["kind"].endswith(".member") and f["key"] in orphan_sets)]
+
+
+def find_dangling_history(client, key, batch):
+    # Yields (members checked, findings) per ZSCAN batch of one history zset.
+    cursor = 0
+    while True:
+        cursor, members = client.zscan(key, cursor, count=batch)
+        IDs = [member.decode() for member, _ in members]
+        pipe = client.pipeline(transaction=False)
+        for ID in IDs:
+            pipe.exists("diagnosis:" + ID)
+        found = [{"kind": "history.member", "key": key, "member": ID, "ref": "diagnosis:" + ID}
+                 for ID, exists in zip(IDs, pipe.execute() if IDs else []) if not exists]
+        yield len(IDs), found
+        if cursor == 0:
+            return
+
+
+def _apply(pipe, finding):
+    kind, key = finding["kind"], finding["key"]
+    if kind == "doctor.hospital_ID":
+        pipe.hset(key, "hospital_ID", "")
+    elif kind == "diagnosis.patient_ID":
+        diagnosis_ID = key.split(":", 1)[1]
+        pipe.delete(key)
+        pipe.srem("patient-diagnosis:" + finding["patient_ID"], diagnosis_ID)
+        pipe.zrem(history.GLOBAL_KEY, diagnosis_ID)
+        pipe.zrem(history.patient_key(finding["patient_ID"]), diagnosis_ID)
+        pipe.zrem(history.type_key(finding["type"]), diagnosis_ID)
+    elif kind.endswith(".owner"):
+        pipe.delete(key)
+    elif kind == "history.member":
+        pipe.zrem(key, finding["member"])
+    else:
+        pipe.srem(key, finding["member"])
+
+
+def repair(client, finding):
+    # True if repaired, False if the referenced record showed up meanwhile.
+    with client.pipeline() as pipe:
+        try:
+            pipe.watch(finding["ref"])
+            if pipe.exists(finding["ref"]):
+                return False
+            pipe.multi()
+            _apply(pipe, finding)
+            pipe.execute()
+            return True
+        except redis.exceptions.WatchError:
+            return False
+
+
+def load_checkpoint(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_checkpoint(path, state):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, path)
+
+
+def scan(client, args, out=sys.stdout):
+    state = load_checkpoint(args.checkpoint)
+    if state:
+        print(f"[integrity] resuming at cursor {state['cursor']} "
+              f"({state['scanned']} keys scanned)", file=sys.stderr)
+    else:
+        state = {"started": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"), "cursor": 0,
+                 "scanned": 0, "found": 0, "repaired": 0}
+
+    t0 = time.monotonic()
+    done_here = 0
+
+    def report(findings):
+        for finding in findings:
+            state["found"] += 1
+            if args.repair:
+                finding["repaired"] = repair(client, finding)
+                state["repaired"] += finding["repaired"]
+            out.write(json.dumps(finding) + "\n")
+        out.flush()
+
+    def pace(n):
+        # keep to --rate keys (and zset members) per second on average
+        nonlocal done_here
+        done_here += n
+        ahead = done_here / args.rate - (time.monotonic() - t0)
+        if ahead > 0:
+            time.sleep(ahead)
+
+    while True:
+        cursor, keys = client.scan(cursor=state["cursor"], count=args.batch)
+        report(find_dangling(client, keys))
+        for key in keys:
+            if is_history_key(key.decode()):
+                for checked, findings in find_dangling_history(client, key.decode(), args.batch):
+                    report(findings)
+                    pace(checked)
+
+        state["cursor"] = cursor
+        state["scanned"] += len(keys)
+        if cursor == 0:
+            break
+        save_checkpoint(args.checkpoint, state)
+        pace(len(keys))
+
+    if os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+    print(f"[integrity] done: {state['scanned']} keys, {state['found']} dangling references, "
+          f"{state['repaired']} repaired", file=sys.stderr)
+    return state
+
+
+def positive(value):
+    rate = float(value)
+    if rate <= 0:
+        raise argparse.ArgumentTypeError("must be > 0")
+    return rate
+
+
+def main_cli():
+    ap = argparse.ArgumentParser(description="Find and repair dangling references in the Redis data of main.py.")
+    ap.add_argument("--redis-host", default=os.environ.get("REDIS_HOST", "localhost"))
+    ap.add_argument("--redis-port", type=int, default=int(os.environ.get("REDIS_PORT", "6379")))
+    ap.add_argument("--redis-db", type=int, default=0)
+    ap.add_argument("--repair", action="store_true", help="fix what is found (default: report only)")
+    ap.add_argument("--batch", type=int, default=100, help="SCAN COUNT hint per batch")
+    ap.add_argument("--rate", type=positive, default=1000, help="max keys scanned per second (> 0)")
+    ap.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT)
+    ap.add_argument("--loop", type=float, default=0, help="rescan every N seconds (0 = one pass)")
+    args = ap.parse_args()
+
+    client = redis.StrictRedis(host=args.redis_host, port=args.redis_port, db=args.redis_db)
+    while True:
+        try:
+            scan(client, args)
+        except redis.exceptions.ConnectionError as e:
+            # the checkpoint keeps the progress of this pass
+            print(f"[integrity] {e}", file=sys.stderr)
+            if not args.loop:
+                return 1
+        if not args.loop:
+            return 0
+        time.sleep(args.loop)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main_cli())
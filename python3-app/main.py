@@ -1,14 +1,26 @@
 #!/usr/bin/env python3
 
+import asyncio
 import logging
 import os
 import redis
+import time
+import redis.asyncio
 import tornado.ioloop
 import tornado.web
 
+from tornado.iostream import StreamClosedError
 from tornado.options import parse_command_line
 
+import admission
+import chart
+import events
+import history
+import replicas
+
 PORT = 8888
+# records per Redis pipeline / flushed chunk of a list page
+LIST_CHUNK = int(os.environ.get("LIST_CHUNK", "500"))
 r = redis.StrictRedis(host=os.environ.get("REDIS_HOST", "localhost"), 
     port=int(os.environ.get("REDIS_PORT", "6379")), db=0)
 
@@ -18,22 +30,158 @@ class MainHandler(tornado.web.RequestHandler):
         self.render('templates/index.html')
 
 
-class HospitalHandler(tornado.web.RequestHandler):
-    def get(self):
-        items = []
-        try:
-            ID = r.get("hospital:autoID").decode()
+class AdmittedHandler(tornado.web.RequestHandler):
+    # POSTs touch a handful of keys, GETs read and render the whole table
+    priorities = {"POST": admission.HIGH}
+
+    _ticket = None
+    _admitted = False
+    _db = None
+
+    async def prepare(self):
+        if await self._admit() and self.request.method == "POST":
+            self._pin_to_primary()
 
-            for i in range(int(ID)):
-                result = r.hgetall("hospital:" + str(i))
-                if result:
-                    items.append(result)
+    def reader(self):
+        # client for GET reads: a replica, unless this client wrote recently
+        router = self.settings.get("replicas")
+        if router is None or self._pinned_to_primary():
+            return r
+        return router.next() or r
 
+    def read(self, fn, *args):
+        # fn(client, *args) on the reader() client, picked once per request.
+        # An unreachable replica is retried on the primary, which then serves
+        # the rest of the request; errors from the primary propagate.
+        if self._db is None:
+            self._db = self.reader()
+        try:
+            return fn(self._db, *args)
+        except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as e:
+            if self._db is r:
+                raise
+            self.settings["replicas"].mark_down(self._db, e)
+            self._db = r
+            return fn(r, *args)
+
+    def _pin_to_primary(self):
+        router = self.settings.get("replicas")
+        if router is not None and router.pin_seconds > 0:
+            self.set_cookie(replicas.PIN_COOKIE, "%.3f" % (time.time() + router.pin_seconds))
+
+    def _pinned_to_primary(self):
+        try:
+            return float(self.get_cookie(replicas.PIN_COOKIE, "0")) > time.time()
+        except ValueError:
+            return False
+
+    async def _admit(self):
+        control = self.settings.get("admission")
+        if control is None or not control.enabled:
+            return True
+
+        priority = self.priorities.get(self.request.method, admission.LOW)
+        self._ticket = control.enqueue(priority, self.request.method)
+        reason = admission.QUEUE_FULL
+        if self._ticket is not None:
+            reason = await self._ticket.future
+
+        if reason is None:
+            self._admitted = True
+            return True
+
+        self.set_status(503)
+        self.set_header("Retry-After", str(control.retry_after))
+        self.finish("Server overloaded, retry later")
+        return False
+
+    def on_connection_close(self):
+        control = self.settings.get("admission")
+        if self._ticket is not None and not self._admitted:
+            control.cancel(self._ticket)
+
+    def on_finish(self):
+        if self._admitted:
+            self._admitted = False
+            self.settings["admission"].release()
+
+
+class AdmissionHandler(tornado.web.RequestHandler):
+    def get(self):
+        control = self.settings.get("admission")
+        self.write(control.stats() if control else {"enabled": False})
+
+
+class ListHandler(AdmittedHandler):
+    # GET streams the page: the skeleton up to the table body right away, then
+    # the rows in chunks of LIST_CHUNK records, one Redis pipeline per chunk,
+    # so neither the first byte nor the memory per request depends on the table size.
+    counter = None
+    key = None
+    template = None
+    rows_template = None
+    # entity of the page's live feed: its stream ID is read before the rows,
+    # so the page can resume the feed from there
+    events_entity = None
+
+    def queue_read(self, pipe, ID):
+        pipe.hgetall(self.key + str(ID))
+
+    def collect(self, IDs, results):
+        return [result for result in results if result]
+
+    def read_head(self, db):
+        last_event_id = events.last_id(db, self.events_entity) if self.events_entity else ""
+        return last_event_id, int(db.get(self.counter).decode())
+
+    def read_chunk(self, db, IDs):
+        pipe = db.pipeline(transaction=False)
+        for ID in IDs:
+            self.queue_read(pipe, ID)
+        return self.collect(IDs, pipe.execute())
+
+    async def get(self):
+        try:
+            last_event_id, last_ID = self.read(self.read_head)
         except redis.exceptions.ConnectionError:
             self.set_status(400)
             self.write("Redis connection refused")
-        else:
-            self.render('templates/hospital.html', items=items)
+            return
+
+        page = self.render_string(self.template, last_event_id=last_event_id, last_ID=last_ID)
+        head, tbody_end, tail = page.decode().partition("</tbody>")
+        offset = 0
+        try:
+            self.write(head)
+            await self.send_chunk()
+
+            for start in range(0, last_ID, LIST_CHUNK):
+                items = self.read(self.read_chunk, range(start, min(start + LIST_CHUNK, last_ID)))
+                if items:
+                    self.write(self.render_string(self.rows_template, items=items, offset=offset))
+                    offset += len(items)
+                    await self.send_chunk()
+        except redis.exceptions.ConnectionError:
+            # the status line is already sent: cut the page short
+            logging.warning("Redis connection refused while streaming " + self.request.path)
+            return
+        except StreamClosedError:
+            return
+
+        self.write(tbody_end + tail)
+
+    async def send_chunk(self):
+        await self.flush()
+        # flush() resolves at once while the socket buffer has room; give the
+        # loop a turn so other requests are not starved by a long page
+        await asyncio.sleep(0)
+
+
+class HospitalHandler(ListHandler):
+    counter = "hospital:autoID"
+    key = "hospital:"
+    template = "templates/hospital.html"
+    rows_template = "templates/hospital-rows.html"
 
     def post(self):
         name = self.get_argument('name')
@@ -57,6 +205,9 @@ class HospitalHandler(tornado.web.RequestHandler):
             a += r.hset("hospital:" + ID, "beds_number", beds_number)
 
             r.incr("hospital:autoID")
+
+            events.publish(r, "hospital", {"ID": ID, "name": name, "address": address,
+                                           "phone": phone, "beds_number": beds_number})
         except redis.exceptions.ConnectionError:
             self.set_status(400)
             self.write("Redis connection refused")
@@ -68,22 +219,11 @@ class HospitalHandler(tornado.web.RequestHandler):
                 self.write('OK: ID ' + ID + " for " + name)
 
 
-class DoctorHandler(tornado.web.RequestHandler):
-    def get(self):
-        items = []
-        try:
-            ID = r.get("doctor:autoID").decode()
-
-            for i in range(int(ID)):
-                result = r.hgetall("doctor:" + str(i))
-                if result:
-                    items.append(result)
-
-        except redis.exceptions.ConnectionError:
-            self.set_status(400)
-            self.write("Redis connection refused")
-        else:
-            self.render('templates/doctor.html', items=items)
+class DoctorHandler(ListHandler):
+    counter = "doctor:autoID"
+    key = "doctor:"
+    template = "templates/doctor.html"
+    rows_template = "templates/doctor-rows.html"
 
     def post(self):
         surname = self.get_argument('surname')
@@ -114,6 +254,9 @@ class DoctorHandler(tornado.web.RequestHandler):
             a += r.hset("doctor:" + ID, "hospital_ID", hospital_ID)
 
             r.incr("doctor:autoID")
+
+            events.publish(r, "doctor", {"ID": ID, "surname": surname, "profession": profession,
+                                         "hospital_ID": hospital_ID})
         except redis.exceptions.ConnectionError:
             self.set_status(400)
             self.write("Redis connection refused")
@@ -125,22 +268,11 @@ class DoctorHandler(tornado.web.RequestHandler):
                 self.write('OK: ID ' + ID + " for " + surname)
 
 
-class PatientHandler(tornado.web.RequestHandler):
-    def get(self):
-        items = []
-        try:
-            ID = r.get("patient:autoID").decode()
-
-            for i in range(int(ID)):
-                result = r.hgetall("patient:" + str(i))
-                if result:
-                    items.append(result)
-
-        except redis.exceptions.ConnectionError:
-            self.set_status(400)
-            self.write("Redis connection refused")
-        else:
-            self.render('templates/patient.html', items=items)
+class PatientHandler(ListHandler):
+    counter = "patient:autoID"
+    key = "patient:"
+    template = "templates/patient.html"
+    rows_template = "templates/patient-rows.html"
 
     def post(self):
         surname = self.get_argument('surname')
@@ -170,6 +302,9 @@ class PatientHandler(tornado.web.RequestHandler):
             a += r.hset("patient:" + ID, "mpn", mpn)
 
             r.incr("patient:autoID")
+
+            events.publish(r, "patient", {"ID": ID, "surname": surname, "born_date": born_date,
+                                          "sex": sex, "mpn": mpn})
         except redis.exceptions.ConnectionError:
             self.set_status(400)
             self.write("Redis connection refused")
@@ -181,22 +316,34 @@ class PatientHandler(tornado.web.RequestHandler):
                 self.write('OK: ID ' + ID + " for " + surname)
 
 
-class DiagnosisHandler(tornado.web.RequestHandler):
-    def get(self):
-        items = []
-        try:
-            ID = r.get("diagnosis:autoID").decode()
+class PatientChartHandler(AdmittedHandler):
+    # a handful of keys per patient, as cheap as a POST
+    priorities = {"GET": admission.HIGH}
 
-            for i in range(int(ID)):
-                result = r.hgetall("diagnosis:" + str(i))
-                if result:
-                    items.append(result)
-            
+    def get(self, patient_ID):
+        try:
+            items = self.read(chart.load, patient_ID)
         except redis.exceptions.ConnectionError:
             self.set_status(400)
             self.write("Redis connection refused")
+            return
+
+        if items is None:
+            self.set_status(404)
+            self.write("No patient with such ID")
+        elif self.get_argument("format", "") == "json" or \
+                "application/json" in self.request.headers.get("Accept", ""):
+            self.write(items)
         else:
-            self.render('templates/diagnosis.html', items=items)
+            self.render('templates/chart.html', chart=items)
+
+
+class DiagnosisHandler(ListHandler):
+    counter = "diagnosis:autoID"
+    key = "diagnosis:"
+    template = "templates/diagnosis.html"
+    rows_template = "templates/diagnosis-rows.html"
+    events_entity = "diagnosis"
 
     def post(self):
         patient_ID = self.get_argument('patient_ID')
@@ -220,38 +367,98 @@ class DiagnosisHandler(tornado.web.RequestHandler):
                 self.write("No patient with such ID")
                 return
 
+            # the record goes first: an index entry must never point at a missing diagnosis
+            ts = time.time()
+            created = history.isoformat(ts)
+
             a  = r.hset("diagnosis:" + ID, "patient_ID", patient_ID)
             a += r.hset("diagnosis:" + ID, "type", diagnosis_type)
             a += r.hset("diagnosis:" + ID, "information", information)
+            a += r.hset("diagnosis:" + ID, "created", created)
+
+            history.add_diagnosis(r, ID, patient_ID, diagnosis_type, ts=ts)
 
             r.incr("diagnosis:autoID")
+            chart.add_diagnosis(r, patient_ID, ID)
+
+            events.publish(r, "diagnosis", {"ID": ID, "patient_ID": patient_ID, "type": diagnosis_type,
+                                            "information": information, "created": created})
         except redis.exceptions.ConnectionError:
             self.set_status(400)
             self.write("Redis connection refused")
         else:
-            if (a != 3):
+            if (a != 4):
                 self.set_status(500)
                 self.write("Something went terribly wrong")
             else:
                 self.write('OK: ID ' + ID + " for patient " + patient[b'surname'].decode())
 
 
-class DoctorPatientHandler(tornado.web.RequestHandler):
+class DiagnosisHistoryHandler(AdmittedHandler):
+    # reads only the requested slice of the sorted sets
+    priorities = {"GET": admission.HIGH}
+
     def get(self):
-        items = {}
+        patient_ID = self.get_argument("patient_ID", "") or None
+        since = self.get_argument("since", "")
+        until = self.get_argument("until", "")
+
         try:
-            ID = r.get("doctor:autoID").decode()
+            limit = int(self.get_argument("limit", "20"))
+            start = history.parse_time(since) if since else None
+            end = history.parse_time(until) if until else "+inf"
+        except ValueError:
+            self.set_status(400)
+            self.write("Bad since, until or limit")
+            return
+        limit = max(1, min(limit, history.MAX_LIMIT))
+
+        try:
+            if start is not None:
+                items = self.read(history.since, start, end, patient_ID, limit)
+            else:
+                items = self.read(history.last, limit, patient_ID)
+        except redis.exceptions.ConnectionError:
+            self.set_status(400)
+            self.write("Redis connection refused")
+        else:
+            self.write({"items": items})
 
-            for i in range(int(ID)):
-                result = r.smembers("doctor-patient:" + str(i))
-                if result:
-                    items[i] = result
 
+class DiagnosisTypesHandler(AdmittedHandler):
+    priorities = {"GET": admission.HIGH}
+
+    def get(self):
+        since = self.get_argument("since", "")
+        until = self.get_argument("until", "")
+
+        try:
+            start = history.parse_time(since) if since else "-inf"
+            end = history.parse_time(until) if until else "+inf"
+        except ValueError:
+            self.set_status(400)
+            self.write("Bad since or until")
+            return
+
+        try:
+            counts = self.read(history.type_counts, start, end)
         except redis.exceptions.ConnectionError:
             self.set_status(400)
             self.write("Redis connection refused")
         else:
-            self.render('templates/doctor-patient.html', items=items)
+            self.write({"counts": counts})
+
+
+class DoctorPatientHandler(ListHandler):
+    counter = "doctor:autoID"
+    template = "templates/doctor-patient.html"
+    rows_template = "templates/doctor-patient-rows.html"
+
+    def queue_read(self, pipe, ID):
+        pipe.smembers("doctor-patient:" + str(ID))
+
+    def collect(self, IDs, results):
+        return [(ID, members) for ID, members in zip(IDs, results) if members]
 
     def post(self):
         doctor_ID = self.get_argument('doctor_ID')
@@ -273,7 +480,9 @@ class DoctorPatientHandler(tornado.web.RequestHandler):
                 self.write("No such ID for doctor or patient")
                 return
 
-            r.sadd("doctor-patient:" + doctor_ID, patient_ID)
+            chart.add_doctor(r, patient_ID, doctor_ID)
+            if r.sadd("doctor-patient:" + doctor_ID, patient_ID):
+                events.publish(r, "doctor-patient", {"doctor_ID": doctor_ID, "patient_ID": patient_ID})
 
         except redis.exceptions.ConnectionError:
             self.set_status(400)
@@ -282,6 +491,68 @@ class DoctorPatientHandler(tornado.web.RequestHandler):
             self.write("OK: doctor ID: " + doctor_ID + ", patient ID: " + patient_ID)
 
 
+class EventsHandler(tornado.web.RequestHandler):
+    # Long-lived connection, so it is not behind admission control.
+    _sub = None
+
+    async def get(self):
+        entity = self.get_argument("entity")
+        if entity not in events.ENTITIES:
+            self.set_status(400)
+            self.write("Unknown entity")
+            return
+
+        hub = self.settings["events"]
+        last_id = self.request.headers.get("Last-Event-ID") or self.get_argument("last_event_id", "")
+        sent = events.parse_id(last_id)
+
+        self.set_header("Content-Type", "text/event-stream")
+        self.set_header("Cache-Control", "no-cache")
+        self.set_header("X-Accel-Buffering", "no")
+
+        # subscribe before reading the backlog: live events that race with it
+        # are buffered and deduplicated by id below
+        self._sub = hub.subscribe(entity)
+        try:
+            self.write("retry: 2000\n\n")
+            if sent is not None:
+                backlog = await hub.since(entity, last_id)
+                if backlog is None:
+                    self.write("event: reset\ndata: {}\n\n")
+                    sent = None
+                else:
+                    for parsed, event_id, fields in backlog:
+                        self.write(events.format_event(entity, event_id, fields))
+                        sent = parsed
+            await self.flush()
+
+            while not self._sub.closed:
+                try:
+                    event = await asyncio.wait_for(self._sub.queue.get(), events.KEEPALIVE)
+                except asyncio.TimeoutError:
+                    self.write(": keepalive\n\n")
+                    await self.flush()
+                    continue
+
+                while event is not None:
+                    parsed, event_id, fields = event
+                    if sent is None or parsed > sent:
+                        self.write(events.format_event(entity, event_id, fields))
+                        sent = parsed
+                    event = None if self._sub.queue.empty() else self._sub.queue.get_nowait()
+                await self.flush()
+        except StreamClosedError:
+            pass
+        except redis.exceptions.ConnectionError:
+            logging.warning("events: Redis connection refused")
+        finally:
+            hub.unsubscribe(self._sub)
+
+    def on_connection_close(self):
+        if self._sub is not None:
+            self._sub.close()
+
+
 def init_db():
     db_initiated = r.get("db_initiated")
     if not db_initiated:
@@ -291,17 +562,33 @@ def init_db():
         r.set("diagnosis:autoID", 1)
         r.set("db_initiated", 1)
 
+    if not r.get("chart_index_built"):
+        chart.build_index(r)
+        r.set("chart_index_built", 1)
+
 
-def make_app():
+def make_app(**settings):
+    options = dict(autoreload=True, debug=True, compiled_template_cache=False, serve_traceback=True,
+                   admission=admission.AdmissionControl.from_env(),
+                   replicas=replicas.ReplicaRouter.from_env(),
+                   events=events.EventHub(redis.asyncio.StrictRedis(
+                       host=os.environ.get("REDIS_HOST", "localhost"),
+                       port=int(os.environ.get("REDIS_PORT", "6379")), db=0)))
+    options.update(settings)
     return tornado.web.Application([
         (r"/", MainHandler),
         (r'/static/(.*)', tornado.web.StaticFileHandler, {'path': 'static/'}),
         (r"/hospital", HospitalHandler),
         (r"/doctor", DoctorHandler),
         (r"/patient", PatientHandler),
+        (r"/patient/(\d+)/chart", PatientChartHandler),
         (r"/diagnosis", DiagnosisHandler),
-        (r"/doctor-patient", DoctorPatientHandler)
-    ], autoreload=True, debug=True, compiled_template_cache=False, serve_traceback=True)
+        (r"/diagnosis/history", DiagnosisHistoryHandler),
+        (r"/diagnosis/types", DiagnosisTypesHandler),
+        (r"/doctor-patient", DoctorPatientHandler),
+        (r"/events", EventsHandler),
+        (r"/admission", AdmissionHandler)
+    ], **options)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,126 @@
+# Read-replica routing for the GET handlers of main.py.
+#
+# REDIS_REPLICAS lists replicas as host:port[,host:port...]. GET handlers take
+# a client from ReplicaRouter.next() (round-robin over the healthy replicas)
+# and fall back to the primary when none is healthy. POSTs, including their
+# validation reads, always use the primary.
+#
+# A background check (in a thread, so a dead replica does not stall the
+# IOLoop) runs INFO replication on every replica each REPLICA_CHECK_INTERVAL
+# seconds. A replica is healthy when its link to the primary is up, it is not
+# in a full resync, and it heard from the primary within REPLICA_MAX_LAG
+# seconds (the primary pings replicas every repl-ping-replica-period, 10 s by
+# default).
+#
+# A read that cannot reach its replica is retried on the primary, and the
+# replica is left out of rotation until the next check finds it healthy.
+#
+# Replicas are asynchronous, so a client may not see its own write on the next
+# GET. With READ_YOUR_WRITES=<seconds>, a POST sets a cookie that sends that
+# client's GETs to the primary for the given time.
+#
+#   redis-server --port 6380 --replicaof 127.0.0.1 6379
+#   REDIS_REPLICAS=127.0.0.1:6380 READ_YOUR_WRITES=2 python3 main.py
+
+import itertools
+import logging
+import os
+
+import redis
+import tornado.ioloop
+
+PIN_COOKIE = "rw_until"
+
+
+def parse_replicas(value):
+    replicas = []
+    for item in value.split(","):
+        item = item.strip()
+        if item:
+            host, _, port = item.rpartition(":")
+            replicas.append((host or "localhost", int(port)))
+    return replicas
+
+
+class Replica:
+    def __init__(self, host, port, db=0, timeout=0.5):
+        self.name = "%s:%d" % (host, port)
+        self.client = redis.StrictRedis(host=host, port=port, db=db,
+                                        socket_timeout=timeout, socket_connect_timeout=timeout)
+        self.healthy = False
+        self.reason = "not checked yet"
+
+    def check(self, max_lag):
+        # Returns (healthy, reason); runs in a worker thread.
+        try:
+            info = self.client.info("replication")
+        except redis.exceptions.RedisError as e:
+            return False, str(e)
+        if info.get("role") != "slave":
+            return False, "role is %s" % info.get("role")
+        if info.get("master_link_status") != "up":
+            return False, "link to primary is down"
+        if info.get("master_sync_in_progress"):
+            return False, "full resync in progress"
+        if info.get("master_last_io_seconds_ago", 0) > max_lag:
+            return False, "no data from primary for %ss" % info["master_last_io_seconds_ago"]
+        return True, "ok"
+
+
+class ReplicaRouter:
+    def __init__(self, replicas, check_interval=2.0, max_lag=15, pin_seconds=0.0):
+        self.replicas = [Replica(host, port) for host, port in replicas]
+        self.check_interval = check_interval
+        self.max_lag = max_lag
+        self.pin_seconds = pin_seconds
+        self._cycle = itertools.cycle(self.replicas)
+        self._checker = None
+        self._checking = False
+
+    @classmethod
+    def from_env(cls, env=os.environ):
+        replicas = parse_replicas(env.get("REDIS_REPLICAS", ""))
+        if not replicas:
+            return None
+        return cls(replicas,
+                   check_interval=float(env.get("REPLICA_CHECK_INTERVAL", "2")),
+                   max_lag=int(env.get("REPLICA_MAX_LAG", "15")),
+                   pin_seconds=float(env.get("READ_YOUR_WRITES", "0")))
+
+    def next(self):
+        # A healthy replica client, round-robin, or None.
+        if self._checker is None:
+            self._start()
+        for _ in range(len(self.replicas)):
+            replica = next(self._cycle)
+            if replica.healthy:
+                return replica.client
+        return None
+
+    def mark_down(self, client, reason):
+        # a read on this replica's client failed: skip it until the next check
+        for replica in self.replicas:
+            if replica.client is client and replica.healthy:
+                logging.warning("replica %s is down: %s", replica.name, reason)
+                replica.healthy, replica.reason = False, str(reason)
+
+    def _start(self):
+        self._checker = tornado.ioloop.PeriodicCallback(self._check, self.check_interval * 1000)
+        self._checker.start()
+        # until the first check completes every GET goes to the primary
+        tornado.ioloop.IOLoop.current().add_callback(self._check)
+
+    async def _check(self):
+        if self._checking:
+            return
+        self._checking = True
+        try:
+            loop = tornado.ioloop.IOLoop.current()
+            for replica in self.replicas:
+                healthy, reason = await loop.run_in_executor(None, replica.check, self.max_lag)
+                if healthy != replica.healthy:
+                    log = logging.info if healthy else logging.warning
+                    log("replica %s is %s: %s", replica.name, "up" if healthy else "down", reason)
+                replica.healthy, replica.reason = healthy, reason
+        finally:
+            self._checking = False